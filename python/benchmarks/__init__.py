@@ -0,0 +1,3 @@
+"""
+性能基准 - 冷启动和导入流水线的基准脚本
+"""
@@ -0,0 +1,204 @@
+"""
+合成基准语料 - 在本地生成确定性的 PDF、音频和字幕样本
+
+同一参数总是生成同一份文件（固定随机种子），已存在的样本直接复用。
+"""
+import math
+import random
+import wave
+from pathlib import Path
+
+import numpy as np
+
+_WORDS = (
+    "friday library reader listener watcher agent resource markdown vector index search "
+    "page shard worker process extract image text layout column header footer summary "
+    "transcript segment audio video subtitle chapter section figure table equation note"
+).split()
+
+
+def _paragraph(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def make_text_pdf(path: Path, pages: int, seed: int = 0) -> Path:
+    """生成纯文本 PDF：每页约 5 段、400 个词"""
+    import fitz  # PyMuPDF
+
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        body = "\n\n".join(_paragraph(rng, 80) for _ in range(5))
+        page.insert_textbox(fitz.Rect(54, 54, page.rect.width - 54, page.rect.height - 54), f"Page {page_num + 1}\n\n{body}", fontsize=9)
+    doc.save(str(path), deflate=True)
+    doc.close()
+    return path
+
+
+def make_paper_pdf(path: Path, pages: int, columns: int = 2, seed: int = 0) -> Path:
+    """
+    生成多栏论文 PDF
+
+    每页有页眉（会议名）、页脚（页码），首页有跨栏标题和摘要，正文分 columns 栏，
+    每栏若干带编号的段落，便于检查阅读顺序。
+    """
+    import fitz  # PyMuPDF
+
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    doc = fitz.open()
+    paragraph = 0
+    for page_num in range(pages):
+        page = doc.new_page()
+        width, height = page.rect.width, page.rect.height
+        page.insert_text((54, 36), "Proceedings of the Friday Workshop on Document Layout", fontsize=8)
+        page.insert_text((width / 2 - 10, height - 30), f"{page_num + 1}", fontsize=8)
+        top = 60
+        if page_num == 0:
+            page.insert_textbox(fitz.Rect(54, 60, width - 54, 90), "A Synthetic Study of Reading Order", fontsize=16, align=1)
+            page.insert_textbox(fitz.Rect(90, 95, width - 90, 170), "Abstract. " + _paragraph(rng, 50), fontsize=9)
+            top = 180
+        gutter = 18
+        column_width = (width - 108 - gutter * (columns - 1)) / columns
+        for column in range(columns):
+            x0 = 54 + column * (column_width + gutter)
+            y = top
+            while y < height - 120:
+                paragraph += 1
+                text = f"[P{paragraph}] " + _paragraph(rng, rng.randint(30, 60))
+                rect = fitz.Rect(x0, y, x0 + column_width, y + 90)
+                spare = page.insert_textbox(rect, text, fontsize=9)
+                y += 90 - max(spare, 0) + 8
+    doc.save(str(path), deflate=True)
+    doc.close()
+    return path
+
+
+def _pattern(size: int, seed: int) -> np.ndarray:
+    """生成每个种子都不同、但压缩率接近真实插图的 RGB 图案"""
+    y, x = np.mgrid[0:size, 0:size].astype(np.float32) / size
+    phase = seed * 0.7
+    r = (np.sin((x * 6 + phase) * math.pi) + 1) * 127.5
+    g = (np.cos((y * 4 + phase * 1.3) * math.pi) + 1) * 127.5
+    b = ((x + y + seed % 7 / 7) % 1.0) * 255
+    return np.stack([r, g, b], axis=-1).astype(np.uint8)
+
+
+def make_image_pdf(path: Path, pages: int, images_per_page: int = 2, image_size: int = 256, seed: int = 0) -> Path:
+    """
+    生成图片密集的 PDF
+
+    每页带一段文字、images_per_page 张内容各不相同的图片，以及一个所有页面共用的 logo
+    （同一 xref，用于覆盖图片去重路径）。
+    """
+    import fitz  # PyMuPDF
+
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    doc = fitz.open()
+    logo = fitz.Pixmap(fitz.csRGB, 64, 64, _pattern(64, -1).tobytes(), 0)
+    logo_xref = 0
+    for page_num in range(pages):
+        page = doc.new_page()
+        if logo_xref:
+            page.insert_image(fitz.Rect(500, 20, 540, 60), xref=logo_xref)
+        else:
+            logo_xref = page.insert_image(fitz.Rect(500, 20, 540, 60), pixmap=logo)
+        page.insert_textbox(fitz.Rect(54, 70, page.rect.width - 54, 200), _paragraph(rng, 60), fontsize=9)
+        for index in range(images_per_page):
+            pixels = _pattern(image_size, seed * 100003 + page_num * images_per_page + index)
+            pix = fitz.Pixmap(fitz.csRGB, image_size, image_size, pixels.tobytes(), 0)
+            top = 210 + index * 280
+            page.insert_image(fitz.Rect(80, top, 330, top + 250), pixmap=pix)
+    doc.save(str(path), deflate=True)
+    doc.close()
+    return path
+
+
+def make_scanned_pdf(path: Path, pages: int, scanned_every: int = 1, dpi: int = 150, seed: int = 0) -> Path:
+    """
+    生成扫描版（或混合）PDF
+
+    每 scanned_every 页中有一页是把文字页栅格化后整页插入的灰度图（没有文本层），
+    其余页保留文本层；scanned_every=1 时全部为扫描页。
+    """
+    import fitz  # PyMuPDF
+
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    doc = fitz.open()
+    scratch = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        body = "\n\n".join(_paragraph(rng, 60) for _ in range(4))
+        box = fitz.Rect(54, 54, page.rect.width - 54, page.rect.height - 54)
+        text = f"Page {page_num + 1}\n\n{body}"
+        if page_num % scanned_every:
+            page.insert_textbox(box, text, fontsize=10)
+            continue
+        source = scratch.new_page()
+        source.insert_textbox(box, text, fontsize=10)
+        pix = source.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+        page.insert_image(page.rect, pixmap=pix)
+    scratch.close()
+    doc.save(str(path), deflate=True)
+    doc.close()
+    return path
+
+
+def make_wav(path: Path, seconds: float, sample_rate: int = 16000, seed: int = 0) -> Path:
+    """生成 16-bit 单声道 WAV：变调正弦波叠加噪声，模拟有停顿的语音能量包络"""
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        # 按 10 秒分块写入，长音频不占用大量内存
+        block = sample_rate * 10
+        total = int(seconds * sample_rate)
+        for start in range(0, total, block):
+            t = np.arange(start, min(start + block, total)) / sample_rate
+            envelope = (np.sin(t * 2 * math.pi * 0.25) > -0.3).astype(np.float32)
+            tone = np.sin(2 * math.pi * (180 + 40 * np.sin(t * 1.7)) * t)
+            samples = (tone * envelope * 0.5 + rng.normal(0, 0.02, t.shape)) * 32767
+            wav.writeframes(np.clip(samples, -32768, 32767).astype("<i2").tobytes())
+    return path
+
+
+def wav_duration(path: Path) -> float:
+    """WAV 时长（秒）"""
+    with wave.open(str(path), "rb") as wav:
+        return wav.getnframes() / wav.getframerate()
+
+
+def _vtt_timestamp(seconds: float) -> str:
+    return f"{int(seconds // 3600):02d}:{int(seconds % 3600 // 60):02d}:{seconds % 60:06.3f}"
+
+
+def make_vtt(path: Path, seconds: float, seed: int = 0) -> Path:
+    """生成 WebVTT 字幕：每 4 秒一条，形式同自动生成字幕（每条重复上一条的文本行）"""
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    previous = _paragraph(rng, 8)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("WEBVTT\nKind: captions\nLanguage: en\n\n")
+        for start in range(0, int(seconds), 4):
+            line = _paragraph(rng, rng.randint(6, 14))
+            f.write(f"{_vtt_timestamp(start)} --> {_vtt_timestamp(start + 3.8)} align:start position:0%\n{previous}\n{line}\n\n")
+            previous = line
+    return path
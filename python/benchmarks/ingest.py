@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+导入流水线基准
+
+在本地生成合成语料（纯文本 / 图片密集 PDF，1 到 2000 页；合成 WAV 音频；
+1 到 50 小时的 WebVTT 字幕），分别测量 parse_pdf、process_audio、process_video
+以及完整 main.py 单次请求路径的：吞吐（页/秒、MB/秒、音频秒/秒、视频秒/秒）、延迟分位数（p50/p90/p95/p99）和峰值 RSS。
+
+每个场景在独立子进程中运行（空数据目录），峰值 RSS 互不影响；PDF 进程池
+和转写进程池 worker 的峰值单独统计。结果可保存为基线，后续运行与基线比较，吞吐下降、
+延迟或峰值内存上升超过容差时以退出码 1 结束。
+
+用法:
+    python benchmarks/ingest.py                          # quick 场景集
+    python benchmarks/ingest.py --suite full --runs 5    # 包含 2000 页和 10 分钟音频
+    python benchmarks/ingest.py --scenarios pdf_text_50,main_parse_pdf
+    python benchmarks/ingest.py --save-baseline          # 升级 PyMuPDF 前先记录基线
+    python benchmarks/ingest.py --json result.json       # 与基线比较并输出 JSON
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+PYTHON_DIR = Path(__file__).resolve().parent.parent
+MAIN_SCRIPT = PYTHON_DIR / "main.py"
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "ingest_baseline.json"
+DEFAULT_FIXTURES = Path(tempfile.gettempdir()) / "friday-bench-fixtures"
+
+sys.path.insert(0, str(PYTHON_DIR))
+
+# 场景定义：kind 决定运行方式，fixture 决定语料
+SCENARIOS: Dict[str, Dict[str, Any]] = {
+    "pdf_text_1": {"kind": "parse_pdf", "fixture": ("text", 1)},
+    "pdf_text_50": {"kind": "parse_pdf", "fixture": ("text", 50)},
+    "pdf_text_500": {"kind": "parse_pdf", "fixture": ("text", 500)},
+    "pdf_text_2000": {"kind": "parse_pdf", "fixture": ("text", 2000)},
+    "pdf_image_20": {"kind": "parse_pdf", "fixture": ("image", 20)},
+    "pdf_image_200": {"kind": "parse_pdf", "fixture": ("image", 200)},
+    "pdf_paper_100": {"kind": "parse_pdf", "fixture": ("paper", 100)},
+    "pdf_scanned_20": {"kind": "parse_pdf", "fixture": ("scanned", 20)},
+    "pdf_mixed_100": {"kind": "parse_pdf", "fixture": ("mixed", 100)},
+    "audio_30s": {"kind": "process_audio", "fixture": ("wav", 30)},
+    "audio_600s": {"kind": "process_audio", "fixture": ("wav", 600)},
+    "subtitle_1h": {"kind": "process_video", "fixture": ("vtt", 3600)},
+    "subtitle_50h": {"kind": "process_video", "fixture": ("vtt", 180000)},
+    "main_parse_pdf": {"kind": "main", "fixture": ("text", 50)},
+    "main_process_audio": {"kind": "main", "fixture": ("wav", 30)},
+}
+
+SUITES = {
+    "quick": ["pdf_text_1", "pdf_text_50", "pdf_image_20", "audio_30s", "subtitle_1h", "main_parse_pdf", "main_process_audio"],
+    "full": list(SCENARIOS),
+}
+
+# 与基线比较的指标：方向 +1 表示越大越好，-1 表示越小越好
+COMPARED_METRICS = {
+    "pages_per_s": 1,
+    "audio_s_per_s": 1,
+    "video_s_per_s": 1,
+    "mb_per_s": 1,
+    "p50_ms": -1,
+    "p95_ms": -1,
+    "peak_rss_kb": -1,
+    "workers_peak_rss_kb": -1,
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """线性插值分位数（q 取 0-100）"""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    pos = (len(ordered) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def _max_rss_kb(usage) -> int:
+    return usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+
+
+def prepare_fixture(fixtures_dir: Path, spec) -> Dict[str, Any]:
+    """生成（或复用）场景语料，返回路径和规模"""
+    from benchmarks import fixtures
+
+    style, size = spec
+    if style == "text":
+        path = fixtures.make_text_pdf(fixtures_dir / f"text_{size}.pdf", size)
+        return {"path": str(path), "pages": size, "bytes": path.stat().st_size}
+    if style == "image":
+        path = fixtures.make_image_pdf(fixtures_dir / f"image_{size}.pdf", size)
+        return {"path": str(path), "pages": size, "bytes": path.stat().st_size}
+    if style == "paper":
+        path = fixtures.make_paper_pdf(fixtures_dir / f"paper_{size}.pdf", size)
+        return {"path": str(path), "pages": size, "bytes": path.stat().st_size}
+    if style in ("scanned", "mixed"):
+        path = fixtures.make_scanned_pdf(fixtures_dir / f"{style}_{size}.pdf", size, scanned_every=1 if style == "scanned" else 4)
+        return {"path": str(path), "pages": size, "bytes": path.stat().st_size}
+    if style == "vtt":
+        path = fixtures.make_vtt(fixtures_dir / f"subtitle_{size}s.vtt", size)
+        return {"path": str(path), "video_seconds": size, "bytes": path.stat().st_size}
+    path = fixtures.make_wav(fixtures_dir / f"audio_{size}s.wav", size)
+    return {"path": str(path), "seconds": fixtures.wav_duration(path), "bytes": path.stat().st_size}
+
+
+# ---------------------------------------------------------------------------
+# 子进程：在独立解释器中运行一个场景
+# ---------------------------------------------------------------------------
+
+async def _worker_runs(kind: str, path: str, runs: int, warmup: int, workers: Optional[int]) -> List[float]:
+    if kind == "parse_pdf":
+        from friday_reader.main import parse_pdf
+
+        async def once():
+            await parse_pdf(path, workers=workers, force=True, progress_callback=lambda *args, **kwargs: None)
+    elif kind == "process_video":
+        from friday_watcher.main import process_video
+
+        async def once():
+            await process_video(path, workers=workers, force=True, progress_callback=lambda *args, **kwargs: None)
+    else:
+        from friday_listener.main import process_audio
+
+        async def once():
+            await process_audio(path, workers=workers, force=True, progress_callback=lambda *args, **kwargs: None)
+
+    for _ in range(warmup):
+        await once()
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await once()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run_worker(kind: str, path: str, runs: int, warmup: int, workers: Optional[int]):
+    """--worker 模式入口：输出一行 JSON {latencies, peak_rss_kb, workers_peak_rss_kb}"""
+    latencies = asyncio.run(_worker_runs(kind, path, runs, warmup, workers))
+
+    result: Dict[str, Any] = {"latencies": latencies}
+    try:
+        import resource
+    except ImportError:
+        print(json.dumps(result))
+        return
+
+    # 等进程池 worker 退出后，RUSAGE_CHILDREN 才包含它们的峰值
+    from friday_reader import extractor
+    from friday_listener import transcriber
+    from friday_watcher import summarizer
+    extractor.shutdown_executor()
+    transcriber.shutdown_executor()
+    summarizer.shutdown_executor()
+    result["peak_rss_kb"] = _max_rss_kb(resource.getrusage(resource.RUSAGE_SELF))
+    result["workers_peak_rss_kb"] = _max_rss_kb(resource.getrusage(resource.RUSAGE_CHILDREN)) or None
+    print(json.dumps(result))
+
+
+# ---------------------------------------------------------------------------
+# 父进程：调度场景并汇总
+# ---------------------------------------------------------------------------
+
+def _scenario_env(data_dir: str, with_index: bool) -> Dict[str, str]:
+    return {
+        **os.environ,
+        "PYTHONPATH": str(PYTHON_DIR),
+        "DATABASE_PATH": str(Path(data_dir) / "data" / "friday.db"),
+        "CHROMADB_PATH": str(Path(data_dir) / "data" / "chroma_db"),
+        "LIBRARY_PATH": str(Path(data_dir) / "library"),
+        "VECTOR_INDEX_ENABLED": "true" if with_index else "false",
+        # 默认用能量检测替身测转写流水线本身；设置 ASR_BACKEND=faster_whisper 测真实模型
+        "ASR_BACKEND": os.environ.get("ASR_BACKEND", "energy"),
+        # OCR 同理默认用替身；识别结果缓存放在场景目录中
+        "OCR_BACKEND": os.environ.get("OCR_BACKEND", "placeholder"),
+        "OCR_CACHE_PATH": str(Path(data_dir) / "data" / "ocr_cache"),
+        "LOG_LEVEL": "WARNING",
+    }
+
+
+def _run_in_worker(kind: str, fixture: Dict[str, Any], args, env: Dict[str, str], cwd: str) -> Dict[str, Any]:
+    cmd = [
+        sys.executable, str(Path(__file__).resolve()), "--worker", kind, fixture["path"],
+        "--runs", str(args.runs), "--warmup", str(args.warmup),
+    ]
+    if args.workers:
+        cmd += ["--workers", str(args.workers)]
+    proc = subprocess.run(cmd, capture_output=True, cwd=cwd, env=env)
+    lines = proc.stdout.decode("utf-8", errors="replace").strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        raise RuntimeError(proc.stderr.decode("utf-8", errors="replace")[-2000:])
+    return json.loads(lines[-1])
+
+
+def _run_main_once(kind: str, path: str, env: Dict[str, str], cwd: str):
+    """以单次模式运行一次 main.py，返回 (耗时秒, 峰值 RSS KB, 响应)"""
+    payload = {"path": path, "force": True}
+    request = json.dumps({"cmd": kind, "payload": payload}).encode("utf-8")
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, str(MAIN_SCRIPT)],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, cwd=cwd, env=env,
+    )
+    peak = None
+    if hasattr(os, "wait4"):
+        proc.stdin.write(request)
+        proc.stdin.close()
+        output = proc.stdout.read()
+        # 自行回收子进程以拿到它的资源占用
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        peak = _max_rss_kb(usage)
+    else:
+        output, _ = proc.communicate(request)
+    elapsed = time.perf_counter() - start
+    lines = output.decode("utf-8", errors="replace").strip().splitlines()
+    response = json.loads(lines[-1]) if lines else {"error": "no output"}
+    return elapsed, peak, response
+
+
+def _run_main(fixture: Dict[str, Any], args, env: Dict[str, str], cwd: str) -> Dict[str, Any]:
+    kind = "parse_pdf" if "pages" in fixture else "process_audio"
+    for _ in range(args.warmup):
+        _run_main_once(kind, fixture["path"], env, cwd)
+    latencies, peaks = [], []
+    for _ in range(args.runs):
+        elapsed, peak, response = _run_main_once(kind, fixture["path"], env, cwd)
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        latencies.append(elapsed)
+        if peak is not None:
+            peaks.append(peak)
+    return {"latencies": latencies, "peak_rss_kb": max(peaks) if peaks else None}
+
+
+def summarize(name: str, fixture: Dict[str, Any], raw: Dict[str, Any]) -> Dict[str, Any]:
+    latencies = raw["latencies"]
+    mean_s = sum(latencies) / len(latencies)
+    result: Dict[str, Any] = {
+        "scenario": name,
+        "runs": len(latencies),
+        "bytes": fixture["bytes"],
+        "mb_per_s": round(fixture["bytes"] / 1e6 / mean_s, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "peak_rss_kb": raw.get("peak_rss_kb"),
+    }
+    if raw.get("workers_peak_rss_kb"):
+        result["workers_peak_rss_kb"] = raw["workers_peak_rss_kb"]
+    if "pages" in fixture:
+        result["pages"] = fixture["pages"]
+        result["pages_per_s"] = round(fixture["pages"] / mean_s, 2)
+    elif "video_seconds" in fixture:
+        result["video_seconds"] = fixture["video_seconds"]
+        result["video_s_per_s"] = round(fixture["video_seconds"] / mean_s, 1)
+    else:
+        result["audio_seconds"] = round(fixture["seconds"], 1)
+        result["audio_s_per_s"] = round(fixture["seconds"] / mean_s, 2)
+    return result
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """与基线比较，返回回归描述列表"""
+    base_by_name = {item["scenario"]: item for item in baseline.get("results", [])}
+    regressions = []
+    for item in results:
+        base = base_by_name.get(item["scenario"])
+        if not base:
+            continue
+        for metric, direction in COMPARED_METRICS.items():
+            current, previous = item.get(metric), base.get(metric)
+            if not current or not previous:
+                continue
+            change = (current - previous) / previous
+            item.setdefault("vs_baseline", {})[metric] = round(change, 3)
+            if change * direction < -tolerance:
+                regressions.append(f"{item['scenario']}: {metric} {previous} -> {current} ({change:+.1%})")
+    return regressions
+
+
+def environment_info() -> Dict[str, Any]:
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+    try:
+        import fitz
+        info["pymupdf"] = fitz.VersionBind
+    except ImportError:
+        pass
+    from friday_reader.extractor import get_extractor_version
+    info["extractor_version"] = get_extractor_version()
+    return info
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Friday ingest pipeline benchmark")
+    parser.add_argument("--suite", choices=sorted(SUITES), default="quick", help="场景集")
+    parser.add_argument("--scenarios", help="逗号分隔的场景名，覆盖 --suite")
+    parser.add_argument("--runs", type=int, default=3, help="每个场景的计时次数")
+    parser.add_argument("--warmup", type=int, default=1, help="每个场景的预热次数（不计时）")
+    parser.add_argument("--workers", type=int, help="PDF worker 进程数，默认使用配置")
+    parser.add_argument("--with-index", action="store_true", help="包含向量索引（默认关闭，只测抽取和全文索引）")
+    parser.add_argument("--fixtures-dir", default=str(DEFAULT_FIXTURES), help="合成语料缓存目录")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="基线文件路径")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果写为基线")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的相对退化比例")
+    parser.add_argument("--json", dest="json_out", help="把结果写入 JSON 文件")
+    parser.add_argument("--worker", nargs=2, metavar=("KIND", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker[0], args.worker[1], args.runs, args.warmup, args.workers)
+        return 0
+
+    names = args.scenarios.split(",") if args.scenarios else SUITES[args.suite]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)}")
+
+    fixtures_dir = Path(args.fixtures_dir)
+    results = []
+    for name in names:
+        spec = SCENARIOS[name]
+        fixture = prepare_fixture(fixtures_dir, spec["fixture"])
+        with tempfile.TemporaryDirectory(prefix="friday-bench-") as data_dir:
+            env = _scenario_env(data_dir, args.with_index)
+            if spec["kind"] == "main":
+                raw = _run_main(fixture, args, env, data_dir)
+            else:
+                raw = _run_in_worker(spec["kind"], fixture, args, env, data_dir)
+        item = summarize(name, fixture, raw)
+        results.append(item)
+        if "pages_per_s" in item:
+            rate = f"{item['pages_per_s']:9.1f} pages/s"
+        elif "video_s_per_s" in item:
+            rate = f"{item['video_s_per_s']:9.1f} video s/s"
+        else:
+            rate = f"{item['audio_s_per_s']:9.1f} audio s/s"
+        print(
+            f"{name:<20} {rate}  {item['mb_per_s']:8.2f} MB/s  "
+            f"p50 {item['p50_ms']:9.1f} ms  p95 {item['p95_ms']:9.1f} ms  peak {item['peak_rss_kb'] or 0:>8} KB"
+        )
+
+    report = {"environment": environment_info(), "runs": args.runs, "results": results}
+
+    regressions = []
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Baseline saved to {baseline_path}")
+    elif baseline_path.exists():
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        report["baseline_environment"] = baseline.get("environment")
+        report["regressions"] = regressions
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if not regressions:
+            print(f"No regressions against {baseline_path} (tolerance {args.tolerance:.0%})")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Sidecar 冷启动基准
+
+逐条命令以单次模式启动 main.py（新进程、空数据目录），测量从拉起进程到拿到
+响应的耗时，与 startup_budget.json 中的预算比较，超出预算时以退出码 1 结束。
+
+用法:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 10 --commands execute_command,parse_pdf
+    python benchmarks/startup.py --importtime   # 额外输出每条命令最耗时的导入模块
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+PYTHON_DIR = Path(__file__).resolve().parent.parent
+MAIN_SCRIPT = PYTHON_DIR / "main.py"
+DEFAULT_BUDGET = Path(__file__).resolve().parent / "startup_budget.json"
+
+# 每条命令使用最轻量的 payload，只测启动和导入开销
+COMMANDS: Dict[str, Dict[str, Any]] = {
+    "execute_command": {"command": "你好"},
+    "process_video": {"url": "missing.srt"},
+    "process_audio": {"path": "missing.wav"},
+    "parse_pdf": {"path": "missing.pdf"},
+    "get_task_status": {"id": "missing"},
+    "list_tasks": {},
+    "get_watch_status": {},
+    "search_library": {"query": "startup"},
+}
+
+
+def _run_once(cmd: str, payload: Dict[str, Any], workdir: str, env: Dict[str, str], extra_args: List[str] = None):
+    """启动一次 sidecar，返回 (耗时秒, 响应, stderr)"""
+    request = json.dumps({"cmd": cmd, "payload": payload}, ensure_ascii=False).encode("utf-8")
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, *(extra_args or []), str(MAIN_SCRIPT)],
+        input=request,
+        capture_output=True,
+        cwd=workdir,
+        env=env,
+    )
+    elapsed = time.perf_counter() - start
+    lines = proc.stdout.decode("utf-8", errors="replace").strip().splitlines()
+    try:
+        response = json.loads(lines[-1]) if lines else {}
+    except json.JSONDecodeError:
+        response = {"error": lines[-1]}
+    return elapsed, response, proc.stderr.decode("utf-8", errors="replace")
+
+
+def _top_imports(stderr: str, top: int = 10) -> List[str]:
+    """解析 -X importtime 输出，按累计耗时取最慢的顶层导入"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|").split("|")]
+        rows.append((int(cumulative_us), name))
+    rows.sort(reverse=True)
+    return [f"{us / 1000:8.1f} ms  {name}" for us, name in rows[:top]]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Friday sidecar cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="每条命令的运行次数")
+    parser.add_argument("--commands", help="逗号分隔的命令列表，默认全部")
+    parser.add_argument("--budget", default=str(DEFAULT_BUDGET), help="预算文件路径")
+    parser.add_argument("--json", dest="json_out", help="把结果写入 JSON 文件")
+    parser.add_argument("--importtime", action="store_true", help="输出最耗时的导入模块")
+    args = parser.parse_args()
+
+    with open(args.budget, "r", encoding="utf-8") as f:
+        budget = json.load(f)
+    commands = args.commands.split(",") if args.commands else list(COMMANDS)
+
+    results = []
+    failed = False
+    with tempfile.TemporaryDirectory(prefix="friday-startup-") as workdir:
+        env = {
+            **os.environ,
+            "PYTHONPATH": str(PYTHON_DIR),
+            "DATABASE_PATH": str(Path(workdir) / "data" / "friday.db"),
+            "CHROMADB_PATH": str(Path(workdir) / "data" / "chroma_db"),
+            "LIBRARY_PATH": str(Path(workdir) / "library"),
+        }
+        for cmd in commands:
+            payload = COMMANDS[cmd]
+            # 第一次运行包含 .pyc 编译和数据库建表，只作预热
+            _run_once(cmd, payload, workdir, env)
+            timings = []
+            response = {}
+            for _ in range(args.runs):
+                elapsed, response, _ = _run_once(cmd, payload, workdir, env)
+                timings.append(elapsed * 1000)
+
+            median_ms = statistics.median(timings)
+            budget_ms = budget.get("commands", {}).get(cmd, budget.get("default_ms", 1000))
+            over = median_ms > budget_ms
+            failed = failed or over
+            results.append({
+                "cmd": cmd,
+                "median_ms": round(median_ms, 1),
+                "max_ms": round(max(timings), 1),
+                "budget_ms": budget_ms,
+                "over_budget": over,
+                "error": response.get("error"),
+            })
+            status = "OVER" if over else "ok"
+            print(f"{cmd:<18} median {median_ms:8.1f} ms  max {max(timings):8.1f} ms  budget {budget_ms:6} ms  {status}")
+
+            if args.importtime:
+                _, _, stderr = _run_once(cmd, payload, workdir, env, ["-X", "importtime"])
+                for line in _top_imports(stderr):
+                    print(f"    {line}")
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump({"results": results}, f, ensure_ascii=False, indent=2)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
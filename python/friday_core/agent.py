@@ -10,54 +10,71 @@ logger = setup_logger(__name__)
 async def execute_command(command: str) -> Dict[str, Any]:
     """
     执行自然语言命令
-    1. 意图识别
+    1. 意图识别（规则优先，未命中时退回 LLM）
     2. 提取参数
     3. 调用对应模块
+
+    任务记录由任务队列维护（见 Router._handle_execute_command），这里只负责执行。
     """
     logger.info(f"Executing command: {command}")
+    intent = await _identify_intent(command)
+    return await _dispatch_task(intent, command)
 
-    # TODO: 使用 LLM 进行意图识别
-    intent = _identify_intent(command)
-
-    # TODO: 根据意图调用对应模块
-    result = await _dispatch_task(intent, command)
 
-    return {
-        "id": "task_id",  # TODO: 生成任务 ID
-        "status": "completed",
-        "result": result,
-    }
+async def _identify_intent(command: str) -> Dict[str, Any]:
+    """识别用户意图"""
+    from friday_core.intents import identify_intent
+    from friday_core.plugins import discover_plugins
+    # 插件声明的意图在发现时登记（发现结果有缓存）
+    discover_plugins()
+    intent = await identify_intent(command)
+    logger.info(f"Intent: {intent['type']} ({intent['source']})")
+    return intent
 
 
-def _identify_intent(command: str) -> Dict[str, Any]:
-    """识别用户意图"""
-    # TODO: 使用 LLM 或规则模板识别意图
-    command_lower = command.lower()
-
-    if "pdf" in command_lower or "论文" in command_lower:
-        return {"type": "pdf", "action": "parse"}
-    elif "视频" in command_lower or "video" in command_lower or "youtube" in command_lower or "bilibili" in command_lower:
-        return {"type": "video", "action": "process"}
-    elif "音频" in command_lower or "audio" in command_lower or "录音" in command_lower:
-        return {"type": "audio", "action": "process"}
-    else:
-        return {"type": "unknown", "action": "unknown"}
+def _pick_path(intent: Dict[str, Any]) -> str:
+    """选择与意图匹配的路径：优先扩展名相符的"""
+    from friday_core.intents import get_intent
+    paths = intent["args"]["paths"]
+    rule = get_intent(intent["type"])
+    extensions = rule["extensions"] if rule else ()
+    for path in paths:
+        if path.lower().endswith(extensions):
+            return path
+    return paths[0] if paths else ""
 
 
 async def _dispatch_task(intent: Dict[str, Any], command: str) -> Dict[str, Any]:
     """根据意图分发任务"""
+    from friday_core.context import get_router
     intent_type = intent.get("type")
+    args = intent.get("args", {})
 
     if intent_type == "pdf":
-        # TODO: 从命令中提取文件路径
-        return {"message": "PDF 处理功能待实现"}
+        path = _pick_path(intent)
+        if not path:
+            return {"intent": intent, "message": "请提供 PDF 文件路径"}
+        payload = {"path": path}
     elif intent_type == "video":
-        # TODO: 从命令中提取视频链接
-        return {"message": "视频处理功能待实现"}
+        path = _pick_path(intent)
+        if not path:
+            message = "暂不支持在线视频，请提供本地字幕文件或 .info.json 路径" if args.get("urls") else "请提供字幕文件或 .info.json 路径"
+            return {"intent": intent, "message": message}
+        payload = {"path": path}
     elif intent_type == "audio":
-        # TODO: 从命令中提取音频路径
-        return {"message": "音频处理功能待实现"}
+        path = _pick_path(intent)
+        if not path:
+            return {"intent": intent, "message": "请提供音频文件路径"}
+        payload = {"path": path}
+    elif intent_type == "search":
+        query = (args.get("quoted") or [args.get("query")])[0]
+        if not query:
+            return {"intent": intent, "message": "请提供检索内容"}
+        payload = {"query": query}
+    elif intent.get("cmd"):
+        # 插件登记的意图：把提取到的参数原样交给对应命令
+        payload = {"args": args, "command": command}
     else:
-        return {"message": "无法识别命令意图"}
-
+        return {"intent": intent, "message": "无法识别命令意图"}
 
+    return {"intent": intent, "result": await get_router().route(intent["cmd"], payload)}
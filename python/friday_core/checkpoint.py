@@ -0,0 +1,86 @@
+"""
+检查点 - 长任务的断点续做
+
+处理中的资源目录下保存 checkpoint.json，记录源文件内容哈希、抽取器版本和进度状态
+（PDF 已写入的页数和 Markdown 字节数，音频已转写到的偏移等）。逐页 / 逐段的明细追加
+写入资源目录中的 JSON Lines 文件，检查点只记录其字节数，每次写入的大小与进度无关。
+资源 ID 由内容哈希确定（见 library.resource_id_for_hash），重试时落到同一目录，校验
+通过即从检查点继续，复用已写入的产物。任务队列中执行时，检查点同时写入
+tasks.checkpoint 便于查看进度。
+
+检查点只在产物刷盘之后更新，记录的字节数之后的内容在恢复时会被截断丢弃。
+"""
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional
+from friday_core.logger import setup_logger
+from friday_core.progress import current_task_id
+
+logger = setup_logger(__name__)
+
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+def load_checkpoint(resource_dir: Path, kind: str, content_hash: str, version: str) -> Optional[Dict[str, Any]]:
+    """
+    读取检查点状态
+
+    Returns:
+        状态字典；不存在、损坏，或类型 / 内容哈希 / 版本不匹配时返回 None
+    """
+    path = Path(resource_dir) / CHECKPOINT_FILE
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if data.get("kind") != kind or data.get("content_hash") != content_hash or data.get("version") != version:
+        logger.info(f"Discarding stale checkpoint in {resource_dir}")
+        return None
+    return data.get("state")
+
+
+def save_checkpoint(resource_dir: Path, kind: str, content_hash: str, version: str, state: Dict[str, Any]):
+    """原子写入检查点，并同步到当前任务记录"""
+    data = {
+        "kind": kind,
+        "content_hash": content_hash,
+        "version": version,
+        "state": state,
+        "updated_at": datetime.now().isoformat(),
+    }
+    path = Path(resource_dir) / CHECKPOINT_FILE
+    tmp_path = path.with_name(f"{CHECKPOINT_FILE}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+    task_id = current_task_id.get()
+    if task_id:
+        from friday_core.task_queue import update_task_record
+        update_task_record(task_id, checkpoint={"kind": kind, "resource_dir": str(resource_dir), **state})
+
+
+def clear_checkpoint(resource_dir: Path):
+    """任务完成后删除检查点"""
+    (Path(resource_dir) / CHECKPOINT_FILE).unlink(missing_ok=True)
+
+
+def truncate_to(path: Path, size: int) -> bool:
+    """
+    把文件截断到检查点记录的长度
+
+    Returns:
+        文件存在且不短于 size 时截断并返回 True，否则返回 False（检查点不可用）
+    """
+    try:
+        if os.path.getsize(path) < size:
+            return False
+        with open(path, "r+b") as f:
+            f.truncate(size)
+        return True
+    except OSError:
+        return False
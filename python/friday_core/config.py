@@ -3,12 +3,12 @@
 """
 import os
 from pathlib import Path
-from typing import Dict, Optional
-from dotenv import load_dotenv
+from typing import Dict, List, Optional
 
-# 加载 .env 文件
+# 加载 .env 文件（只有文件存在时才导入 dotenv）
 env_path = Path(__file__).parent.parent / ".env"
 if env_path.exists():
+    from dotenv import load_dotenv
     load_dotenv(env_path)
 
 
@@ -20,16 +20,179 @@ class Config:
     GEMINI_API_KEY: Optional[str] = os.getenv("GEMINI_API_KEY")
     CLAUDE_API_KEY: Optional[str] = os.getenv("CLAUDE_API_KEY")
 
+    # LLM 调用（LLM_PROVIDER: openai | claude | gemini | mock=本地模拟，不访问网络）
+    # 限流和并发上限按提供方配置（格式: "openai=60,claude=50"，限流单位为每分钟请求数）；
+    # 响应按请求内容哈希缓存在 LLM_CACHE_PATH，LLM_CACHE_TTL 秒后过期，超过 LLM_CACHE_MAX_MB 时淘汰最久未用的
+    LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "openai")
+    OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+    CLAUDE_MODEL: str = os.getenv("CLAUDE_MODEL", "claude-3-5-haiku-latest")
+    GEMINI_MODEL: str = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+    LLM_MAX_TOKENS: int = int(os.getenv("LLM_MAX_TOKENS", "1024"))
+    LLM_TIMEOUT: float = float(os.getenv("LLM_TIMEOUT", "60"))
+    LLM_MAX_CONNECTIONS: int = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+    LLM_RATE_LIMITS: str = os.getenv("LLM_RATE_LIMITS", "openai=500,claude=50,gemini=60")
+    LLM_CONCURRENCY: str = os.getenv("LLM_CONCURRENCY", "openai=8,claude=4,gemini=4,mock=16")
+    LLM_DEFAULT_CONCURRENCY: int = int(os.getenv("LLM_DEFAULT_CONCURRENCY", "4"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "4"))
+    LLM_BACKOFF_BASE: float = float(os.getenv("LLM_BACKOFF_BASE", "1.0"))
+    LLM_BACKOFF_MAX: float = float(os.getenv("LLM_BACKOFF_MAX", "30"))
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", "python/data/llm_cache.db")
+    LLM_CACHE_TTL: float = float(os.getenv("LLM_CACHE_TTL", str(30 * 24 * 3600)))
+    LLM_CACHE_MAX_MB: int = int(os.getenv("LLM_CACHE_MAX_MB", "64"))
+    LLM_MOCK_LATENCY: float = float(os.getenv("LLM_MOCK_LATENCY", "0"))
+    LLM_MOCK_FAILURE_RATE: float = float(os.getenv("LLM_MOCK_FAILURE_RATE", "0"))
+
+    # 意图识别：规则识别结果的 LRU 缓存条数；规则未命中时是否退回 LLM
+    INTENT_CACHE_SIZE: int = int(os.getenv("INTENT_CACHE_SIZE", "1024"))
+    INTENT_LLM_FALLBACK: bool = os.getenv("INTENT_LLM_FALLBACK", "true").lower() in ("1", "true", "yes")
+
     # 数据库路径
     DATABASE_PATH: str = os.getenv("DATABASE_PATH", "python/data/friday.db")
     CHROMADB_PATH: str = os.getenv("CHROMADB_PATH", "python/data/chroma_db")
 
+    # SQLite 连接：日志模式、同步级别、锁等待毫秒数、连接池大小
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT: int = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))
+    SQLITE_POOL_SIZE: int = int(os.getenv("SQLITE_POOL_SIZE", "8"))
+
     # Library 路径
     LIBRARY_PATH: str = os.getenv("LIBRARY_PATH", "library")
 
+    # 同一内容的导入互斥：跨进程锁文件超过该秒数未续期时视为持有者已退出
+    RESOURCE_LOCK_STALE: float = float(os.getenv("RESOURCE_LOCK_STALE", "60"))
+
+    # 资源库列表：默认每页条数、每页上限
+    LIBRARY_PAGE_SIZE: int = int(os.getenv("LIBRARY_PAGE_SIZE", "50"))
+    LIBRARY_PAGE_MAX: int = int(os.getenv("LIBRARY_PAGE_MAX", "500"))
+
     # 日志级别
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
 
+    # PDF 并行抽取（PDF_WORKERS=0 表示使用全部 CPU 核）
+    PDF_WORKERS: int = int(os.getenv("PDF_WORKERS", "0"))
+    PDF_MAX_SHARD_PAGES: int = int(os.getenv("PDF_MAX_SHARD_PAGES", "32"))
+    PDF_PARALLEL_MIN_PAGES: int = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16"))
+
+    # 版面分析：页边区域占页高的比例、页眉页脚至少出现在分片内多大比例的页面上、
+    # 宽度超过正文宽度该比例的块不参与分栏检测、覆盖低于正文高度该比例的竖直空隙视为栏间距、
+    # 栏间距最小宽度（pt）、每栏窄块总高度至少占正文高度的比例；启用时每个分片至少 LAYOUT_MIN_SHARD_PAGES 页，以便跨页识别页眉页脚（末尾或续做剩下的短分片借用相邻页面）
+    LAYOUT_ENABLED: bool = os.getenv("LAYOUT_ENABLED", "true").lower() in ("1", "true", "yes")
+    LAYOUT_STRIP_RUNNING: bool = os.getenv("LAYOUT_STRIP_RUNNING", "true").lower() in ("1", "true", "yes")
+    LAYOUT_MARGIN: float = float(os.getenv("LAYOUT_MARGIN", "0.08"))
+    LAYOUT_RUNNING_RATIO: float = float(os.getenv("LAYOUT_RUNNING_RATIO", "0.4"))
+    LAYOUT_WIDE_RATIO: float = float(os.getenv("LAYOUT_WIDE_RATIO", "0.55"))
+    LAYOUT_GUTTER_TOLERANCE: float = float(os.getenv("LAYOUT_GUTTER_TOLERANCE", "0.05"))
+    LAYOUT_MIN_GUTTER: float = float(os.getenv("LAYOUT_MIN_GUTTER", "6"))
+    LAYOUT_MIN_COLUMN_FILL: float = float(os.getenv("LAYOUT_MIN_COLUMN_FILL", "0.2"))
+    LAYOUT_MIN_SHARD_PAGES: int = int(os.getenv("LAYOUT_MIN_SHARD_PAGES", "8"))
+
+    # 扫描页 OCR（OCR_BACKEND: pymupdf=经 PyMuPDF 调用本机 Tesseract，tesseract=pytesseract，
+    # placeholder=不依赖模型的替身，用于测试）；去掉空白后少于 OCR_MIN_TEXT_CHARS 个字符的含图页面视为扫描页
+    OCR_ENABLED: bool = os.getenv("OCR_ENABLED", "true").lower() in ("1", "true", "yes")
+    OCR_BACKEND: str = os.getenv("OCR_BACKEND", "pymupdf")
+    OCR_LANGUAGE: str = os.getenv("OCR_LANGUAGE", "chi_sim+eng")
+    OCR_DPI: int = int(os.getenv("OCR_DPI", "300"))
+    OCR_MIN_TEXT_CHARS: int = int(os.getenv("OCR_MIN_TEXT_CHARS", "20"))
+    OCR_CACHE_PATH: str = os.getenv("OCR_CACHE_PATH", "python/data/ocr_cache")
+
+    # PDF 页面渲染：图片缓存目录和容量、预渲染页数（仅常驻模式）、渲染线程内保持打开的文档数、最大缩放
+    RENDER_CACHE_PATH: str = os.getenv("RENDER_CACHE_PATH", "python/data/render_cache")
+    RENDER_CACHE_MAX_MB: int = int(os.getenv("RENDER_CACHE_MAX_MB", "512"))
+    RENDER_PREFETCH_PAGES: int = int(os.getenv("RENDER_PREFETCH_PAGES", "3"))
+    RENDER_OPEN_DOCUMENTS: int = int(os.getenv("RENDER_OPEN_DOCUMENTS", "4"))
+    RENDER_MAX_ZOOM: float = float(os.getenv("RENDER_MAX_ZOOM", "4.0"))
+
+    # 向量索引（EMBEDDING_FUNCTION: hashing=特征哈希，完全离线；default=ChromaDB 本地 ONNX 模型，首次使用时下载约 80 MB）
+    # 不同 embedding 的向量维度不同，切换 EMBEDDING_FUNCTION 时需同时换用新的 CHROMA_COLLECTION
+    VECTOR_INDEX_ENABLED: bool = os.getenv("VECTOR_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+    CHROMA_COLLECTION: str = os.getenv("CHROMA_COLLECTION", "friday_library")
+    EMBEDDING_FUNCTION: str = os.getenv("EMBEDDING_FUNCTION", "hashing")
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    HASHING_EMBEDDING_DIM: int = int(os.getenv("HASHING_EMBEDDING_DIM", "512"))
+    CHUNK_MAX_CHARS: int = int(os.getenv("CHUNK_MAX_CHARS", "1500"))
+
+    # 语音转写（ASR_BACKEND: faster_whisper=本地 Whisper 模型，energy=基于能量检测的轻量替身，用于测试）
+    # 音频按 ASR_WINDOW_SECONDS 秒的窗口解码，相邻窗口重叠 ASR_OVERLAP_SECONDS 秒；
+    # 每 ASR_BATCH_WINDOWS 个窗口作为一个批次交给进程池（ASR_WORKERS=0 表示 CPU 核数的一半）
+    ASR_BACKEND: str = os.getenv("ASR_BACKEND", "faster_whisper")
+    ASR_MODEL: str = os.getenv("ASR_MODEL", "small")
+    ASR_COMPUTE_TYPE: str = os.getenv("ASR_COMPUTE_TYPE", "int8")
+    ASR_LANGUAGE: Optional[str] = os.getenv("ASR_LANGUAGE") or None
+    ASR_WINDOW_SECONDS: float = float(os.getenv("ASR_WINDOW_SECONDS", "30"))
+    ASR_OVERLAP_SECONDS: float = float(os.getenv("ASR_OVERLAP_SECONDS", "2"))
+    ASR_BATCH_WINDOWS: int = int(os.getenv("ASR_BATCH_WINDOWS", "2"))
+    ASR_WORKERS: int = int(os.getenv("ASR_WORKERS", "0"))
+
+    # 波形峰值：第 0 层每对峰值覆盖的样本数（16 kHz 下 256 约 16 毫秒）；
+    # 按宽度自动选层级时的默认目标峰值数、单次请求最多返回的峰值数
+    WAVEFORM_SAMPLES_PER_PEAK: int = int(os.getenv("WAVEFORM_SAMPLES_PER_PEAK", "256"))
+    WAVEFORM_DEFAULT_WIDTH: int = int(os.getenv("WAVEFORM_DEFAULT_WIDTH", "2000"))
+    WAVEFORM_MAX_PEAKS: int = int(os.getenv("WAVEFORM_MAX_PEAKS", "20000"))
+
+    # 字幕处理：相邻字幕间隔不超过 SUBTITLE_MERGE_GAP 秒时合并为一段，每段不超过 SUBTITLE_SEGMENT_SECONDS 秒、
+    # SUBTITLE_SEGMENT_CHARS 字；从 .info.json 导入时按 SUBTITLE_LANGUAGES 的顺序选择本地字幕文件
+    SUBTITLE_MERGE_GAP: float = float(os.getenv("SUBTITLE_MERGE_GAP", "1.5"))
+    SUBTITLE_SEGMENT_SECONDS: float = float(os.getenv("SUBTITLE_SEGMENT_SECONDS", "30"))
+    SUBTITLE_SEGMENT_CHARS: int = int(os.getenv("SUBTITLE_SEGMENT_CHARS", "300"))
+    SUBTITLE_LANGUAGES: str = os.getenv("SUBTITLE_LANGUAGES", "zh-Hans,zh-CN,zh,en")
+
+    # 长文本总结（SUMMARIZER: extractive=离线抽取式，llm=调用 LLM_PROVIDER）：逐字稿按 SUMMARY_CHUNK_CHARS 字分块并行总结，
+    # 每 SUMMARY_FAN_IN 个部分总结再合并一次，直到只剩一个（SUMMARY_WORKERS=0 表示全部 CPU 核）
+    SUMMARIZER: str = os.getenv("SUMMARIZER", "extractive")
+    SUMMARY_CHUNK_CHARS: int = int(os.getenv("SUMMARY_CHUNK_CHARS", "4000"))
+    SUMMARY_SENTENCES: int = int(os.getenv("SUMMARY_SENTENCES", "6"))
+    SUMMARY_FAN_IN: int = int(os.getenv("SUMMARY_FAN_IN", "8"))
+    SUMMARY_WORKERS: int = int(os.getenv("SUMMARY_WORKERS", "0"))
+
+    # 关键片段：按 KEY_SEGMENT_SECONDS 秒的窗口打分，最多选出 KEY_SEGMENT_COUNT 个
+    KEY_SEGMENT_SECONDS: float = float(os.getenv("KEY_SEGMENT_SECONDS", "120"))
+    KEY_SEGMENT_COUNT: int = int(os.getenv("KEY_SEGMENT_COUNT", "5"))
+
+    # 批量导入的 CPU 预算（同时处理的文件数与 PDF 进程池大小，0 表示全部 CPU 核）
+    INGEST_CPU_BUDGET: int = int(os.getenv("INGEST_CPU_BUDGET", "0"))
+
+    # 文件夹监视（常驻模式）：WATCH_DIRS 为自动导入的目录（按系统路径分隔符分隔，留空不监视）；
+    # WATCH_BACKEND: auto=安装了 watchdog 时使用系统文件事件（inotify 等），否则轮询，polling=总是轮询；
+    # 文件大小和修改时间保持 WATCH_DEBOUNCE 秒不变后才导入，同时导入的文件数不超过 WATCH_CONCURRENCY
+    WATCH_DIRS: str = os.getenv("WATCH_DIRS", "")
+    WATCH_RECURSIVE: bool = os.getenv("WATCH_RECURSIVE", "true").lower() in ("1", "true", "yes")
+    WATCH_BACKEND: str = os.getenv("WATCH_BACKEND", "auto")
+    WATCH_POLL_INTERVAL: float = float(os.getenv("WATCH_POLL_INTERVAL", "30"))
+    WATCH_DEBOUNCE: float = float(os.getenv("WATCH_DEBOUNCE", "2"))
+    WATCH_CONCURRENCY: int = int(os.getenv("WATCH_CONCURRENCY", "2"))
+    # 导入失败时：格式不支持、文件损坏等确定性错误记为失败，文件再次变化前不重试；
+    # 其他错误（数据库繁忙、磁盘或后端暂时不可用等）等待 WATCH_RETRY_DELAY 秒后重试，
+    # 每次等待时间翻倍，重试 WATCH_MAX_RETRIES 次仍失败时记为失败
+    WATCH_RETRY_DELAY: float = float(os.getenv("WATCH_RETRY_DELAY", "30"))
+    WATCH_MAX_RETRIES: int = int(os.getenv("WATCH_MAX_RETRIES", "5"))
+
+    # 常驻模式下同时处理的请求帧上限，超出的帧按到达顺序等待
+    SERVER_MAX_CONCURRENCY: int = int(os.getenv("SERVER_MAX_CONCURRENCY", "32"))
+
+    # 进度事件的最小输出间隔（秒）
+    PROGRESS_INTERVAL: float = float(os.getenv("PROGRESS_INTERVAL", "0.2"))
+
+    # 任务队列：全局并发数，以及按命令的并发上限（格式: "parse_pdf=2,process_audio=1"）
+    TASK_WORKERS: int = int(os.getenv("TASK_WORKERS", "4"))
+    TASK_COMMAND_LIMITS: str = os.getenv("TASK_COMMAND_LIMITS", "parse_pdf=2,process_audio=1,process_video=2")
+
+    # 插件：PLUGIN_DIRS 为内置 plugins 目录之外的插件目录（按系统路径分隔符分隔）；
+    # 发现结果缓存在 PLUGIN_INDEX_PATH；插件在专用线程池 / 独占的 worker 进程中执行，默认超时 PLUGIN_TIMEOUT 秒；
+    # PLUGIN_PROCESSES 为进程模式插件的并发调用数（也是保留的空闲 worker 数）
+    PLUGIN_DIRS: str = os.getenv("PLUGIN_DIRS", "")
+    PLUGIN_INDEX_PATH: str = os.getenv("PLUGIN_INDEX_PATH", "python/data/plugin_index.json")
+    PLUGIN_TIMEOUT: float = float(os.getenv("PLUGIN_TIMEOUT", "60"))
+    PLUGIN_THREADS: int = int(os.getenv("PLUGIN_THREADS", "4"))
+    PLUGIN_PROCESSES: int = int(os.getenv("PLUGIN_PROCESSES", "2"))
+
+    # 性能埋点：每条命令的统计追加写入 METRICS_EXPORT_PATH（JSON Lines，留空不导出）；
+    # PROFILE 为 cprofile / sampling 时对所有命令开启剖析，否则只对 payload 带 "_profile" 的请求开启
+    METRICS_EXPORT_PATH: Optional[str] = os.getenv("METRICS_EXPORT_PATH") or None
+    PROFILE: Optional[str] = os.getenv("PROFILE") or None
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "python/logs/profiles")
+
     @classmethod
     def get_api_key(cls, provider: str) -> Optional[str]:
         """获取 API Key"""
@@ -40,6 +203,72 @@ class Config:
         }
         return key_map.get(provider.lower())
 
+    @classmethod
+    def get_pdf_workers(cls) -> int:
+        """获取 PDF 抽取的 worker 进程数"""
+        return cls.PDF_WORKERS if cls.PDF_WORKERS > 0 else (os.cpu_count() or 1)
+
+    @classmethod
+    def get_asr_workers(cls) -> int:
+        """获取语音转写的 worker 进程数"""
+        return cls.ASR_WORKERS if cls.ASR_WORKERS > 0 else max(1, (os.cpu_count() or 1) // 2)
+
+    @classmethod
+    def get_summary_workers(cls) -> int:
+        """获取长文本总结的 worker 进程数"""
+        return cls.SUMMARY_WORKERS if cls.SUMMARY_WORKERS > 0 else (os.cpu_count() or 1)
+
+    @classmethod
+    def get_subtitle_languages(cls) -> List[str]:
+        """获取字幕语言的优先顺序"""
+        return [lang.strip() for lang in cls.SUBTITLE_LANGUAGES.split(",") if lang.strip()]
+
+    @classmethod
+    def get_ingest_cpu_budget(cls) -> int:
+        """获取批量导入的 CPU 预算"""
+        return cls.INGEST_CPU_BUDGET if cls.INGEST_CPU_BUDGET > 0 else (os.cpu_count() or 1)
+
+    @classmethod
+    def get_watch_dirs(cls) -> List[str]:
+        """获取监视目录（绝对路径）"""
+        return [os.path.abspath(d) for d in cls.WATCH_DIRS.split(os.pathsep) if d.strip()]
+
+    @staticmethod
+    def _parse_limits(value: str) -> Dict[str, int]:
+        """解析 "name=N,name=N" 形式的上限配置"""
+        limits = {}
+        for item in value.split(","):
+            if "=" not in item:
+                continue
+            name, limit = item.split("=", 1)
+            limits[name.strip()] = max(1, int(limit))
+        return limits
+
+    @classmethod
+    def get_task_command_limits(cls) -> Dict[str, int]:
+        """解析按命令的任务并发上限"""
+        return cls._parse_limits(cls.TASK_COMMAND_LIMITS)
+
+    @classmethod
+    def get_llm_rate_limits(cls) -> Dict[str, int]:
+        """解析按提供方的 LLM 限流（每分钟请求数）"""
+        return cls._parse_limits(cls.LLM_RATE_LIMITS)
+
+    @classmethod
+    def get_llm_concurrency(cls) -> Dict[str, int]:
+        """解析按提供方的 LLM 并发上限"""
+        return cls._parse_limits(cls.LLM_CONCURRENCY)
+
+    @classmethod
+    def get_llm_model(cls, provider: str) -> str:
+        """获取提供方的默认模型"""
+        models = {
+            "openai": cls.OPENAI_MODEL,
+            "claude": cls.CLAUDE_MODEL,
+            "gemini": cls.GEMINI_MODEL,
+        }
+        return models.get(provider.lower(), provider)
+
     @classmethod
     def ensure_directories(cls):
         """确保必要的目录存在"""
@@ -0,0 +1,147 @@
+"""
+应用上下文 - 进程内共享的路由器、数据库引擎和会话工厂
+
+路由器的处理器表、SQLAlchemy 引擎（连接池）和 sessionmaker 只在首次使用时
+创建一次，之后所有请求、任务和后台线程共用。会话本身不共享：每次进入
+session_scope 都会从工厂取一个新会话，退出时提交或回滚并关闭，因此多个线程
+和协程可以同时使用各自的会话。协程中访问数据库应通过 run_in_session 放到线程
+中执行，避免等待写锁时阻塞事件循环。
+"""
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Optional
+from friday_core.config import Config
+from friday_core.logger import setup_logger
+
+if TYPE_CHECKING:
+    # SQLAlchemy 只在首次访问数据库时导入，main.py 导入本模块时不付出这部分启动开销
+    from sqlalchemy.orm import Session, sessionmaker
+
+logger = setup_logger(__name__)
+
+
+class AppContext:
+    """应用上下文，各组件按需创建"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or Config.DATABASE_PATH
+        # 常驻模式（main.py --server）：进程在请求之间保持运行，后台工作（任务队列、
+        # 预渲染等）才有机会完成；单次模式下进程随响应退出
+        self.server_mode = False
+        self._router = None
+        self._engine = None
+        self._session_factory: Optional["sessionmaker"] = None
+        self._lock = threading.Lock()
+
+    @property
+    def router(self):
+        """共享的命令路由器"""
+        if self._router is None:
+            with self._lock:
+                if self._router is None:
+                    from friday_core.router import Router
+                    self._router = Router()
+        return self._router
+
+    @property
+    def engine(self):
+        """共享的数据库引擎（首次使用时建表和迁移）"""
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    from friday_core.database import init_database
+                    self._engine = init_database(self.db_path)
+                    logger.debug(f"Database engine created: {self.db_path}")
+        return self._engine
+
+    @property
+    def session_factory(self) -> "sessionmaker":
+        """共享的会话工厂；提交后不过期对象，会话关闭后仍可读取已加载的字段"""
+        if self._session_factory is None:
+            engine = self.engine
+            with self._lock:
+                if self._session_factory is None:
+                    from sqlalchemy.orm import sessionmaker
+                    self._session_factory = sessionmaker(bind=engine, expire_on_commit=False)
+        return self._session_factory
+
+    @contextmanager
+    def session_scope(self) -> Iterator["Session"]:
+        """
+        会话作用域：正常退出时提交，异常时回滚，最后关闭
+
+        用法:
+            with get_app_context().session_scope() as session:
+                session.add(...)
+        """
+        session = self.session_factory()
+        try:
+            yield session
+            session.commit()
+        except BaseException:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    async def run_in_session(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """在线程中以独立会话执行 func(session, *args, **kwargs)"""
+        def run():
+            with self.session_scope() as session:
+                return func(session, *args, **kwargs)
+
+        return await asyncio.to_thread(run)
+
+    def dispose(self):
+        """关闭连接池中的所有连接"""
+        if self._engine is not None:
+            self._engine.dispose()
+
+
+_context: Optional[AppContext] = None
+_context_lock = threading.Lock()
+
+
+def get_app_context() -> AppContext:
+    """获取进程内共享的应用上下文"""
+    global _context
+    if _context is None:
+        with _context_lock:
+            if _context is None:
+                _context = AppContext()
+    return _context
+
+
+def reset_app_context():
+    """丢弃当前上下文并关闭其连接（配置变化后重建）"""
+    global _context
+    with _context_lock:
+        if _context is not None:
+            _context.dispose()
+        _context = None
+
+
+def is_server_mode() -> bool:
+    """当前进程是否运行在常驻模式"""
+    return get_app_context().server_mode
+
+
+def get_router():
+    """获取共享的命令路由器"""
+    return get_app_context().router
+
+
+def get_engine():
+    """获取共享的数据库引擎"""
+    return get_app_context().engine
+
+
+def session_scope():
+    """共享会话工厂上的会话作用域，见 AppContext.session_scope"""
+    return get_app_context().session_scope()
+
+
+async def run_in_session(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """见 AppContext.run_in_session"""
+    return await get_app_context().run_in_session(func, *args, **kwargs)
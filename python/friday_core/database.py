@@ -1,9 +1,8 @@
 """
 数据库模型和操作
 """
-from sqlalchemy import create_engine, Column, String, DateTime, JSON
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event, inspect, text, Column, String, DateTime, JSON, Integer, Float, Index
+from sqlalchemy.orm import declarative_base, sessionmaker
 from datetime import datetime
 import uuid
 
@@ -13,6 +12,13 @@ Base = declarative_base()
 class Resource(Base):
     """资源模型"""
     __tablename__ = "resources"
+    # 资源库列表的过滤和排序索引；末尾带上 id，键集分页的同值决胜也能走索引
+    __table_args__ = (
+        Index("ix_resources_type_created_at", "type", "created_at", "id"),
+        Index("ix_resources_created_at", "created_at", "id"),
+        Index("ix_resources_updated_at", "updated_at", "id"),
+        Index("ix_resources_title", "title", "id"),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     type = Column(String, nullable=False)  # pdf | video | audio
@@ -21,9 +27,25 @@ class Resource(Base):
     md_path = Column(String, nullable=True)
     assets = Column(JSON, default=list)
     vector_index = Column(String, nullable=True)
+    content_hash = Column(String, nullable=True, index=True)  # 源文件内容 SHA-256
+    extractor_version = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    def to_dict(self) -> dict:
+        """转换为与 Tauri 端 Resource 结构一致的字典"""
+        return {
+            "id": self.id,
+            "type": self.type,
+            "title": self.title,
+            "source": self.source,
+            "md_path": self.md_path,
+            "assets": self.assets or [],
+            "vector_index": self.vector_index,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
 
 class Task(Base):
     """任务模型"""
@@ -35,23 +57,105 @@ class Task(Base):
     payload = Column(JSON, nullable=False)
     result = Column(JSON, nullable=True)
     error = Column(String, nullable=True)
+    metrics = Column(JSON, nullable=True)  # 性能埋点：耗时、CPU、内存、I/O 及分阶段统计
+    checkpoint = Column(JSON, nullable=True)  # 最近一次检查点摘要（已完成页数、音频偏移等）
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    def to_dict(self) -> dict:
+        """转换为与 Tauri 端 Task 结构一致的字典"""
+        return {
+            "id": self.id,
+            "status": self.status,
+            "cmd": self.cmd,
+            "payload": self.payload,
+            "result": self.result,
+            "error": self.error,
+            "metrics": self.metrics,
+            "checkpoint": self.checkpoint,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+
+class IngestedFile(Base):
+    """
+    已导入文件索引 - 记录文件大小、修改时间和内容哈希，用于跳过未变化的文件
+
+    resource_id 为空表示导入失败，文件变化之前文件夹监视不会重试。
+    """
+    __tablename__ = "ingested_files"
+
+    path = Column(String, primary_key=True)
+    size = Column(Integer, nullable=False)
+    mtime = Column(Float, nullable=False)
+    resource_id = Column(String, nullable=True)
+    content_hash = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 
 # 数据库初始化
 def init_database(db_path: str = "python/data/friday.db"):
-    """初始化数据库"""
+    """
+    创建数据库引擎并建表、迁移
+
+    每次调用都会新建引擎；进程内应通过 friday_core.context 共享同一个引擎。
+    """
     from pathlib import Path
+    from friday_core.config import Config
     Path(db_path).parent.mkdir(parents=True, exist_ok=True)
 
-    engine = create_engine(f"sqlite:///{db_path}")
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        connect_args={"timeout": Config.SQLITE_BUSY_TIMEOUT / 1000, "check_same_thread": False},
+        pool_size=Config.SQLITE_POOL_SIZE,
+    )
+    _configure_sqlite(engine)
     Base.metadata.create_all(engine)
+    _migrate_schema(engine)
     return engine
 
 
+def _configure_sqlite(engine):
+    """
+    为每个新连接设置 PRAGMA
+
+    WAL 下读写互不阻塞，synchronous=NORMAL 在 WAL 下只在检查点时 fsync，
+    busy_timeout 让并发写入排队等待而不是立即报 "database is locked"。
+    """
+    from friday_core.config import Config
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={Config.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={Config.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(Config.SQLITE_BUSY_TIMEOUT)}")
+        cursor.close()
+
+
+def _migrate_schema(engine):
+    """
+    轻量迁移：为已存在的表补齐新增的列和索引
+
+    create_all 只会创建缺失的表，不会修改旧库中已存在的表。
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    col_type = column.type.compile(engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}"))
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+
 def get_session(engine):
-    """获取数据库会话"""
+    """获取数据库会话（临时会话工厂；进程内共享的会话见 friday_core.context.session_scope）"""
     Session = sessionmaker(bind=engine)
     return Session()
 
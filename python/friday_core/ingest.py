@@ -0,0 +1,232 @@
+"""
+批量导入 - 发现目录/通配符/文件列表中的 PDF 和音频，并行送入 Reader 和 Listener
+"""
+import asyncio
+import glob
+import os
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+from friday_core.config import Config
+from friday_core.context import session_scope
+from friday_core.database import IngestedFile, Resource
+from friday_core.logger import setup_logger
+from friday_core.progress import ProgressReporter
+
+logger = setup_logger(__name__)
+
+PDF_EXTENSIONS = {".pdf"}
+AUDIO_EXTENSIONS = {".mp3", ".wav", ".m4a", ".flac", ".ogg"}
+
+
+def classify_file(path: str) -> Optional[str]:
+    """根据扩展名判断资源类型，不支持的文件返回 None"""
+    ext = Path(path).suffix.lower()
+    if ext in PDF_EXTENSIONS:
+        return "pdf"
+    if ext in AUDIO_EXTENSIONS:
+        return "audio"
+    return None
+
+
+def _walk(directory: str, recursive: bool) -> Iterator[str]:
+    """用 os.scandir 遍历目录，跳过隐藏目录"""
+    try:
+        entries = list(os.scandir(directory))
+    except OSError as e:
+        logger.warning(f"Cannot scan directory {directory}: {e}")
+        return
+    for entry in sorted(entries, key=lambda e: e.name):
+        if entry.name.startswith("."):
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            if recursive:
+                yield from _walk(entry.path, recursive)
+        elif entry.is_file():
+            yield entry.path
+
+
+def discover_files(
+    path: Optional[str] = None,
+    pattern: Optional[str] = None,
+    paths: Optional[Iterable[str]] = None,
+    recursive: bool = True,
+) -> Iterator[str]:
+    """
+    发现待导入的文件（去重，只保留支持的类型）
+
+    Args:
+        path: 目录或单个文件
+        pattern: glob 通配符，如 "D:/papers/**/*.pdf"
+        paths: 显式文件列表
+        recursive: 目录是否递归扫描
+    """
+    seen = set()
+
+    def candidates() -> Iterator[str]:
+        if path:
+            if os.path.isdir(path):
+                yield from _walk(path, recursive)
+            else:
+                yield path
+        if pattern:
+            yield from glob.iglob(pattern, recursive=True)
+        if paths:
+            yield from paths
+
+    for candidate in candidates():
+        key = os.path.abspath(candidate)
+        if key in seen or not os.path.isfile(candidate) or classify_file(candidate) is None:
+            continue
+        seen.add(key)
+        yield key
+
+
+def _load_file_index(file_paths: List[str]) -> Dict[str, IngestedFile]:
+    """批量读取已导入文件索引"""
+    with session_scope() as session:
+        index = {}
+        # SQLite 单条语句的参数个数有限，分批查询
+        for start in range(0, len(file_paths), 500):
+            batch = file_paths[start:start + 500]
+            for record in session.query(IngestedFile).filter(IngestedFile.path.in_(batch)):
+                session.expunge(record)
+                index[record.path] = record
+        return index
+
+
+def record_ingested(path: str, size: int, mtime: float, resource_id: Optional[str], content_hash: Optional[str] = None) -> Optional[str]:
+    """
+    写入或更新已导入文件索引，返回记录的内容哈希
+
+    content_hash 为空时取资源记录中的内容哈希（导入时已计算过，无需再读一遍文件）；
+    resource_id 为空表示导入失败。
+    """
+    with session_scope() as session:
+        if content_hash is None and resource_id is not None:
+            content_hash = session.query(Resource.content_hash).filter(Resource.id == resource_id).scalar()
+        record = session.get(IngestedFile, path)
+        if record is None:
+            record = IngestedFile(path=path)
+            session.add(record)
+        record.size = size
+        record.mtime = mtime
+        record.resource_id = resource_id
+        record.content_hash = content_hash
+    return content_hash
+
+
+def split_budget(budget: int, pdf_files: int, audio_files: int) -> Tuple[int, int]:
+    """
+    PDF 进程池和 ASR 进程池分用同一份 CPU 预算
+
+    两类文件都有时按文件数比例分配，各至少 1 个 worker；只有一类时独占全部预算。
+
+    Returns:
+        (PDF worker 数, ASR worker 数)
+    """
+    if not pdf_files or not audio_files or budget < 2:
+        return budget, budget
+    pdf_workers = min(budget - 1, max(1, round(budget * pdf_files / (pdf_files + audio_files))))
+    return pdf_workers, budget - pdf_workers
+
+
+async def ingest_file(path: str, workers: Optional[int] = None, force: bool = False, progress_callback=None) -> Dict[str, Any]:
+    """将单个文件送入对应模块处理，返回资源信息"""
+    file_type = classify_file(path)
+    if file_type == "pdf":
+        from friday_reader.main import parse_pdf
+        return await parse_pdf(path, workers=workers, force=force, progress_callback=progress_callback)
+    if file_type == "audio":
+        from friday_listener.main import process_audio
+        return await process_audio(path, workers=workers, force=force, progress_callback=progress_callback)
+    raise ValueError(f"Unsupported file type: {path}")
+
+
+async def batch_ingest(
+    path: Optional[str] = None,
+    pattern: Optional[str] = None,
+    paths: Optional[List[str]] = None,
+    recursive: bool = True,
+    force: bool = False,
+    cpu_budget: Optional[int] = None,
+    progress_callback=None,
+) -> Dict[str, Any]:
+    """
+    批量导入文件
+
+    同时处理的文件数不超过 CPU 预算，PDF 共享进程池和 ASR 进程池分用这份预算（见 split_budget；
+    预算为 1 时文件逐个处理），多个文件的页面分片和音频窗口在各自的进程池中排队，整体 CPU 占用受控。
+    文件发现和导入索引的读写在线程中执行，不阻塞事件循环。
+    大小和修改时间与上次成功导入时一致的文件会被跳过（force=True 时不跳过）。
+
+    Args:
+        path / pattern / paths: 导入来源，见 discover_files
+        recursive: 目录是否递归扫描
+        force: 是否强制重新导入
+        cpu_budget: CPU 预算，None 时使用 Config.INGEST_CPU_BUDGET
+        progress_callback: 整体进度回调 (stage, progress, message, **fields)，默认发到进度事件通道；
+            单个文件的进度以 source="parse_pdf" / "process_audio" 并带 file 字段的事件单独上报
+
+    Returns:
+        {"total", "processed", "skipped", "failed", "items": [...]}
+    """
+    report = progress_callback or ProgressReporter("batch_ingest").update
+    budget = max(1, cpu_budget or Config.get_ingest_cpu_budget())
+
+    file_paths = await asyncio.to_thread(lambda: list(discover_files(path, pattern, paths, recursive)))
+    total = len(file_paths)
+    pdf_files = sum(1 for p in file_paths if classify_file(p) == "pdf")
+    workers = dict(zip(("pdf", "audio"), split_budget(budget, pdf_files, total - pdf_files)))
+    logger.info(f"Batch ingest: {total} files discovered, cpu budget {budget} (pdf {workers['pdf']}, audio {workers['audio']})")
+    report("batch", 0, f"发现 {total} 个文件")
+
+    index = {} if force else await asyncio.to_thread(_load_file_index, file_paths)
+    if pdf_files:
+        from friday_reader.extractor import warm_up
+        await asyncio.to_thread(warm_up, workers["pdf"])
+
+    slots = asyncio.Semaphore(budget)
+    items: List[Dict[str, Any]] = []
+    counts = {"processed": 0, "skipped": 0, "failed": 0}
+
+    def finish(item: Dict[str, Any]):
+        items.append(item)
+        counts[item["status"]] += 1
+        done = len(items)
+        name = Path(item["path"]).name
+        report("batch", int(done / total * 100), f"[{done}/{total}] {name}: {item['status']}", current=done, total=total)
+
+    async def process(file_path: str):
+        try:
+            stat = os.stat(file_path)
+        except OSError as e:
+            # 收集文件列表之后被删除或无权限访问的文件
+            logger.error(f"Batch ingest failed for {file_path}: {e}")
+            finish({"path": file_path, "status": "failed", "error": str(e)})
+            return
+        record = index.get(file_path)
+        if record and record.resource_id and record.size == stat.st_size and record.mtime == stat.st_mtime:
+            finish({"path": file_path, "status": "skipped", "resource_id": record.resource_id})
+            return
+
+        file_type = classify_file(file_path)
+        source = "parse_pdf" if file_type == "pdf" else "process_audio"
+        file_reporter = ProgressReporter(source, file=file_path)
+
+        async with slots:
+            try:
+                resource = await ingest_file(file_path, workers=workers[file_type], force=force, progress_callback=file_reporter.update)
+            except Exception as e:
+                logger.error(f"Batch ingest failed for {file_path}: {e}")
+                finish({"path": file_path, "status": "failed", "error": str(e)})
+                return
+            finally:
+                file_reporter.close()
+
+        await asyncio.to_thread(record_ingested, file_path, stat.st_size, stat.st_mtime, resource.get("id"))
+        finish({"path": file_path, "status": "processed", "resource_id": resource.get("id")})
+
+    await asyncio.gather(*(process(p) for p in file_paths))
+
+    report("batch", 100, f"批量导入完成：处理 {counts['processed']}，跳过 {counts['skipped']}，失败 {counts['failed']}")
+    return {"total": total, **counts, "items": items}
@@ -0,0 +1,294 @@
+"""
+意图识别引擎 - 表驱动的规则，编译为一个组合正则
+
+每个意图登记关键词、正则和文件扩展名，首次识别时全部编译为一个带命名分组的
+组合正则，一次扫描即可得到所有命中；参数（URL、路径、引号内文本）由另一个组合
+正则提取，扩展名命中的路径也计入对应意图的得分。规则识别结果按命令文本做 LRU
+记忆化，登记新意图时重新编译并清空缓存。
+
+规则都未命中时可退回 LLM（见 friday_core.llm），其响应同样有磁盘缓存。
+"""
+import copy
+import json
+import re
+from functools import lru_cache
+from typing import Dict, Any, Iterable, List, Optional
+from friday_core.config import Config
+from friday_core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+UNKNOWN_INTENT = {"type": "unknown", "action": "unknown"}
+
+# 意图表：名称 -> 规则
+_intents: Dict[str, Dict[str, Any]] = {}
+_matcher: Optional[Dict[str, Any]] = None
+
+# 扩展名命中比关键词更可靠，得分更高
+_EXTENSION_WEIGHT = 2
+_KEYWORD_WEIGHT = 1
+
+_JSON_RE = re.compile(r"\{.*?\}", re.S)
+
+
+def register_intent(
+    name: str,
+    action: str,
+    cmd: Optional[str] = None,
+    keywords: Iterable[str] = (),
+    patterns: Iterable[str] = (),
+    extensions: Iterable[str] = (),
+    priority: int = 0,
+    description: str = "",
+):
+    """
+    登记意图
+
+    Args:
+        name: 意图类型，如 "pdf"
+        action: 动作，如 "parse"
+        cmd: 对应的 Router 命令，如 "parse_pdf"
+        keywords: 关键词（不区分大小写；英文关键词要求前面不是字母）
+        patterns: 正则（不可使用命名分组）
+        extensions: 文件扩展名，命令中出现该扩展名的路径时计入得分
+        priority: 得分相同时优先级高的意图胜出
+        description: 给 LLM 的意图说明
+    """
+    global _matcher
+    _intents[name] = {
+        "type": name,
+        "action": action,
+        "cmd": cmd,
+        "keywords": tuple(keywords),
+        "patterns": tuple(patterns),
+        "extensions": tuple(ext.lower() for ext in extensions),
+        "priority": priority,
+        "order": len(_intents),
+        "description": description,
+    }
+    _matcher = None
+    _classify_rules.cache_clear()
+
+
+def get_intent(name: str) -> Optional[Dict[str, Any]]:
+    """获取已登记的意图规则"""
+    return _intents.get(name)
+
+
+def list_intents() -> List[Dict[str, Any]]:
+    """列出已登记的意图"""
+    return [
+        {key: intent[key] for key in ("type", "action", "cmd", "description")}
+        for intent in _intents.values()
+    ]
+
+
+def _keyword_regex(keyword: str) -> str:
+    escaped = re.escape(keyword.lower())
+    return f"(?<![a-z]){escaped}" if keyword[:1].isascii() and keyword[:1].isalpha() else escaped
+
+
+def _compile() -> Dict[str, Any]:
+    """把意图表编译为关键词组合正则和参数组合正则"""
+    groups = {}
+    alternatives = []
+    for index, intent in enumerate(_intents.values()):
+        parts = [_keyword_regex(k) for k in intent["keywords"]] + [f"(?:{p})" for p in intent["patterns"]]
+        if parts:
+            group = f"i{index}"
+            groups[group] = intent["type"]
+            alternatives.append(f"(?P<{group}>{'|'.join(parts)})")
+
+    extensions = sorted({ext for intent in _intents.values() for ext in intent["extensions"]}, key=len, reverse=True)
+    ext_regex = "|".join(re.escape(ext) for ext in extensions) or r"\.pdf"
+    args = re.compile(
+        r"(?P<url>https?://[^\s\"'<>，。]+)"
+        r"|\"(?P<dq>[^\"]+)\"|'(?P<sq>[^']+)'|“(?P<cq>[^”]+)”|「(?P<bq>[^」]+)」"
+        r"|(?P<path>(?:[A-Za-z]:[\\/]|~?/|\.{1,2}/)[^\s\"'，。；]+"
+        rf"|[^\s\"'，。；:/\\]+(?:{ext_regex}))",
+        re.I,
+    )
+    by_extension = {}
+    for intent in sorted(_intents.values(), key=lambda i: (-i["priority"], i["order"])):
+        for ext in intent["extensions"]:
+            by_extension.setdefault(ext, intent["type"])
+
+    return {
+        "keywords": re.compile("|".join(alternatives), re.I) if alternatives else None,
+        "groups": groups,
+        "args": args,
+        "extensions": extensions,
+        "by_extension": by_extension,
+    }
+
+
+def _get_matcher() -> Dict[str, Any]:
+    global _matcher
+    if _matcher is None:
+        _matcher = _compile()
+    return _matcher
+
+
+def _looks_like_path(value: str, extensions: List[str]) -> bool:
+    lower = value.lower()
+    return "/" in value or "\\" in value or any(lower.endswith(ext) for ext in extensions)
+
+
+def _strip_spans(command: str, spans: List[tuple]) -> str:
+    """去掉若干（可能重叠的）片段，合并多余空白"""
+    keep = [True] * len(command)
+    for start, end in spans:
+        keep[start:end] = [False] * (end - start)
+    return " ".join("".join(c if k else " " for c, k in zip(command, keep)).split())
+
+
+def _extract(command: str) -> tuple:
+    matcher = _get_matcher()
+    urls, paths, quoted = [], [], []
+    spans = []
+    for match in matcher["args"].finditer(command):
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "url":
+            urls.append(value)
+        elif kind == "path":
+            paths.append(value)
+        elif _looks_like_path(value, matcher["extensions"]):
+            paths.append(value)
+        else:
+            quoted.append(value)
+            continue
+        spans.append(match.span())
+    return {"urls": urls, "paths": paths, "quoted": quoted}, spans
+
+
+def extract_arguments(command: str) -> Dict[str, Any]:
+    """
+    提取命令中的参数
+
+    Returns:
+        {"urls": [...], "paths": [...], "quoted": [...], "text": 去掉 URL 和路径后的文本}
+    """
+    args, spans = _extract(command)
+    return {**args, "text": _strip_spans(command, spans)}
+
+
+@lru_cache(maxsize=Config.INTENT_CACHE_SIZE)
+def _classify_rules(command: str) -> Dict[str, Any]:
+    """规则识别（记忆化）；结果不可修改，调用方使用副本"""
+    matcher = _get_matcher()
+    args, spans = _extract(command)
+    args["text"] = _strip_spans(command, spans)
+    scores: Dict[str, int] = {}
+
+    if matcher["keywords"] is not None:
+        for match in matcher["keywords"].finditer(command):
+            intent = matcher["groups"][match.lastgroup]
+            scores[intent] = scores.get(intent, 0) + _KEYWORD_WEIGHT
+            spans.append(match.span())
+    for path in args["paths"]:
+        lower = path.lower()
+        for ext in matcher["extensions"]:
+            if lower.endswith(ext):
+                intent = matcher["by_extension"][ext]
+                scores[intent] = scores.get(intent, 0) + _EXTENSION_WEIGHT
+                break
+
+    if not scores:
+        return {**UNKNOWN_INTENT, "cmd": None, "args": {**args, "query": args["text"]}, "source": "none"}
+
+    best = max(scores, key=lambda name: (scores[name], _intents[name]["priority"], -_intents[name]["order"]))
+    intent = _intents[best]
+    # 去掉参数和关键词后的文本作为查询等自由文本参数
+    args["query"] = _strip_spans(command, spans)
+    return {"type": intent["type"], "action": intent["action"], "cmd": intent["cmd"], "args": args, "source": "rules"}
+
+
+def classify(command: str) -> Dict[str, Any]:
+    """只用规则识别意图"""
+    return copy.deepcopy(_classify_rules(command.strip()))
+
+
+def _llm_enabled() -> bool:
+    if not Config.INTENT_LLM_FALLBACK:
+        return False
+    return Config.LLM_PROVIDER == "mock" or bool(Config.get_api_key(Config.LLM_PROVIDER))
+
+
+def _llm_prompt(command: str) -> str:
+    options = "\n".join(f"- {intent['type']}: {intent['description']}" for intent in _intents.values())
+    return (
+        "判断下面这条命令属于哪种意图，只输出 JSON，例如 {\"type\": \"pdf\"}；都不属于时 type 为 \"unknown\"。\n"
+        f"可选意图：\n{options}\n\n命令：{command}"
+    )
+
+
+def _parse_llm_intent(text: str, rules: Dict[str, Any]) -> Dict[str, Any]:
+    match = _JSON_RE.search(text or "")
+    try:
+        name = json.loads(match.group(0)).get("type") if match else None
+    except ValueError:
+        name = None
+    intent = _intents.get(name)
+    if intent is None:
+        return rules
+    return {**rules, "type": intent["type"], "action": intent["action"], "cmd": intent["cmd"], "source": "llm"}
+
+
+async def identify_intents(commands: List[str], use_llm: bool = True) -> List[Dict[str, Any]]:
+    """
+    批量识别意图：先逐条规则识别，未命中的再一次性交给 LLM（相同命令只请求一次）
+
+    Returns:
+        与 commands 一一对应的 {"type", "action", "cmd", "args", "source"}；
+        source 为 "rules" | "llm" | "none"
+    """
+    results = [classify(command) for command in commands]
+    unresolved = [i for i, result in enumerate(results) if result["source"] == "none"]
+    if not unresolved or not use_llm or not _llm_enabled():
+        return results
+
+    from friday_core.llm import get_llm_client
+
+    try:
+        responses = await get_llm_client().complete_many([_llm_prompt(commands[i]) for i in unresolved], max_tokens=64)
+    except Exception as e:
+        logger.warning(f"LLM intent fallback failed: {e}")
+        return results
+    for i, response in zip(unresolved, responses):
+        results[i] = _parse_llm_intent(response["text"], results[i])
+    return results
+
+
+async def identify_intent(command: str, use_llm: bool = True) -> Dict[str, Any]:
+    """识别单条命令的意图"""
+    return (await identify_intents([command], use_llm=use_llm))[0]
+
+
+register_intent(
+    "pdf", "parse", cmd="parse_pdf",
+    keywords=("pdf", "论文", "文献"),
+    extensions=(".pdf",),
+    priority=3,
+    description="解析 PDF 文档或论文",
+)
+register_intent(
+    "video", "process", cmd="process_video",
+    keywords=("视频", "video", "youtube", "bilibili", "字幕", "subtitle"),
+    extensions=(".srt", ".vtt", ".info.json"),
+    priority=2,
+    description="处理视频字幕，生成总结和关键片段",
+)
+register_intent(
+    "audio", "process", cmd="process_audio",
+    keywords=("音频", "audio", "录音"),
+    extensions=(".mp3", ".wav", ".m4a", ".flac", ".ogg", ".aac", ".opus"),
+    priority=1,
+    description="转写音频或录音",
+)
+register_intent(
+    "search", "search", cmd="search_library",
+    keywords=("搜索", "查找", "检索", "search", "find"),
+    priority=4,
+    description="在资源库中检索内容",
+)
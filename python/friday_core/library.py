@@ -0,0 +1,326 @@
+"""
+Library 资源库管理 - 资源目录、内容哈希和资源记录的读写
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, AsyncIterator, List, Optional
+from sqlalchemy import and_, or_
+from friday_core.config import Config
+from friday_core.context import session_scope
+from friday_core.database import Resource
+from friday_core.logger import setup_logger
+from friday_core.metrics import stage
+
+logger = setup_logger(__name__)
+
+# 计算哈希时每次读取的字节数
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+# 由内容哈希派生资源 ID 的命名空间
+_RESOURCE_NAMESPACE = uuid.UUID("8f5f1d2e-4c1a-5b7e-9a53-6a0e7c3b2f41")
+
+
+def compute_file_hash(path: str) -> str:
+    """流式计算文件内容的 SHA-256（十六进制）"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_resource_dir(resource_id: str) -> Path:
+    """获取资源在 Library 中的目录"""
+    return Path(Config.LIBRARY_PATH) / resource_id
+
+
+def find_cached_resource(content_hash: str, extractor_version: str) -> Optional[Dict[str, Any]]:
+    """
+    按内容哈希和抽取器版本查找已处理过的资源
+
+    只有 Markdown 文件仍然存在时才视为命中。
+
+    Returns:
+        资源字典，未命中时返回 None
+    """
+    with session_scope() as session:
+        resource = (
+            session.query(Resource)
+            .filter(Resource.content_hash == content_hash, Resource.extractor_version == extractor_version)
+            .order_by(Resource.updated_at.desc())
+            .first()
+        )
+        if resource and resource.md_path and Path(resource.md_path).exists():
+            return resource.to_dict()
+        return None
+
+
+def get_resource(resource_id: str) -> Optional[Dict[str, Any]]:
+    """按 ID 读取资源"""
+    with session_scope() as session:
+        resource = session.get(Resource, resource_id)
+        return resource.to_dict() if resource else None
+
+
+def find_resource_id_by_hash(content_hash: str) -> Optional[str]:
+    """按内容哈希查找资源 ID（不限抽取器版本），用于强制重新抽取时复用目录"""
+    with session_scope() as session:
+        resource = session.query(Resource.id).filter(Resource.content_hash == content_hash).first()
+        return resource.id if resource else None
+
+
+def resource_id_for_hash(content_hash: str) -> str:
+    """
+    获取内容对应的资源 ID
+
+    已入库的内容沿用原资源 ID；新内容的 ID 由内容哈希确定（UUID5），
+    中断后重试会落到同一资源目录，从而可以从检查点继续。
+    """
+    return find_resource_id_by_hash(content_hash) or str(uuid.uuid5(_RESOURCE_NAMESPACE, content_hash))
+
+
+# 进程内每个内容哈希的 [锁, 持有或等待的请求数]，无人使用时移除
+_resource_locks: Dict[str, list] = {}
+
+
+def _lock_path(content_hash: str) -> Path:
+    return Path(Config.LIBRARY_PATH) / ".locks" / f"{content_hash}.lock"
+
+
+async def _claim_lock_file(path: Path):
+    """独占创建锁文件；已被其他进程持有时等待，持有者超过 RESOURCE_LOCK_STALE 秒未续期视为已退出"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    waiting = False
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                age = time.time() - os.path.getmtime(path)
+            except FileNotFoundError:
+                continue
+            if age > Config.RESOURCE_LOCK_STALE:
+                logger.warning(f"Removing stale resource lock: {path}")
+                path.unlink(missing_ok=True)
+                continue
+            if not waiting:
+                logger.info(f"Waiting for another import of the same content ({path.stem[:12]})")
+                waiting = True
+            await asyncio.sleep(0.2)
+            continue
+        with os.fdopen(fd, "w") as f:
+            f.write(str(os.getpid()))
+        return
+
+
+async def _renew_lock_file(path: Path):
+    """定期更新锁文件的修改时间，表明持有者仍在运行"""
+    while True:
+        await asyncio.sleep(Config.RESOURCE_LOCK_STALE / 4)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+
+@asynccontextmanager
+async def resource_lock(content_hash: str) -> AsyncIterator[None]:
+    """
+    同一内容的处理互斥
+
+    资源 ID 和目录由内容哈希确定，同一内容的多次导入（重复文件、并发请求、单次模式的
+    多个进程）会写同一个目录。进程内用 asyncio 锁排队，跨进程用 Library 下独占创建的
+    锁文件；拿到锁后调用方应重新查一次缓存，前一次导入完成时直接复用结果。
+    """
+    entry = _resource_locks.setdefault(content_hash, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            path = _lock_path(content_hash)
+            await _claim_lock_file(path)
+            renew = asyncio.create_task(_renew_lock_file(path))
+            try:
+                yield
+            finally:
+                renew.cancel()
+                path.unlink(missing_ok=True)
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            _resource_locks.pop(content_hash, None)
+
+
+def save_resource(resource_data: Dict[str, Any], content_hash: Optional[str] = None, extractor_version: Optional[str] = None) -> Dict[str, Any]:
+    """
+    新增或更新资源记录
+
+    Args:
+        resource_data: 资源字典（字段同 Resource.to_dict）
+        content_hash: 源文件内容哈希
+        extractor_version: 生成该资源的抽取器版本
+
+    Returns:
+        写入后的资源字典
+    """
+    with session_scope() as session:
+        resource = session.get(Resource, resource_data["id"])
+        if resource is None:
+            resource = Resource(id=resource_data["id"])
+            session.add(resource)
+
+        resource.type = resource_data["type"]
+        resource.title = resource_data["title"]
+        resource.source = resource_data["source"]
+        resource.md_path = resource_data.get("md_path")
+        resource.assets = resource_data.get("assets", [])
+        resource.vector_index = resource_data.get("vector_index")
+        if content_hash is not None:
+            resource.content_hash = content_hash
+        if extractor_version is not None:
+            resource.extractor_version = extractor_version
+
+        session.commit()
+        return resource.to_dict()
+
+
+# 列表排序字段：名称 -> (排序列, 游标值的解析函数)
+_SORT_COLUMNS = {
+    "created_at": (Resource.created_at, datetime.fromisoformat),
+    "updated_at": (Resource.updated_at, datetime.fromisoformat),
+    "title": (Resource.title, str),
+}
+
+# 列表只返回精简字段
+_SUMMARY_COLUMNS = (Resource.id, Resource.type, Resource.title, Resource.source, Resource.created_at, Resource.updated_at)
+
+
+def _encode_cursor(value: Any, resource_id: str) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, resource_id], ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str, parse) -> tuple:
+    try:
+        value, resource_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return parse(value), str(resource_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _parse_datetime(value: Optional[str], name: str) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError as e:
+        raise ValueError(f"Invalid '{name}': {value}") from e
+
+
+def list_resources(
+    type: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    title_prefix: Optional[str] = None,
+    sort: str = "created_at",
+    order: str = "desc",
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    分页列出资源库（键集分页）
+
+    按 (排序字段, id) 定位下一页的起点，而不是 OFFSET，翻到多深都只扫描一页的
+    索引范围；type + created_at 的组合、title 排序和前缀过滤都有对应索引。
+
+    Args:
+        type: 资源类型过滤（pdf | video | audio）
+        since / until: 创建时间范围（ISO 8601，含 since 不含 until）
+        title_prefix: 标题前缀（区分大小写）
+        sort: 排序字段 created_at | updated_at | title
+        order: asc | desc
+        limit: 每页条数，None 时使用配置，不超过 Config.LIBRARY_PAGE_MAX
+        cursor: 上一页返回的 next_cursor
+
+    Returns:
+        {"items": [{"id", "type", "title", "source", "created_at", "updated_at"}, ...],
+         "next_cursor": 下一页游标，没有更多时为 None}
+    """
+    if sort not in _SORT_COLUMNS:
+        raise ValueError(f"Unknown sort field: {sort}")
+    if order not in ("asc", "desc"):
+        raise ValueError(f"Unknown sort order: {order}")
+    column, parse = _SORT_COLUMNS[sort]
+    limit = max(1, min(int(limit or Config.LIBRARY_PAGE_SIZE), Config.LIBRARY_PAGE_MAX))
+    since_dt = _parse_datetime(since, "since")
+    until_dt = _parse_datetime(until, "until")
+
+    with session_scope() as session:
+        query = session.query(*_SUMMARY_COLUMNS)
+        if type:
+            query = query.filter(Resource.type == type)
+        if since_dt:
+            query = query.filter(Resource.created_at >= since_dt)
+        if until_dt:
+            query = query.filter(Resource.created_at < until_dt)
+        if title_prefix:
+            # 用范围条件代替 LIKE，才能走 title 索引
+            query = query.filter(Resource.title >= title_prefix, Resource.title < title_prefix + "\U0010ffff")
+        if cursor:
+            value, last_id = _decode_cursor(cursor, parse)
+            if order == "desc":
+                query = query.filter(column <= value, or_(column < value, and_(column == value, Resource.id < last_id)))
+            else:
+                query = query.filter(column >= value, or_(column > value, and_(column == value, Resource.id > last_id)))
+        if order == "desc":
+            query = query.order_by(column.desc(), Resource.id.desc())
+        else:
+            query = query.order_by(column.asc(), Resource.id.asc())
+        rows = query.limit(limit + 1).all()
+
+    items: List[Dict[str, Any]] = [
+        {
+            "id": row.id,
+            "type": row.type,
+            "title": row.title,
+            "source": row.source,
+            "created_at": row.created_at.isoformat() if row.created_at else None,
+            "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+        }
+        for row in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = _encode_cursor(getattr(last, sort), last.id)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+async def finalize_resource(resource: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    资源写入 Library 后的索引钩子：更新全文索引和向量索引
+
+    索引失败只记录日志，不影响资源本身。
+
+    Returns:
+        更新后的资源字典（vector_index 可能被填充）
+    """
+    from friday_core.search import index_resource_text
+    from friday_core.vector_index import update_vector_index
+
+    try:
+        with stage("fts_index"):
+            await asyncio.to_thread(index_resource_text, resource)
+    except Exception as e:
+        logger.error(f"Full-text indexing failed for {resource['id']}: {e}")
+    with stage("vector_index"):
+        return await update_vector_index(resource)
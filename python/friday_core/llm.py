@@ -0,0 +1,497 @@
+"""
+LLM 客户端 - 各模块共用的异步调用层
+
+- 连接池：所有提供方共用一个 httpx.AsyncClient，按事件循环创建
+- 限流：每个提供方一个令牌桶（每分钟请求数）和一个并发上限
+- 重试：网络错误、429 和 5xx 按指数退避重试，优先遵守 Retry-After
+- 合并：同一批或同时在途的相同请求只发送一次
+- 缓存：响应按请求内容哈希写入本地 SQLite，按 TTL 过期、超出容量时按最近访问淘汰
+
+提供方是一个异步函数：接收共享的 HTTP 客户端和请求字典，返回 {"text", "usage"}。
+内置 openai / claude / gemini 三个 REST 提供方，以及不访问网络的 mock 提供方。
+"""
+import asyncio
+import hashlib
+import json
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Awaitable, Callable, List, Optional
+from friday_core.config import Config
+from friday_core.logger import setup_logger
+from friday_core.metrics import record_worker_stats
+
+logger = setup_logger(__name__)
+
+LLMProvider = Callable[[Any, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+_provider_factories: Dict[str, Callable[[], LLMProvider]] = {}
+_providers: Dict[str, LLMProvider] = {}
+_client: Optional["LLMClient"] = None
+
+# 可重试的 HTTP 状态码
+_RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+class LLMError(RuntimeError):
+    """LLM 调用失败；retryable 表示可以退避后重试"""
+
+    def __init__(self, message: str, retryable: bool = False, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def register_llm_provider(name: str, factory: Callable[[], LLMProvider]):
+    """注册 LLM 提供方，factory 在首次使用时调用"""
+    _provider_factories[name] = factory
+    _providers.pop(name, None)
+
+
+def get_llm_provider(name: Optional[str] = None) -> LLMProvider:
+    """获取（按需创建）LLM 提供方"""
+    name = name or Config.LLM_PROVIDER
+    if name not in _providers:
+        factory = _provider_factories.get(name)
+        if factory is None:
+            raise ValueError(f"Unknown LLM provider: {name}")
+        _providers[name] = factory()
+    return _providers[name]
+
+
+# ---------------------------------------------------------------------------
+# 提供方
+# ---------------------------------------------------------------------------
+
+def _require_key(provider: str) -> str:
+    key = Config.get_api_key(provider)
+    if not key:
+        raise ValueError(f"Missing API key for LLM provider: {provider}")
+    return key
+
+
+async def _post(http, url: str, headers: Dict[str, str], body: Dict[str, Any]) -> Dict[str, Any]:
+    """发送请求，把 HTTP 错误转换为 LLMError"""
+    import httpx
+
+    try:
+        response = await http.post(url, headers=headers, json=body)
+    except httpx.TransportError as e:
+        raise LLMError(f"LLM request failed: {e}", retryable=True) from e
+
+    if response.status_code >= 400:
+        retry_after = response.headers.get("retry-after")
+        try:
+            retry_after = float(retry_after) if retry_after else None
+        except ValueError:
+            retry_after = None
+        raise LLMError(
+            f"LLM request failed with HTTP {response.status_code}: {response.text[:500]}",
+            retryable=response.status_code in _RETRY_STATUS,
+            retry_after=retry_after,
+        )
+    return response.json()
+
+
+def _openai_factory() -> LLMProvider:
+    """OpenAI Chat Completions（兼容接口可通过 OPENAI_BASE_URL 指定）"""
+
+    async def send(http, request: Dict[str, Any]) -> Dict[str, Any]:
+        messages = []
+        if request.get("system"):
+            messages.append({"role": "system", "content": request["system"]})
+        messages.append({"role": "user", "content": request["prompt"]})
+        data = await _post(
+            http,
+            f"{Config.OPENAI_BASE_URL.rstrip('/')}/chat/completions",
+            {"Authorization": f"Bearer {_require_key('openai')}"},
+            {
+                "model": request["model"],
+                "messages": messages,
+                "temperature": request["temperature"],
+                "max_tokens": request["max_tokens"],
+            },
+        )
+        return {"text": data["choices"][0]["message"]["content"] or "", "usage": data.get("usage")}
+
+    return send
+
+
+def _claude_factory() -> LLMProvider:
+    """Anthropic Messages API"""
+
+    async def send(http, request: Dict[str, Any]) -> Dict[str, Any]:
+        body = {
+            "model": request["model"],
+            "max_tokens": request["max_tokens"],
+            "temperature": request["temperature"],
+            "messages": [{"role": "user", "content": request["prompt"]}],
+        }
+        if request.get("system"):
+            body["system"] = request["system"]
+        data = await _post(
+            http,
+            "https://api.anthropic.com/v1/messages",
+            {"x-api-key": _require_key("claude"), "anthropic-version": "2023-06-01"},
+            body,
+        )
+        text = "".join(block.get("text", "") for block in data.get("content", []) if block.get("type") == "text")
+        return {"text": text, "usage": data.get("usage")}
+
+    return send
+
+
+def _gemini_factory() -> LLMProvider:
+    """Google Gemini generateContent"""
+
+    async def send(http, request: Dict[str, Any]) -> Dict[str, Any]:
+        body: Dict[str, Any] = {
+            "contents": [{"role": "user", "parts": [{"text": request["prompt"]}]}],
+            "generationConfig": {"temperature": request["temperature"], "maxOutputTokens": request["max_tokens"]},
+        }
+        if request.get("system"):
+            body["systemInstruction"] = {"parts": [{"text": request["system"]}]}
+        data = await _post(
+            http,
+            f"https://generativelanguage.googleapis.com/v1beta/models/{request['model']}:generateContent",
+            {"x-goog-api-key": _require_key("gemini")},
+            body,
+        )
+        candidates = data.get("candidates") or [{}]
+        parts = candidates[0].get("content", {}).get("parts", [])
+        return {"text": "".join(part.get("text", "") for part in parts), "usage": data.get("usageMetadata")}
+
+    return send
+
+
+# mock 提供方的应答函数：(请求) -> 文本，可通过 set_mock_responder 替换
+_mock_responder: Optional[Callable[[Dict[str, Any]], str]] = None
+
+
+def set_mock_responder(responder: Optional[Callable[[Dict[str, Any]], str]]):
+    """替换 mock 提供方的应答函数（None 恢复默认的回显）"""
+    global _mock_responder
+    _mock_responder = responder
+
+
+def _mock_factory() -> LLMProvider:
+    """
+    本地 mock：不访问网络，默认回显请求摘要
+
+    LLM_MOCK_LATENCY 模拟响应延迟；LLM_MOCK_FAILURE_RATE 按概率返回可重试错误，
+    用于测试限流、重试和缓存。
+    """
+
+    async def send(http, request: Dict[str, Any]) -> Dict[str, Any]:
+        if Config.LLM_MOCK_LATENCY > 0:
+            await asyncio.sleep(Config.LLM_MOCK_LATENCY)
+        if Config.LLM_MOCK_FAILURE_RATE > 0 and random.random() < Config.LLM_MOCK_FAILURE_RATE:
+            raise LLMError("Mock provider simulated failure", retryable=True)
+        if _mock_responder is not None:
+            text = _mock_responder(request)
+        else:
+            text = f"[mock:{request['model']}] {request['prompt'][:200]}"
+        return {"text": text, "usage": {"prompt_chars": len(request["prompt"]), "completion_chars": len(text)}}
+
+    return send
+
+
+# ---------------------------------------------------------------------------
+# 响应缓存
+# ---------------------------------------------------------------------------
+
+class ResponseCache:
+    """按请求哈希缓存响应的本地 SQLite 存储，TTL 过期，超出容量按最近访问淘汰"""
+
+    def __init__(self, path: str, ttl_seconds: float, max_bytes: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl_seconds > 0 and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Dict[str, Any]):
+        data = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now, now),
+            )
+            self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        if self.ttl_seconds > 0:
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 从最久未访问的开始删除，直到总大小回到上限以内
+        excess = total - self.max_bytes
+        freed = 0
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            stale.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# ---------------------------------------------------------------------------
+# 客户端
+# ---------------------------------------------------------------------------
+
+class _RateLimiter:
+    """令牌桶：每分钟 rate 个请求，允许 rate 个的突发"""
+
+    def __init__(self, rate_per_minute: int):
+        self.rate = rate_per_minute / 60
+        self.capacity = max(1, rate_per_minute)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class LLMClient:
+    """
+    共享的 LLM 客户端
+
+    HTTP 连接池、限流器和在途请求表都属于创建它们的事件循环；单次模式下每次
+    asyncio.run 都是新的事件循环，检测到切换时重新创建。
+    """
+
+    def __init__(self):
+        self.cache = ResponseCache(Config.LLM_CACHE_PATH, Config.LLM_CACHE_TTL, Config.LLM_CACHE_MAX_MB * 1024 * 1024)
+        self._loop = None
+        self._http = None
+        self._limiters: Dict[str, _RateLimiter] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._http = None
+            self._limiters = {}
+            self._semaphores = {}
+            self._inflight = {}
+
+    def _get_http(self):
+        if self._http is None:
+            import httpx
+
+            self._http = httpx.AsyncClient(
+                timeout=Config.LLM_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=Config.LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=Config.LLM_MAX_CONNECTIONS,
+                ),
+            )
+        return self._http
+
+    def _limits_for(self, provider: str):
+        if provider not in self._semaphores:
+            self._semaphores[provider] = asyncio.Semaphore(Config.get_llm_concurrency().get(provider, Config.LLM_DEFAULT_CONCURRENCY))
+            rate = Config.get_llm_rate_limits().get(provider)
+            if rate:
+                self._limiters[provider] = _RateLimiter(rate)
+        return self._semaphores[provider], self._limiters.get(provider)
+
+    @staticmethod
+    def _request_key(request: Dict[str, Any]) -> str:
+        data = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    async def complete(
+        self,
+        prompt: str,
+        system: Optional[str] = None,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        temperature: float = 0.0,
+        max_tokens: Optional[int] = None,
+        use_cache: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        单次补全
+
+        Returns:
+            {"text", "provider", "model", "usage", "cached"}
+        """
+        self._bind_loop()
+        provider = provider or Config.LLM_PROVIDER
+        request = {
+            "provider": provider,
+            "model": model or Config.get_llm_model(provider),
+            "system": system,
+            "prompt": prompt,
+            "temperature": temperature,
+            "max_tokens": max_tokens or Config.LLM_MAX_TOKENS,
+        }
+        key = self._request_key(request)
+
+        if use_cache:
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                return {**cached, "cached": True}
+
+        # 相同请求正在进行时等待它的结果，不重复发送
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return {**(await asyncio.shield(inflight)), "cached": True}
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await self._send_with_retry(request)
+            if use_cache:
+                await asyncio.to_thread(self.cache.put, key, response)
+            future.set_result(response)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 没有等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        return {**response, "cached": False}
+
+    async def complete_many(self, prompts: List[str], **kwargs) -> List[Dict[str, Any]]:
+        """
+        批量补全：相同的提示只发送一次，其余并发发送（受各提供方的并发上限和限流约束）
+
+        Returns:
+            与 prompts 一一对应的结果
+        """
+        unique = list(dict.fromkeys(prompts))
+        results = await asyncio.gather(*(self.complete(prompt, **kwargs) for prompt in unique))
+        by_prompt = dict(zip(unique, results))
+        return [by_prompt[prompt] for prompt in prompts]
+
+    async def _send_with_retry(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        provider = request["provider"]
+        send = get_llm_provider(provider)
+        semaphore, limiter = self._limits_for(provider)
+        http = None if provider == "mock" else self._get_http()
+
+        attempt = 0
+        while True:
+            if limiter is not None:
+                await limiter.acquire()
+            try:
+                async with semaphore:
+                    started = time.perf_counter()
+                    try:
+                        result = await send(http, request)
+                    finally:
+                        record_worker_stats({"llm": time.perf_counter() - started})
+            except LLMError as e:
+                if not e.retryable or attempt >= Config.LLM_MAX_RETRIES:
+                    raise
+                # 指数退避加抖动，服务端给出 Retry-After 时以它为准
+                delay = e.retry_after or min(Config.LLM_BACKOFF_MAX, Config.LLM_BACKOFF_BASE * 2 ** attempt)
+                delay *= random.uniform(1.0, 1.25)
+                attempt += 1
+                logger.warning(f"LLM request to {provider} failed ({e}), retry {attempt} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            return {
+                "text": result["text"],
+                "provider": provider,
+                "model": request["model"],
+                "usage": result.get("usage"),
+            }
+
+    async def aclose(self):
+        """关闭连接池和缓存"""
+        if self._http is not None and self._loop is asyncio.get_running_loop():
+            await self._http.aclose()
+        self._http = None
+        self.cache.close()
+
+
+def get_llm_client() -> LLMClient:
+    """获取共享的 LLM 客户端"""
+    global _client
+    if _client is None:
+        _client = LLMClient()
+    return _client
+
+
+async def close_llm_client():
+    """关闭共享的 LLM 客户端（未创建时什么也不做）"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def complete(prompt: str, **kwargs) -> str:
+    """便捷函数：返回补全文本"""
+    return (await get_llm_client().complete(prompt, **kwargs))["text"]
+
+
+register_llm_provider("openai", _openai_factory)
+register_llm_provider("claude", _claude_factory)
+register_llm_provider("gemini", _gemini_factory)
+register_llm_provider("mock", _mock_factory)
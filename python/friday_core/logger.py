@@ -16,9 +16,9 @@ logger.add(
     level="INFO",
 )
 
-# 添加文件输出
-log_dir = Path("python/logs")
-log_dir.mkdir(parents=True, exist_ok=True)
+# 添加文件输出（delay=True：首条日志写入时才创建目录和文件，导入本模块不触发磁盘 I/O）
+# 目录固定在 python/ 包目录下，与启动时的工作目录无关
+log_dir = Path(__file__).resolve().parent.parent / "logs"
 
 logger.add(
     log_dir / "friday_{time:YYYY-MM-DD}.log",
@@ -26,6 +26,7 @@ logger.add(
     retention="30 days",
     format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function} - {message}",
     level="DEBUG",
+    delay=True,
 )
 
 
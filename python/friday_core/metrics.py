@@ -0,0 +1,278 @@
+"""
+性能埋点 - 记录每条命令和每个流水线阶段的耗时、CPU、内存和 I/O
+
+Router.route 为每条命令建立一个 RequestMetrics 并放入上下文，处理器内部用
+stage("name") 包住各阶段即可记录：墙钟时间，以及阶段开始和结束时采样的常驻内存
+（rss_start_kb / rss_end_kb）。CPU 时间和读写字节数只能按进程统计，常驻模式下会
+包含同时执行的其他请求，因此以 process_ 前缀标明；process_peak_rss_kb 是进程
+启动以来的峰值，不是本请求的峰值。进程池 worker 内的分项耗时通过
+record_worker_stats 汇总。
+
+结果会写入当前任务的 tasks.metrics 字段（任务队列执行时），并在配置了
+METRICS_EXPORT_PATH 时以 JSON Lines 追加导出。
+
+单个请求可以通过 payload 中的 "_profile": "cprofile" | "sampling" 开启剖析：
+cprofile 使用标准库 cProfile（协程交错执行时会统计到同一线程上的其他请求），
+sampling 使用 pyinstrument（需单独安装）。剖析结果保存在 Config.PROFILE_DIR。
+同一线程同时只能有一个剖析器，剖析的请求在事件循环上排队依次执行；剖析中的请求
+内部再路由的命令（如 execute_command 分发的命令）包含在外层的剖析结果中。
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional
+from friday_core.config import Config
+from friday_core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+current_metrics: ContextVar[Optional["RequestMetrics"]] = ContextVar("current_metrics", default=None)
+
+PROFILE_MODES = ("cprofile", "sampling")
+
+# 当前上下文是否已在剖析中（嵌套的命令不再单独剖析）
+_profiled: ContextVar[bool] = ContextVar("_profiled", default=False)
+# 每个事件循环一把剖析锁：cProfile / pyinstrument 都不能在同一线程上同时开启两个
+_profile_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+
+def _rss_kb() -> Optional[int]:
+    """进程当前常驻内存（KB）"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, IndexError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss // 1024
+    except ImportError:
+        return None
+
+
+def _peak_rss_kb() -> Optional[int]:
+    """进程启动以来的峰值常驻内存（KB）"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS 返回字节，Linux 返回 KB
+        return peak // 1024 if sys.platform == "darwin" else peak
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) // 1024
+    except ImportError:
+        return None
+
+
+def _io_bytes() -> Optional[Dict[str, int]]:
+    """进程累计读写字节数"""
+    try:
+        with open("/proc/self/io", "r") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+        return {"read": int(fields["rchar"]), "written": int(fields["wchar"])}
+    except (OSError, KeyError, ValueError):
+        pass
+    try:
+        import psutil
+        counters = psutil.Process().io_counters()
+        return {"read": counters.read_bytes, "written": counters.write_bytes}
+    except (ImportError, AttributeError):
+        return None
+
+
+class _Snapshot:
+    """一次资源采样"""
+
+    def __init__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        self.io = _io_bytes()
+        self.rss = _rss_kb()
+
+    def delta(self, start: "_Snapshot") -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "wall_s": round(self.wall - start.wall, 4),
+            "rss_start_kb": start.rss,
+            "rss_end_kb": self.rss,
+            "process_cpu_s": round(self.cpu - start.cpu, 4),
+            "process_peak_rss_kb": _peak_rss_kb(),
+        }
+        if self.io and start.io:
+            result["process_bytes_read"] = self.io["read"] - start.io["read"]
+            result["process_bytes_written"] = self.io["written"] - start.io["written"]
+        return result
+
+
+class RequestMetrics:
+    """单条命令的埋点数据"""
+
+    def __init__(self, cmd: str):
+        self.cmd = cmd
+        self.started_at = datetime.now().isoformat()
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.total: Dict[str, Any] = {}
+        self.profile_path: Optional[str] = None
+
+    @contextmanager
+    def stage(self, name: str):
+        start = _Snapshot()
+        try:
+            yield
+        finally:
+            self.stages.setdefault(name, {}).update(_Snapshot().delta(start))
+
+    def add_worker_stats(self, stats: Dict[str, float]):
+        """
+        汇总 worker 进程内的分项统计
+
+        stats 形如 {"text": 秒, "images": 秒, "bytes_written": 字节}，
+        秒数累加到对应阶段的 worker_s（多个 worker 的耗时之和），字节数累加到
+        命令总计的 worker_bytes_written 等字段（worker 的 I/O 不计入本进程的计数器）。
+        """
+        for key, value in stats.items():
+            if key.startswith("bytes"):
+                key = f"worker_{key}"
+                self.total[key] = self.total.get(key, 0) + value
+            else:
+                stage = self.stages.setdefault(key, {})
+                stage["worker_s"] = round(stage.get("worker_s", 0.0) + value, 4)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"cmd": self.cmd, "started_at": self.started_at, **self.total, "stages": self.stages}
+        if self.profile_path:
+            data["profile"] = self.profile_path
+        return data
+
+
+@contextmanager
+def stage(name: str):
+    """记录当前命令的一个阶段；不在埋点上下文中时什么也不做"""
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    with metrics.stage(name):
+        yield
+
+
+def record_worker_stats(stats: Dict[str, float]):
+    """把 worker 进程返回的分项统计汇总到当前命令"""
+    metrics = current_metrics.get()
+    if metrics is not None:
+        metrics.add_worker_stats(stats)
+
+
+def _profile_file(cmd: str, suffix: str) -> Path:
+    profile_dir = Path(Config.PROFILE_DIR)
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    return profile_dir / f"{cmd}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.{suffix}"
+
+
+@contextmanager
+def _profiler(metrics: RequestMetrics, mode: str):
+    """开启 cProfile / pyinstrument 剖析，结束时写入剖析文件"""
+    if mode == "sampling":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logger.warning("pyinstrument is not installed, falling back to cProfile")
+        else:
+            profiler = Profiler(async_mode="enabled")
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                path = _profile_file(metrics.cmd, "html")
+                path.write_text(profiler.output_html(), encoding="utf-8")
+                metrics.profile_path = str(path)
+            return
+
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        path = _profile_file(metrics.cmd, "prof")
+        profiler.dump_stats(str(path))
+        metrics.profile_path = str(path)
+
+
+@asynccontextmanager
+async def _profiling(metrics: RequestMetrics, mode: Optional[str]):
+    """
+    按需剖析：同一事件循环上的剖析请求排队依次执行
+
+    Raises:
+        ValueError: 未知的剖析模式
+    """
+    if mode is None or _profiled.get():
+        yield
+        return
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode: {mode}")
+
+    lock = _profile_locks.setdefault(asyncio.get_running_loop(), asyncio.Lock())
+    async with lock:
+        token = _profiled.set(True)
+        try:
+            with _profiler(metrics, mode):
+                yield
+        finally:
+            _profiled.reset(token)
+
+
+def _export(metrics: Dict[str, Any]):
+    """写入任务记录并导出到 JSON Lines 文件（在线程中调用）"""
+    from friday_core.progress import current_task_id
+
+    task_id = current_task_id.get()
+    if task_id:
+        from friday_core.task_queue import update_task_record
+        update_task_record(task_id, metrics=metrics)
+
+    if Config.METRICS_EXPORT_PATH:
+        export_path = Path(Config.METRICS_EXPORT_PATH)
+        export_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(export_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"task_id": task_id, "pid": os.getpid(), **metrics}, ensure_ascii=False) + "\n")
+
+
+@asynccontextmanager
+async def instrument(cmd: str, profile: Optional[str] = None):
+    """
+    为一条命令建立埋点上下文
+
+    Args:
+        cmd: 命令名
+        profile: None | "cprofile" | "sampling"
+    """
+    metrics = RequestMetrics(cmd)
+    token = current_metrics.set(metrics)
+    start = _Snapshot()
+    try:
+        async with _profiling(metrics, profile):
+            yield metrics
+    finally:
+        current_metrics.reset(token)
+        metrics.total.update(_Snapshot().delta(start))
+        data = metrics.to_dict()
+        logger.debug(f"Metrics for {cmd}: {data}")
+        try:
+            # 写任务记录可能等待数据库写锁，放到线程中执行，不阻塞事件循环
+            await asyncio.to_thread(_export, data)
+        except Exception as e:
+            logger.warning(f"Failed to export metrics for {cmd}: {e}")
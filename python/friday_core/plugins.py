@@ -0,0 +1,407 @@
+"""
+插件系统 - 免导入发现、首次使用时懒加载、在独立线程池或进程池中带超时执行
+
+插件来源：
+1. 已安装包的 entry points（group "friday.plugins"，值为 "模块:函数"）
+2. 插件目录（默认 python/plugins，另可通过 PLUGIN_DIRS 追加）：
+   - 目录下有 plugins.json 清单时以清单为准
+   - 否则用 AST 扫描 *.py 中 @friday_plugin(...) 装饰的函数，不执行插件代码；
+     扫描结果按文件 mtime / 大小缓存在 PLUGIN_INDEX_PATH，只重新解析变化的文件
+
+每个插件注册为同名的 Router 命令（内置命令优先），声明了 keywords 的插件同时
+登记为意图。插件函数接收 payload 字典、返回结果字典，可以是同步或异步函数：
+- mode="thread"：在专用线程池中执行，超时后放弃等待（线程无法强制终止）
+- mode="process"：每次调用独占一个 worker 进程（空闲 worker 复用），超时后只终止
+  这个 worker，适合 CPU 密集型插件；插件只在 worker 中导入，主进程按发现阶段的选项调度
+- 其他异步函数在事件循环上执行，超时后取消
+"""
+import ast
+import asyncio
+import importlib
+import importlib.util
+import inspect
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from importlib.metadata import entry_points
+from pathlib import Path
+from typing import Dict, Any, Callable, List, Optional
+from friday_core.config import Config
+from friday_core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+ENTRY_POINT_GROUP = "friday.plugins"
+MANIFEST_FILE = "plugins.json"
+
+# 内置插件目录
+DEFAULT_PLUGIN_DIR = Path(__file__).resolve().parent.parent / "plugins"
+
+# 装饰器可声明的选项及默认值
+_OPTION_DEFAULTS = {"mode": "thread", "timeout": None, "description": "", "keywords": []}
+
+_registry: Optional[Dict[str, Dict[str, Any]]] = None
+_loaded: Dict[str, Callable] = {}
+_thread_pool: Optional[ThreadPoolExecutor] = None
+# 进程模式：调度线程池限制并发调用数，每次调用独占一个单 worker 进程池，空闲的留待复用
+_dispatch_pool: Optional[ThreadPoolExecutor] = None
+_idle_workers: List[ProcessPoolExecutor] = []
+_idle_lock = threading.Lock()
+
+
+def friday_plugin(name: str, mode: str = "thread", timeout: Optional[float] = None, description: str = "", keywords=()):
+    """
+    插件装饰器：声明插件名和执行选项
+
+    选项必须写成字面量，插件发现阶段通过 AST 读取而不导入模块。
+
+    Args:
+        name: 插件名，即 Router 命令名
+        mode: "thread" | "process"
+        timeout: 超时秒数，None 时使用 Config.PLUGIN_TIMEOUT
+        description: 插件说明
+        keywords: 意图关键词，命令中出现时由 agent 分发到该插件
+    """
+    if mode not in ("thread", "process"):
+        raise ValueError(f"Unknown plugin mode: {mode}")
+
+    def decorator(func):
+        func.__friday_plugin__ = {
+            "name": name,
+            "mode": mode,
+            "timeout": timeout,
+            "description": description,
+            "keywords": list(keywords),
+        }
+        return func
+    return decorator
+
+
+# ---------------------------------------------------------------------------
+# 发现
+# ---------------------------------------------------------------------------
+
+def _plugin_dirs() -> List[Path]:
+    dirs = [DEFAULT_PLUGIN_DIR]
+    dirs.extend(Path(p) for p in Config.PLUGIN_DIRS.split(os.pathsep) if p)
+    return [d for d in dirs if d.is_dir()]
+
+
+def _decorator_options(decorator: ast.expr) -> Optional[Dict[str, Any]]:
+    """从 @friday_plugin(...) 的 AST 读取字面量参数，不是该装饰器时返回 None"""
+    if not isinstance(decorator, ast.Call):
+        return None
+    func = decorator.func
+    func_name = func.id if isinstance(func, ast.Name) else func.attr if isinstance(func, ast.Attribute) else None
+    if func_name != "friday_plugin":
+        return None
+    options: Dict[str, Any] = {}
+    try:
+        if decorator.args:
+            options["name"] = ast.literal_eval(decorator.args[0])
+        for keyword in decorator.keywords:
+            if keyword.arg:
+                options[keyword.arg] = ast.literal_eval(keyword.value)
+    except ValueError:
+        return None
+    return options if options.get("name") else None
+
+
+def _scan_file(path: Path) -> List[Dict[str, Any]]:
+    """AST 扫描一个插件文件"""
+    try:
+        tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    except (OSError, SyntaxError, UnicodeDecodeError) as e:
+        logger.warning(f"Skipping plugin file {path}: {e}")
+        return []
+    plugins = []
+    for node in tree.body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        for decorator in node.decorator_list:
+            options = _decorator_options(decorator)
+            if options:
+                plugins.append({**_OPTION_DEFAULTS, **options, "module": str(path.resolve()), "attr": node.name})
+    return plugins
+
+
+def _load_index() -> Dict[str, Any]:
+    try:
+        with open(Config.PLUGIN_INDEX_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(index: Dict[str, Any]):
+    path = Path(Config.PLUGIN_INDEX_PATH)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Failed to save plugin index: {e}")
+
+
+def _discover_dir(directory: Path, index: Dict[str, Any], seen: set) -> List[Dict[str, Any]]:
+    """发现目录中的插件：有清单用清单，否则按缓存索引增量扫描"""
+    manifest = directory / MANIFEST_FILE
+    if manifest.exists():
+        with open(manifest, "r", encoding="utf-8") as f:
+            entries = json.load(f).get("plugins", [])
+        plugins = []
+        for entry in entries:
+            module = entry["module"]
+            # 以 .py 结尾的视为相对清单目录的文件，否则为可导入的模块名
+            if module.endswith(".py"):
+                module = str((directory / module).resolve())
+            plugins.append({**_OPTION_DEFAULTS, **entry, "module": module, "attr": entry.get("attr", "run")})
+        return plugins
+
+    plugins = []
+    for path in sorted(directory.glob("*.py")):
+        if path.name.startswith("_"):
+            continue
+        key = str(path.resolve())
+        seen.add(key)
+        stat = path.stat()
+        cached = index.get(key)
+        if not cached or cached["mtime"] != stat.st_mtime or cached["size"] != stat.st_size:
+            cached = {"mtime": stat.st_mtime, "size": stat.st_size, "plugins": _scan_file(path)}
+            index[key] = cached
+        plugins.extend(cached["plugins"])
+    return plugins
+
+
+def _discover_entry_points() -> List[Dict[str, Any]]:
+    plugins = []
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        module, _, attr = ep.value.partition(":")
+        plugins.append({**_OPTION_DEFAULTS, "name": ep.name, "module": module.strip(), "attr": attr.strip() or "run"})
+    return plugins
+
+
+def discover_plugins(refresh: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    发现所有插件（不导入插件模块），结果在进程内缓存
+
+    Returns:
+        插件名 -> {"name", "module", "attr", "mode", "timeout", "description", "keywords"}
+    """
+    global _registry
+    if _registry is not None and not refresh:
+        return _registry
+
+    index = _load_index()
+    original = json.dumps(index, sort_keys=True)
+    seen: set = set()
+    found = _discover_entry_points()
+    for directory in _plugin_dirs():
+        found.extend(_discover_dir(directory, index, seen))
+
+    # 删除已不存在的文件，索引有变化时写回
+    stale = [key for key in index if key not in seen and not Path(key).exists()]
+    for key in stale:
+        del index[key]
+    if json.dumps(index, sort_keys=True) != original:
+        _save_index(index)
+
+    registry: Dict[str, Dict[str, Any]] = {}
+    for plugin in found:
+        if plugin["name"] in registry:
+            logger.warning(f"Duplicate plugin name {plugin['name']}: {plugin['module']} ignored")
+            continue
+        registry[plugin["name"]] = plugin
+    _registry = registry
+    _loaded.clear()
+    _register_intents(registry)
+    logger.info(f"Discovered {len(registry)} plugins")
+    return registry
+
+
+def _register_intents(registry: Dict[str, Dict[str, Any]]):
+    """声明了关键词的插件登记为意图"""
+    from friday_core.intents import register_intent
+    for plugin in registry.values():
+        if plugin.get("keywords"):
+            register_intent(
+                plugin["name"], "run", cmd=plugin["name"],
+                keywords=plugin["keywords"], description=plugin.get("description", ""),
+            )
+
+
+def get_plugin(name: str) -> Optional[Dict[str, Any]]:
+    """按名称获取插件描述（不导入）"""
+    return discover_plugins().get(name)
+
+
+def list_plugins() -> List[Dict[str, Any]]:
+    """列出插件描述"""
+    return [
+        {key: plugin.get(key) for key in ("name", "mode", "timeout", "description", "keywords")}
+        for plugin in discover_plugins().values()
+    ]
+
+
+# ---------------------------------------------------------------------------
+# 加载与执行
+# ---------------------------------------------------------------------------
+
+def _import_plugin(spec: Dict[str, Any]) -> Callable:
+    """导入插件函数；文件形式的插件以 friday_plugins.<文件名> 为模块名"""
+    module_ref = spec["module"]
+    if module_ref.endswith(".py"):
+        module_name = f"friday_plugins.{Path(module_ref).stem}"
+        module = sys.modules.get(module_name)
+        if module is None:
+            import_spec = importlib.util.spec_from_file_location(module_name, module_ref)
+            module = importlib.util.module_from_spec(import_spec)
+            sys.modules[module_name] = module
+            try:
+                import_spec.loader.exec_module(module)
+            except BaseException:
+                sys.modules.pop(module_name, None)
+                raise
+    else:
+        module = importlib.import_module(module_ref)
+    return getattr(module, spec["attr"])
+
+
+def load_plugin(name: str) -> Callable:
+    """首次使用时导入插件，合并装饰器声明的选项"""
+    if name in _loaded:
+        return _loaded[name]
+    spec = get_plugin(name)
+    if spec is None:
+        raise ValueError(f"Unknown plugin: {name}")
+    func = _import_plugin(spec)
+    declared = getattr(func, "__friday_plugin__", None)
+    if declared:
+        # entry point 插件的选项只有导入后才知道
+        spec.update({key: value for key, value in declared.items() if key != "name"})
+    _loaded[name] = func
+    logger.info(f"Loaded plugin: {name} ({spec['mode']})")
+    return func
+
+
+def _run_in_process(spec: Dict[str, Any], payload: Dict[str, Any]) -> Any:
+    """worker 进程中导入并执行插件（每个 worker 进程只导入一次）"""
+    func = _import_plugin(spec)
+    result = func(payload)
+    if inspect.isawaitable(result):
+        result = asyncio.run(result)
+    return result
+
+
+def _get_thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=Config.PLUGIN_THREADS, thread_name_prefix="friday-plugin")
+    return _thread_pool
+
+
+def _get_dispatch_pool() -> ThreadPoolExecutor:
+    global _dispatch_pool
+    if _dispatch_pool is None:
+        _dispatch_pool = ThreadPoolExecutor(max_workers=Config.PLUGIN_PROCESSES, thread_name_prefix="friday-plugin-process")
+    return _dispatch_pool
+
+
+def _terminate_worker(worker: ProcessPoolExecutor):
+    """终止一个 worker 进程（只影响在其中执行的那次调用）"""
+    processes = list((getattr(worker, "_processes", None) or {}).values())
+    worker.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+
+def _call_in_worker(name: str, spec: Dict[str, Any], payload: Dict[str, Any], timeout: float) -> Any:
+    """
+    在调度线程中执行一次进程模式调用：取一个空闲 worker（没有则新建），阻塞等待结果
+
+    Raises:
+        TimeoutError: 超时，该 worker 被终止，其他调用不受影响
+    """
+    with _idle_lock:
+        worker = _idle_workers.pop() if _idle_workers else None
+    if worker is None:
+        worker = ProcessPoolExecutor(max_workers=1)
+    try:
+        result = worker.submit(_run_in_process, spec, payload).result(timeout)
+    except FutureTimeoutError:
+        _terminate_worker(worker)
+        raise TimeoutError(f"Plugin {name} timed out after {timeout}s")
+    except BaseException:
+        # 插件抛出的异常不影响 worker；worker 崩溃时丢弃
+        if getattr(worker, "_broken", False):
+            _terminate_worker(worker)
+        else:
+            _release_worker(worker)
+        raise
+    _release_worker(worker)
+    return result
+
+
+def _release_worker(worker: ProcessPoolExecutor):
+    """worker 放回空闲列表，超过 PLUGIN_PROCESSES 个时关闭"""
+    with _idle_lock:
+        if len(_idle_workers) < Config.PLUGIN_PROCESSES:
+            _idle_workers.append(worker)
+            return
+    worker.shutdown(wait=False)
+
+
+def shutdown_executor():
+    """关闭插件线程池和进程模式的 worker"""
+    global _thread_pool, _dispatch_pool
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
+    if _dispatch_pool is not None:
+        _dispatch_pool.shutdown(wait=True)
+        _dispatch_pool = None
+    with _idle_lock:
+        workers = list(_idle_workers)
+        _idle_workers.clear()
+    for worker in workers:
+        worker.shutdown(wait=True)
+
+
+async def run_plugin(name: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    执行插件
+
+    Raises:
+        ValueError: 插件不存在
+        TimeoutError: 超过插件超时时间
+    """
+    spec = get_plugin(name)
+    if spec is None:
+        raise ValueError(f"Unknown plugin: {name}")
+    # 进程模式的插件按发现阶段（AST / 清单）的选项调度，只在 worker 中导入；
+    # entry point 插件的选项要导入后才知道，在本进程加载后若声明为进程模式同样交给 worker
+    func = None if spec["mode"] == "process" else load_plugin(name)
+    timeout = spec.get("timeout") or Config.PLUGIN_TIMEOUT
+    loop = asyncio.get_running_loop()
+
+    if spec["mode"] == "process":
+        # 超时由调度线程计时，排队等待调度线程的时间不计入
+        result = await loop.run_in_executor(_get_dispatch_pool(), _call_in_worker, name, spec, payload, timeout)
+        return result if isinstance(result, dict) else {"result": result}
+
+    if inspect.iscoroutinefunction(func):
+        future = func(payload)
+    else:
+        future = loop.run_in_executor(_get_thread_pool(), func, payload)
+
+    try:
+        result = await asyncio.wait_for(future, timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"Plugin {name} timed out after {timeout}s")
+    return result if isinstance(result, dict) else {"result": result}
@@ -0,0 +1,130 @@
+"""
+进度事件通道 - 各模块共用的结构化、限频进度上报
+
+进度以 JSON 事件的形式发出，字段包括 stage / progress / message，以及可选的
+current / total / bytes / eta / file 等，并自动带上当前请求 ID 和任务 ID：
+
+- 单次模式：写到 stderr，每条一行 "PROGRESS:{json}"，由 Tauri 端解析
+- 常驻模式：main.serve 通过 set_sink 切换为 stdout 上的 {"event": "progress"} 帧
+
+同一个 ProgressReporter 在 Config.PROGRESS_INTERVAL 秒内只输出一次，阶段切换
+和完成事件总是立即输出，被合并掉的更新在 close() 时补发最后一条。
+"""
+import json
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Any, Callable, Optional
+from friday_core.config import Config
+
+# 当前请求 ID（常驻模式下由 main 设置）与任务 ID（由任务队列设置）
+current_request_id: ContextVar[Optional[Any]] = ContextVar("current_request_id", default=None)
+current_task_id: ContextVar[Optional[str]] = ContextVar("current_task_id", default=None)
+
+ProgressSink = Callable[[Dict[str, Any]], None]
+
+_sink_lock = threading.Lock()
+
+
+def _stderr_sink(event: Dict[str, Any]):
+    """默认输出：stderr 上的 PROGRESS 行"""
+    line = "PROGRESS:" + json.dumps(event, ensure_ascii=False) + "\n"
+    with _sink_lock:
+        sys.stderr.write(line)
+        sys.stderr.flush()
+
+
+_sink: ProgressSink = _stderr_sink
+
+
+def set_sink(sink: Optional[ProgressSink]):
+    """替换进度事件输出（None 恢复默认的 stderr 输出）"""
+    global _sink
+    _sink = sink or _stderr_sink
+
+
+def emit(event: Dict[str, Any]):
+    """立即发出一条进度事件（补齐请求 ID 和任务 ID）"""
+    event.setdefault("request_id", current_request_id.get())
+    event.setdefault("task_id", current_task_id.get())
+    event.setdefault("ts", round(time.time(), 3))
+    _sink(event)
+
+
+class ProgressReporter:
+    """限频进度上报器"""
+
+    def __init__(self, source: str, min_interval: Optional[float] = None, **fields):
+        """
+        Args:
+            source: 事件来源，如 "parse_pdf"
+            min_interval: 两次输出的最小间隔（秒），None 时使用 Config.PROGRESS_INTERVAL
+            fields: 附加到每条事件上的固定字段，如 file="a.pdf"
+        """
+        self.source = source
+        self.min_interval = Config.PROGRESS_INTERVAL if min_interval is None else min_interval
+        self.fields = fields
+        self._stage: Optional[str] = None
+        self._stage_started = 0.0
+        self._last_emit = 0.0
+        self._pending: Optional[Dict[str, Any]] = None
+
+    def update(
+        self,
+        stage: str,
+        progress: int,
+        message: str = "",
+        current: Optional[int] = None,
+        total: Optional[int] = None,
+        bytes_done: Optional[int] = None,
+        **fields,
+    ):
+        """
+        上报进度，签名兼容 (stage, progress, message) 形式的进度回调
+
+        Args:
+            stage: 阶段名
+            progress: 总进度百分比 0-100
+            message: 进度描述
+            current / total: 当前阶段的完成量和总量（页数、秒数等），用于估算 ETA
+            bytes_done: 已处理字节数
+        """
+        now = time.monotonic()
+        stage_changed = stage != self._stage
+        if stage_changed:
+            self._stage = stage
+            self._stage_started = now
+
+        event: Dict[str, Any] = {
+            "source": self.source,
+            "stage": stage,
+            "progress": int(progress),
+            "message": message,
+            **self.fields,
+            **fields,
+        }
+        if current is not None:
+            event["current"] = current
+        if total is not None:
+            event["total"] = total
+        if bytes_done is not None:
+            event["bytes"] = bytes_done
+        if current and total and current < total:
+            elapsed = now - self._stage_started
+            event["eta"] = round(elapsed * (total - current) / current, 1)
+
+        if stage_changed or progress >= 100 or now - self._last_emit >= self.min_interval:
+            self._pending = None
+            self._last_emit = now
+            emit(event)
+        else:
+            self._pending = event
+
+    __call__ = update
+
+    def close(self):
+        """补发被合并掉的最后一条更新"""
+        if self._pending is not None:
+            emit(self._pending)
+            self._pending = None
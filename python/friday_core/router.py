@@ -1,8 +1,11 @@
 """
 资源路由器 - 根据命令路由到对应模块
 """
-from typing import Dict, Any
+import asyncio
+from typing import Dict, Any, Tuple
+from friday_core.config import Config
 from friday_core.logger import setup_logger
+from friday_core.metrics import instrument
 
 logger = setup_logger(__name__)
 
@@ -18,24 +21,61 @@ class Router:
         """注册所有命令处理器"""
         # PDF 模块
         self.handlers["parse_pdf"] = self._handle_parse_pdf
+        self.handlers["render_page"] = self._handle_render_page
+
+        # 向量索引
+        self.handlers["index_resource"] = self._handle_index_resource
+
+        # 资源库
+        self.handlers["list_resources"] = self._handle_list_resources
+
+        # 全文检索
+        self.handlers["search_library"] = self._handle_search_library
+        self.handlers["rebuild_search_index"] = self._handle_rebuild_search_index
+
+        # 批量导入
+        self.handlers["batch_ingest"] = self._handle_batch_ingest
+        self.handlers["get_watch_status"] = self._handle_get_watch_status
 
         # 视频模块
         self.handlers["process_video"] = self._handle_process_video
 
         # 音频模块
         self.handlers["process_audio"] = self._handle_process_audio
+        self.handlers["get_waveform"] = self._handle_get_waveform
 
         # AI Agent
         self.handlers["execute_command"] = self._handle_execute_command
 
+        # 任务队列
+        self.handlers["submit_task"] = self._handle_submit_task
+        self.handlers["get_task_status"] = self._handle_get_task_status
+        self.handlers["list_tasks"] = self._handle_list_tasks
+
+        # 插件（每个插件另外注册为同名命令，首次调用时才发现和导入）
+        self.handlers["list_plugins"] = self._handle_list_plugins
+        self.handlers["run_plugin"] = self._handle_run_plugin
+
     async def route(self, cmd: str, payload: Dict[str, Any]) -> Dict[str, Any]:
         """路由命令到对应处理器"""
-        handler = self.handlers.get(cmd)
+        result, _ = await self.route_with_metrics(cmd, payload)
+        return result
+
+    async def route_with_metrics(self, cmd: str, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        路由命令并返回 (结果, 性能埋点)
+
+        payload 中的 "_profile"（"cprofile" | "sampling"）为本次请求开启剖析，
+        未指定时使用 Config.PROFILE。
+        """
+        handler = self.handlers.get(cmd) or self._plugin_handler(cmd)
         if not handler:
             raise ValueError(f"Unknown command: {cmd}")
 
         logger.info(f"Routing command: {cmd}")
-        return await handler(payload)
+        async with instrument(cmd, profile=payload.get("_profile") or Config.PROFILE) as metrics:
+            result = await handler(payload)
+        return result, metrics.to_dict()
 
     async def _handle_parse_pdf(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """处理 PDF 解析"""
@@ -43,15 +83,100 @@ class Router:
         path = payload.get("path")
         if not path:
             raise ValueError("Missing 'path' in payload")
-        return await parse_pdf(path)
+        return await parse_pdf(path, workers=payload.get("workers"), force=bool(payload.get("force", False)))
+
+    async def _handle_render_page(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """渲染 PDF 页面为图片（按资源 ID 或文件路径）"""
+        from friday_reader.renderer import render_page
+        path = payload.get("path")
+        resource_id = payload.get("resource_id")
+        if not path and resource_id:
+            from friday_core.library import get_resource
+            resource = await asyncio.to_thread(get_resource, resource_id)
+            if resource is None or resource["type"] != "pdf":
+                raise ValueError(f"PDF resource not found: {resource_id}")
+            path = resource["source"]
+        if not path:
+            raise ValueError("Missing 'path' in payload")
+        return await render_page(
+            path,
+            page=payload.get("page", 1),
+            zoom=payload.get("zoom", 1.0),
+            prefetch=payload.get("prefetch"),
+        )
+
+    async def _handle_index_resource(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """为资源建立或增量更新向量索引"""
+        from friday_core.vector_index import index_resource
+        resource_id = payload.get("id")
+        if not resource_id:
+            raise ValueError("Missing 'id' in payload")
+        return await index_resource(resource_id, force=bool(payload.get("force", False)))
+
+    async def _handle_list_resources(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """分页列出资源库（键集分页，翻页时传入上一页的 next_cursor）"""
+        from friday_core.library import list_resources
+        return await asyncio.to_thread(
+            list_resources,
+            type=payload.get("type"),
+            since=payload.get("since"),
+            until=payload.get("until"),
+            title_prefix=payload.get("title_prefix"),
+            sort=payload.get("sort", "created_at"),
+            order=payload.get("order", "desc"),
+            limit=payload.get("limit"),
+            cursor=payload.get("cursor"),
+        )
+
+    async def _handle_search_library(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """检索 Library（页级全文检索，可选混合语义检索）"""
+        from friday_core.search import search_library
+        query = payload.get("query")
+        if not query:
+            raise ValueError("Missing 'query' in payload")
+        types = payload.get("types") or ([payload["type"]] if payload.get("type") else None)
+        return await search_library(
+            query,
+            types=types,
+            limit=int(payload.get("limit", 20)),
+            offset=int(payload.get("offset", 0)),
+            hybrid=bool(payload.get("hybrid", False)),
+        )
+
+    async def _handle_rebuild_search_index(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """按资源表重建全文索引"""
+        from friday_core.search import rebuild_search_index
+        return await asyncio.to_thread(rebuild_search_index)
+
+    async def _handle_batch_ingest(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """批量导入目录、通配符或文件列表中的 PDF 和音频"""
+        from friday_core.ingest import batch_ingest
+        path = payload.get("path")
+        pattern = payload.get("glob")
+        paths = payload.get("paths")
+        if not (path or pattern or paths):
+            raise ValueError("Missing 'path', 'glob' or 'paths' in payload")
+        return await batch_ingest(
+            path=path,
+            pattern=pattern,
+            paths=paths,
+            recursive=bool(payload.get("recursive", True)),
+            force=bool(payload.get("force", False)),
+            cpu_budget=payload.get("cpu_budget"),
+        )
+
+    async def _handle_get_watch_status(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """文件夹监视状态（常驻模式下配置了 WATCH_DIRS 时启动）"""
+        from friday_core.watch import get_folder_watcher
+        return get_folder_watcher().status()
 
     async def _handle_process_video(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        """处理视频"""
+        """处理视频（本地字幕文件或 yt-dlp 的 .info.json）"""
         from friday_watcher.main import process_video
-        url = payload.get("url")
-        if not url:
-            raise ValueError("Missing 'url' in payload")
-        return await process_video(url)
+        path = payload.get("path") or payload.get("url")
+        if not path:
+            raise ValueError("Missing 'path' in payload")
+        return await process_video(path, workers=payload.get("workers"), force=bool(payload.get("force", False)))
 
     async def _handle_process_audio(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """处理音频"""
@@ -59,14 +184,88 @@ class Router:
         path = payload.get("path")
         if not path:
             raise ValueError("Missing 'path' in payload")
-        return await process_audio(path)
+        return await process_audio(path, workers=payload.get("workers"), force=bool(payload.get("force", False)))
+
+    async def _handle_get_waveform(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """读取音频资源的波形峰值（任意层级和时间范围，不重新解码音频）"""
+        from friday_listener.waveform import get_waveform
+        resource_id = payload.get("resource_id")
+        if not resource_id:
+            raise ValueError("Missing 'resource_id' in payload")
+        level = payload.get("level")
+        return await asyncio.to_thread(
+            get_waveform,
+            resource_id,
+            start=float(payload.get("start", 0)),
+            end=payload.get("end"),
+            level=None if level is None else int(level),
+            width=payload.get("width"),
+        )
 
     async def _handle_execute_command(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        """执行自然语言命令"""
+        """执行自然语言命令，作为任务记录在 tasks 表中，返回执行结束后的任务记录"""
         from friday_core.agent import execute_command
+        from friday_core.progress import current_task_id
+        from friday_core.task_queue import get_task_queue
         command = payload.get("command")
         if not command:
             raise ValueError("Missing 'command' in payload")
-        return await execute_command(command)
+        if current_task_id.get():
+            # 作为任务执行（含重启后恢复的任务）：结果写入该任务记录
+            return await execute_command(command)
+        task = await get_task_queue(self).submit("execute_command", {"command": command}, wait=True)
+        if task["status"] == "failed":
+            raise RuntimeError(task["error"])
+        return task
+
+    async def _handle_submit_task(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """提交后台任务，返回任务记录（单次请求模式下执行完才返回）"""
+        from friday_core.task_queue import get_task_queue
+        cmd = payload.get("cmd")
+        if not cmd:
+            raise ValueError("Missing 'cmd' in payload")
+        return await get_task_queue(self).submit(cmd, payload.get("payload", {}))
+
+    async def _handle_get_task_status(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """查询任务状态"""
+        from friday_core.task_queue import get_task_record
+        task_id = payload.get("id")
+        if not task_id:
+            raise ValueError("Missing 'id' in payload")
+        task = await asyncio.to_thread(get_task_record, task_id)
+        if task is None:
+            raise ValueError(f"Task not found: {task_id}")
+        return task
+
+    async def _handle_list_tasks(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """列出任务"""
+        from friday_core.task_queue import list_task_records
+        tasks = await asyncio.to_thread(
+            list_task_records, status=payload.get("status"), limit=int(payload.get("limit", 50))
+        )
+        return {"tasks": tasks}
+
+    def _plugin_handler(self, cmd: str):
+        """未注册的命令尝试作为插件名"""
+        from friday_core.plugins import get_plugin, run_plugin
+        if get_plugin(cmd) is None:
+            return None
+
+        async def handler(payload: Dict[str, Any]) -> Dict[str, Any]:
+            return await run_plugin(cmd, payload)
+        return handler
 
+    async def _handle_list_plugins(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """列出插件（只读取描述，不导入插件）"""
+        from friday_core.plugins import discover_plugins, list_plugins
+        if payload.get("refresh"):
+            discover_plugins(refresh=True)
+        return {"plugins": list_plugins()}
 
+    async def _handle_run_plugin(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """按名称执行插件"""
+        from friday_core.plugins import run_plugin
+        name = payload.get("name")
+        if not name:
+            raise ValueError("Missing 'name' in payload")
+        return await run_plugin(name, payload.get("payload", {}))
@@ -0,0 +1,342 @@
+"""
+Library 全文检索 - 基于 SQLite FTS5 的页级索引
+
+每个资源的 Markdown 按 "## 第 N 页" 切分为页，逐页写入与主库同文件的
+FTS5 虚拟表 pages_fts。检索结果使用 BM25 排序并返回高亮片段，可按
+Resource.type 过滤；可选与向量索引结果做混合排序（RRF）。
+
+中文检索依赖 trigram 分词器（SQLite >= 3.34）。少于 3 个字符的词无法走
+trigram 倒排索引，改查辅助表 pages_bigram_fts：同一页的文本中每段中日韩文字
+改写为重叠的二元组（外加末字），其余文字按 unicode61 分词。两字词精确匹配二元组，
+单字按前缀匹配，短的西文词按整词匹配；结果与主表按 rowid 对应，同样按 BM25 排序。
+"""
+import asyncio
+import re
+import threading
+import weakref
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from sqlalchemy import text
+from friday_core.context import get_engine, session_scope
+from friday_core.database import Resource
+from friday_core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+_PAGE_RE = re.compile(r"^## 第 (\d+) 页\s*$")
+_CJK_RE = re.compile(r"[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff]+")
+
+# RRF 融合常数
+_RRF_K = 60
+
+# 已建好 FTS5 表的引擎及其主表分词器；按引擎记录，reset_app_context 切换数据库后会对新库重新建表
+_fts_tokenizers: "weakref.WeakKeyDictionary[Any, str]" = weakref.WeakKeyDictionary()
+_fts_lock = threading.Lock()
+
+
+def _bigram_text(value: str) -> str:
+    """辅助表的文本：中日韩文字改写为空格分隔的重叠二元组，每段末字单独保留一次"""
+    def split(match):
+        run = match.group(0)
+        return " " + " ".join([run[i:i + 2] for i in range(len(run) - 1)] + [run[-1]]) + " "
+    return _CJK_RE.sub(split, value)
+
+
+_INSERT_BIGRAM = text(
+    "INSERT INTO pages_bigram_fts (rowid, resource_id, title, content) "
+    "VALUES (:rowid, :resource_id, :title, :content)"
+)
+
+
+def _bigram_row(rowid: int, resource_id: str, title: str, content: str) -> Dict[str, Any]:
+    return {"rowid": rowid, "resource_id": resource_id, "title": _bigram_text(title or ""), "content": _bigram_text(content)}
+
+
+def _ensure_fts(engine) -> str:
+    """
+    创建 FTS5 表（trigram 不可用时退化为 unicode61，此时不需要短词辅助表）
+
+    Returns:
+        主表使用的分词器
+    """
+    tokenizer = _fts_tokenizers.get(engine)
+    if tokenizer:
+        return tokenizer
+    with _fts_lock:
+        tokenizer = _fts_tokenizers.get(engine)
+        if tokenizer:
+            return tokenizer
+        columns = "resource_id UNINDEXED, type UNINDEXED, page UNINDEXED, title, content"
+        with engine.begin() as conn:
+            try:
+                conn.execute(text(f"CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5({columns}, tokenize='trigram')"))
+            except Exception:
+                logger.warning("FTS5 trigram tokenizer unavailable, falling back to unicode61")
+                conn.execute(text(f"CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5({columns}, tokenize='unicode61')"))
+            # 已有的表沿用建表时的分词器
+            sql = conn.execute(
+                text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'pages_fts'")
+            ).scalar() or ""
+            tokenizer = "trigram" if "trigram" in sql else "unicode61"
+
+            if tokenizer == "trigram":
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'pages_bigram_fts'")
+                ).first()
+                if not exists:
+                    conn.execute(text(
+                        "CREATE VIRTUAL TABLE pages_bigram_fts USING fts5("
+                        "resource_id UNINDEXED, title, content, tokenize='unicode61')"
+                    ))
+                    # 加入辅助表之前建立的索引：从主表补齐
+                    result = conn.execute(text("SELECT rowid, resource_id, title, content FROM pages_fts"))
+                    count = 0
+                    while rows := result.fetchmany(500):
+                        conn.execute(_INSERT_BIGRAM, [_bigram_row(row.rowid, row.resource_id, row.title, row.content) for row in rows])
+                        count += len(rows)
+                    if count:
+                        logger.info(f"Built short-term index for {count} pages")
+        _fts_tokenizers[engine] = tokenizer
+    return tokenizer
+
+
+def _get_engine():
+    """当前数据库引擎及其全文索引分词器"""
+    engine = get_engine()
+    return engine, _ensure_fts(engine)
+
+
+def iter_pages(md_path: str) -> Iterator[Tuple[Optional[int], str]]:
+    """
+    按页流式读取 Markdown
+
+    Yields:
+        (页码, 页文本)；第一页之前的内容（文件头或无分页的文档）页码为 None
+    """
+    page: Optional[int] = None
+    buffer: List[str] = []
+    with open(md_path, "r", encoding="utf-8") as f:
+        for line in f:
+            match = _PAGE_RE.match(line)
+            if match:
+                if "".join(buffer).strip():
+                    yield page, "".join(buffer)
+                page = int(match.group(1))
+                buffer = []
+                continue
+            buffer.append(line)
+    if "".join(buffer).strip():
+        yield page, "".join(buffer)
+
+
+def index_resource_text(resource: Dict[str, Any]) -> int:
+    """
+    将资源 Markdown 写入全文索引（先删除该资源的旧页面）
+
+    Returns:
+        写入的页数
+    """
+    md_path = resource.get("md_path")
+    if not md_path or not Path(md_path).exists():
+        return 0
+
+    engine, tokenizer = _get_engine()
+    insert = text(
+        "INSERT INTO pages_fts (rowid, resource_id, type, page, title, content) "
+        "VALUES (:rowid, :resource_id, :type, :page, :title, :content)"
+    )
+    bigrams = tokenizer == "trigram"
+    count = 0
+    with engine.begin() as conn:
+        _delete_pages(conn, tokenizer, resource["id"])
+        # 显式分配 rowid，辅助表的同一页使用相同的 rowid（写事务内不会有并发写入）
+        next_rowid = conn.execute(text("SELECT COALESCE(MAX(rowid), 0) FROM pages_fts")).scalar() + 1
+        batch = []
+
+        def flush():
+            conn.execute(insert, batch)
+            if bigrams:
+                conn.execute(_INSERT_BIGRAM, [
+                    _bigram_row(row["rowid"], row["resource_id"], row["title"], row["content"]) for row in batch
+                ])
+
+        for page, content in iter_pages(md_path):
+            batch.append({
+                "rowid": next_rowid,
+                "resource_id": resource["id"],
+                "type": resource["type"],
+                "page": page,
+                "title": resource["title"],
+                "content": content,
+            })
+            next_rowid += 1
+            if len(batch) >= 200:
+                flush()
+                count += len(batch)
+                batch = []
+        if batch:
+            flush()
+            count += len(batch)
+    logger.info(f"Full-text indexed {count} pages for resource {resource['id']}")
+    return count
+
+
+def _delete_pages(conn, tokenizer: str, resource_id: Optional[str] = None):
+    """删除资源（None 时为全部）在主表和辅助表中的页面"""
+    tables = ["pages_fts"] + (["pages_bigram_fts"] if tokenizer == "trigram" else [])
+    for table in tables:
+        if resource_id is None:
+            conn.execute(text(f"DELETE FROM {table}"))
+        else:
+            conn.execute(text(f"DELETE FROM {table} WHERE resource_id = :rid"), {"rid": resource_id})
+
+
+def remove_resource_text(resource_id: str):
+    """从全文索引中删除资源"""
+    engine, tokenizer = _get_engine()
+    with engine.begin() as conn:
+        _delete_pages(conn, tokenizer, resource_id)
+
+
+def rebuild_search_index() -> Dict[str, Any]:
+    """按资源表重建全文索引"""
+    engine, tokenizer = _get_engine()
+    with session_scope() as session:
+        resources = [r.to_dict() for r in session.query(Resource).filter(Resource.md_path.isnot(None))]
+
+    with engine.begin() as conn:
+        _delete_pages(conn, tokenizer)
+    pages = sum(index_resource_text(r) for r in resources)
+    return {"resources": len(resources), "pages": pages}
+
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _build_match(query: str, tokenizer: str = "trigram") -> Tuple[str, str, List[str]]:
+    """
+    把用户查询转换为 FTS5 MATCH 表达式
+
+    Returns:
+        (主表 match 表达式, 辅助表 match 表达式, 短词列表)
+    """
+    terms = [t for t in query.split() if t]
+    phrases, short_phrases, short_terms = [], [], []
+    for term in terms:
+        if tokenizer == "trigram" and len(term) < 3:
+            short_terms.append(term)
+            if _CJK_RE.fullmatch(term):
+                # 两字词即一个二元组；单字可能是二元组的首字或一段的末字，按前缀匹配
+                short_phrases.append(_quote(term) if len(term) == 2 else _quote(term) + "*")
+            else:
+                short_phrases.append(_quote(_bigram_text(term).strip()))
+        else:
+            phrases.append(_quote(term))
+    return " AND ".join(phrases), " AND ".join(short_phrases), short_terms
+
+
+def search_text(
+    query: str,
+    types: Optional[List[str]] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> List[Dict[str, Any]]:
+    """BM25 排序的页级全文检索"""
+    engine, tokenizer = _get_engine()
+    match, short_match, short_terms = _build_match(query, tokenizer)
+    if not match and not short_match:
+        return []
+
+    where, params = [], {"limit": limit, "offset": offset}
+    if match:
+        where.append("pages_fts MATCH :match")
+        params["match"] = match
+    if types:
+        placeholders = ", ".join(f":type{i}" for i in range(len(types)))
+        where.append(f"pages_fts.type IN ({placeholders})")
+        params.update({f"type{i}": t for i, t in enumerate(types)})
+
+    if match:
+        snippet = "snippet(pages_fts, 4, '<mark>', '</mark>', '…', 24)"
+        rank = "bm25(pages_fts, 0, 0, 0, 2.0, 1.0)"
+    else:
+        # 只有短词时主表没有 MATCH，片段取第一个短词出现位置附近的文本
+        snippet = "substr(pages_fts.content, max(1, instr(pages_fts.content, :first_term) - 40), 120)"
+        rank = "0"
+        params["first_term"] = short_terms[0]
+
+    source = "pages_fts"
+    if short_match:
+        # 短词命中辅助表中的同一页（rowid 相同），两边的 BM25 相加
+        source += (
+            " JOIN (SELECT rowid AS bigram_rowid, bm25(pages_bigram_fts, 0, 2.0, 1.0) AS bigram_rank"
+            " FROM pages_bigram_fts WHERE pages_bigram_fts MATCH :short_match) AS short"
+            " ON pages_fts.rowid = short.bigram_rowid"
+        )
+        rank += " + short.bigram_rank"
+        params["short_match"] = short_match
+
+    sql = (
+        f"SELECT pages_fts.resource_id, pages_fts.type, pages_fts.page, pages_fts.title, "
+        f"{snippet} AS snippet, {rank} AS rank FROM {source} "
+        f"{'WHERE ' + ' AND '.join(where) if where else ''} ORDER BY rank LIMIT :limit OFFSET :offset"
+    )
+    with engine.connect() as conn:
+        rows = conn.execute(text(sql), params).fetchall()
+
+    return [
+        {
+            "resource_id": row.resource_id,
+            "type": row.type,
+            "page": row.page,
+            "title": row.title,
+            "snippet": row.snippet,
+            "score": -float(row.rank),
+        }
+        for row in rows
+    ]
+
+
+async def search_library(
+    query: str,
+    types: Optional[List[str]] = None,
+    limit: int = 20,
+    offset: int = 0,
+    hybrid: bool = False,
+) -> Dict[str, Any]:
+    """
+    检索 Library
+
+    Args:
+        query: 查询词，空格分隔的多个词按 AND 组合
+        types: 资源类型过滤，如 ["pdf", "audio"]
+        limit / offset: 分页参数
+        hybrid: 为 True 时与向量检索结果按 RRF 融合排序
+    """
+    hits = await asyncio.to_thread(search_text, query, types, limit + offset if hybrid else limit, 0 if hybrid else offset)
+    if not hybrid:
+        return {"query": query, "hits": hits}
+
+    from friday_core.vector_index import query_similar
+    try:
+        similar = await query_similar(query, limit + offset, types)
+    except ImportError as e:
+        logger.warning(f"Hybrid search falls back to full-text only: {e}")
+        return {"query": query, "hits": hits[offset:offset + limit]}
+    except Exception as e:
+        # 向量库损坏、维度不匹配或 embedding 加载失败时同样只返回全文结果
+        logger.error(f"Vector search failed, falling back to full-text only: {e}")
+        return {"query": query, "hits": hits[offset:offset + limit]}
+
+    fused: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+    for rank, hit in enumerate(hits):
+        key = (hit["resource_id"], hit["page"])
+        fused[key] = {**hit, "score": 1.0 / (_RRF_K + rank + 1)}
+    for rank, hit in enumerate(similar):
+        key = (hit["resource_id"], hit["page"])
+        entry = fused.setdefault(key, {**hit, "score": 0.0})
+        entry["score"] += 1.0 / (_RRF_K + rank + 1)
+
+    ranked = sorted(fused.values(), key=lambda h: h["score"], reverse=True)
+    return {"query": query, "hits": ranked[offset:offset + limit]}
@@ -0,0 +1,201 @@
+"""
+任务队列 - 基于 tasks 表的持久化异步任务调度
+
+任务提交后立即写入 tasks 表并返回任务 ID，由有界的 worker 池在后台执行；
+状态流转为 pending -> running -> completed | failed。进程重启后，未完成的
+任务（pending，以及中断时处于 running 的任务）会重新入队执行。
+后台 worker 只在常驻模式（--server）下运行，单次请求模式下提交的任务在请求内直接执行。
+"""
+import asyncio
+from typing import Dict, Any, List, Optional
+from friday_core.config import Config
+from friday_core.context import session_scope
+from friday_core.database import Task
+from friday_core.logger import setup_logger
+from friday_core.progress import current_task_id
+
+logger = setup_logger(__name__)
+
+TASK_STATUSES = ("pending", "running", "completed", "failed")
+
+
+def create_task_record(cmd: str, payload: Dict[str, Any], status: str = "pending") -> Dict[str, Any]:
+    """新建任务记录"""
+    with session_scope() as session:
+        task = Task(status=status, cmd=cmd, payload=payload)
+        session.add(task)
+        session.commit()
+        return task.to_dict()
+
+
+def update_task_record(task_id: str, **fields) -> Optional[Dict[str, Any]]:
+    """更新任务记录的字段（status / result / error 等）"""
+    with session_scope() as session:
+        task = session.get(Task, task_id)
+        if task is None:
+            return None
+        for name, value in fields.items():
+            setattr(task, name, value)
+        session.commit()
+        return task.to_dict()
+
+
+def get_task_record(task_id: str) -> Optional[Dict[str, Any]]:
+    """读取任务记录"""
+    with session_scope() as session:
+        task = session.get(Task, task_id)
+        return task.to_dict() if task else None
+
+
+def list_task_records(status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    """按创建时间倒序列出任务记录"""
+    with session_scope() as session:
+        query = session.query(Task)
+        if status:
+            query = query.filter(Task.status == status)
+        return [task.to_dict() for task in query.order_by(Task.created_at.desc()).limit(limit)]
+
+
+def _recover_unfinished() -> List[str]:
+    """将中断时处于 running 的任务重置为 pending，返回所有待执行任务 ID（按提交顺序）"""
+    with session_scope() as session:
+        session.query(Task).filter(Task.status == "running").update({"status": "pending"})
+        session.commit()
+        pending = session.query(Task.id).filter(Task.status == "pending").order_by(Task.created_at)
+        return [row.id for row in pending]
+
+
+class TaskQueue:
+    """持久化任务队列"""
+
+    def __init__(self, router, max_workers: Optional[int] = None, command_limits: Optional[Dict[str, int]] = None):
+        self.router = router
+        self.max_workers = max_workers or Config.TASK_WORKERS
+        self.command_limits = command_limits if command_limits is not None else Config.get_task_command_limits()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._command_slots: Dict[str, asyncio.Semaphore] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._started = False
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    async def start(self):
+        """启动调度：恢复上次未完成的任务并开始执行"""
+        if self._started:
+            return
+        self._slots = asyncio.Semaphore(self.max_workers)
+        self._started = True
+
+        recovered = _recover_unfinished()
+        if recovered:
+            logger.info(f"Recovered {len(recovered)} unfinished tasks")
+        for task_id in recovered:
+            self._schedule(task_id)
+
+    async def stop(self):
+        """停止调度，取消正在执行的任务（它们在下次启动时会重新入队）"""
+        self._started = False
+        for job in list(self._running.values()):
+            job.cancel()
+        if self._running:
+            await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+    async def join(self):
+        """等待当前所有任务执行完毕"""
+        while self._running:
+            await asyncio.gather(*list(self._running.values()), return_exceptions=True)
+
+    async def submit(self, cmd: str, payload: Dict[str, Any], wait: bool = False) -> Dict[str, Any]:
+        """
+        提交任务，返回任务记录
+
+        常驻模式下任务交给后台 worker 执行，立即返回 pending 记录；wait=True 时
+        等待执行结束。队列未启动（单次请求模式）时进程随响应退出，没有后台 worker，
+        任务在本次请求中直接执行。等待或直接执行时返回执行结束后的记录（completed 或 failed）。
+        """
+        if cmd not in self.router.handlers:
+            raise ValueError(f"Unknown command: {cmd}")
+
+        task = await asyncio.to_thread(create_task_record, cmd, payload)
+        logger.info(f"Task submitted: {task['id']} ({cmd})")
+        if self._started:
+            self._schedule(task["id"])
+            if not wait:
+                return task
+            # 调用方被取消时任务继续在后台执行
+            await asyncio.shield(self._running[task["id"]])
+        else:
+            await self._execute(task)
+        return await asyncio.to_thread(get_task_record, task["id"])
+
+    def _command_slot(self, cmd: str) -> Optional[asyncio.Semaphore]:
+        """获取命令级并发限制（未配置的命令只受全局 worker 数限制）"""
+        limit = self.command_limits.get(cmd)
+        if limit is None:
+            return None
+        if cmd not in self._command_slots:
+            self._command_slots[cmd] = asyncio.Semaphore(limit)
+        return self._command_slots[cmd]
+
+    def _schedule(self, task_id: str):
+        if task_id in self._running:
+            return
+        job = asyncio.create_task(self._run(task_id))
+        self._running[task_id] = job
+        job.add_done_callback(lambda _: self._running.pop(task_id, None))
+
+    async def _run(self, task_id: str):
+        task = await asyncio.to_thread(get_task_record, task_id)
+        if task is None or task["status"] != "pending":
+            return
+
+        # 先占命令级名额再占全局名额，等待中的任务不会占用全局 worker
+        command_slot = self._command_slot(task["cmd"])
+        if command_slot is not None:
+            await command_slot.acquire()
+        try:
+            async with self._slots:
+                await self._execute(task)
+        finally:
+            if command_slot is not None:
+                command_slot.release()
+
+    async def _execute(self, task: Dict[str, Any]):
+        task_id = task["id"]
+        # 任务 ID 只在执行期间可见；直接执行时结束后恢复调用方的值，
+        # 外层请求的埋点和检查点不会写到这条任务记录上
+        token = current_task_id.set(task_id)
+        try:
+            await asyncio.to_thread(update_task_record, task_id, status="running")
+            logger.info(f"Task running: {task_id} ({task['cmd']})")
+            try:
+                result = await self.router.route(task["cmd"], task["payload"] or {})
+            except asyncio.CancelledError:
+                # 进程退出时中断的任务保持 pending，下次启动继续（同步写入，不再让出）
+                update_task_record(task_id, status="pending")
+                raise
+            except Exception as e:
+                logger.error(f"Task failed: {task_id}: {e}")
+                await asyncio.to_thread(update_task_record, task_id, status="failed", error=str(e))
+                return
+
+            await asyncio.to_thread(update_task_record, task_id, status="completed", result=result)
+            logger.info(f"Task completed: {task_id}")
+        finally:
+            current_task_id.reset(token)
+
+
+_task_queue: Optional[TaskQueue] = None
+
+
+def get_task_queue(router=None) -> TaskQueue:
+    """获取进程内共享的任务队列（首次调用时需传入 router）"""
+    global _task_queue
+    if _task_queue is None:
+        if router is None:
+            from friday_core.context import get_router
+            router = get_router()
+        _task_queue = TaskQueue(router)
+    return _task_queue
@@ -0,0 +1,9 @@
+"""
+时间格式化 - 音频、视频逐字稿共用的时间戳格式
+"""
+
+
+def format_timestamp(seconds: float) -> str:
+    """秒数格式化为 HH:MM:SS"""
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
@@ -0,0 +1,324 @@
+"""
+向量索引 - 将资源 Markdown 分块、批量向量化并写入本地 ChromaDB
+
+流程：
+1. 按页（## 第 N 页）和标题把 Markdown 切分为块，超长块按段落再切分
+2. 块 ID 由资源 ID 和块内容哈希组成，只对新增或变化的块做向量化（增量重建）
+3. 按批调用可插拔的本地 embedding 函数，批量 upsert 到持久化 collection
+"""
+import asyncio
+import hashlib
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Any, Callable, Iterator, List, Optional, Sequence
+from friday_core.config import Config
+from friday_core.context import run_in_session, session_scope
+from friday_core.database import Resource
+from friday_core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+EmbeddingFunction = Callable[[Sequence[str]], Any]
+
+_PAGE_RE = re.compile(r"^## 第 (\d+) 页\s*$")
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*$")
+
+_embedding_factories: Dict[str, Callable[[], EmbeddingFunction]] = {}
+_embedding_functions: Dict[str, EmbeddingFunction] = {}
+_client = None
+_client_lock = threading.Lock()
+
+
+def register_embedding_function(name: str, factory: Callable[[], EmbeddingFunction]):
+    """
+    注册 embedding 函数
+
+    factory 在首次使用时调用，返回的函数接收一批文本，
+    返回形状为 (len(texts), dim) 的向量（numpy 数组或嵌套列表）。
+    """
+    _embedding_factories[name] = factory
+    _embedding_functions.pop(name, None)
+
+
+def get_embedding_function(name: Optional[str] = None) -> EmbeddingFunction:
+    """获取（按需创建）embedding 函数"""
+    name = name or Config.EMBEDDING_FUNCTION
+    if name not in _embedding_functions:
+        factory = _embedding_factories.get(name)
+        if factory is None:
+            raise ValueError(f"Unknown embedding function: {name}")
+        _embedding_functions[name] = factory()
+    return _embedding_functions[name]
+
+
+def _chroma_default_factory() -> EmbeddingFunction:
+    """ChromaDB 自带的本地 ONNX 模型（all-MiniLM-L6-v2）"""
+    from chromadb.utils import embedding_functions
+    return embedding_functions.DefaultEmbeddingFunction()
+
+
+def _hashing_factory() -> EmbeddingFunction:
+    """
+    特征哈希 embedding：字符 1~3-gram 哈希到固定维度，完全离线且无需模型
+
+    整批文本的码点拼接为一个数组，用 numpy 一次性计算整批所有 n-gram 的桶号并累加。
+    """
+    import numpy as np
+
+    dim = Config.HASHING_EMBEDDING_DIM
+
+    def embed(texts: Sequence[str]):
+        matrix = np.zeros(len(texts) * dim, dtype=np.float64)
+        codes = [np.frombuffer(t.lower().encode("utf-32-le"), dtype=np.uint32) for t in texts]
+        lengths = np.array([len(c) for c in codes], dtype=np.int64)
+        if lengths.sum() == 0:
+            return matrix.reshape(len(texts), dim).astype(np.float32)
+
+        flat = np.concatenate(codes).astype(np.uint64)
+        rows = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+        for n in (1, 2, 3):
+            m = len(flat) - n + 1
+            if m <= 0:
+                continue
+            h = np.zeros(m, dtype=np.uint64)
+            for k in range(n):
+                h = h * np.uint64(1000003) ^ flat[k:k + m]
+            h = h * np.uint64(0x9E3779B97F4A7C15) + np.uint64(n)
+            # 丢弃跨越两段文本边界的 n-gram
+            valid = rows[:m] == rows[n - 1:n - 1 + m]
+            h = h[valid]
+            buckets = rows[:m][valid] * dim + (h % np.uint64(dim)).astype(np.int64)
+            signs = np.where((h >> np.uint64(33)) & np.uint64(1), 1.0, -1.0)
+            matrix += np.bincount(buckets, weights=signs, minlength=matrix.size)
+
+        matrix = matrix.reshape(len(texts), dim)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return (matrix / np.maximum(norms, 1e-12)).astype(np.float32)
+
+    return embed
+
+
+register_embedding_function("default", _chroma_default_factory)
+register_embedding_function("hashing", _hashing_factory)
+
+
+def _get_collection():
+    """获取持久化 collection（客户端在进程内复用）"""
+    global _client
+    try:
+        import chromadb
+    except ImportError as e:
+        raise ImportError("chromadb is required for vector indexing: pip install chromadb") from e
+
+    # 常驻模式下多个导入会在不同线程同时建立索引，客户端只能创建一次
+    with _client_lock:
+        if _client is None:
+            Path(Config.CHROMADB_PATH).mkdir(parents=True, exist_ok=True)
+            _client = chromadb.PersistentClient(path=Config.CHROMADB_PATH)
+    return _client.get_or_create_collection(
+        name=Config.CHROMA_COLLECTION,
+        metadata={"hnsw:space": "cosine"},
+    )
+
+
+def chunk_markdown(md_path: str, max_chars: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    按页和标题流式切分 Markdown
+
+    Yields:
+        {"text": 块文本, "page": 页码或 None, "heading": 最近的标题}
+    """
+    max_chars = max_chars or Config.CHUNK_MAX_CHARS
+    page: Optional[int] = None
+    heading = ""
+    buffer: List[str] = []
+    size = 0
+
+    def flush():
+        text = "".join(buffer).strip()
+        buffer.clear()
+        if text:
+            return {"text": text, "page": page, "heading": heading}
+        return None
+
+    with open(md_path, "r", encoding="utf-8") as f:
+        for line in f:
+            page_match = _PAGE_RE.match(line)
+            heading_match = None if page_match else _HEADING_RE.match(line)
+            if page_match or heading_match:
+                chunk = flush()
+                size = 0
+                if chunk:
+                    yield chunk
+                if page_match:
+                    page = int(page_match.group(1))
+                    heading = ""
+                else:
+                    heading = heading_match.group(2)
+                continue
+
+            # 超长块在段落边界（空行）处切分
+            if size >= max_chars and not line.strip():
+                chunk = flush()
+                size = 0
+                if chunk:
+                    yield chunk
+                continue
+
+            buffer.append(line)
+            size += len(line)
+
+    chunk = flush()
+    if chunk:
+        yield chunk
+
+
+def _chunk_hash(chunk: Dict[str, Any]) -> str:
+    key = f"{chunk['page']}\x00{chunk['heading']}\x00{chunk['text']}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def _build_index(resource_id: str, resource_type: str, md_path: str, force: bool) -> Dict[str, Any]:
+    """在线程中执行的同步索引流程"""
+    collection = _get_collection()
+    embed = get_embedding_function()
+
+    # 块 ID 由内容哈希确定：前面插入或删除内容时，其余未变的块 ID 不变，无需重新向量化；
+    # 完全相同的块（同页、同标题、同文本）只保留一份
+    chunks: List[Dict[str, Any]] = []
+    hashes: List[str] = []
+    seen = set()
+    for chunk in chunk_markdown(md_path):
+        chunk_hash = _chunk_hash(chunk)
+        if chunk_hash not in seen:
+            seen.add(chunk_hash)
+            chunks.append(chunk)
+            hashes.append(chunk_hash)
+    ids = [f"{resource_id}:{h}" for h in hashes]
+
+    existing = set(collection.get(where={"resource_id": resource_id}, include=[])["ids"])
+    changed = [i for i, chunk_id in enumerate(ids) if force or chunk_id not in existing]
+    current_ids = set(ids)
+    stale = [chunk_id for chunk_id in existing if chunk_id not in current_ids]
+
+    batch_size = Config.EMBEDDING_BATCH_SIZE
+    for start in range(0, len(changed), batch_size):
+        batch = changed[start:start + batch_size]
+        texts = [chunks[i]["text"] for i in batch]
+        vectors = embed(texts)
+        collection.upsert(
+            ids=[ids[i] for i in batch],
+            embeddings=[list(map(float, v)) for v in vectors],
+            documents=texts,
+            metadatas=[
+                {
+                    "resource_id": resource_id,
+                    "type": resource_type,
+                    "page": chunks[i]["page"] or 0,
+                    "heading": chunks[i]["heading"],
+                    "chunk_hash": hashes[i],
+                }
+                for i in batch
+            ],
+        )
+
+    if stale:
+        collection.delete(ids=stale)
+
+    return {
+        "resource_id": resource_id,
+        "collection": collection.name,
+        "chunks": len(chunks),
+        "embedded": len(changed),
+        "deleted": len(stale),
+    }
+
+
+async def index_resource(resource_id: str, force: bool = False) -> Dict[str, Any]:
+    """
+    为资源建立或增量更新向量索引，并回写 Resource.vector_index
+
+    Args:
+        resource_id: 资源 ID
+        force: 为 True 时忽略块哈希，全部重新向量化
+    """
+    def load(session):
+        resource = session.get(Resource, resource_id)
+        if resource is None:
+            raise ValueError(f"Resource not found: {resource_id}")
+        if not resource.md_path or not Path(resource.md_path).exists():
+            raise FileNotFoundError(f"Markdown not found for resource: {resource_id}")
+        return resource.type, resource.md_path
+
+    resource_type, md_path = await run_in_session(load)
+
+    logger.info(f"Indexing resource: {resource_id}")
+    stats = await asyncio.to_thread(_build_index, resource_id, resource_type, md_path, force)
+    logger.info(f"Indexed resource {resource_id}: {stats['embedded']}/{stats['chunks']} chunks embedded, {stats['deleted']} deleted")
+
+    def save(session):
+        session.get(Resource, resource_id).vector_index = stats["collection"]
+
+    await run_in_session(save)
+    return stats
+
+
+async def update_vector_index(resource: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    解析完成后的索引钩子：建立索引并返回更新后的资源字典
+
+    未启用或 chromadb 不可用时只记录日志，不影响解析结果。
+    """
+    if not Config.VECTOR_INDEX_ENABLED:
+        return resource
+    try:
+        stats = await index_resource(resource["id"])
+    except ImportError as e:
+        logger.warning(f"Vector indexing skipped: {e}")
+        return resource
+    except Exception as e:
+        logger.error(f"Vector indexing failed for {resource['id']}: {e}")
+        return resource
+    return {**resource, "vector_index": stats["collection"]}
+
+
+def _query(query_text: str, n_results: int, types: Optional[List[str]]) -> List[Dict[str, Any]]:
+    collection = _get_collection()
+    embed = get_embedding_function()
+    where = None
+    if types:
+        where = {"type": types[0]} if len(types) == 1 else {"type": {"$in": list(types)}}
+    result = collection.query(
+        query_embeddings=[list(map(float, embed([query_text])[0]))],
+        n_results=n_results,
+        where=where,
+        include=["metadatas", "documents", "distances"],
+    )
+    hits = []
+    for meta, doc, distance in zip(result["metadatas"][0], result["documents"][0], result["distances"][0]):
+        hits.append({
+            "resource_id": meta["resource_id"],
+            "type": meta.get("type"),
+            "page": meta.get("page") or None,
+            "snippet": doc[:200],
+            "score": 1.0 - float(distance),
+        })
+
+    if hits:
+        with session_scope() as session:
+            resource_ids = {hit["resource_id"] for hit in hits}
+            titles = dict(session.query(Resource.id, Resource.title).filter(Resource.id.in_(resource_ids)))
+        for hit in hits:
+            hit["title"] = titles.get(hit["resource_id"], "")
+    return hits
+
+
+async def query_similar(query_text: str, n_results: int = 20, types: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    语义检索最相近的块
+
+    Returns:
+        [{"resource_id", "type", "page", "title", "snippet", "score"}, ...]，按相似度降序
+    """
+    return await asyncio.to_thread(_query, query_text, n_results, types)
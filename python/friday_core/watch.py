@@ -0,0 +1,376 @@
+"""
+文件夹监视 - 自动导入放入监视目录（Config.WATCH_DIRS）的 PDF 和音频
+
+- 变化来源：安装了 watchdog 时使用系统文件事件（Linux 上为 inotify），否则（或监视数
+  超出系统上限时）每 WATCH_POLL_INTERVAL 秒遍历一次目录。
+- 扫描索引：导入过的文件的路径、大小、修改时间和内容哈希持久化在 ingested_files 表中。
+  启动时只遍历一次目录（os.scandir 的目录项自带 stat 信息）并与索引比对，未变化的文件
+  不读取内容也不重新导入；只有修改时间变化的文件按内容哈希确认后跳过。
+- 防抖：发现变化的文件先进入待定表，大小和修改时间连续 WATCH_DEBOUNCE 秒不变才视为
+  写入完成，避免导入复制到一半的文件。
+- 导入：WATCH_CONCURRENCY 个 worker 从队列中取文件，交给 parse_pdf / process_audio 处理。
+  格式不支持、文件损坏等确定性错误记为失败，文件再次变化前不重试；其他错误按指数退避
+  重试（WATCH_RETRY_DELAY / WATCH_MAX_RETRIES）。
+"""
+import asyncio
+import os
+import sys
+import time
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple
+from friday_core.config import Config
+from friday_core.context import session_scope
+from friday_core.database import IngestedFile
+from friday_core.ingest import classify_file, ingest_file, record_ingested
+from friday_core.library import compute_file_hash
+from friday_core.logger import setup_logger
+from friday_core.progress import ProgressReporter
+
+logger = setup_logger(__name__)
+
+# 扫描索引项：(大小, 修改时间, 内容哈希, 资源 ID)
+IndexEntry = Tuple[int, float, Optional[str], Optional[str]]
+
+# 这些文件事件不会产生需要导入的内容
+_IGNORED_EVENTS = {"deleted", "opened", "closed_no_write"}
+
+
+def load_scan_index(roots: List[str]) -> Dict[str, IndexEntry]:
+    """读取监视目录下所有文件的索引项（按路径前缀做范围查询，走主键索引）"""
+    index = {}
+    with session_scope() as session:
+        for root in roots:
+            prefix = os.path.join(root, "")
+            rows = session.query(
+                IngestedFile.path, IngestedFile.size, IngestedFile.mtime,
+                IngestedFile.content_hash, IngestedFile.resource_id,
+            ).filter(IngestedFile.path >= prefix, IngestedFile.path < prefix + "\U0010ffff")
+            for path, size, mtime, content_hash, resource_id in rows:
+                index[path] = (size, mtime, content_hash, resource_id)
+    return index
+
+
+def scan_directory(root: str, recursive: bool = True) -> Iterator[Tuple[str, int, float]]:
+    """遍历目录中可导入的文件，返回 (路径, 大小, 修改时间)；跳过隐藏文件和隐藏目录"""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                stack.append(entry.path)
+                        elif classify_file(entry.name) and entry.is_file():
+                            stat = entry.stat()
+                            yield entry.path, stat.st_size, stat.st_mtime
+                    except OSError:
+                        # 遍历期间被删除的文件
+                        continue
+        except OSError as e:
+            logger.warning(f"Cannot scan directory {directory}: {e}")
+
+
+def _is_permanent_error(e: Exception) -> bool:
+    """输入文件本身的问题（格式不支持、内容损坏），重试也不会成功"""
+    if isinstance(e, ValueError):
+        return True
+    # PyMuPDF 打不开的损坏 PDF（只有抽取过 PDF 时才已导入 fitz）
+    fitz = sys.modules.get("fitz")
+    return fitz is not None and isinstance(e, fitz.FileDataError)
+
+
+def _stat_files(paths: List[str]) -> List[Optional[Tuple[int, float]]]:
+    """批量读取 (大小, 修改时间)，文件不存在时为 None"""
+    stats = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            stats.append(None)
+            continue
+        stats.append((stat.st_size, stat.st_mtime))
+    return stats
+
+
+class FolderWatcher:
+    """监视目录并自动导入新增和变化的文件"""
+
+    def __init__(
+        self,
+        dirs: Optional[List[str]] = None,
+        recursive: Optional[bool] = None,
+        backend: Optional[str] = None,
+        debounce: Optional[float] = None,
+        concurrency: Optional[int] = None,
+    ):
+        self.dirs = [os.path.abspath(d) for d in dirs] if dirs is not None else Config.get_watch_dirs()
+        self.recursive = Config.WATCH_RECURSIVE if recursive is None else recursive
+        self.backend = backend or Config.WATCH_BACKEND
+        self.debounce = Config.WATCH_DEBOUNCE if debounce is None else debounce
+        self.concurrency = max(1, concurrency or Config.WATCH_CONCURRENCY)
+        # 实际使用的变化来源：native（系统文件事件）或 polling
+        self.mode: Optional[str] = None
+        self._index: Dict[str, IndexEntry] = {}
+        # 待定文件：路径 -> (大小, 修改时间, 最近一次变化的时间)；大小为 -1 表示尚未读取
+        self._pending: Dict[str, Tuple[int, float, float]] = {}
+        # 已入队或正在导入的文件
+        self._queued: Set[str] = set()
+        # 等待重试的文件：路径 -> 已失败次数
+        self._retries: Dict[str, int] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._background: Set[asyncio.Task] = set()
+        self._observer = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._counts = {"processed": 0, "unchanged": 0, "failed": 0}
+        self._started = False
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    async def start(self):
+        """加载扫描索引，启动变化来源、防抖循环和导入 worker"""
+        if self._started:
+            return
+        self._started = True
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        for directory in self.dirs:
+            if not os.path.isdir(directory):
+                logger.warning(f"Watch directory does not exist: {directory}")
+
+        self._index = await asyncio.to_thread(load_scan_index, self.dirs)
+        # 先启动系统文件事件再做首次扫描，扫描期间新增的文件不会漏掉
+        if self.backend != "polling" and self._start_observer():
+            self.mode = "native"
+            self._tasks.append(asyncio.create_task(self._scan(self.dirs)))
+        else:
+            self.mode = "polling"
+            self._tasks.append(asyncio.create_task(self._poll()))
+        self._tasks.append(asyncio.create_task(self._debounce_loop()))
+        self._tasks.extend(asyncio.create_task(self._worker()) for _ in range(self.concurrency))
+        logger.info(f"Watching {len(self.dirs)} directories ({self.mode}), {len(self._index)} files indexed")
+
+    async def stop(self):
+        """停止监视；中断的导入在下次启动时重新进行"""
+        self._started = False
+        if self._observer is not None:
+            self._observer.stop()
+            await asyncio.to_thread(self._observer.join)
+            self._observer = None
+        tasks = self._tasks + list(self._background)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._background.clear()
+
+    def status(self) -> Dict[str, Any]:
+        """监视状态和本次启动以来的导入计数"""
+        return {
+            "started": self._started,
+            "dirs": self.dirs,
+            "mode": self.mode,
+            "indexed": len(self._index),
+            "pending": len(self._pending),
+            "queued": len(self._queued),
+            "retrying": len(self._retries),
+            **self._counts,
+        }
+
+    def _start_observer(self) -> bool:
+        """启动 watchdog 观察者，不可用时返回 False"""
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            logger.info("watchdog is not installed, watching by polling")
+            return False
+
+        loop = self._loop
+        on_event = self._on_event
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.event_type in _IGNORED_EVENTS:
+                    return
+                # 移动事件取目标路径（下载完成后改名为 .pdf 等）
+                path = getattr(event, "dest_path", "") or event.src_path
+                loop.call_soon_threadsafe(on_event, os.fsdecode(path), event.event_type, event.is_directory)
+
+        observer = Observer()
+        try:
+            for directory in self.dirs:
+                if os.path.isdir(directory):
+                    observer.schedule(Handler(), directory, recursive=self.recursive)
+            observer.start()
+        except OSError as e:
+            # 如 inotify 监视数超出 fs.inotify.max_user_watches
+            logger.warning(f"Native file watching unavailable ({e}), watching by polling")
+            observer.stop()
+            return False
+        self._observer = observer
+        return True
+
+    def _is_hidden(self, path: str) -> bool:
+        for root in self.dirs:
+            if path.startswith(root):
+                return (os.sep + ".") in path[len(root):]
+        return False
+
+    def _on_event(self, path: str, event_type: str, is_directory: bool):
+        """在事件循环中处理一个文件事件"""
+        if self._is_hidden(path):
+            return
+        if is_directory:
+            # 整个目录移入时不会为其中的文件逐个产生事件，补扫该目录
+            if event_type in ("created", "moved") and self.recursive:
+                task = asyncio.create_task(self._scan([path]))
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+            return
+        if classify_file(path):
+            self._mark(path)
+
+    def _mark(self, path: str, size: int = -1, mtime: float = -1.0):
+        """记录文件变化；大小和修改时间与待定表中一致时不重置防抖计时"""
+        entry = self._pending.get(path)
+        if entry is None or size < 0 or entry[:2] != (size, mtime):
+            self._pending[path] = (size, mtime, time.monotonic())
+
+    def _find_changes(self, roots: List[str]) -> List[Tuple[str, int, float]]:
+        """遍历目录，返回与扫描索引不一致的文件（在线程中调用）"""
+        changed = []
+        for root in roots:
+            for path, size, mtime in scan_directory(root, self.recursive):
+                entry = self._index.get(path)
+                if entry is None or entry[0] != size or entry[1] != mtime:
+                    changed.append((path, size, mtime))
+        return changed
+
+    async def _scan(self, roots: List[str]):
+        started = time.perf_counter()
+        changed = await asyncio.to_thread(self._find_changes, roots)
+        for path, size, mtime in changed:
+            self._mark(path, size, mtime)
+        logger.info(f"Watch scan: {len(changed)} new or changed files in {time.perf_counter() - started:.2f}s")
+
+    async def _poll(self):
+        while True:
+            await self._scan(self.dirs)
+            await asyncio.sleep(Config.WATCH_POLL_INTERVAL)
+
+    async def _debounce_loop(self):
+        """定期检查待定文件，大小和修改时间稳定够久的送入导入队列"""
+        interval = max(0.1, min(1.0, self.debounce / 2))
+        while True:
+            await asyncio.sleep(interval)
+            if not self._pending:
+                continue
+            paths = list(self._pending)
+            stats = await asyncio.to_thread(_stat_files, paths)
+            now = time.monotonic()
+            for path, stat in zip(paths, stats):
+                entry = self._pending.get(path)
+                if entry is None:
+                    continue
+                if stat is None:
+                    # 已删除或被移走
+                    del self._pending[path]
+                elif stat != entry[:2]:
+                    self._pending[path] = (*stat, now)
+                elif now - entry[2] >= self.debounce and path not in self._queued:
+                    # 正在导入的文件又发生了变化时留在待定表中，导入完成后再比对
+                    del self._pending[path]
+                    self._queued.add(path)
+                    self._queue.put_nowait((path, *stat))
+
+    async def _worker(self):
+        while True:
+            path, size, mtime = await self._queue.get()
+            try:
+                await self._process(path, size, mtime)
+            except Exception as e:
+                self._schedule_retry(path, e)
+            finally:
+                self._queued.discard(path)
+                self._queue.task_done()
+
+    async def _process(self, path: str, size: int, mtime: float):
+        """导入一个稳定下来的文件并更新扫描索引"""
+        entry = self._index.get(path)
+        if entry is not None and entry[:2] == (size, mtime):
+            return
+
+        content_hash = None
+        if entry is not None and entry[2]:
+            # 修改时间变了但内容没变（如复制时保留了内容、被 touch）时只更新索引
+            content_hash = await asyncio.to_thread(compute_file_hash, path)
+            if content_hash == entry[2]:
+                await asyncio.to_thread(record_ingested, path, size, mtime, entry[3], content_hash)
+                self._index[path] = (size, mtime, content_hash, entry[3])
+                self._counts["unchanged"] += 1
+                return
+
+        source = "parse_pdf" if classify_file(path) == "pdf" else "process_audio"
+        reporter = ProgressReporter(source, file=path)
+        logger.info(f"Watch ingest: {path}")
+        try:
+            resource = await ingest_file(path, progress_callback=reporter.update)
+        except Exception as e:
+            if not _is_permanent_error(e) and self._retries.get(path, 0) < Config.WATCH_MAX_RETRIES:
+                raise
+            # 记录失败，文件再次变化之前不重试
+            logger.error(f"Watch ingest failed for {path}: {e}")
+            await asyncio.to_thread(record_ingested, path, size, mtime, None, content_hash)
+            self._index[path] = (size, mtime, content_hash, None)
+            self._retries.pop(path, None)
+            self._counts["failed"] += 1
+            return
+        finally:
+            reporter.close()
+
+        self._retries.pop(path, None)
+        resource_id = resource.get("id")
+        content_hash = await asyncio.to_thread(record_ingested, path, size, mtime, resource_id)
+        self._index[path] = (size, mtime, content_hash, resource_id)
+        self._counts["processed"] += 1
+
+    def _schedule_retry(self, path: str, error: Exception):
+        """非确定性错误：等待一段时间（每次翻倍）后重新送入防抖"""
+        if not os.path.exists(path):
+            # 文件已被删除，重新出现时会再次触发导入
+            self._retries.pop(path, None)
+            return
+        attempt = self._retries.get(path, 0) + 1
+        if attempt > Config.WATCH_MAX_RETRIES:
+            logger.error(f"Watch ingest failed for {path}, giving up after {attempt - 1} retries: {error}")
+            self._retries.pop(path, None)
+            self._counts["failed"] += 1
+            return
+        self._retries[path] = attempt
+        delay = Config.WATCH_RETRY_DELAY * 2 ** (attempt - 1)
+        logger.warning(f"Watch ingest failed for {path}: {error}; retry {attempt}/{Config.WATCH_MAX_RETRIES} in {delay:.0f}s")
+        task = asyncio.create_task(self._retry_later(path, delay))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _retry_later(self, path: str, delay: float):
+        await asyncio.sleep(delay)
+        self._mark(path)
+
+
+_folder_watcher: Optional[FolderWatcher] = None
+
+
+def get_folder_watcher() -> FolderWatcher:
+    """获取进程内共享的文件夹监视器（监视 Config.WATCH_DIRS）"""
+    global _folder_watcher
+    if _folder_watcher is None:
+        _folder_watcher = FolderWatcher()
+    return _folder_watcher
@@ -0,0 +1,98 @@
+"""
+语音识别后端 - 可插拔的窗口级转写函数
+
+后端是一个函数：接收一个窗口的 16 kHz 单声道 float32 样本，返回窗口内的分段
+[{"start": 秒, "end": 秒, "text": 文本}, ...]，时间相对于窗口起点。
+
+后端在 worker 进程中按名称创建并缓存，每个进程只加载一次模型。工厂函数接收同时
+转写的 worker 数，用于分摊 CPU 线程。内置后端在本模块导入时注册；自定义后端需在
+worker 进程也能执行到的模块顶层注册。
+"""
+import os
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+import numpy as np
+
+from friday_core.config import Config
+
+AsrBackend = Callable[[np.ndarray, int], List[Dict[str, Any]]]
+
+_backend_factories: Dict[str, Callable[[int], AsrBackend]] = {}
+_backends: Dict[Tuple[str, int], AsrBackend] = {}
+
+
+def register_asr_backend(name: str, factory: Callable[[int], AsrBackend]):
+    """注册语音识别后端，factory(workers) 在首次使用时调用"""
+    _backend_factories[name] = factory
+    for key in [key for key in _backends if key[0] == name]:
+        del _backends[key]
+
+
+def get_asr_backend(name: Optional[str] = None, workers: int = 1) -> AsrBackend:
+    """
+    获取（按需创建）语音识别后端
+
+    Args:
+        name: 后端名称，None 时使用 Config.ASR_BACKEND
+        workers: 同时转写的 worker 数（本次转写实际使用的进程数）
+    """
+    key = (name or Config.ASR_BACKEND, max(1, workers))
+    if key not in _backends:
+        factory = _backend_factories.get(key[0])
+        if factory is None:
+            raise ValueError(f"Unknown ASR backend: {key[0]}")
+        _backends[key] = factory(key[1])
+    return _backends[key]
+
+
+def _faster_whisper_factory(workers: int) -> AsrBackend:
+    """本地 Whisper 模型（CTranslate2，CPU 推理）"""
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError as e:
+        raise ImportError("faster-whisper is required for transcription: pip install faster-whisper") from e
+
+    # 多个 worker 进程分摊 CPU 核，避免线程超额订阅
+    cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+    model = WhisperModel(Config.ASR_MODEL, device="cpu", compute_type=Config.ASR_COMPUTE_TYPE, cpu_threads=cpu_threads)
+
+    def transcribe(samples: np.ndarray, sample_rate: int) -> List[Dict[str, Any]]:
+        segments, _ = model.transcribe(samples, language=Config.ASR_LANGUAGE, vad_filter=True)
+        return [
+            {"start": segment.start, "end": segment.end, "text": segment.text.strip()}
+            for segment in segments
+            if segment.text.strip()
+        ]
+
+    return transcribe
+
+
+def _energy_factory(workers: int) -> AsrBackend:
+    """
+    基于短时能量的轻量替身：检测有声片段，文本为片段时长占位
+
+    不依赖任何模型，输出确定，用于测试和基准中替代真实模型。
+    """
+    frame_seconds = 0.03
+    min_seconds = 0.3
+
+    def transcribe(samples: np.ndarray, sample_rate: int) -> List[Dict[str, Any]]:
+        frame = int(sample_rate * frame_seconds)
+        count = len(samples) // frame
+        if count == 0:
+            return []
+        rms = np.sqrt(np.mean(samples[:count * frame].reshape(count, frame) ** 2, axis=1))
+        voiced = np.concatenate([[False], rms > max(0.02, float(rms.mean()) * 0.5), [False]])
+        edges = np.flatnonzero(np.diff(voiced.astype(np.int8)))
+        segments = []
+        for begin, end in zip(edges[::2], edges[1::2]):
+            start, stop = begin * frame_seconds, end * frame_seconds
+            if stop - start >= min_seconds:
+                segments.append({"start": start, "end": stop, "text": f"[语音 {stop - start:.1f} 秒]"})
+        return segments
+
+    return transcribe
+
+
+register_asr_backend("faster_whisper", _faster_whisper_factory)
+register_asr_backend("energy", _energy_factory)
@@ -0,0 +1,173 @@
+"""
+音频解码 - 流式解码为 16 kHz 单声道 float32 PCM，并切分为重叠窗口
+
+WAV 文件用标准库 wave 逐块读取，其他格式通过 FFmpeg 子进程解码到管道；
+任何时刻内存中只保留一个窗口加一个读取块，与录音时长无关。
+"""
+import shutil
+import subprocess
+import wave
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+# 每次从文件或管道读取的时长（秒）
+_BLOCK_SECONDS = 10
+
+
+def probe_duration(path: str) -> Optional[float]:
+    """获取音频时长（秒），无法获取时返回 None"""
+    if Path(path).suffix.lower() == ".wav":
+        with wave.open(path, "rb") as wav:
+            return wav.getnframes() / wav.getframerate()
+
+    ffprobe = shutil.which("ffprobe")
+    if ffprobe is None:
+        return None
+    proc = subprocess.run(
+        [ffprobe, "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+        capture_output=True,
+        text=True,
+    )
+    try:
+        return float(proc.stdout.strip())
+    except ValueError:
+        return None
+
+
+def _to_float(raw: bytes, sample_width: int, channels: int) -> np.ndarray:
+    """PCM 字节转为 [-1, 1] 的 float32 单声道"""
+    if sample_width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sample_width == 2:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768
+    elif sample_width == 4:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {sample_width * 8} bit")
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+class _Resampler:
+    """分块线性插值重采样，块边界处与整段重采样结果一致"""
+
+    def __init__(self, source_rate: int):
+        self.ratio = SAMPLE_RATE / source_rate
+        self.consumed = 0      # 已读入的源样本数
+        self.produced = 0      # 已输出的目标样本数
+        self.tail = np.zeros(0, dtype=np.float32)
+
+    def __call__(self, block: np.ndarray) -> np.ndarray:
+        if self.ratio == 1:
+            return block
+        data = np.concatenate([self.tail, block])
+        offset = self.consumed - len(self.tail)
+        self.consumed += len(block)
+        # 目标样本 n 对应源位置 n / ratio，只输出完全落在已读数据内的样本
+        last = int(np.floor((self.consumed - 1) * self.ratio))
+        positions = np.arange(self.produced, last + 1) / self.ratio - offset
+        self.produced = last + 1
+        self.tail = data[-1:]
+        return np.interp(positions, np.arange(len(data)), data).astype(np.float32)
+
+
+def _iter_wav(path: str, start_seconds: float = 0.0) -> Iterator[np.ndarray]:
+    with wave.open(path, "rb") as wav:
+        if start_seconds > 0:
+            wav.setpos(min(int(start_seconds * wav.getframerate()), wav.getnframes()))
+        channels = wav.getnchannels()
+        sample_width = wav.getsampwidth()
+        resample = _Resampler(wav.getframerate())
+        block_frames = wav.getframerate() * _BLOCK_SECONDS
+        while True:
+            raw = wav.readframes(block_frames)
+            if not raw:
+                break
+            yield resample(_to_float(raw, sample_width, channels))
+
+
+def _iter_ffmpeg(path: str, start_seconds: float = 0.0) -> Iterator[np.ndarray]:
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError(f"FFmpeg is required to decode {Path(path).suffix} files")
+    # -ss 放在 -i 之前由 FFmpeg 直接定位，不解码之前的内容
+    seek = ["-ss", f"{start_seconds:.3f}"] if start_seconds > 0 else []
+    proc = subprocess.Popen(
+        [ffmpeg, "-nostdin", "-v", "error", *seek, "-i", path, "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    block_bytes = SAMPLE_RATE * _BLOCK_SECONDS * 2
+    try:
+        while True:
+            raw = proc.stdout.read(block_bytes)
+            if not raw:
+                break
+            # 管道读取可能在样本中间截断，补齐或丢弃不完整的最后一个字节
+            if len(raw) % 2:
+                raw += proc.stdout.read(1)
+            yield _to_float(raw[:len(raw) // 2 * 2], 2, 1)
+        if proc.wait() != 0:
+            raise RuntimeError(f"FFmpeg failed to decode {path}: {proc.stderr.read().decode('utf-8', errors='replace')}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+
+def iter_pcm(path: str, start_seconds: float = 0.0) -> Iterator[np.ndarray]:
+    """从 start_seconds 开始流式解码为 16 kHz 单声道 float32 PCM 块"""
+    if Path(path).suffix.lower() == ".wav":
+        return _iter_wav(path, start_seconds)
+    return _iter_ffmpeg(path, start_seconds)
+
+
+def iter_windows(
+    path: str,
+    window_seconds: float,
+    overlap_seconds: float,
+    start_seconds: float = 0.0,
+    on_pcm: Optional[Callable[[np.ndarray], None]] = None,
+) -> Iterator[Tuple[float, np.ndarray, bool]]:
+    """
+    从 start_seconds 开始把音频切分为固定长度、相邻重叠的窗口
+
+    on_pcm 按顺序收到每个解码出的 PCM 块（不重叠），可在同一次解码中顺带计算波形等。
+
+    Yields:
+        (窗口起点秒数, 样本, 是否最后一个窗口)；最后一个窗口可能短于 window_seconds
+    """
+    window = int(window_seconds * SAMPLE_RATE)
+    overlap = int(overlap_seconds * SAMPLE_RATE)
+    step = window - overlap
+    if step <= 0:
+        raise ValueError("ASR window must be longer than the overlap")
+
+    buffer = np.zeros(0, dtype=np.float32)
+    start = int(start_seconds * SAMPLE_RATE)  # buffer[0] 对应的样本序号
+    pending: Optional[Tuple[float, np.ndarray]] = None
+
+    for block in iter_pcm(path, start_seconds):
+        if on_pcm is not None:
+            on_pcm(block)
+        buffer = np.concatenate([buffer, block])
+        while len(buffer) >= window:
+            # 先输出上一个窗口：此时已知它后面还有窗口
+            if pending is not None:
+                yield pending[0], pending[1], False
+            pending = (start / SAMPLE_RATE, buffer[:window].copy())
+            buffer = buffer[step:]
+            start += step
+
+    # 剩余样本只在未被上一个窗口完全覆盖时才需要单独成窗
+    if len(buffer) > overlap or (pending is None and len(buffer) > 0):
+        if pending is not None:
+            yield pending[0], pending[1], False
+        pending = (start / SAMPLE_RATE, buffer.copy())
+    if pending is not None:
+        yield pending[0], pending[1], True
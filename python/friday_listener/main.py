@@ -1,41 +1,215 @@
 """
 音频处理主模块
 """
-from typing import Dict, Any
+import json
+import shutil
+import asyncio
+from typing import Dict, Any, Callable, List, Optional
 from pathlib import Path
+from datetime import datetime
 from friday_core.logger import setup_logger
+from friday_core.config import Config
+from friday_core.checkpoint import clear_checkpoint, load_checkpoint, save_checkpoint, truncate_to
+from friday_core.metrics import stage
+from friday_core.progress import ProgressReporter, emit
+from friday_core.timefmt import format_timestamp
+from friday_core.vector_index import update_vector_index
+from friday_core.library import (
+    compute_file_hash,
+    finalize_resource,
+    find_cached_resource,
+    get_resource_dir,
+    resource_id_for_hash,
+    resource_lock,
+    save_resource,
+)
+from friday_listener.decoder import probe_duration
+from friday_listener.transcriber import get_transcriber_version, resolve_workers, transcribe
+from friday_listener.waveform import WAVEFORM_FILENAME, PeakBuilder, build_waveform
 
 logger = setup_logger(__name__)
 
+# 进度回调 (stage, progress, message, **fields)，与 ProgressReporter.update 兼容
+ProgressCallback = Callable[..., None]
 
-async def process_audio(audio_path: str) -> Dict[str, Any]:
+# 逐字稿每隔多少秒插入一个时间标题，便于分块检索
+_SECTION_SECONDS = 300
+
+
+async def process_audio(
+    audio_path: str,
+    workers: Optional[int] = None,
+    force: bool = False,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
     """
     处理音频
-    1. ASR 转写
-    2. 说话人分离
-    3. 术语校正
-    4. 生成逐字稿
+    1. 流式解码为重叠窗口
+    2. ASR 转写（按批次并行，可插拔后端）
+    3. 按时间顺序流式生成带时间戳的逐字稿并保存到 Library
+    4. 在同一次解码中生成波形峰值文件（assets/waveform.peaks，见 friday_listener.waveform）
+
+    Args:
+        audio_path: 音频文件路径
+        workers: 并行转写的 worker 进程数，None 时使用 Config.ASR_WORKERS
+        force: 为 True 时忽略内容哈希缓存，强制重新转写
+        progress_callback: 进度回调函数 (stage, progress, message, **fields)，默认发到进度事件通道
+            stage: "transcribe" | "complete"
+
+    新转写出的分段另以 stage="segments" 的事件实时发出（不限频），字段 segments 为
+    [{"start", "end", "text"}, ...]。
     """
     logger.info(f"Processing audio: {audio_path}")
+    report = progress_callback or ProgressReporter("process_audio").update
+
+    audio_path_obj = Path(str(audio_path))
+    if not audio_path_obj.exists():
+        raise FileNotFoundError(f"Audio file not found: {audio_path}")
+    audio_path = str(audio_path_obj)
+
+    Config.ensure_directories()
+    transcriber_version = get_transcriber_version()
+
+    # 按内容哈希 + 转写器版本命中缓存时直接返回已有资源
+    with stage("hash"):
+        content_hash = await asyncio.to_thread(compute_file_hash, audio_path)
+
+    async def cache_hit() -> Optional[Dict[str, Any]]:
+        if force:
+            return None
+        cached = await asyncio.to_thread(find_cached_resource, content_hash, transcriber_version)
+        if cached:
+            logger.info(f"Audio cache hit: {cached['id']} (hash {content_hash[:12]})")
+            report("complete", 100, "音频已在资源库中")
+            if cached["vector_index"] is None:
+                cached = await update_vector_index(cached)
+        return cached
+
+    cached = await cache_hit()
+    if cached:
+        return cached
+
+    # 同一内容的导入共用资源目录，需串行执行；拿到锁后再查一次缓存，
+    # 前一个导入刚完成时直接复用它的结果
+    async with resource_lock(content_hash):
+        cached = await cache_hit()
+        if cached:
+            return cached
+
+        # 资源 ID 由内容哈希确定：重新转写或中断后重试都落到同一目录
+        resource_id = resource_id_for_hash(content_hash)
+        title = audio_path_obj.stem
+        resource_dir = get_resource_dir(resource_id)
+        segments_path = resource_dir / "transcript.jsonl"
+        waveform_path = resource_dir / "assets" / WAVEFORM_FILENAME
+
+        duration = await asyncio.to_thread(probe_duration, audio_path)
+
+        def prepare():
+            # 上次中断留下的检查点可用时，截断到最后一次刷盘的位置并从记录的偏移继续
+            checkpoint = load_checkpoint(resource_dir, "audio", content_hash, transcriber_version)
+            if (
+                checkpoint
+                and truncate_to(resource_dir / checkpoint["md_name"], checkpoint["md_bytes"])
+                and truncate_to(segments_path, checkpoint["segments_bytes"])
+            ):
+                logger.info(f"Resuming audio {resource_id} from {format_timestamp(checkpoint['offset'])}")
+                return resource_dir / checkpoint["md_name"], checkpoint["offset"], checkpoint["section"], checkpoint["segments"]
+
+            if resource_dir.exists():
+                shutil.rmtree(resource_dir)
+            resource_dir.mkdir(parents=True, exist_ok=True)
+
+            # 1. 写入 Markdown 文件头
+            md_path = resource_dir / f"{title}.md"
+            with open(md_path, "w", encoding="utf-8") as f:
+                f.write(f"# {title}\n\n")
+                f.write(f"**来源**: {audio_path}\n\n")
+                f.write(f"**处理时间**: {datetime.now().isoformat()}\n\n")
+                if duration:
+                    f.write(f"**时长**: {format_timestamp(duration)}\n\n")
+                f.write("---\n\n")
+            segments_path.touch()
+            return md_path, 0.0, -1, 0
+
+        # 检查点、目录和任务记录的读写都是阻塞 I/O，放到线程中执行
+        md_path, offset, section, segment_count = await asyncio.to_thread(prepare)
+
+        # 2. 分窗转写，分段按时间顺序流式追加到 Markdown 和 transcript.jsonl
+        workers = resolve_workers(workers)
+        logger.info(f"Transcribing audio with {workers} workers ({transcriber_version})...")
+        report("transcribe", 0, "正在转写音频...")
+
+        with open(md_path, "a", encoding="utf-8") as md_file, open(segments_path, "a", encoding="utf-8") as segments_file:
+            def write_checkpoint(resume_seconds: float):
+                save_checkpoint(resource_dir, "audio", content_hash, transcriber_version, {
+                    "md_name": md_path.name,
+                    "md_bytes": md_file.tell(),
+                    "segments_bytes": segments_file.tell(),
+                    "offset": resume_seconds,
+                    "section": section,
+                    "segments": segment_count,
+                })
+
+            def append_segments(segments: List[Dict[str, Any]], resume_seconds: float):
+                nonlocal section, segment_count
+                for segment in segments:
+                    segment_section = int(segment["start"] // _SECTION_SECONDS)
+                    if segment_section != section:
+                        section = segment_section
+                        md_file.write(f"## {format_timestamp(section * _SECTION_SECONDS)}\n\n")
+                    md_file.write(f"**[{format_timestamp(segment['start'])}]** {segment['text']}\n\n")
+                    segments_file.write(json.dumps(segment, ensure_ascii=False) + "\n")
+                md_file.flush()
+                segments_file.flush()
+                segment_count += len(segments)
+                write_checkpoint(resume_seconds)
+
+            async def on_segments(segments: List[Dict[str, Any]], done_seconds: float, resume_seconds: float):
+                await asyncio.to_thread(append_segments, segments, resume_seconds)
+
+                progress = int(min(done_seconds / duration, 1.0) * 95) if duration else 0  # 转写占 95%
+                if segments:
+                    emit({"source": "process_audio", "stage": "segments", "progress": progress, "resource_id": resource_id, "segments": segments})
+                message = f"正在转写音频 ({format_timestamp(done_seconds)}"
+                message += f"/{format_timestamp(duration)})..." if duration else ")..."
+                report(
+                    "transcribe",
+                    progress,
+                    message,
+                    current=int(done_seconds),
+                    total=int(duration) if duration else None,
+                )
+
+            # 从头转写时波形随转写的解码一起计算；从检查点继续时开头部分不会被解码，之后单独生成
+            peaks = PeakBuilder() if offset == 0 else None
+            await asyncio.to_thread(write_checkpoint, offset)
+            with stage("transcribe"):
+                await transcribe(audio_path, on_segments, workers=workers, start_seconds=offset, on_pcm=peaks.feed if peaks else None)
 
-    # TODO: 实现音频处理逻辑
-    # 1. 使用 Faster-Whisper 进行 ASR
-    # 2. 使用 Pyannote 进行说话人分离
-    # 3. 术语校正
-    # 4. 生成带时间戳的逐字稿
-    # 5. 保存到 Library
-
-    # 临时返回
-    return {
-        "id": "resource_id",
-        "type": "audio",
-        "title": Path(audio_path).stem,
-        "source": audio_path,
-        "md_path": None,
-        "assets": [],
-        "vector_index": None,
-        "created_at": "2024-01-01T00:00:00",
-        "updated_at": "2024-01-01T00:00:00",
-    }
+        with stage("waveform"):
+            if peaks is not None:
+                await asyncio.to_thread(peaks.save, waveform_path)
+            else:
+                await asyncio.to_thread(build_waveform, audio_path, waveform_path)
 
+        report("complete", 100, "音频转写完成")
+        logger.info(f"Audio transcription completed: {resource_id} ({segment_count} segments)")
 
+        # 保存到资源库，建立全文和向量索引后返回资源信息
+        resource = await asyncio.to_thread(
+            save_resource,
+            {
+                "id": resource_id,
+                "type": "audio",
+                "title": title,
+                "source": audio_path,
+                "md_path": str(md_path),
+                "assets": [str(waveform_path)],
+                "vector_index": None,
+            },
+            content_hash=content_hash,
+            extractor_version=transcriber_version,
+        )
+        clear_checkpoint(resource_dir)
+        return await finalize_resource(resource)
@@ -0,0 +1,171 @@
+"""
+流式分窗转写引擎 - 把重叠窗口按批次交给进程池转写，按时间顺序流式输出分段
+
+解码在线程中逐批进行，同时在途的批次数不超过 worker 数的两倍，内存占用与录音
+时长无关。相邻窗口重叠 overlap 秒，分段按起点归属：每个窗口只保留起点落在
+[起点 + overlap/2, 终点 - overlap/2) 内的分段（首窗口从 0 开始，末窗口不设上限），
+重叠区内的分段只会被输出一次；在前一个窗口末尾开始的分段由该窗口完整识别到窗口终点。
+"""
+import asyncio
+import itertools
+import math
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Tuple
+from friday_core.config import Config
+from friday_core.metrics import record_worker_stats
+from friday_listener.asr import get_asr_backend
+from friday_listener.decoder import SAMPLE_RATE, iter_windows
+
+# 转写器版本：分段或输出格式变化时递增，使内容哈希缓存失效
+TRANSCRIBER_VERSION = "asr-1"
+
+# 分段回调 (segments, done_seconds, resume_seconds)：按时间顺序调用；
+# resume_seconds 是下一个窗口的起点，从这里继续转写不会遗漏或重复分段
+SegmentCallback = Callable[[List[Dict[str, Any]], float, float], Awaitable[None]]
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+
+
+def get_transcriber_version(backend: Optional[str] = None) -> str:
+    """缓存键中的转写器版本，包含后端和模型名"""
+    backend = backend or Config.ASR_BACKEND
+    if backend == "faster_whisper":
+        return f"{TRANSCRIBER_VERSION}:{backend}:{Config.ASR_MODEL}"
+    return f"{TRANSCRIBER_VERSION}:{backend}"
+
+
+def resolve_workers(workers: Optional[int] = None) -> int:
+    """解析 worker 数量：显式参数 > 配置"""
+    return max(1, workers or Config.get_asr_workers())
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    """获取（必要时重建）共享进程池，worker 内的模型在进程存活期间复用"""
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = ProcessPoolExecutor(max_workers=workers)
+        _executor_workers = workers
+    return _executor
+
+
+def shutdown_executor():
+    """关闭共享进程池并等待 worker 退出"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+    _executor = None
+
+
+def _reset_executor():
+    """进程池损坏（worker 崩溃）后丢弃，下次调用时重建"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+    _executor = None
+
+
+def _transcribe_batch(
+    backend_name: str, windows: List[Tuple[float, Any, bool]], overlap_seconds: float, workers: int = 1
+) -> Tuple[List[Dict[str, Any]], float]:
+    """
+    在 worker 中转写一批窗口（workers 为同时转写的 worker 数，后端据此分摊 CPU 线程）
+
+    Returns:
+        (按时间排序的分段（绝对时间）, 耗时秒数)
+    """
+    started = time.perf_counter()
+    backend = get_asr_backend(backend_name, workers)
+    half_overlap = overlap_seconds / 2
+    segments = []
+    for start, samples, is_last in windows:
+        lower = start + half_overlap if start > 0 else 0.0
+        upper = math.inf if is_last else start + len(samples) / SAMPLE_RATE - half_overlap
+        for segment in backend(samples, SAMPLE_RATE):
+            begin, end = start + segment["start"], start + segment["end"]
+            if lower <= begin < upper:
+                segments.append({"start": round(begin, 2), "end": round(end, 2), "text": segment["text"]})
+    return segments, time.perf_counter() - started
+
+
+async def transcribe(
+    audio_path: str,
+    on_segments: SegmentCallback,
+    workers: Optional[int] = None,
+    backend: Optional[str] = None,
+    start_seconds: float = 0.0,
+    on_pcm: Optional[Callable[[Any], None]] = None,
+) -> int:
+    """
+    流式转写音频
+
+    Args:
+        audio_path: 音频文件路径
+        on_segments: 异步分段回调，每个批次完成后按时间顺序调用并等待一次
+        workers: worker 进程数，None 时使用配置；为 1 时在线程中转写
+        backend: 语音识别后端名称，None 时使用 Config.ASR_BACKEND
+        start_seconds: 从该偏移继续转写（应为之前某次回调给出的 resume_seconds）
+        on_pcm: 按顺序接收解码出的 PCM 块（在解码线程中调用），见 iter_windows
+
+    Returns:
+        分段总数
+    """
+    workers = resolve_workers(workers)
+    backend = backend or Config.ASR_BACKEND
+    overlap = Config.ASR_OVERLAP_SECONDS
+    batch_size = max(1, Config.ASR_BATCH_WINDOWS)
+    windows = iter_windows(audio_path, Config.ASR_WINDOW_SECONDS, overlap, start_seconds, on_pcm)
+
+    def next_batch():
+        started = time.perf_counter()
+        batch = list(itertools.islice(windows, batch_size))
+        return batch, time.perf_counter() - started
+
+    if workers == 1:
+        def run(batch):
+            return asyncio.ensure_future(asyncio.to_thread(_transcribe_batch, backend, batch, overlap, workers))
+    else:
+        executor = _get_executor(workers)
+        loop = asyncio.get_running_loop()
+
+        def run(batch):
+            return loop.run_in_executor(executor, _transcribe_batch, backend, batch, overlap, workers)
+
+    inflight: deque = deque()
+    total = 0
+
+    async def drain():
+        nonlocal total
+        future, done_seconds, resume_seconds = inflight.popleft()
+        segments, elapsed = await future
+        record_worker_stats({"asr": elapsed})
+        total += len(segments)
+        await on_segments(segments, done_seconds, resume_seconds)
+
+    try:
+        while True:
+            batch, decode_seconds = await asyncio.to_thread(next_batch)
+            record_worker_stats({"decode": decode_seconds})
+            if not batch:
+                break
+            start, samples, _ = batch[-1]
+            end = start + len(samples) / SAMPLE_RATE
+            inflight.append((run(batch), end, end - overlap))
+            if len(inflight) >= workers * 2:
+                await drain()
+        while inflight:
+            await drain()
+    except BrokenProcessPool:
+        _reset_executor()
+        raise
+    finally:
+        for future, _, _ in inflight:
+            future.cancel()
+        windows.close()
+
+    return total
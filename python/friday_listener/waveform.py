@@ -0,0 +1,224 @@
+"""
+波形峰值金字塔 - 供 Listener 页面绘制音频波形
+
+转写时解码出的 16 kHz PCM 块顺带交给 PeakBuilder（与 ASR 共用同一次解码），
+每 WAVEFORM_SAMPLES_PER_PEAK 个样本取一对 (最小值, 最大值) 作为第 0 层，之后每层
+把相邻两对合并为一对，直到只剩一对。峰值量化为 int8（最小值向下、最大值向上取整，
+波形包络不会被削薄），3 小时录音的全部层级约 2.7 MB。
+
+文件格式（小端）：
+    文件头  magic(4s) version(H) 层数(H) 采样率(I) 第 0 层每对样本数(I) 总样本数(Q)
+    层表    每层一项：数据偏移(Q) 峰值对数(Q)
+    数据    各层的 int8 峰值，按 (min, max) 交错存放
+
+读取时只解析文件头和层表，所需层级和时间范围内的峰值通过内存映射按需读取，
+绘制一屏波形只读几 KB，不需要再解码音频。
+"""
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from friday_core.config import Config
+from friday_listener.decoder import SAMPLE_RATE, iter_pcm
+
+WAVEFORM_FILENAME = "waveform.peaks"
+
+_MAGIC = b"FWPK"
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHHIIQ")
+_LEVEL_ENTRY = struct.Struct("<QQ")
+
+# 峰值量化后的满幅值
+PEAK_SCALE = 127
+
+
+class PeakBuilder:
+    """流式构建峰值金字塔：逐块送入 PCM，最后一次写出所有层级"""
+
+    def __init__(self, samples_per_peak: Optional[int] = None, sample_rate: int = SAMPLE_RATE):
+        self.samples_per_peak = max(1, samples_per_peak or Config.WAVEFORM_SAMPLES_PER_PEAK)
+        self.sample_rate = sample_rate
+        self.total_samples = 0
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._mins: List[np.ndarray] = []
+        self._maxs: List[np.ndarray] = []
+
+    def feed(self, block: np.ndarray):
+        """送入一块 [-1, 1] 的 float32 样本"""
+        self.total_samples += len(block)
+        data = np.concatenate([self._carry, block]) if len(self._carry) else block
+        count = len(data) // self.samples_per_peak
+        if count:
+            frames = data[:count * self.samples_per_peak].reshape(count, self.samples_per_peak)
+            self._mins.append(_quantize(frames.min(axis=1), np.floor))
+            self._maxs.append(_quantize(frames.max(axis=1), np.ceil))
+        self._carry = data[count * self.samples_per_peak:].copy()
+
+    def levels(self) -> List[np.ndarray]:
+        """所有层级，每层形状为 (峰值对数, 2)，第 0 层最精细"""
+        mins, maxs = list(self._mins), list(self._maxs)
+        if len(self._carry):
+            # 不足一对的尾部样本单独成对
+            mins.append(_quantize(self._carry.min(keepdims=True), np.floor))
+            maxs.append(_quantize(self._carry.max(keepdims=True), np.ceil))
+        if not mins:
+            return [np.zeros((0, 2), dtype=np.int8)]
+
+        level = np.stack([np.concatenate(mins), np.concatenate(maxs)], axis=1)
+        result = [level]
+        while len(level) > 1:
+            if len(level) % 2:
+                # 奇数对时补一对与最后一对相同的值，不影响合并结果
+                level = np.concatenate([level, level[-1:]])
+            pairs = level.reshape(-1, 2, 2)
+            level = np.stack([pairs[:, :, 0].min(axis=1), pairs[:, :, 1].max(axis=1)], axis=1)
+            result.append(level)
+        return result
+
+    def save(self, path: Path):
+        """写出峰值文件（先写临时文件再替换）"""
+        levels = self.levels()
+        offset = _HEADER.size + _LEVEL_ENTRY.size * len(levels)
+        table = []
+        for level in levels:
+            table.append(_LEVEL_ENTRY.pack(offset, len(level)))
+            offset += level.nbytes
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, len(levels), self.sample_rate, self.samples_per_peak, self.total_samples))
+            f.write(b"".join(table))
+            for level in levels:
+                f.write(level.tobytes())
+        os.replace(tmp_path, path)
+
+
+def _quantize(values: np.ndarray, rounding) -> np.ndarray:
+    return np.clip(rounding(values * PEAK_SCALE), -PEAK_SCALE, PEAK_SCALE).astype(np.int8)
+
+
+def build_waveform(audio_path: str, output_path: Path) -> Path:
+    """单独解码一遍音频生成峰值文件（转写从检查点继续、或旧资源没有峰值文件时使用）"""
+    builder = PeakBuilder()
+    for block in iter_pcm(audio_path):
+        builder.feed(block)
+    builder.save(output_path)
+    return Path(output_path)
+
+
+def _read_header(path: Path) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError(f"Invalid waveform file: {path}")
+        magic, version, level_count, sample_rate, samples_per_peak, total_samples = _HEADER.unpack(header)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported waveform file: {path}")
+        table = f.read(_LEVEL_ENTRY.size * level_count)
+    return {
+        "sample_rate": sample_rate,
+        "samples_per_peak": samples_per_peak,
+        "total_samples": total_samples,
+        "levels": [_LEVEL_ENTRY.unpack_from(table, i * _LEVEL_ENTRY.size) for i in range(level_count)],
+    }
+
+
+def read_waveform(
+    path: Path,
+    start: float = 0.0,
+    end: Optional[float] = None,
+    level: Optional[int] = None,
+    width: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    读取某一层级在时间范围内的峰值
+
+    Args:
+        path: 峰值文件路径
+        start / end: 时间范围（秒），end 为 None 时到结尾
+        level: 层级（0 最精细，每层每对覆盖的样本数翻倍）
+        width: 未指定 level 时，选择该范围内峰值对数不少于 width 的最粗层级（如画布像素宽度）
+
+    Returns:
+        {"level", "levels", "sample_rate", "seconds_per_peak", "duration", "start", "end",
+         "scale": 满幅值, "min": [...], "max": [...]}；start / end 为返回峰值实际覆盖的范围
+    """
+    header = _read_header(path)
+    sample_rate = header["sample_rate"]
+    levels = header["levels"]
+    duration = header["total_samples"] / sample_rate
+    start = min(max(0.0, float(start)), duration)
+    end = duration if end is None else min(max(start, float(end)), duration)
+
+    if level is None:
+        span = (end - start) * sample_rate / header["samples_per_peak"]
+        target = max(1, int(width or Config.WAVEFORM_DEFAULT_WIDTH))
+        level = 0
+        while level + 1 < len(levels) and span / 2 ** (level + 1) >= target:
+            level += 1
+    level = int(level)
+    if not 0 <= level < len(levels):
+        raise ValueError(f"Waveform level out of range: {level} (0-{len(levels) - 1})")
+
+    samples_per_peak = header["samples_per_peak"] * 2 ** level
+    offset, count = levels[level]
+    first = min(int(start * sample_rate // samples_per_peak), count)
+    last = min(-(-int(np.ceil(end * sample_rate)) // samples_per_peak), count)
+    if last - first > Config.WAVEFORM_MAX_PEAKS:
+        raise ValueError(
+            f"Too many peaks requested: {last - first} (max {Config.WAVEFORM_MAX_PEAKS}); use a coarser level or a shorter range"
+        )
+
+    if last > first:
+        peaks = np.memmap(path, dtype=np.int8, mode="r", offset=offset + first * 2, shape=(last - first, 2))
+        mins, maxs = peaks[:, 0].tolist(), peaks[:, 1].tolist()
+        del peaks
+    else:
+        mins, maxs = [], []
+    return {
+        "level": level,
+        "levels": len(levels),
+        "sample_rate": sample_rate,
+        "seconds_per_peak": samples_per_peak / sample_rate,
+        "duration": duration,
+        "start": first * samples_per_peak / sample_rate,
+        "end": min(last * samples_per_peak / sample_rate, duration),
+        "scale": PEAK_SCALE,
+        "min": mins,
+        "max": maxs,
+    }
+
+
+def get_waveform(
+    resource_id: str,
+    start: float = 0.0,
+    end: Optional[float] = None,
+    level: Optional[int] = None,
+    width: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    读取音频资源的波形峰值（参数见 read_waveform）
+
+    在加入峰值文件之前转写的资源没有该文件，首次请求时从原音频生成一次。
+    """
+    from friday_core.library import get_resource, get_resource_dir
+
+    resource = get_resource(resource_id)
+    if resource is None:
+        raise ValueError(f"Resource not found: {resource_id}")
+    if resource["type"] != "audio":
+        raise ValueError(f"Resource is not audio: {resource_id}")
+
+    path = get_resource_dir(resource_id) / "assets" / WAVEFORM_FILENAME
+    if not path.exists():
+        source = resource.get("source")
+        if not source or not os.path.isfile(source):
+            raise FileNotFoundError(f"Waveform not available and source audio is missing: {source}")
+        build_waveform(source, path)
+    return {"resource_id": resource_id, **read_waveform(path, start, end, level, width)}
@@ -0,0 +1,385 @@
+"""
+PDF 并行抽取引擎 - 按页分片，交给进程池并行提取文本和图片
+
+每页的文本和图片在同一次遍历中提取，分片内按版面分析得到的阅读顺序输出，
+每个分片完成后立即以 Markdown 片段写入磁盘，内存占用与文档页数无关。
+"""
+import asyncio
+import hashlib
+import math
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Any, List, Tuple, Awaitable, Callable, Optional
+from friday_core.config import Config
+from friday_core.logger import setup_logger
+from friday_core.metrics import record_worker_stats
+
+# 抽取器版本：输出格式或抽取逻辑变化时递增，使内容哈希缓存失效
+EXTRACTOR_VERSION = "pdf-6"
+
+logger = setup_logger(__name__)
+
+# 进程池在进程内复用，常驻模式下避免每次请求重新拉起 worker
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+
+
+def get_extractor_version() -> str:
+    """缓存键中的抽取器版本；关闭版面分析时带 raw，启用 OCR 时包含 OCR 后端和参数"""
+    from friday_reader.ocr import get_ocr_version
+    version = EXTRACTOR_VERSION if Config.LAYOUT_ENABLED else f"{EXTRACTOR_VERSION}:raw"
+    ocr_version = get_ocr_version()
+    return f"{version}:{ocr_version}" if ocr_version else version
+
+
+def resolve_workers(workers: Optional[int] = None) -> int:
+    """解析 worker 数量：显式参数 > 配置 > CPU 核数"""
+    return max(1, workers or Config.get_pdf_workers())
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    """获取（必要时重建）共享进程池"""
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = ProcessPoolExecutor(max_workers=workers)
+        _executor_workers = workers
+    return _executor
+
+
+def warm_up(workers: Optional[int] = None):
+    """提前拉起共享进程池；池已就绪时小文档也会交给进程池，批量导入时借此并行处理多个文件"""
+    _get_executor(resolve_workers(workers))
+
+
+def _reset_executor():
+    """进程池损坏（worker 崩溃）后丢弃，下次调用时重建"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+    _executor = None
+
+
+def shutdown_executor():
+    """关闭共享进程池并等待 worker 退出"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+    _executor = None
+
+
+def plan_shards(total_pages: int, workers: int, start_page: int = 0, min_pages: int = 1) -> List[Tuple[int, int]]:
+    """
+    将页码范围 [start_page, total_pages) 切分为分片
+
+    每个 worker 分到约 4 个分片，兼顾负载均衡和进度粒度；
+    单个分片不少于 min_pages 页（版面分析需要跨页识别页眉页脚），
+    不超过 Config.PDF_MAX_SHARD_PAGES 页。
+
+    Returns:
+        [(start, end), ...]，左闭右开，按页序排列
+    """
+    remaining = total_pages - start_page
+    if remaining <= 0:
+        return []
+    shard_size = math.ceil(remaining / (workers * 4))
+    shard_size = max(1, min_pages, min(shard_size, Config.PDF_MAX_SHARD_PAGES))
+    return [(start, min(start + shard_size, total_pages)) for start in range(start_page, total_pages, shard_size)]
+
+
+def _render_page(page_num: int, text: str, image_paths: List[str]) -> str:
+    """渲染单页 Markdown 片段，图片紧跟在所在页的文本之后"""
+    parts = [f"## 第 {page_num} 页\n\n{text}\n\n"]
+    for image_path in image_paths:
+        img_name = Path(image_path).name
+        parts.append(f"![{img_name}](assets/{img_name})\n\n")
+    parts.append("\n")
+    return "".join(parts)
+
+
+def get_asset_store_dir() -> Path:
+    """Library 级共享图片仓库，按内容哈希存放"""
+    return Path(Config.LIBRARY_PATH) / ".assets"
+
+
+def _store_image(image_bytes: bytes, image_ext: str, output_dir: Path, store_dir: Path) -> Tuple[Path, int]:
+    """
+    按内容哈希保存图片，返回 (资源 assets 目录中的路径, 实际写入的字节数)
+
+    同一内容在整个 Library 中只写入一次共享仓库，资源目录中放置指向它的硬链接；
+    文件系统不支持硬链接时退化为复制。命中已有文件时不写入，字节数为 0。
+    """
+    digest = hashlib.sha256(image_bytes).hexdigest()
+    image_filename = f"{digest[:32]}.{image_ext}"
+    image_path = output_dir / image_filename
+    if image_path.exists():
+        return image_path, 0
+
+    written = 0
+    stored_path = store_dir / digest[:2] / image_filename
+    if not stored_path.exists():
+        stored_path.parent.mkdir(parents=True, exist_ok=True)
+        # 先写临时文件再原子替换，避免并发 worker（含同一进程内的多个线程）读到半写文件
+        tmp_path = stored_path.with_name(f"{stored_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as img_file:
+            img_file.write(image_bytes)
+        os.replace(tmp_path, stored_path)
+        written += len(image_bytes)
+
+    try:
+        os.link(stored_path, image_path)
+    except FileExistsError:
+        pass
+    except OSError:
+        shutil.copyfile(stored_path, image_path)
+        written += len(image_bytes)
+    return image_path, written
+
+
+def _extract_shard(
+    pdf_path: str, start: int, end: int, assets_dir: str, out_path: str, store_dir: str,
+    ocr_backend: Optional[str] = None, layout: bool = False,
+) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+    """
+    在 worker 进程中提取一个分片的文本和图片，并把 Markdown 追加写入 out_path
+
+    每个 worker 自己打开 fitz 文档，一次遍历同时完成文本和图片提取；
+    分片处理完一次写盘，内存中最多只有一个分片的文本。同一 xref（页眉 logo、水印等）
+    在分片内只解码一次，图片文件按内容哈希去重。指定 ocr_backend 时，
+    没有可用文本层的扫描页改用 OCR 结果。layout 为 True 时对整个分片做版面分析
+    （分栏、阅读顺序，跨页去掉页眉页脚；分片不足 Config.LAYOUT_MIN_SHARD_PAGES 页时
+    以相邻页面为参照），否则按 get_text() 的原始顺序输出。
+
+    Returns:
+        (pages, stats)
+        pages: [{"page": 页码(从 1 开始), "images": [图片路径, ...]}, ...]；
+            扫描页另有 "ocr"：是否得到了 OCR 文本；做了版面分析的页另有 "columns"：栏数
+        stats: 分项耗时（秒）{"text", "images", "ocr", "layout", "markdown", "write"} 和 "bytes_written"
+    """
+    import fitz  # PyMuPDF
+    from friday_reader.layout import layout_pages, page_blocks
+    from friday_reader.ocr import needs_ocr, ocr_page
+
+    output_dir = Path(assets_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    xref_paths: Dict[int, str] = {}
+    pages = []
+    texts: List[str] = []
+    blocks: Dict[int, Dict[str, Any]] = {}  # 需要版面分析的页：分片内下标 -> 文本块
+    stats = {"text": 0.0, "images": 0.0, "ocr": 0.0, "layout": 0.0, "markdown": 0.0, "write": 0.0, "bytes_written": 0}
+    clock = time.perf_counter
+
+    doc = fitz.open(pdf_path)
+    try:
+        for index, page_num in enumerate(range(start, end)):
+            t0 = clock()
+            page = doc[page_num]
+            if layout:
+                page_layout = page_blocks(page)
+                text = "\n\n".join(page_layout["texts"])
+            else:
+                text = page.get_text()
+            image_paths = []
+            t1 = clock()
+
+            for img in page.get_images():
+                xref = img[0]
+                if xref not in xref_paths:
+                    base_image = doc.extract_image(xref)
+                    image_path, written = _store_image(base_image["image"], base_image["ext"], output_dir, Path(store_dir))
+                    xref_paths[xref] = str(image_path)
+                    stats["bytes_written"] += written
+
+                image_paths.append(xref_paths[xref])
+            t2 = clock()
+
+            meta = {"page": page_num + 1, "images": image_paths}
+            ocr_text = None
+            if ocr_backend and needs_ocr(text, len(image_paths)):
+                ocr_text, _ = ocr_page(page, ocr_backend)
+                meta["ocr"] = ocr_text is not None
+            if ocr_text is not None:
+                text = ocr_text
+            elif layout:
+                blocks[index] = page_layout
+            t3 = clock()
+
+            stats["text"] += t1 - t0
+            stats["images"] += t2 - t1
+            stats["ocr"] += t3 - t2
+            texts.append(text)
+            pages.append(meta)
+
+        context = []
+        if blocks and end - start < Config.LAYOUT_MIN_SHARD_PAGES:
+            # 分片太短（文档末尾的分片、断点续做剩下的几页）时，借用前后相邻页面的文本块识别页眉页脚
+            t0 = clock()
+            need = Config.LAYOUT_MIN_SHARD_PAGES - (end - start)
+            before = list(range(max(0, start - need), start))
+            after = list(range(end, min(doc.page_count, end + need - len(before))))
+            context = [page_blocks(doc[page_num]) for page_num in before + after]
+            stats["layout"] += clock() - t0
+    finally:
+        doc.close()
+
+    if blocks:
+        t0 = clock()
+        for index, result in zip(blocks, layout_pages(list(blocks.values()), context)):
+            texts[index] = result["text"]
+            pages[index]["columns"] = result["columns"]
+        stats["layout"] += clock() - t0
+
+    with open(out_path, "a", encoding="utf-8") as out:
+        for meta, text in zip(pages, texts):
+            t0 = clock()
+            fragment = _render_page(meta["page"], text, meta["images"])
+            t1 = clock()
+            out.write(fragment)
+            stats["markdown"] += t1 - t0
+            stats["write"] += clock() - t1
+            stats["bytes_written"] += len(fragment.encode("utf-8"))
+
+    return pages, stats
+
+
+def get_page_count(pdf_path: str) -> int:
+    """获取 PDF 页数"""
+    import fitz  # PyMuPDF
+    with fitz.open(pdf_path) as doc:
+        return len(doc)
+
+
+def count_scanned_pages(pdf_path: str, start_page: int = 0) -> int:
+    """统计需要 OCR 的页数（只读文本层和图片列表，不解码图片）"""
+    import fitz  # PyMuPDF
+    from friday_reader.ocr import needs_ocr
+    with fitz.open(pdf_path) as doc:
+        return sum(1 for page in doc.pages(start_page) if needs_ocr(page.get_text(), len(page.get_images())))
+
+
+def _log_ocr_summary(pages: List[Dict[str, Any]], backend: Optional[str]):
+    scanned = [page for page in pages if "ocr" in page]
+    if not scanned:
+        return
+    failed = sum(1 for page in scanned if not page["ocr"])
+    logger.info(f"OCR: {len(scanned) - failed}/{len(scanned)} scanned pages recognized with {backend}")
+    if failed:
+        logger.warning(f"OCR backend {backend} unavailable, {failed} scanned pages kept without text")
+
+
+async def extract_pages(
+    pdf_path: str,
+    assets_dir: Path,
+    md_path: Path,
+    workers: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    start_page: int = 0,
+    checkpoint_callback: Optional[Callable[[List[Dict[str, Any]], int], Awaitable[None]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    并行提取 PDF 页面的文本和图片，按页序流式追加到 md_path
+
+    只有 1 个 worker，或进程池尚未启动且页数不超过 Config.PDF_PARALLEL_MIN_PAGES 时，
+    在线程中逐个分片直接写入 md_path；否则各分片先写入 md_path 同目录下 .parts/ 中的
+    片段文件，父进程按页序把已完成的片段依次拼接到 md_path 后删除。
+    各分片的分项耗时汇总到当前命令的性能埋点中。
+
+    Args:
+        pdf_path: PDF 文件路径
+        assets_dir: 图片输出目录
+        md_path: Markdown 输出路径（以追加方式写入，调用方负责写入文件头）
+        workers: worker 进程数，None 时使用配置
+        progress_callback: 进度回调函数 (done_pages, total_pages)，分片完成时调用
+        start_page: 从该页（从 0 开始）继续提取，之前的页面已在 md_path 中
+        checkpoint_callback: 异步检查点回调 (新写入的页面元数据, md_path 当前字节数)，
+            每当有页面按页序写入 md_path 并刷盘后等待其完成
+
+    Returns:
+        本次提取的页面元数据列表（从 start_page 开始，按页序），格式同 _extract_shard 返回的 pages；
+        同一图片在每个出现的页面中都会被引用
+    """
+    workers = resolve_workers(workers)
+    total_pages = get_page_count(pdf_path)
+    store_dir = get_asset_store_dir()
+    ocr_backend = Config.OCR_BACKEND if Config.OCR_ENABLED else None
+    layout = Config.LAYOUT_ENABLED
+    min_pages = min(Config.LAYOUT_MIN_SHARD_PAGES, Config.PDF_MAX_SHARD_PAGES) if layout else 1
+
+    pool_ready = _executor is not None and _executor_workers == workers
+    sequential = workers == 1 or (total_pages - start_page <= Config.PDF_PARALLEL_MIN_PAGES and not pool_ready)
+    if sequential and workers > 1 and ocr_backend:
+        # 小文档通常在线程中直接抽取；含多张扫描页时 OCR 耗时远超抽取，仍交给进程池并行
+        sequential = await asyncio.to_thread(count_scanned_pages, pdf_path, start_page) < 2
+    if sequential:
+        results = []
+        for start, end in plan_shards(total_pages, 1, start_page, min_pages):
+            pages, stats = await asyncio.to_thread(
+                _extract_shard, pdf_path, start, end, str(assets_dir), str(md_path), str(store_dir), ocr_backend, layout
+            )
+            record_worker_stats(stats)
+            results.extend(pages)
+            if checkpoint_callback:
+                await checkpoint_callback(pages, os.path.getsize(md_path))
+            if progress_callback:
+                progress_callback(end, total_pages)
+        _log_ocr_summary(results, ocr_backend)
+        return results
+
+    shards = plan_shards(total_pages, workers, start_page, min_pages)
+    executor = _get_executor(workers)
+    loop = asyncio.get_running_loop()
+    parts_dir = Path(md_path).parent / ".parts"
+    # 进程被杀死时 finally 不会执行，先清掉上次残留的片段文件
+    shutil.rmtree(parts_dir, ignore_errors=True)
+    parts_dir.mkdir(parents=True, exist_ok=True)
+
+    def part_path(index: int) -> Path:
+        return parts_dir / f"shard_{index:05d}.md"
+
+    async def run_shard(index: int, start: int, end: int):
+        pages, stats = await loop.run_in_executor(
+            executor, _extract_shard, pdf_path, start, end, str(assets_dir), str(part_path(index)), str(store_dir),
+            ocr_backend, layout,
+        )
+        record_worker_stats(stats)
+        return index, pages
+
+    results: List[Optional[List[Dict[str, Any]]]] = [None] * len(shards)
+    next_index = 0  # 下一个待拼接的分片
+    done_pages = start_page
+    try:
+        with open(md_path, "ab") as md_file:
+            for next_done in asyncio.as_completed([run_shard(i, s, e) for i, (s, e) in enumerate(shards)]):
+                index, pages = await next_done
+                results[index] = pages
+                done_pages += len(pages)
+
+                # 按页序拼接所有已就绪的片段
+                appended = []
+                while next_index < len(shards) and results[next_index] is not None:
+                    with open(part_path(next_index), "rb") as part_file:
+                        shutil.copyfileobj(part_file, md_file)
+                    part_path(next_index).unlink()
+                    appended.extend(results[next_index])
+                    next_index += 1
+
+                if appended and checkpoint_callback:
+                    md_file.flush()
+                    await checkpoint_callback(appended, md_file.tell())
+                if progress_callback:
+                    progress_callback(done_pages, total_pages)
+    except BrokenProcessPool:
+        _reset_executor()
+        raise
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    results = [page for shard_pages in results for page in shard_pages]
+    _log_ocr_summary(results, ocr_backend)
+    return results
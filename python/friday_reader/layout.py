@@ -0,0 +1,183 @@
+"""
+版面分析 - 基于文本块几何的分栏、页眉页脚和阅读顺序
+
+每页的文本块（get_text("blocks") 给出的块坐标和块文本）转为 NumPy 数组后整体
+计算，不逐个 span 处理：
+
+- 页眉页脚：一个分片内所有页面的页边区域文本块一起归一化（数字替换为 #），
+  在足够多页面上重复出现的视为页眉页脚；只有页码的块总是视为页眉页脚。分片太短时
+  借用相邻页面作为参照（见 layout_pages 的 context）。
+- 分栏：窄块在横轴上的覆盖剖面（按块高度加权，一次差分 + 累加得到）中，
+  几乎无覆盖的竖直空隙即为栏间距，文字过少的栏（如表格的列）并入相邻栏；
+  跨越栏间距的块（标题、摘要、通栏图注）为通栏块。
+- 阅读顺序：通栏块把页面切成若干横带，带内先按栏、栏内按纵坐标排序。
+"""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from friday_core.config import Config
+
+_DIGITS_RE = re.compile(r"\d+")
+_SPACE_RE = re.compile(r"\s+")
+# 只有页码的块：如 "12"、"- 12 -"、"Page 12"、"12 / 30"、"第 12 页"
+_PAGE_NUMBER_RE = re.compile(r"[\W_]*(?:page|p\.|第)?[\W_]*#(?:[\W_]*(?:of|/)[\W_]*#)?[\W_]*页?[\W_]*")
+
+# 页面块：宽高、块坐标 (n, 4) 和块文本
+PageBlocks = Dict[str, Any]
+
+
+def page_blocks(page) -> PageBlocks:
+    """读取页面的文本块（不含图片块）"""
+    import fitz  # PyMuPDF
+
+    blocks = [b for b in page.get_text("blocks", flags=fitz.TEXTFLAGS_BLOCKS & ~fitz.TEXT_PRESERVE_IMAGES) if b[6] == 0 and b[4].strip()]
+    boxes = np.array([b[:4] for b in blocks], dtype=np.float32).reshape(-1, 4)
+    return {
+        "width": float(page.rect.width),
+        "height": float(page.rect.height),
+        "boxes": boxes,
+        "texts": [b[4].strip() for b in blocks],
+    }
+
+
+def _signature(text: str) -> str:
+    return _SPACE_RE.sub(" ", _DIGITS_RE.sub("#", text.lower())).strip()
+
+
+def detect_running(pages: List[PageBlocks]) -> List[np.ndarray]:
+    """
+    一次检测多页中的页眉页脚
+
+    Returns:
+        与 pages 一一对应的布尔数组，True 表示该块是页眉或页脚
+    """
+    counts = np.array([len(p["texts"]) for p in pages], dtype=np.int64)
+    masks = [np.zeros(n, dtype=bool) for n in counts]
+    if not counts.sum():
+        return masks
+
+    boxes = np.concatenate([p["boxes"] for p in pages])
+    page_index = np.repeat(np.arange(len(pages)), counts)
+    heights = np.repeat(np.array([p["height"] for p in pages], dtype=np.float32), counts)
+    band = heights * Config.LAYOUT_MARGIN
+    top = boxes[:, 3] <= band
+    bottom = boxes[:, 1] >= heights - band
+    candidates = np.flatnonzero(top | bottom)
+    if not len(candidates):
+        return masks
+
+    texts = [text for p in pages for text in p["texts"]]
+    signatures = np.array([("t:" if top[i] else "b:") + _signature(texts[i]) for i in candidates])
+    # 每个签名出现在多少个不同页面上
+    unique, inverse = np.unique(signatures, return_inverse=True)
+    pairs = np.unique(inverse * len(pages) + page_index[candidates])
+    pages_per_signature = np.bincount(pairs // len(pages), minlength=len(unique))
+    threshold = max(2, int(np.ceil(len(pages) * Config.LAYOUT_RUNNING_RATIO)))
+    repeated = pages_per_signature[inverse] >= threshold
+    page_numbers = np.array([bool(_PAGE_NUMBER_RE.fullmatch(s[2:])) for s in signatures])
+    running = candidates[repeated | page_numbers]
+
+    flags = np.zeros(len(boxes), dtype=bool)
+    flags[running] = True
+    return np.split(flags, np.cumsum(counts)[:-1])
+
+
+def _column_separators(boxes: np.ndarray, x0: float, x1: float, body_height: float) -> np.ndarray:
+    """由窄块的横向覆盖剖面找栏间距，返回各栏间距中点的横坐标（升序）"""
+    widths = boxes[:, 2] - boxes[:, 0]
+    narrow = boxes[widths < (x1 - x0) * Config.LAYOUT_WIDE_RATIO]
+    if len(narrow) < 2:
+        return np.empty(0, dtype=np.float32)
+
+    bins = max(1, int(np.ceil(x1 - x0)))
+    start = np.clip(np.floor(narrow[:, 0] - x0).astype(np.int64), 0, bins)
+    end = np.clip(np.ceil(narrow[:, 2] - x0).astype(np.int64), 0, bins)
+    weight = narrow[:, 3] - narrow[:, 1]
+    delta = np.zeros(bins + 1, dtype=np.float64)
+    np.add.at(delta, start, weight)
+    np.add.at(delta, end, -weight)
+    coverage = np.cumsum(delta)[:bins]
+
+    empty = coverage <= body_height * Config.LAYOUT_GUTTER_TOLERANCE
+    # 空隙的起止位置；贴着左右边缘的空白不是栏间距
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], empty.astype(np.int8), [0]])))
+    gap_start, gap_end = edges[::2], edges[1::2]
+    inner = (gap_start > 0) & (gap_end < bins) & (gap_end - gap_start >= Config.LAYOUT_MIN_GUTTER)
+    separators = ((gap_start[inner] + gap_end[inner]) / 2 + x0).astype(np.float32)
+
+    # 每栏的窄块总高度需占正文高度一定比例；单栏页面中表格各列之间的空隙不算分栏，
+    # 不足的栏并入较空的相邻栏
+    centers = (narrow[:, 0] + narrow[:, 2]) / 2
+    while len(separators):
+        fill = np.bincount(np.searchsorted(separators, centers), weights=weight, minlength=len(separators) + 1)
+        weakest = int(np.argmin(fill))
+        if fill[weakest] >= body_height * Config.LAYOUT_MIN_COLUMN_FILL:
+            break
+        if weakest == 0:
+            drop = 0
+        elif weakest == len(separators):
+            drop = weakest - 1
+        else:
+            drop = weakest - 1 if fill[weakest - 1] <= fill[weakest + 1] else weakest
+        separators = np.delete(separators, drop)
+    return separators
+
+
+def reading_order(boxes: np.ndarray, width: float, height: float) -> Tuple[np.ndarray, int]:
+    """
+    计算一页正文块的阅读顺序
+
+    Returns:
+        (块下标的排列, 栏数)
+    """
+    if len(boxes) < 2:
+        return np.arange(len(boxes)), 1
+
+    x0, x1 = float(boxes[:, 0].min()), float(boxes[:, 2].max())
+    body_height = float(boxes[:, 3].max() - boxes[:, 1].min())
+    separators = _column_separators(boxes, x0, x1, body_height)
+
+    left = np.searchsorted(separators, boxes[:, 0])
+    right = np.searchsorted(separators, boxes[:, 2])
+    spanning = left != right
+    column = np.where(spanning, 0, left)
+
+    # 通栏块按纵向中点把页面切成横带：第 k 个通栏块的键为 2k+1，
+    # 位于第 k 个和第 k+1 个通栏块之间的块键为 2k+2（第一个之前为 0）
+    middle = (boxes[:, 1] + boxes[:, 3]) / 2
+    span_middles = np.sort(middle[spanning])
+    band = 2 * np.searchsorted(span_middles, middle)
+    band[spanning] = 2 * np.searchsorted(span_middles, middle[spanning]) + 1
+
+    order = np.lexsort((boxes[:, 0], boxes[:, 1], column, band))
+    return order, len(separators) + 1
+
+
+def layout_pages(pages: List[PageBlocks], context: Optional[List[PageBlocks]] = None) -> List[Dict[str, Any]]:
+    """
+    对连续多页做版面分析
+
+    Args:
+        pages: 要分析的页面
+        context: 只参与页眉页脚识别的相邻页面（页数太少时无法判断哪些块在各页重复出现）
+
+    Returns:
+        与 pages 一一对应的 {"text": 按阅读顺序拼接的正文, "columns": 栏数, "running": 去掉的页眉页脚块数}
+    """
+    if Config.LAYOUT_STRIP_RUNNING:
+        running = detect_running(pages + list(context or []))[:len(pages)]
+    else:
+        running = [np.zeros(len(p["texts"]), dtype=bool) for p in pages]
+    results = []
+    for page, mask in zip(pages, running):
+        body = np.flatnonzero(~mask)
+        order, columns = reading_order(page["boxes"][body], page["width"], page["height"])
+        texts = page["texts"]
+        results.append({
+            "text": "\n\n".join(texts[i] for i in body[order]),
+            "columns": columns,
+            "running": int(mask.sum()),
+        })
+    return results
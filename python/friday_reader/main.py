@@ -1,105 +1,61 @@
 """
 PDF 处理主模块
 """
-import sys
-import uuid
-from typing import Dict, Any, Callable, Optional
+import json
+import shutil
+import asyncio
+from typing import Dict, Any, Callable, List, Optional
 from pathlib import Path
 from datetime import datetime
-import fitz  # PyMuPDF
 from friday_core.logger import setup_logger
 from friday_core.config import Config
+from friday_core.checkpoint import clear_checkpoint, load_checkpoint, save_checkpoint, truncate_to
+from friday_core.metrics import stage
+from friday_core.progress import ProgressReporter
+from friday_core.vector_index import update_vector_index
+from friday_core.library import (
+    compute_file_hash,
+    finalize_resource,
+    find_cached_resource,
+    get_resource_dir,
+    resource_id_for_hash,
+    resource_lock,
+    save_resource,
+)
+from friday_reader.extractor import extract_pages, get_extractor_version, resolve_workers
 
 logger = setup_logger(__name__)
 
+# 进度回调 (stage, progress, message, **fields)，与 ProgressReporter.update 兼容
+ProgressCallback = Callable[..., None]
 
-def _extract_text_from_pdf(pdf_path: str, progress_callback: Optional[Callable[[int, int], None]] = None) -> str:
-    """
-    从 PDF 提取文本内容
-    
-    Args:
-        pdf_path: PDF 文件路径
-        progress_callback: 进度回调函数 (current_page, total_pages)
-    
-    Returns:
-        提取的文本内容
-    """
-    doc = fitz.open(pdf_path)
-    total_pages = len(doc)
-    text_parts = []
-    
-    for page_num in range(total_pages):
-        page = doc[page_num]
-        text = page.get_text()
-        text_parts.append(f"## 第 {page_num + 1} 页\n\n{text}\n\n")
-        
-        # 调用进度回调
-        if progress_callback:
-            progress_callback(page_num + 1, total_pages)
-    
-    doc.close()
-    return "\n".join(text_parts)
-
-
-def _extract_images_from_pdf(pdf_path: str, output_dir: Path, progress_callback: Optional[Callable[[int, int], None]] = None) -> list:
-    """
-    从 PDF 提取图片
-    
-    Args:
-        pdf_path: PDF 文件路径
-        output_dir: 图片输出目录
-        progress_callback: 进度回调函数
-    
-    Returns:
-        提取的图片路径列表
-    """
-    doc = fitz.open(pdf_path)
-    total_pages = len(doc)
-    image_paths = []
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    for page_num in range(total_pages):
-        page = doc[page_num]
-        image_list = page.get_images()
-        
-        for img_index, img in enumerate(image_list):
-            xref = img[0]
-            base_image = doc.extract_image(xref)
-            image_bytes = base_image["image"]
-            image_ext = base_image["ext"]
-            
-            # 保存图片
-            image_filename = f"page_{page_num + 1}_img_{img_index + 1}.{image_ext}"
-            image_path = output_dir / image_filename
-            with open(image_path, "wb") as img_file:
-                img_file.write(image_bytes)
-            
-            image_paths.append(str(image_path))
-        
-        if progress_callback:
-            progress_callback(page_num + 1, total_pages)
-    
-    doc.close()
-    return image_paths
+# 抽取中已完成页面的元数据（JSON Lines），完成后删除
+_PAGES_FILE = "pages.jsonl"
 
 
-async def parse_pdf(pdf_path: str) -> Dict[str, Any]:
+async def parse_pdf(
+    pdf_path: str,
+    workers: Optional[int] = None,
+    force: bool = False,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
     """
     解析 PDF 文件
-    1. 版面分析（基础版本：逐页提取）
-    2. 文本抽取
-    3. 图表提取
-    4. 生成 Markdown
-    5. 保存到 Library
+    1. 版面分析（分栏、页眉页脚、阅读顺序，见 friday_reader.layout）
+    2. 文本抽取 + 图表提取（按页分片并行，单次遍历）
+    3. 流式生成 Markdown 并保存到 Library
     
     Args:
         pdf_path: PDF 文件路径
-        progress_callback: 进度回调函数 (stage, current, total)
-            stage: "text" | "images" | "markdown"
-            current: 当前进度
-            total: 总进度
+        workers: 并行抽取的 worker 进程数，None 时使用 Config.PDF_WORKERS
+        force: 为 True 时忽略内容哈希缓存，强制重新抽取
+        progress_callback: 进度回调函数 (stage, progress, message, **fields)，默认发到进度事件通道
+            stage: "extract" | "complete"
+            progress: 总进度百分比 0-100
+            message: 进度描述
     """
     logger.info(f"Parsing PDF: {pdf_path}")
+    report = progress_callback or ProgressReporter("parse_pdf").update
     logger.info(f"PDF path type: {type(pdf_path)}, length: {len(pdf_path) if isinstance(pdf_path, str) else 'N/A'}")
     
     # 确保路径是字符串类型
@@ -122,79 +78,131 @@ async def parse_pdf(pdf_path: str) -> Dict[str, Any]:
         error_msg += f"Parent directory exists: {pdf_path_obj.parent.exists() if pdf_path_obj.parent else False}"
         raise FileNotFoundError(error_msg)
     
-    # 生成资源 ID
-    resource_id = str(uuid.uuid4())
-    title = pdf_path_obj.stem
-    
-    # 创建输出目录
     Config.ensure_directories()
-    library_path = Path(Config.LIBRARY_PATH)
-    resource_dir = library_path / resource_id
-    resource_dir.mkdir(parents=True, exist_ok=True)
-    
-    assets_dir = resource_dir / "assets"
-    assets_dir.mkdir(parents=True, exist_ok=True)
-    
-    # 1. 提取文本
-    logger.info("Extracting text from PDF...")
-    print("PROGRESS:text:0:正在提取文本...", file=sys.stderr, flush=True)
-    
-    def text_progress(current: int, total: int):
-        progress = int((current / total) * 40)  # 文本提取占 40%
-        print(f"PROGRESS:text:{progress}:正在提取文本 ({current}/{total} 页)...", file=sys.stderr, flush=True)
-    
-    text_content = _extract_text_from_pdf(pdf_path, text_progress)
-    
-    # 2. 提取图片
-    logger.info("Extracting images from PDF...")
-    print("PROGRESS:images:40:正在提取图片...", file=sys.stderr, flush=True)
     
-    def image_progress(current: int, total: int):
-        progress = 40 + int((current / total) * 30)  # 图片提取占 30%
-        print(f"PROGRESS:images:{progress}:正在提取图片 ({current}/{total} 页)...", file=sys.stderr, flush=True)
-    
-    image_paths = _extract_images_from_pdf(pdf_path, assets_dir, image_progress)
-    
-    # 3. 生成 Markdown
-    logger.info("Generating Markdown...")
-    print("PROGRESS:markdown:70:正在生成 Markdown...", file=sys.stderr, flush=True)
-    
-    # 构建 Markdown 内容
-    markdown_content = f"# {title}\n\n"
-    markdown_content += f"**来源**: {pdf_path}\n\n"
-    markdown_content += f"**处理时间**: {datetime.now().isoformat()}\n\n"
-    markdown_content += "---\n\n"
-    
-    # 添加文本内容
-    markdown_content += text_content
-    
-    # 添加图片引用
-    if image_paths:
-        markdown_content += "\n## 提取的图片\n\n"
-        for img_path in image_paths:
-            img_name = Path(img_path).name
-            markdown_content += f"![{img_name}](assets/{img_name})\n\n"
-    
-    # 保存 Markdown 文件
-    md_path = resource_dir / f"{title}.md"
-    with open(md_path, "w", encoding="utf-8") as f:
-        f.write(markdown_content)
-    
-    print("PROGRESS:complete:100:PDF 解析完成", file=sys.stderr, flush=True)
-    
-    logger.info(f"PDF parsing completed: {resource_id}")
-    
-    # 返回资源信息
-    return {
-        "id": resource_id,
-        "type": "pdf",
-        "title": title,
-        "source": pdf_path,
-        "md_path": str(md_path),
-        "assets": [str(p) for p in image_paths],
-        "vector_index": None,
-        "created_at": datetime.now().isoformat(),
-        "updated_at": datetime.now().isoformat(),
-    }
+    # 按内容哈希 + 抽取器版本命中缓存时直接返回已有资源
+    extractor_version = get_extractor_version()
+    with stage("hash"):
+        content_hash = await asyncio.to_thread(compute_file_hash, pdf_path)
+
+    async def cache_hit() -> Optional[Dict[str, Any]]:
+        if force:
+            return None
+        cached = await asyncio.to_thread(find_cached_resource, content_hash, extractor_version)
+        if cached:
+            logger.info(f"PDF cache hit: {cached['id']} (hash {content_hash[:12]})")
+            report("complete", 100, "PDF 已在资源库中")
+            if cached["vector_index"] is None:
+                cached = await update_vector_index(cached)
+        return cached
+
+    cached = await cache_hit()
+    if cached:
+        return cached
+
+    # 同一内容的导入共用资源目录，需串行执行；拿到锁后再查一次缓存，
+    # 前一个导入刚完成时直接复用它的结果
+    async with resource_lock(content_hash):
+        cached = await cache_hit()
+        if cached:
+            return cached
+
+        # 资源 ID 由内容哈希确定：重新抽取或中断后重试都落到同一目录
+        resource_id = resource_id_for_hash(content_hash)
+        title = pdf_path_obj.stem
+        resource_dir = get_resource_dir(resource_id)
+        assets_dir = resource_dir / "assets"
+        # 已完成页面的元数据逐行追加，检查点只记录页数和字节数，写检查点的开销与文档长度无关
+        pages_path = resource_dir / _PAGES_FILE
+
+        def prepare():
+            # 上次中断留下的检查点可用时，截断到最后一次刷盘的位置并从下一页继续
+            checkpoint = load_checkpoint(resource_dir, "pdf", content_hash, extractor_version)
+            if (
+                checkpoint
+                and truncate_to(resource_dir / checkpoint["md_name"], checkpoint["md_bytes"])
+                and truncate_to(pages_path, checkpoint["pages_bytes"])
+            ):
+                with open(pages_path, "r", encoding="utf-8") as f:
+                    pages = [json.loads(line) for line in f]
+                logger.info(f"Resuming PDF {resource_id} from page {checkpoint['pages_done'] + 1}")
+                return resource_dir / checkpoint["md_name"], pages, checkpoint["pages_done"]
+
+            # 创建输出目录（重新抽取时先清空旧产物）
+            if resource_dir.exists():
+                shutil.rmtree(resource_dir)
+            resource_dir.mkdir(parents=True, exist_ok=True)
+
+            # 1. 写入 Markdown 文件头
+            md_path = resource_dir / f"{title}.md"
+            with open(md_path, "w", encoding="utf-8") as f:
+                f.write(f"# {title}\n\n")
+                f.write(f"**来源**: {pdf_path}\n\n")
+                f.write(f"**处理时间**: {datetime.now().isoformat()}\n\n")
+                f.write("---\n\n")
+            pages_path.touch()
+            return md_path, [], 0
+
+        # 检查点、目录和任务记录的读写都是阻塞 I/O，放到线程中执行
+        md_path, pages, start_page = await asyncio.to_thread(prepare)
+        assets_dir.mkdir(parents=True, exist_ok=True)
+
+        # 2. 提取文本和图片，逐页流式写入 Markdown（按页分片并行）
+        workers = resolve_workers(workers)
+        logger.info(f"Extracting text and images from PDF with {workers} workers...")
+        report("extract", 0, "正在提取文本和图片...")
+
+        def extract_progress(current: int, total: int):
+            progress = int((current / total) * 95)  # 提取并写入 Markdown 占 95%
+            report("extract", progress, f"正在提取文本和图片 ({current}/{total} 页)...", current=current, total=total)
+
+        with open(pages_path, "a", encoding="utf-8") as pages_file:
+            def append_pages(new_pages: List[Dict[str, Any]], md_bytes: int):
+                pages.extend(new_pages)
+                for page in new_pages:
+                    pages_file.write(json.dumps(page, ensure_ascii=False) + "\n")
+                pages_file.flush()
+                save_checkpoint(resource_dir, "pdf", content_hash, extractor_version, {
+                    "md_name": md_path.name,
+                    "md_bytes": md_bytes,
+                    "pages_done": len(pages),
+                    "pages_bytes": pages_file.tell(),
+                })
+
+            async def write_checkpoint(new_pages: List[Dict[str, Any]], md_bytes: int):
+                await asyncio.to_thread(append_pages, new_pages, md_bytes)
+
+            await write_checkpoint([], md_path.stat().st_size)
+            with stage("extract"):
+                await extract_pages(
+                    pdf_path, assets_dir, md_path, workers, extract_progress,
+                    start_page=start_page, checkpoint_callback=write_checkpoint,
+                )
+        # 同一图片可能在多页出现，资源的 assets 只记录一次
+        image_paths = list(dict.fromkeys(image_path for page in pages for image_path in page["images"]))
+        # 有扫描页因 OCR 后端不可用而缺少文本时不作为缓存命中，安装后端后会重新抽取
+        if not all(page.get("ocr", True) for page in pages):
+            extractor_version = f"{extractor_version}:incomplete"
+
+        report("complete", 100, "PDF 解析完成")
 
+        logger.info(f"PDF parsing completed: {resource_id}")
 
+        # 保存到资源库，建立全文和向量索引后返回资源信息
+        resource = await asyncio.to_thread(
+            save_resource,
+            {
+                "id": resource_id,
+                "type": "pdf",
+                "title": title,
+                "source": pdf_path,
+                "md_path": str(md_path),
+                "assets": [str(p) for p in image_paths],
+                "vector_index": None,
+            },
+            content_hash=content_hash,
+            extractor_version=extractor_version,
+        )
+        clear_checkpoint(resource_dir)
+        pages_path.unlink(missing_ok=True)
+        return await finalize_resource(resource)
@@ -0,0 +1,193 @@
+"""
+扫描页 OCR - 文本层检测 + 可插拔的页面级识别后端
+
+抽取时逐页检查文本层：含图片且几乎没有可用文字（或大多是乱码）的页面才会被
+渲染为灰度图交给 OCR 后端，其余页面直接使用 get_text() 的结果。OCR 在 PDF 抽取
+的 worker 进程中随分片一起执行，识别结果按页面图像哈希（页面上各图片的内容摘要
+及位置）缓存到磁盘，同一扫描页（重复导入、不同文件中的相同页面）只识别一次，
+缓存命中时也不必渲染页面。
+
+后端是一个函数：接收页面灰度图（uint8，形状 (高, 宽)），返回识别出的文本。
+后端在 worker 进程中按名称创建并缓存；内置后端在本模块导入时注册，自定义后端需
+在 worker 进程也能执行到的模块顶层注册。
+"""
+import hashlib
+import os
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from friday_core.config import Config
+
+OcrBackend = Callable[[np.ndarray], str]
+
+_backend_factories: Dict[str, Callable[[], OcrBackend]] = {}
+_backends: Dict[str, OcrBackend] = {}
+
+# 创建或识别失败的后端（未安装依赖、缺少语言数据等），同一 worker 进程内不再重试
+_unavailable: Dict[str, str] = {}
+
+# 乱码字符（替换符、控制字符）占比超过该值时视为文本层不可用
+_GARBLED_RATIO = 0.3
+
+
+def register_ocr_backend(name: str, factory: Callable[[], OcrBackend]):
+    """注册 OCR 后端，factory 在首次使用时调用"""
+    _backend_factories[name] = factory
+    _backends.pop(name, None)
+    _unavailable.pop(name, None)
+
+
+def get_ocr_backend(name: Optional[str] = None) -> OcrBackend:
+    """获取（按需创建）OCR 后端"""
+    name = name or Config.OCR_BACKEND
+    if name not in _backends:
+        factory = _backend_factories.get(name)
+        if factory is None:
+            raise ValueError(f"Unknown OCR backend: {name}")
+        _backends[name] = factory()
+    return _backends[name]
+
+
+def get_ocr_version(backend: Optional[str] = None) -> Optional[str]:
+    """缓存键中的 OCR 部分，包含后端、语言和分辨率；未启用 OCR 时为 None"""
+    if not Config.OCR_ENABLED:
+        return None
+    return f"ocr:{backend or Config.OCR_BACKEND}:{Config.OCR_LANGUAGE}:{Config.OCR_DPI}"
+
+
+def has_text_layer(text: str) -> bool:
+    """页面文本层是否可用：去掉空白后足够长，且不是大段乱码"""
+    chars = "".join(text.split())
+    if len(chars) < Config.OCR_MIN_TEXT_CHARS:
+        return False
+    garbled = sum(1 for c in chars if c == "\ufffd" or not c.isprintable())
+    return garbled / len(chars) < _GARBLED_RATIO
+
+
+def needs_ocr(text: str, image_count: int) -> bool:
+    """扫描页判定：页面含图片且没有可用的文本层（空白页不做 OCR）"""
+    return image_count > 0 and not has_text_layer(text)
+
+
+def _cache_path(key: str) -> Path:
+    return Path(Config.OCR_CACHE_PATH) / key[:2] / f"{key}.txt"
+
+
+def _render_gray(page) -> np.ndarray:
+    """按 Config.OCR_DPI 把页面渲染为灰度图"""
+    import fitz  # PyMuPDF
+
+    pixmap = page.get_pixmap(dpi=Config.OCR_DPI, colorspace=fitz.csGRAY, alpha=False)
+    image = np.frombuffer(pixmap.samples, dtype=np.uint8)
+    # 每行可能有对齐填充，按 stride 重排后裁掉
+    return image.reshape(pixmap.height, pixmap.stride)[:, :pixmap.width]
+
+
+def page_image_hash(page) -> str:
+    """
+    页面图像哈希：由页面上各图片的内容摘要及其位置决定
+
+    扫描页的外观完全由嵌入的图片决定，用图片摘要代替渲染后的像素做键，
+    缓存命中时无需渲染整页。
+    """
+    placements = sorted(
+        (info["digest"].hex(), tuple(round(v, 1) for v in info["bbox"]))
+        for info in page.get_image_info(hashes=True)
+    )
+    rect = tuple(round(v, 1) for v in page.rect)
+    return hashlib.sha256(f"{rect}:{page.rotation}:{placements}".encode("ascii")).hexdigest()
+
+
+def ocr_page(page, backend_name: Optional[str] = None) -> Tuple[Optional[str], bool]:
+    """
+    识别一页（在 worker 进程中调用）
+
+    Returns:
+        (文本, 是否命中缓存)；后端不可用时文本为 None，调用方保留原文本层
+    """
+    name = backend_name or Config.OCR_BACKEND
+    if name in _unavailable:
+        return None, False
+
+    key = hashlib.sha256(f"{get_ocr_version(name)}:{page_image_hash(page)}".encode("ascii")).hexdigest()
+    path = _cache_path(key)
+    if path.exists():
+        return path.read_text(encoding="utf-8"), True
+
+    try:
+        backend = get_ocr_backend(name)
+    except (ImportError, RuntimeError) as e:
+        _unavailable[name] = str(e)
+        return None, False
+    try:
+        text = backend(_render_gray(page)).strip()
+    except Exception as e:
+        # 识别时才暴露的环境问题（如 tessdata 中缺少所需语言）对后续页面同样存在，
+        # 标记后端不可用，本页保留原文本层
+        _unavailable[name] = f"{type(e).__name__}: {e}"
+        return None, False
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # 先写临时文件再原子替换，避免并发 worker 读到半写文件
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    os.replace(tmp_path, path)
+    return text, False
+
+
+def unavailable_reason(name: Optional[str] = None) -> Optional[str]:
+    """后端在当前进程中不可用的原因"""
+    return _unavailable.get(name or Config.OCR_BACKEND)
+
+
+def _pymupdf_factory() -> OcrBackend:
+    """通过 PyMuPDF 调用本机 Tesseract（需要安装 Tesseract 及对应语言的 tessdata）"""
+    import fitz  # PyMuPDF
+
+    try:
+        tessdata = fitz.get_tessdata()
+    except Exception as e:
+        raise RuntimeError(f"Tesseract language data not found: {e}") from e
+
+    def recognize(image: np.ndarray) -> str:
+        height, width = image.shape
+        pixmap = fitz.Pixmap(fitz.csGRAY, width, height, np.ascontiguousarray(image).tobytes(), 0)
+        pdf = pixmap.pdfocr_tobytes(language=Config.OCR_LANGUAGE, tessdata=tessdata)
+        with fitz.open("pdf", pdf) as doc:
+            return doc[0].get_text()
+
+    return recognize
+
+
+def _tesseract_factory() -> OcrBackend:
+    """pytesseract（需要安装 Tesseract 可执行文件）"""
+    try:
+        import pytesseract
+    except ImportError as e:
+        raise ImportError("pytesseract is required for OCR: pip install pytesseract") from e
+
+    def recognize(image: np.ndarray) -> str:
+        return pytesseract.image_to_string(image, lang=Config.OCR_LANGUAGE)
+
+    return recognize
+
+
+def _placeholder_factory() -> OcrBackend:
+    """
+    不依赖任何模型的轻量替身：按墨迹行数输出占位文本
+
+    输出确定，用于测试和基准中替代真实 OCR。
+    """
+    def recognize(image: np.ndarray) -> str:
+        inked = (image < 128).mean(axis=1) > 0.01
+        lines = int(np.count_nonzero(np.diff(inked.astype(np.int8)) == 1) + inked[0])
+        return f"[扫描页 {lines} 行]"
+
+    return recognize
+
+
+register_ocr_backend("pymupdf", _pymupdf_factory)
+register_ocr_backend("tesseract", _tesseract_factory)
+register_ocr_backend("placeholder", _placeholder_factory)
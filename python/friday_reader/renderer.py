@@ -0,0 +1,290 @@
+"""
+PDF 页面渲染 - 按需光栅化页面并缓存到磁盘
+
+页面图片按 (文档内容哈希, 页码, 缩放) 缓存为 PNG，索引记录在缓存目录的
+SQLite 中，超出容量时按最近访问淘汰。渲染都在一个专用线程中进行，打开的
+文档在该线程内按 LRU 复用，连续翻页不会重复打开同一文档；常驻模式下每次请求后
+在后台预渲染随后几页，同一文档的新请求会取消上一轮尚未完成的预渲染。单次模式下
+进程随响应退出，后台任务来不及完成，不做预渲染。
+"""
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Optional, Set, Tuple
+from friday_core.config import Config
+from friday_core.context import is_server_mode
+from friday_core.library import compute_file_hash
+from friday_core.logger import setup_logger
+from friday_core.metrics import stage
+
+logger = setup_logger(__name__)
+
+# 缩放统一保留两位小数，避免 1.5 和 1.50001 落到不同缓存项
+_ZOOM_DIGITS = 2
+
+# 渲染线程：fitz 文档不能跨线程共享，所有渲染都在这一个线程中进行
+_executor: Optional[ThreadPoolExecutor] = None
+
+# 渲染线程内打开的文档：内容哈希 -> fitz.Document（只在渲染线程中访问）
+_documents: "OrderedDict[str, Any]" = OrderedDict()
+
+# (路径, 大小, 修改时间) -> 内容哈希，避免每次翻页都重新计算整个文件的哈希
+_hashes: Dict[Tuple[str, int, int], str] = {}
+_hashes_lock = threading.Lock()
+
+# 内容哈希 -> 页数；已知页数时缓存命中的请求无需经过渲染线程
+_page_counts: Dict[str, int] = {}
+
+# 每个文档当前的预渲染任务；持有引用防止任务被回收
+_prefetch_tasks: Dict[str, asyncio.Task] = {}
+_background: Set[asyncio.Task] = set()
+
+_cache: Optional["PageCache"] = None
+
+
+class PageCache:
+    """页面图片的磁盘缓存，索引在 SQLite 中，超出容量按最近访问淘汰"""
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.root / "index.db"), check_same_thread=False, timeout=5)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "key TEXT PRIMARY KEY, path TEXT NOT NULL, size INTEGER NOT NULL, "
+                "width INTEGER NOT NULL, height INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_accessed ON pages (accessed_at)")
+            self._conn.commit()
+        return self._conn
+
+    def path_for(self, key: str) -> Path:
+        """缓存项的图片路径（按哈希前缀分目录）"""
+        return self.root / key[:2] / f"{key}.png"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """命中时返回 {"path", "width", "height"} 并刷新访问时间；图片已被删除时视为未命中"""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT path, width, height FROM pages WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if not os.path.exists(row[0]):
+                conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            conn.commit()
+        return {"path": row[0], "width": row[1], "height": row[2]}
+
+    def put(self, key: str, data: bytes, width: int, height: int) -> Dict[str, Any]:
+        """写入图片（先写临时文件再替换）并登记，必要时淘汰旧图片"""
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (key, path, size, width, height, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, str(path), len(data), width, height, time.time()),
+            )
+            self._evict(conn)
+            conn.commit()
+        return {"path": str(path), "width": width, "height": height}
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 从最久未访问的开始删除，直到总大小回到上限以内
+        excess = total - self.max_bytes
+        freed = 0
+        stale = []
+        for key, path, size in conn.execute("SELECT key, path, size FROM pages ORDER BY accessed_at"):
+            stale.append((key,))
+            freed += size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM pages WHERE key = ?", stale)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def get_page_cache() -> PageCache:
+    """获取进程内共享的页面缓存"""
+    global _cache
+    if _cache is None:
+        _cache = PageCache(Config.RENDER_CACHE_PATH, Config.RENDER_CACHE_MAX_MB * 1024 * 1024)
+    return _cache
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="friday-render")
+    return _executor
+
+
+def shutdown_executor():
+    """关闭渲染线程并关闭打开的文档"""
+    global _executor
+    if _executor is not None:
+        _executor.submit(_close_documents)
+        _executor.shutdown(wait=True)
+    _executor = None
+
+
+def _close_documents():
+    while _documents:
+        _, doc = _documents.popitem(last=False)
+        doc.close()
+
+
+def document_hash(path: str) -> str:
+    """文档内容哈希；文件大小和修改时间不变时复用上次的结果"""
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _hashes_lock:
+        cached = _hashes.get(key)
+    if cached is None:
+        cached = compute_file_hash(path)
+        with _hashes_lock:
+            _hashes[key] = cached
+    return cached
+
+
+def cache_key(doc_hash: str, page: int, zoom: float) -> str:
+    """缓存键：由内容哈希、页码（从 1 开始）和缩放派生"""
+    return hashlib.sha256(f"{doc_hash}:{page}:{zoom:.{_ZOOM_DIGITS}f}".encode("ascii")).hexdigest()
+
+
+def _open_document(path: str, doc_hash: str):
+    """在渲染线程中打开（或复用）文档"""
+    import fitz
+
+    doc = _documents.get(doc_hash)
+    if doc is not None:
+        _documents.move_to_end(doc_hash)
+        return doc
+    doc = fitz.open(path)
+    _documents[doc_hash] = doc
+    _page_counts[doc_hash] = doc.page_count
+    while len(_documents) > max(1, Config.RENDER_OPEN_DOCUMENTS):
+        _, oldest = _documents.popitem(last=False)
+        oldest.close()
+    return doc
+
+
+def _render(path: str, doc_hash: str, page: int, zoom: float) -> Dict[str, Any]:
+    """在渲染线程中渲染一页并写入缓存（已缓存时直接返回）"""
+    import fitz
+
+    cache = get_page_cache()
+    key = cache_key(doc_hash, page, zoom)
+    doc = _open_document(path, doc_hash)
+    if not 1 <= page <= doc.page_count:
+        raise ValueError(f"Page out of range: {page} (document has {doc.page_count} pages)")
+
+    entry = cache.get(key)
+    if entry is not None:
+        return {**entry, "page_count": doc.page_count, "cached": True}
+
+    pixmap = doc[page - 1].get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+    entry = cache.put(key, pixmap.tobytes("png"), pixmap.width, pixmap.height)
+    return {**entry, "page_count": doc.page_count, "cached": False}
+
+
+async def _prefetch(path: str, doc_hash: str, pages: range, zoom: float):
+    """逐页预渲染；每次只向渲染线程提交一页，取消后不会再占用渲染线程"""
+    loop = asyncio.get_running_loop()
+    cache = get_page_cache()
+    for page in pages:
+        if await asyncio.to_thread(cache.get, cache_key(doc_hash, page, zoom)) is not None:
+            continue
+        try:
+            await loop.run_in_executor(_get_executor(), _render, path, doc_hash, page, zoom)
+        except Exception as e:
+            logger.warning(f"Prefetch failed for page {page} of {path}: {e}")
+            return
+
+
+def _schedule_prefetch(path: str, doc_hash: str, page: int, page_count: int, zoom: float, count: int):
+    previous = _prefetch_tasks.pop(doc_hash, None)
+    if previous is not None:
+        previous.cancel()
+    pages = range(page + 1, min(page + count, page_count) + 1)
+    if not pages:
+        return
+    task = asyncio.create_task(_prefetch(path, doc_hash, pages, zoom))
+    _prefetch_tasks[doc_hash] = task
+    _background.add(task)
+
+    def done(finished: asyncio.Task):
+        _background.discard(finished)
+        if _prefetch_tasks.get(doc_hash) is finished:
+            del _prefetch_tasks[doc_hash]
+
+    task.add_done_callback(done)
+
+
+async def render_page(
+    pdf_path: str,
+    page: int = 1,
+    zoom: float = 1.0,
+    prefetch: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    渲染 PDF 页面为 PNG
+
+    Args:
+        pdf_path: PDF 文件路径
+        page: 页码（从 1 开始，与 Markdown 中的 "## 第 N 页" 一致）
+        zoom: 缩放比例，1.0 为 72 DPI，不超过 Config.RENDER_MAX_ZOOM
+        prefetch: 预渲染随后的页数，None 时使用 Config.RENDER_PREFETCH_PAGES；只在常驻模式下生效
+
+    Returns:
+        {"path": 图片路径, "width", "height", "page", "page_count", "zoom", "cached": 是否命中缓存}
+    """
+    if not os.path.isfile(pdf_path):
+        raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+    page = int(page)
+    zoom = round(min(max(float(zoom), 0.1), Config.RENDER_MAX_ZOOM), _ZOOM_DIGITS)
+    prefetch = Config.RENDER_PREFETCH_PAGES if prefetch is None else max(0, int(prefetch))
+
+    doc_hash = await asyncio.to_thread(document_hash, pdf_path)
+    result = None
+    page_count = _page_counts.get(doc_hash)
+    if page_count is not None and 1 <= page <= page_count:
+        # 预渲染过的页直接读缓存，不排在渲染线程的预渲染任务后面
+        entry = await asyncio.to_thread(get_page_cache().get, cache_key(doc_hash, page, zoom))
+        if entry is not None:
+            result = {**entry, "page_count": page_count, "cached": True}
+    if result is None:
+        with stage("render"):
+            result = await asyncio.get_running_loop().run_in_executor(_get_executor(), _render, pdf_path, doc_hash, page, zoom)
+    if prefetch and is_server_mode():
+        _schedule_prefetch(pdf_path, doc_hash, page, result["page_count"], zoom, prefetch)
+    return {**result, "page": page, "zoom": zoom}
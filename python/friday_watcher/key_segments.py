@@ -0,0 +1,104 @@
+"""
+关键片段检测 - 向量化地为滑动时间窗口打分
+
+1. 所有分段的码点拼接为一个数组，一次性计算字符二元组的哈希桶号
+2. (分段, 桶) 去重计数得到词频，按出现该桶的分段数得到逆文档频率
+3. 每个分段的 TF-IDF 之和为其信息量，按半个窗口长度分箱累加
+4. 相邻两箱之和即窗口得分，按得分从高到低选取互不重叠的窗口
+
+全程没有逐词循环，50 小时以上的字幕也只需一次排序的开销。
+"""
+from typing import Dict, Any, List, Sequence
+
+import numpy as np
+
+# 字符二元组哈希到的桶数
+_BUCKETS = 1 << 20
+
+
+def segment_information(texts: Sequence[str]) -> np.ndarray:
+    """
+    计算每个分段的信息量（字符二元组 TF-IDF 之和）
+
+    Returns:
+        形状为 (len(texts),) 的 float64 数组
+    """
+    count = len(texts)
+    if count == 0:
+        return np.zeros(0, dtype=np.float64)
+    codes = [np.frombuffer(t.lower().encode("utf-32-le"), dtype=np.uint32) for t in texts]
+    lengths = np.array([len(c) for c in codes], dtype=np.int64)
+    if lengths.sum() < 2:
+        return np.zeros(count, dtype=np.float64)
+
+    flat = np.concatenate(codes).astype(np.uint64)
+    rows = np.repeat(np.arange(count, dtype=np.int64), lengths)
+    # 丢弃跨越两个分段边界的二元组
+    valid = rows[:-1] == rows[1:]
+    h = (flat[:-1] * np.uint64(1000003)) ^ flat[1:]
+    buckets = ((h * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(44)).astype(np.int64)[valid]
+    rows = rows[:-1][valid]
+
+    keys, tf = np.unique(rows * _BUCKETS + buckets, return_counts=True)
+    key_rows = keys // _BUCKETS
+    key_buckets = keys % _BUCKETS
+    df = np.bincount(key_buckets, minlength=_BUCKETS)
+    idf = np.log((count + 1) / (df[key_buckets] + 1))
+    return np.bincount(key_rows, weights=(1 + np.log(tf)) * idf, minlength=count)
+
+
+def detect_key_segments(
+    segments: Dict[str, Any],
+    window_seconds: float,
+    count: int,
+) -> List[Dict[str, Any]]:
+    """
+    检测信息密度最高的时间窗口
+
+    Args:
+        segments: {"start": 起点数组, "end": 终点数组, "text": 文本列表}，按时间排序
+        window_seconds: 窗口长度（秒），相邻窗口错开半个窗口
+        count: 最多返回的片段数
+
+    Returns:
+        按时间排序的 [{"start", "end", "score", "text"}, ...]；score 归一化到 0-1，
+        text 为窗口内信息量最高的分段
+    """
+    starts = np.asarray(segments["start"], dtype=np.float64)
+    ends = np.asarray(segments["end"], dtype=np.float64)
+    texts = segments["text"]
+    if len(starts) == 0 or count <= 0:
+        return []
+
+    information = segment_information(texts)
+    step = window_seconds / 2
+    bins = (starts // step).astype(np.int64)
+    binned = np.bincount(bins, weights=information)
+    # 窗口 i 覆盖第 i、i+1 箱
+    scores = binned + np.append(binned[1:], 0.0)
+    if scores.max() <= 0:
+        return []
+
+    # 按得分从高到低选取，选中窗口的相邻窗口与其重叠，一并排除
+    available = np.ones(len(scores), dtype=bool)
+    chosen = []
+    for window in np.argsort(-scores, kind="stable"):
+        if len(chosen) >= count or scores[window] <= 0:
+            break
+        if not available[window]:
+            continue
+        chosen.append(int(window))
+        available[max(0, window - 1):window + 2] = False
+
+    top = scores.max()
+    results = []
+    for window in sorted(chosen):
+        members = np.flatnonzero((bins == window) | (bins == window + 1))
+        best = members[np.argmax(information[members])]
+        results.append({
+            "start": round(float(starts[members[0]]), 2),
+            "end": round(float(ends[members].max()), 2),
+            "score": round(float(scores[window] / top), 3),
+            "text": texts[best],
+        })
+    return results
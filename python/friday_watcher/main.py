@@ -1,41 +1,275 @@
 """
-视频处理主模块
+视频处理主模块 - 离线导入本地字幕和 yt-dlp 下载的视频元数据
 """
-from typing import Dict, Any
+import bisect
+import json
+import shutil
+import asyncio
+from typing import Dict, Any, Callable, Iterator, List, Optional
+from pathlib import Path
+from datetime import datetime
 from friday_core.logger import setup_logger
+from friday_core.config import Config
+from friday_core.metrics import stage
+from friday_core.progress import ProgressReporter
+from friday_core.timefmt import format_timestamp
+from friday_core.vector_index import update_vector_index
+from friday_core.library import (
+    compute_file_hash,
+    finalize_resource,
+    find_cached_resource,
+    get_resource_dir,
+    resource_id_for_hash,
+    resource_lock,
+    save_resource,
+)
+from friday_watcher.key_segments import detect_key_segments
+from friday_watcher.subtitles import (
+    SUBTITLE_SUFFIXES,
+    find_info_file,
+    find_subtitle_file,
+    iter_cues,
+    load_video_info,
+    merge_cues,
+)
+from friday_watcher.summarizer import summarize_chunks
 
 logger = setup_logger(__name__)
 
+# 处理器版本：分段、总结或输出格式变化时递增，使内容哈希缓存失效
+WATCHER_VERSION = "subtitle-1"
 
-async def process_video(url: str) -> Dict[str, Any]:
+# 进度回调 (stage, progress, message, **fields)，与 ProgressReporter.update 兼容
+ProgressCallback = Callable[..., None]
+
+# 没有章节信息时，逐字稿每隔多少秒插入一个时间标题
+_SECTION_SECONDS = 300
+
+# 总结和关键片段另存一份，缓存命中时直接读取
+_SUMMARY_FILE = "summary.json"
+
+
+def get_watcher_version(summarizer: Optional[str] = None) -> str:
+    """缓存键中的处理器版本，包含总结后端名"""
+    return f"{WATCHER_VERSION}:{summarizer or Config.SUMMARIZER}"
+
+
+def _resolve_source(source: str) -> Dict[str, Any]:
+    """
+    解析输入：字幕文件，或 yt-dlp 的 .info.json（字幕文件需已下载到同一目录）
+
+    Returns:
+        {"subtitle_path": Path, "info": 元数据字典或 None}
     """
-    处理视频
-    1. 解析视频链接
-    2. 获取元数据
-    3. 下载字幕
-    4. 生成总结
-    5. 检测关键片段
+    if source.startswith(("http://", "https://")):
+        raise ValueError("Online videos are not supported; download subtitles with yt-dlp and pass the .info.json or subtitle file")
+
+    path = Path(source)
+    if not path.exists():
+        raise FileNotFoundError(f"Video source not found: {source}")
+
+    if path.name.endswith(".info.json"):
+        info = load_video_info(str(path))
+        return {"subtitle_path": find_subtitle_file(str(path), info, Config.get_subtitle_languages()), "info": info}
+    if path.suffix.lower() in SUBTITLE_SUFFIXES:
+        info_path = find_info_file(str(path))
+        return {"subtitle_path": path, "info": load_video_info(str(info_path)) if info_path else None}
+    raise ValueError(f"Unsupported video source: {path.suffix} (expected .srt, .vtt or .info.json)")
+
+
+def _section_starts(info: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """逐字稿的章节划分：优先使用视频章节"""
+    chapters = (info or {}).get("chapters") or []
+    return sorted(chapters, key=lambda chapter: chapter["start"])
+
+
+def _load_summary(resource: Dict[str, Any]) -> Dict[str, Any]:
+    """读取缓存资源的总结和关键片段"""
+    try:
+        with open(Path(resource["md_path"]).parent / _SUMMARY_FILE, "r", encoding="utf-8") as f:
+            resource.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+    return resource
+
+
+async def process_video(
+    source: str,
+    workers: Optional[int] = None,
+    force: bool = False,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> Dict[str, Any]:
     """
-    logger.info(f"Processing video: {url}")
-
-    # TODO: 实现视频处理逻辑
-    # 1. 使用 yt-dlp 解析链接
-    # 2. 下载字幕
-    # 3. 使用 LLM 生成总结
-    # 4. 检测关键片段
-    # 5. 保存到 Library
-
-    # 临时返回
-    return {
-        "id": "resource_id",
-        "type": "video",
-        "title": "Video Title",
-        "source": url,
-        "md_path": None,
-        "assets": [],
-        "vector_index": None,
-        "created_at": "2024-01-01T00:00:00",
-        "updated_at": "2024-01-01T00:00:00",
-    }
+    处理视频（离线）
+    1. 解析本地字幕文件和视频元数据
+    2. 流式合并字幕为时间对齐的分段，写出逐字稿
+    3. 分块并行 map-reduce 生成总结（可插拔后端）
+    4. 向量化检测关键片段
+    5. 保存到 Library
+
+    Args:
+        source: SRT / WebVTT 字幕文件路径，或 yt-dlp 写出的 .info.json 路径
+        workers: 并行总结的 worker 进程数，None 时使用 Config.SUMMARY_WORKERS
+        force: 为 True 时忽略内容哈希缓存，强制重新处理
+        progress_callback: 进度回调函数 (stage, progress, message, **fields)，默认发到进度事件通道
+            stage: "summarize" | "key_segments" | "complete"
+
+    Returns:
+        资源字典，另带 summary 和 key_segments 字段
+    """
+    logger.info(f"Processing video: {source}")
+    report = progress_callback or ProgressReporter("process_video").update
+
+    resolved = _resolve_source(str(source))
+    subtitle_path = resolved["subtitle_path"]
+    info = resolved["info"] or {}
+
+    Config.ensure_directories()
+    watcher_version = get_watcher_version()
+
+    # 按字幕内容哈希 + 处理器版本命中缓存时直接返回已有资源
+    with stage("hash"):
+        content_hash = await asyncio.to_thread(compute_file_hash, str(subtitle_path))
+
+    async def cache_hit() -> Optional[Dict[str, Any]]:
+        if force:
+            return None
+        cached = await asyncio.to_thread(find_cached_resource, content_hash, watcher_version)
+        if cached:
+            logger.info(f"Video cache hit: {cached['id']} (hash {content_hash[:12]})")
+            report("complete", 100, "视频已在资源库中")
+            if cached["vector_index"] is None:
+                cached = await update_vector_index(cached)
+            cached = _load_summary(cached)
+        return cached
+
+    cached = await cache_hit()
+    if cached:
+        return cached
+
+    # 同一内容的导入共用资源目录，需串行执行；拿到锁后再查一次缓存，
+    # 前一个导入刚完成时直接复用它的结果
+    async with resource_lock(content_hash):
+        cached = await cache_hit()
+        if cached:
+            return cached
+
+        resource_id = resource_id_for_hash(content_hash)
+        title = info.get("title") or subtitle_path.stem
+        resource_dir = get_resource_dir(resource_id)
+        if resource_dir.exists():
+            shutil.rmtree(resource_dir)
+        resource_dir.mkdir(parents=True, exist_ok=True)
+
+        duration = info.get("duration")
+        sections = _section_starts(info)
+        section_times = [section["start"] for section in sections]
+        transcript_part = resource_dir / "transcript.md.part"
+        segments_path = resource_dir / "transcript.jsonl"
+        # 关键片段打分用的紧凑列
+        columns: Dict[str, List[Any]] = {"start": [], "end": [], "text": []}
+
+        def iter_chunks(body, segments_file) -> Iterator[List[str]]:
+            """流式合并字幕、写出逐字稿，并按 SUMMARY_CHUNK_CHARS 分块产出"""
+            section = None
+            chunk: List[str] = []
+            chunk_chars = 0
+            cues = iter_cues(str(subtitle_path))
+            merged = merge_cues(cues, Config.SUBTITLE_MERGE_GAP, Config.SUBTITLE_SEGMENT_SECONDS, Config.SUBTITLE_SEGMENT_CHARS)
+            for segment in merged:
+                if sections:
+                    index = bisect.bisect_right(section_times, segment["start"]) - 1
+                    if index != section:
+                        section = index
+                        heading = sections[index] if index >= 0 else {"start": 0, "title": ""}
+                        body.write(f"## {format_timestamp(heading['start'])} {heading['title']}".rstrip() + "\n\n")
+                else:
+                    index = int(segment["start"] // _SECTION_SECONDS)
+                    if index != section:
+                        section = index
+                        body.write(f"## {format_timestamp(index * _SECTION_SECONDS)}\n\n")
+                body.write(f"**[{format_timestamp(segment['start'])}]** {segment['text']}\n\n")
+                segments_file.write(json.dumps(segment, ensure_ascii=False) + "\n")
+                for column, values in columns.items():
+                    values.append(segment[column])
+
+                chunk.append(segment["text"])
+                chunk_chars += len(segment["text"])
+                if chunk_chars >= Config.SUMMARY_CHUNK_CHARS:
+                    yield chunk
+                    chunk, chunk_chars = [], 0
+            if chunk:
+                yield chunk
+
+        def on_chunk(done: int):
+            # 分块在产出时即写入逐字稿，按已写到的时间估算进度（总结占 90%）
+            done_seconds = columns["end"][-1] if columns["end"] else 0
+            progress = int(min(done_seconds / duration, 1.0) * 90) if duration else 0
+            report("summarize", progress, f"正在总结字幕 (已完成 {done} 块)...", current=int(done_seconds), total=int(duration) if duration else None)
+
+        # 1. 流式解析字幕、写出逐字稿，同时分块并行总结
+        report("summarize", 0, "正在解析字幕...")
+        with open(transcript_part, "w", encoding="utf-8") as body, open(segments_path, "w", encoding="utf-8") as segments_file:
+            with stage("summarize"):
+                summary = await summarize_chunks(iter_chunks(body, segments_file), workers=workers, on_chunk=on_chunk)
+
+        if not columns["text"]:
+            shutil.rmtree(resource_dir)
+            raise ValueError(f"No subtitle text found in {subtitle_path}")
+
+        # 2. 关键片段
+        report("key_segments", 92, "正在检测关键片段...")
+        with stage("key_segments"):
+            key_segments = await asyncio.to_thread(
+                detect_key_segments, columns, Config.KEY_SEGMENT_SECONDS, Config.KEY_SEGMENT_COUNT
+            )
+        duration = duration or columns["end"][-1]
+
+        # 3. 组装 Markdown：元数据、总结、关键片段，然后是逐字稿
+        # 视频标题可能含路径分隔符等文件名中不允许的字符，只用在标题行和资源记录中
+        md_path = resource_dir / "transcript.md"
+        with open(md_path, "w", encoding="utf-8") as f:
+            f.write(f"# {title}\n\n")
+            f.write(f"**来源**: {info.get('url') or source}\n\n")
+            if info.get("uploader"):
+                f.write(f"**作者**: {info['uploader']}\n\n")
+            f.write(f"**字幕**: {subtitle_path}\n\n")
+            f.write(f"**时长**: {format_timestamp(duration)}\n\n")
+            f.write(f"**处理时间**: {datetime.now().isoformat()}\n\n")
+            f.write("---\n\n")
+            f.write(f"## 总结\n\n{summary}\n\n")
+            if key_segments:
+                f.write("## 关键片段\n\n")
+                for segment in key_segments:
+                    f.write(f"- **[{format_timestamp(segment['start'])} - {format_timestamp(segment['end'])}]** {segment['text']}\n")
+                f.write("\n")
+            f.write("---\n\n")
+            with open(transcript_part, "r", encoding="utf-8") as body:
+                shutil.copyfileobj(body, f)
+        transcript_part.unlink()
+
+        extras = {"summary": summary, "key_segments": key_segments}
+        with open(resource_dir / _SUMMARY_FILE, "w", encoding="utf-8") as f:
+            json.dump(extras, f, ensure_ascii=False)
 
+        report("complete", 100, "视频处理完成")
+        logger.info(f"Video processing completed: {resource_id} ({len(columns['text'])} segments)")
 
+        # 保存到资源库，建立全文和向量索引后返回资源信息
+        resource = await asyncio.to_thread(
+            save_resource,
+            {
+                "id": resource_id,
+                "type": "video",
+                "title": title,
+                "source": str(source),
+                "md_path": str(md_path),
+                "assets": [],
+                "vector_index": None,
+            },
+            content_hash=content_hash,
+            extractor_version=watcher_version,
+        )
+        resource = await finalize_resource(resource)
+        resource.update(extras)
+        return resource
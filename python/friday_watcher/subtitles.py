@@ -0,0 +1,217 @@
+"""
+字幕解析 - 流式读取 SRT / WebVTT 字幕和 yt-dlp 下载的视频元数据
+
+字幕文件逐行读取、逐条产出，内存中只保留当前一条字幕；相邻字幕再按时间间隔和
+长度合并为时间对齐的分段。自动生成字幕（滚动字幕）中每条会重复上一条的文本行，
+合并时去掉这些重复行。
+"""
+import functools
+import glob
+import html
+import json
+import re
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+SUBTITLE_SUFFIXES = (".srt", ".vtt")
+
+_TIMESTAMP_RE = re.compile(r"(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{1,3})")
+_TAG_RE = re.compile(r"<[^>]*>|\{\\[^}]*\}")
+_SPACE_RE = re.compile(r"\s+")
+_SENTENCE_END = tuple("。！？!?.…")
+
+
+def parse_timestamp(value: str) -> Optional[float]:
+    """解析 "HH:MM:SS,mmm" / "MM:SS.mmm" 形式的时间戳，返回秒数"""
+    match = _TIMESTAMP_RE.search(value)
+    if not match:
+        return None
+    hours, minutes, seconds, millis = match.groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(millis.ljust(3, "0")) / 1000
+
+
+def _clean_line(line: str) -> str:
+    """去掉样式标签、内联时间戳和多余空白"""
+    return _SPACE_RE.sub(" ", html.unescape(_TAG_RE.sub("", line))).strip()
+
+
+def _parse_block(lines: List[str]) -> Optional[Dict[str, Any]]:
+    """解析一个字幕块；不含时间轴的块（WEBVTT 头、NOTE、STYLE 等）返回 None"""
+    for i, line in enumerate(lines):
+        if "-->" not in line:
+            continue
+        begin, end = line.split("-->", 1)
+        start, stop = parse_timestamp(begin), parse_timestamp(end)
+        if start is None or stop is None:
+            return None
+        text_lines = [cleaned for cleaned in map(_clean_line, lines[i + 1:]) if cleaned]
+        return {"start": start, "end": max(start, stop), "lines": text_lines}
+    return None
+
+
+def iter_cues(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    流式解析 SRT / WebVTT 字幕文件
+
+    Yields:
+        {"start": 秒, "end": 秒, "lines": [文本行, ...]}，按文件中的顺序
+    """
+    block: List[str] = []
+    with open(path, "r", encoding="utf-8-sig", errors="replace") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if line.strip():
+                block.append(line)
+                continue
+            if block:
+                cue = _parse_block(block)
+                block = []
+                if cue:
+                    yield cue
+    if block:
+        cue = _parse_block(block)
+        if cue:
+            yield cue
+
+
+def _is_cjk(char: str) -> bool:
+    return ord(char) >= 0x2E80
+
+
+def _join(left: str, right: str) -> str:
+    """拼接两段文本，中日韩文字之间不加空格"""
+    if not left:
+        return right
+    if not right:
+        return left
+    separator = "" if _is_cjk(left[-1]) and _is_cjk(right[0]) else " "
+    return left + separator + right
+
+
+def merge_cues(
+    cues: Iterable[Dict[str, Any]],
+    max_gap: float,
+    max_seconds: float,
+    max_chars: int,
+) -> Iterator[Dict[str, Any]]:
+    """
+    把相邻字幕合并为时间对齐的分段
+
+    Args:
+        cues: iter_cues 产出的字幕
+        max_gap: 与上一条字幕的间隔超过该秒数时另起一段
+        max_seconds: 每段最长秒数；超过一半且在句末时也会断开
+        max_chars: 每段最多字符数
+
+    Yields:
+        {"start": 秒, "end": 秒, "text": 文本}
+    """
+    current: Optional[Dict[str, Any]] = None
+    previous_lines: List[str] = []
+
+    for cue in cues:
+        lines = cue["lines"]
+        # 滚动字幕：去掉开头与上一条字幕重复的行
+        skip = 0
+        while skip < len(lines) and lines[skip] in previous_lines:
+            skip += 1
+        previous_lines = lines
+        text = functools.reduce(_join, lines[skip:], "")
+
+        if current is not None:
+            if not text:
+                # 只有重复行的字幕只延长当前分段
+                current["end"] = max(current["end"], cue["end"])
+                continue
+            duration = cue["end"] - current["start"]
+            if (
+                cue["start"] - current["end"] > max_gap
+                or duration > max_seconds
+                or len(current["text"]) + len(text) > max_chars
+                or (current["text"].endswith(_SENTENCE_END) and duration > max_seconds / 2)
+            ):
+                yield current
+                current = None
+
+        if not text:
+            continue
+        if current is None:
+            current = {"start": cue["start"], "end": cue["end"], "text": text}
+        else:
+            current["end"] = max(current["end"], cue["end"])
+            current["text"] = _join(current["text"], text)
+
+    if current is not None:
+        yield current
+
+
+def load_video_info(path: str) -> Dict[str, Any]:
+    """读取 yt-dlp 写出的 .info.json，只保留需要的元数据字段"""
+    with open(path, "r", encoding="utf-8") as f:
+        info = json.load(f)
+    return {
+        "title": info.get("title") or info.get("fulltitle"),
+        "uploader": info.get("uploader") or info.get("channel"),
+        "url": info.get("webpage_url") or info.get("original_url"),
+        "duration": info.get("duration"),
+        "upload_date": info.get("upload_date"),
+        "chapters": [
+            {"start": chapter["start_time"], "title": chapter.get("title") or ""}
+            for chapter in info.get("chapters") or []
+            if chapter.get("start_time") is not None
+        ],
+        "requested_subtitles": {
+            lang: sub.get("filepath")
+            for lang, sub in (info.get("requested_subtitles") or {}).items()
+            if isinstance(sub, dict)
+        },
+    }
+
+
+def _info_base(info_path: Path) -> str:
+    name = info_path.name
+    return name[:-len(".info.json")] if name.endswith(".info.json") else info_path.stem
+
+
+def find_subtitle_file(info_path: str, info: Dict[str, Any], languages: List[str]) -> Path:
+    """
+    查找 .info.json 对应的本地字幕文件
+
+    优先使用 requested_subtitles 中记录的路径，否则查找同名的 "<名称>.<语言>.vtt|srt"；
+    按 languages 的顺序选择语言，都没有时取找到的第一个。
+    """
+    info_path = Path(info_path)
+    candidates: Dict[str, Path] = {}
+    for lang, filepath in info.get("requested_subtitles", {}).items():
+        if filepath and Path(filepath).suffix.lower() in SUBTITLE_SUFFIXES and Path(filepath).exists():
+            candidates[lang] = Path(filepath)
+
+    base = _info_base(info_path)
+    for path in sorted(info_path.parent.glob(f"{glob.escape(base)}.*")):
+        if path.suffix.lower() not in SUBTITLE_SUFFIXES:
+            continue
+        # "<名称>.<语言>.vtt" 中间部分为语言，"<名称>.vtt" 没有语言
+        lang = path.name[len(base) + 1:-len(path.suffix)] or ""
+        candidates.setdefault(lang, path)
+
+    if not candidates:
+        raise FileNotFoundError(f"No local subtitle file found for {info_path}")
+    for lang in languages:
+        if lang in candidates:
+            return candidates[lang]
+    return next(iter(candidates.values()))
+
+
+def find_info_file(subtitle_path: str) -> Optional[Path]:
+    """查找字幕文件旁边同名的 .info.json（"<名称>.<语言>.vtt" 对应 "<名称>.info.json"）"""
+    path = Path(subtitle_path)
+    name = path.name[:-len(path.suffix)]
+    while name:
+        candidate = path.with_name(f"{name}.info.json")
+        if candidate.exists():
+            return candidate
+        if "." not in name:
+            break
+        name = name.rsplit(".", 1)[0]
+    return None
+
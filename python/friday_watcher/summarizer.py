@@ -0,0 +1,228 @@
+"""
+长文本总结 - 可插拔的总结后端 + 分块并行的 map-reduce
+
+总结后端是一个函数：接收一组文本（按原始顺序）和期望的句数，返回一段总结。
+map 阶段把逐字稿分块后并行总结，同时在途的块数有上限；reduce 阶段每 fan_in 个
+部分总结再合并总结一次，逐层进行直到只剩一个。
+
+同步后端（CPU 密集，如 extractive）在 worker 进程中按名称创建并缓存，自定义后端
+需在 worker 进程也能执行到的模块顶层注册；异步后端（如调用 LLM 的 llm）直接在
+事件循环上并发执行，并发和限流由 LLM 客户端控制。
+"""
+import asyncio
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from friday_core.config import Config
+from friday_core.metrics import record_worker_stats
+
+Summarizer = Callable[[List[str], int], Union[str, Awaitable[str]]]
+
+# 每个块完成时的回调 (已完成块数)
+ChunkCallback = Callable[[int], None]
+
+_SENTENCE_RE = re.compile(r"[^。！？!?；;]+[。！？!?；;]*")
+
+_summarizer_factories: Dict[str, Callable[[], Summarizer]] = {}
+_summarizers: Dict[str, Summarizer] = {}
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+
+
+def register_summarizer(name: str, factory: Callable[[], Summarizer]):
+    """注册总结后端，factory 在首次使用时调用"""
+    _summarizer_factories[name] = factory
+    _summarizers.pop(name, None)
+
+
+def get_summarizer(name: Optional[str] = None) -> Summarizer:
+    """获取（按需创建）总结后端"""
+    name = name or Config.SUMMARIZER
+    if name not in _summarizers:
+        factory = _summarizer_factories.get(name)
+        if factory is None:
+            raise ValueError(f"Unknown summarizer: {name}")
+        _summarizers[name] = factory()
+    return _summarizers[name]
+
+
+def split_sentences(texts: List[str]) -> List[str]:
+    """按中英文句末标点切分为句子"""
+    sentences = []
+    for text in texts:
+        sentences.extend(s.strip() for s in _SENTENCE_RE.findall(text) if s.strip())
+    return sentences
+
+
+def _extractive_factory() -> Summarizer:
+    """
+    离线抽取式总结：句子的特征哈希向量与全文质心越接近得分越高，
+    依次选取得分最高且与已选句子不重复的句子，按原文顺序输出
+    """
+    import numpy as np
+    from friday_core.vector_index import get_embedding_function
+
+    embed = get_embedding_function("hashing")
+
+    def summarize(texts: List[str], max_sentences: int) -> str:
+        sentences = split_sentences(texts)
+        if len(sentences) <= max_sentences:
+            return "".join(sentences) if all(map(_ends_cjk, sentences)) else " ".join(sentences)
+
+        vectors = np.asarray(embed(sentences), dtype=np.float32)
+        lengths = np.array([len(s) for s in sentences], dtype=np.float32)
+        centroid = vectors.mean(axis=0)
+        # 过短的句子（语气词、"好的"）信息量低，按长度压低得分
+        scores = vectors @ centroid * np.minimum(lengths / 20, 1.0)
+
+        chosen: List[int] = []
+        for index in np.argsort(-scores):
+            if len(chosen) >= max_sentences:
+                break
+            if chosen and float((vectors[chosen] @ vectors[index]).max()) > 0.8:
+                continue
+            chosen.append(int(index))
+        picked = [sentences[i] for i in sorted(chosen)]
+        return "".join(picked) if all(map(_ends_cjk, picked)) else " ".join(picked)
+
+    return summarize
+
+
+def _llm_factory() -> Summarizer:
+    """调用共享 LLM 客户端生成总结，相同的块命中响应缓存"""
+    from friday_core.llm import complete
+
+    async def summarize(texts: List[str], max_sentences: int) -> str:
+        prompt = f"请用不超过 {max_sentences} 句话总结以下内容，保留关键概念和结论，只输出总结本身：\n\n" + "\n".join(texts)
+        return (await complete(prompt, system="你是一个严谨的内容总结助手。")).strip()
+
+    return summarize
+
+
+def _ends_cjk(sentence: str) -> bool:
+    return bool(sentence) and ord(sentence[-1]) >= 0x2E80
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    """获取（必要时重建）共享进程池"""
+    global _executor, _executor_workers
+    if _executor is None or _executor_workers != workers:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = ProcessPoolExecutor(max_workers=workers)
+        _executor_workers = workers
+    return _executor
+
+
+def shutdown_executor():
+    """关闭共享进程池并等待 worker 退出"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+    _executor = None
+
+
+def _reset_executor():
+    """进程池损坏（worker 崩溃）后丢弃，下次调用时重建"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+    _executor = None
+
+
+def _summarize_chunk(name: str, texts: List[str], max_sentences: int) -> Tuple[str, float]:
+    """在 worker 中总结一个块，返回 (总结, 耗时秒数)"""
+    started = time.perf_counter()
+    summary = get_summarizer(name)(texts, max_sentences)
+    return summary, time.perf_counter() - started
+
+
+async def summarize_chunks(
+    chunks: Iterator[List[str]],
+    workers: Optional[int] = None,
+    summarizer: Optional[str] = None,
+    on_chunk: Optional[ChunkCallback] = None,
+) -> str:
+    """
+    map-reduce 总结
+
+    Args:
+        chunks: 逐块产出的文本组，在线程中按需拉取（生成器可以顺带写出逐字稿）
+        workers: worker 进程数，None 时使用配置；为 1 时在线程中总结
+        summarizer: 总结后端名称，None 时使用 Config.SUMMARIZER
+        on_chunk: map 阶段每完成一个块时的回调
+
+    Returns:
+        总结文本，没有任何文本时为空字符串
+    """
+    workers = max(1, workers or Config.get_summary_workers())
+    name = summarizer or Config.SUMMARIZER
+    sentences = Config.SUMMARY_SENTENCES
+    fan_in = max(2, Config.SUMMARY_FAN_IN)
+
+    backend = get_summarizer(name)
+    if asyncio.iscoroutinefunction(backend):
+        # 异步后端在事件循环上执行，在途块数按 LLM 并发上限放宽
+        workers = max(workers, Config.get_llm_concurrency().get(Config.LLM_PROVIDER, Config.LLM_DEFAULT_CONCURRENCY))
+
+        async def timed(texts):
+            started = time.perf_counter()
+            summary = await backend(texts, sentences)
+            return summary, time.perf_counter() - started
+
+        def run(texts):
+            return asyncio.ensure_future(timed(texts))
+    elif workers == 1:
+        def run(texts):
+            return asyncio.ensure_future(asyncio.to_thread(_summarize_chunk, name, texts, sentences))
+    else:
+        executor = _get_executor(workers)
+        loop = asyncio.get_running_loop()
+
+        def run(texts):
+            return loop.run_in_executor(executor, _summarize_chunk, name, texts, sentences)
+
+    inflight: deque = deque()
+    partials: List[str] = []
+
+    async def drain():
+        summary, elapsed = await inflight.popleft()
+        record_worker_stats({"summarize": elapsed})
+        partials.append(summary)
+        if on_chunk:
+            on_chunk(len(partials))
+
+    try:
+        # map：按需拉取块，在途块数受限，结果按块顺序收集
+        while True:
+            texts = await asyncio.to_thread(next, chunks, None)
+            if texts is None:
+                break
+            inflight.append(run(texts))
+            if len(inflight) >= workers * 2:
+                await drain()
+        while inflight:
+            await drain()
+
+        # reduce：逐层合并，同一层的各组并行
+        while len(partials) > 1:
+            groups = [partials[i:i + fan_in] for i in range(0, len(partials), fan_in)]
+            results = await asyncio.gather(*(run(group) for group in groups))
+            record_worker_stats({"summarize": sum(elapsed for _, elapsed in results)})
+            partials = [summary for summary, _ in results]
+    except BrokenProcessPool:
+        _reset_executor()
+        raise
+    finally:
+        for future in inflight:
+            future.cancel()
+
+    return partials[0] if partials else ""
+
+
+register_summarizer("extractive", _extractive_factory)
+register_summarizer("llm", _llm_factory)
@@ -2,14 +2,20 @@
 """
 Friday Python Sidecar - 主入口
 处理来自 Tauri 的 JSON RPC 请求
+
+用法:
+    python main.py            单次模式：读取一个请求，输出结果后退出
+    python main.py --server   常驻模式：逐行读取带 id 的请求帧，并发处理
 """
 import sys
 import json
 import asyncio
+import threading
 from typing import Dict, Any
 
-from friday_core.router import Router
+from friday_core.context import get_router
 from friday_core.logger import setup_logger
+from friday_core.progress import current_request_id, set_sink
 
 logger = setup_logger(__name__)
 
@@ -28,9 +34,11 @@ async def handle_request(request: Dict[str, Any]) -> Dict[str, Any]:
         if "path" in payload:
             logger.debug(f"Path value: {payload['path']}, type: {type(payload['path'])}")
 
-        router = Router()
-        result = await router.route(cmd, payload)
+        result, metrics = await get_router().route_with_metrics(cmd, payload)
 
+        # 请求带 "_metrics" 或 "_profile" 时在响应中附带性能埋点
+        if payload.get("_metrics") or payload.get("_profile"):
+            return {"result": result, "metrics": metrics}
         return {"result": result}
 
     except Exception as e:
@@ -41,35 +49,133 @@ async def handle_request(request: Dict[str, Any]) -> Dict[str, Any]:
         return {"error": str(e)}
 
 
-def main():
-    """主函数 - 从 stdin 读取 JSON，处理并输出结果"""
-    try:
-        # 从 stdin 读取 JSON（确保使用 UTF-8 编码）
-        # 在 Windows 上，stdin 可能是二进制模式，需要正确处理
-        import io
-        if hasattr(sys.stdin, 'buffer'):
-            # 二进制模式，需要解码
-            input_bytes = sys.stdin.buffer.read()
-            input_data = input_bytes.decode('utf-8')
-        else:
-            # 文本模式
-            input_data = sys.stdin.read()
-        
-        request = json.loads(input_data)
+def _read_input() -> str:
+    """从 stdin 读取全部输入（确保使用 UTF-8 编码）"""
+    # 在 Windows 上，stdin 可能是二进制模式，需要正确处理
+    if hasattr(sys.stdin, 'buffer'):
+        # 二进制模式，需要解码
+        return sys.stdin.buffer.read().decode('utf-8')
+    # 文本模式
+    return sys.stdin.read()
 
-        # 处理请求
-        result = asyncio.run(handle_request(request))
 
-        # 输出结果到 stdout（确保使用 UTF-8 编码）
-        output_json = json.dumps(result, ensure_ascii=False)
+def _read_frame() -> str:
+    """从 stdin 读取一行 JSON 帧，EOF 时返回空字符串"""
+    if hasattr(sys.stdin, 'buffer'):
+        return sys.stdin.buffer.readline().decode('utf-8')
+    return sys.stdin.readline()
+
+
+# 响应和进度帧共用 stdout，进度可能从 worker 线程发出，整帧在锁内一次写出
+_stdout_lock = threading.Lock()
+
+
+def _write_response(response: Dict[str, Any]):
+    """输出一行 JSON 到 stdout（确保使用 UTF-8 编码）"""
+    output_json = json.dumps(response, ensure_ascii=False) + '\n'
+    with _stdout_lock:
         if hasattr(sys.stdout, 'buffer'):
             # 二进制模式，需要编码
             sys.stdout.buffer.write(output_json.encode('utf-8'))
-            sys.stdout.buffer.write(b'\n')
             sys.stdout.buffer.flush()
         else:
             # 文本模式
-            print(output_json, flush=True)
+            sys.stdout.write(output_json)
+            sys.stdout.flush()
+
+
+async def _serve_frame(line: str, slots: asyncio.Semaphore):
+    """处理常驻模式下的一帧请求，响应携带原请求 id；slots 限制同时处理的帧数"""
+    try:
+        frame = json.loads(line)
+    except json.JSONDecodeError as e:
+        _write_response({"id": None, "error": f"Invalid JSON: {e}"})
+        return
+
+    if not isinstance(frame, dict):
+        _write_response({"id": None, "error": "Frame must be a JSON object"})
+        return
+
+    current_request_id.set(frame.get("id"))
+    async with slots:
+        response = await handle_request(frame)
+    _write_response({"id": frame.get("id"), **response})
+
+
+async def serve():
+    """
+    常驻模式 - 从 stdin 逐行读取 JSON RPC 帧并在同一事件循环上并发处理
+
+    每一帧形如 {"id": ..., "cmd": ..., "payload": {...}}，响应形如
+    {"id": ..., "result": ...} 或 {"id": ..., "error": ...}，按完成顺序输出，
+    调用方需根据 id 匹配。同时处理的帧数不超过 Config.SERVER_MAX_CONCURRENCY，
+    超出的帧按到达顺序等待。进度事件以 {"event": "progress", "data": {...}} 帧
+    输出在同一 stdout 上。stdin 关闭（EOF）后等待进行中的请求完成再退出；
+    后台任务队列中未完成的任务保持 pending，下次启动时继续执行。
+    配置了 WATCH_DIRS 时同时监视这些目录，自动导入其中新增和变化的文件。
+    """
+    import multiprocessing
+    from friday_core.config import Config
+    from friday_core.context import get_app_context
+    from friday_core.llm import close_llm_client
+    from friday_core.task_queue import get_task_queue
+    from friday_core.watch import get_folder_watcher
+
+    if sys.platform != "win32":
+        # 读取 stdin 的线程阻塞时持有 sys.stdin 的锁，fork 出的进程池 worker 启动时
+        # 关闭 stdin 会永远等待这把锁；改用 forkserver 启动 worker（Windows 上本来就是 spawn）
+        multiprocessing.set_start_method("forkserver", force=True)
+
+    loop = asyncio.get_running_loop()
+    pending = set()
+    slots = asyncio.Semaphore(max(1, Config.SERVER_MAX_CONCURRENCY))
+    get_app_context().server_mode = True
+    logger.info("Sidecar running in server mode")
+    set_sink(lambda event: _write_response({"event": "progress", "data": event}))
+
+    # 常驻模式下启动后台任务队列，并恢复上次未完成的任务
+    task_queue = get_task_queue(get_router())
+    await task_queue.start()
+
+    # 配置了监视目录时自动导入其中新增和变化的文件
+    watcher = get_folder_watcher()
+    if watcher.dirs:
+        await watcher.start()
+
+    while True:
+        # 阻塞读取放到线程中，避免卡住事件循环
+        line = await loop.run_in_executor(None, _read_frame)
+        if not line:
+            break
+        if not line.strip():
+            continue
+
+        task = asyncio.create_task(_serve_frame(line, slots))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    if pending:
+        await asyncio.gather(*pending)
+    await watcher.stop()
+    await task_queue.stop()
+    await close_llm_client()
+    logger.info("Sidecar server mode stopped")
+
+
+def main():
+    """主函数 - 从 stdin 读取 JSON，处理并输出结果；带 --server 参数时进入常驻模式"""
+    if "--server" in sys.argv[1:]:
+        asyncio.run(serve())
+        return
+
+    try:
+        request = json.loads(_read_input())
+
+        # 处理请求
+        result = asyncio.run(handle_request(request))
+
+        # 输出结果到 stdout
+        _write_response(result)
 
     except json.JSONDecodeError as e:
         error_result = {"error": f"Invalid JSON: {e}"}
@@ -83,5 +189,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
-
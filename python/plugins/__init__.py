@@ -1,6 +1,4 @@
 """
 插件系统
-插件会自动注册到 Friday 系统中
+本目录下用 @friday_plugin 装饰的函数会被自动发现并注册为同名命令（见 friday_core.plugins）
 """
-
-
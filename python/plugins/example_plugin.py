@@ -1,28 +1,22 @@
 """
 示例插件 - 展示如何创建 Friday 插件
+
+插件函数用 @friday_plugin 声明名称和执行选项（须为字面量，发现阶段只做 AST 扫描，
+不导入本文件），首次调用时才导入。调用方式：
+    {"cmd": "example_plugin", "payload": {...}}
 """
 from typing import Dict, Any
 from friday_core.logger import setup_logger
+from friday_core.plugins import friday_plugin
 
 logger = setup_logger(__name__)
 
 
-def friday_plugin(name: str):
-    """插件装饰器"""
-    def decorator(func):
-        # 注册插件
-        logger.info(f"Registering plugin: {name}")
-        return func
-    return decorator
-
-
-@friday_plugin(name="example_plugin")
+@friday_plugin(name="example_plugin", mode="thread", timeout=10, description="示例插件，原样返回 payload")
 def run(payload: Dict[str, Any]) -> Dict[str, Any]:
     """
     插件主函数
     接收 payload，返回处理结果
     """
     logger.info(f"Example plugin executed with payload: {payload}")
-    return {"message": "Example plugin executed successfully"}
-
-
+    return {"message": "Example plugin executed successfully", "payload": payload}
@@ -0,0 +1,25 @@
+"""
+测试公共配置：把 python/ 加入导入路径，各测试的数据目录指向临时目录
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from friday_core.config import Config  # noqa: E402
+from friday_core.context import reset_app_context  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_paths(tmp_path, monkeypatch):
+    """资源库、数据库和缓存都写到本次测试的临时目录"""
+    monkeypatch.setattr(Config, "LIBRARY_PATH", str(tmp_path / "library"))
+    monkeypatch.setattr(Config, "DATABASE_PATH", str(tmp_path / "friday.db"))
+    monkeypatch.setattr(Config, "CHROMADB_PATH", str(tmp_path / "chroma_db"))
+    monkeypatch.setattr(Config, "LLM_CACHE_PATH", str(tmp_path / "llm_cache.db"))
+    # 数据库引擎按 DATABASE_PATH 创建，前后各重建一次
+    reset_app_context()
+    yield tmp_path
+    reset_app_context()
@@ -0,0 +1,48 @@
+"""语音识别后端：按实际 worker 数创建后端、分窗转写的顺序和续转"""
+import asyncio
+
+from benchmarks.fixtures import make_wav
+from friday_core.config import Config
+from friday_listener import asr, transcriber
+
+
+def _worker_count_factory(workers: int):
+    def transcribe(samples, sample_rate):
+        return [{"start": 0.0, "end": 0.1, "text": f"workers={workers}"}]
+    return transcribe
+
+
+def collect(path, **kwargs):
+    segments = []
+
+    async def on_segments(batch, done_seconds, resume_seconds):
+        segments.extend(batch)
+
+    asyncio.run(transcriber.transcribe(str(path), on_segments, **kwargs))
+    return segments
+
+
+def test_backend_factory_gets_the_real_worker_count(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "ASR_WORKERS", 8)
+    monkeypatch.setattr(Config, "ASR_WINDOW_SECONDS", 5)
+    asr.register_asr_backend("worker_count", _worker_count_factory)
+    wav = make_wav(tmp_path / "a.wav", 12)
+    try:
+        texts = {s["text"] for s in collect(wav, workers=2, backend="worker_count")}
+    finally:
+        transcriber.shutdown_executor()
+    assert texts == {"workers=2"}
+    assert {s["text"] for s in collect(wav, workers=1, backend="worker_count")} == {"workers=1"}
+
+
+def test_segments_are_ordered_and_resumable(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "ASR_WINDOW_SECONDS", 10)
+    wav = make_wav(tmp_path / "a.wav", 40)
+    segments = collect(wav, workers=1, backend="energy")
+    starts = [s["start"] for s in segments]
+    assert segments and starts == sorted(starts)
+
+    # 从偏移继续时不会产出偏移之前的分段
+    resumed = collect(wav, workers=1, backend="energy", start_seconds=20)
+    assert resumed and min(s["start"] for s in resumed) >= 20
+    assert [s["start"] for s in resumed] == sorted(s["start"] for s in resumed)
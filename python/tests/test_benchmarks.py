@@ -0,0 +1,59 @@
+"""导入基准：场景定义、分位数、结果汇总和与基线的回归比较"""
+import asyncio
+
+from benchmarks import ingest
+from friday_core.config import Config
+from friday_listener import transcriber
+from friday_reader import extractor
+
+
+def test_suites_reference_known_scenarios():
+    for names in ingest.SUITES.values():
+        assert set(names) <= set(ingest.SCENARIOS)
+    assert ingest.SUITES["full"] == list(ingest.SCENARIOS)
+
+
+def test_percentile_interpolates():
+    values = [4.0, 1.0, 3.0, 2.0]
+    assert ingest.percentile(values, 0) == 1.0
+    assert ingest.percentile(values, 50) == 2.5
+    assert ingest.percentile(values, 100) == 4.0
+    assert ingest.percentile([7.0], 99) == 7.0
+
+
+def test_fixtures_are_generated_once(tmp_path):
+    pdf = ingest.prepare_fixture(tmp_path, ("text", 2))
+    wav = ingest.prepare_fixture(tmp_path, ("wav", 2))
+    vtt = ingest.prepare_fixture(tmp_path, ("vtt", 60))
+    assert pdf["pages"] == 2 and wav["seconds"] == 2 and vtt["video_seconds"] == 60
+    mtime = (tmp_path / "text_2.pdf").stat().st_mtime_ns
+    assert ingest.prepare_fixture(tmp_path, ("text", 2)) == pdf
+    assert (tmp_path / "text_2.pdf").stat().st_mtime_ns == mtime
+
+
+def test_summarize_and_compare():
+    fixture = {"path": "a.pdf", "pages": 10, "bytes": 2_000_000}
+    result = ingest.summarize("pdf_text_10", fixture, {"latencies": [1.0, 1.0, 2.0, 4.0], "peak_rss_kb": 1000})
+    assert result["pages_per_s"] == 5.0 and result["mb_per_s"] == 1.0
+    assert result["p50_ms"] == 1500.0
+
+    baseline = {"results": [{**result, "pages_per_s": 10.0, "peak_rss_kb": 990}]}
+    regressions = ingest.compare([result], baseline, tolerance=0.1)
+    # 吞吐下降 50% 是回归；峰值内存只上升约 1%，在容差内
+    assert len(regressions) == 1 and "pages_per_s" in regressions[0]
+    assert result["vs_baseline"]["pages_per_s"] == -0.5
+    assert ingest.compare([result], {"results": []}, tolerance=0.1) == []
+
+
+def test_worker_runs_pdf_and_audio(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "ASR_BACKEND", "energy")
+    pdf = ingest.prepare_fixture(tmp_path, ("text", 2))
+    wav = ingest.prepare_fixture(tmp_path, ("wav", 3))
+    try:
+        pdf_latencies = asyncio.run(ingest._worker_runs("parse_pdf", pdf["path"], runs=2, warmup=0, workers=1))
+        audio_latencies = asyncio.run(ingest._worker_runs("process_audio", wav["path"], runs=1, warmup=0, workers=1))
+    finally:
+        extractor.shutdown_executor()
+        transcriber.shutdown_executor()
+    assert len(pdf_latencies) == 2 and len(audio_latencies) == 1
+    assert all(latency > 0 for latency in pdf_latencies + audio_latencies)
@@ -0,0 +1,106 @@
+"""检查点：读写与校验、截断，以及 PDF 解析中断后从检查点继续"""
+import asyncio
+import re
+
+import pytest
+
+from benchmarks.fixtures import make_text_pdf
+from friday_core.checkpoint import clear_checkpoint, load_checkpoint, save_checkpoint, truncate_to
+from friday_core.config import Config
+from friday_core.progress import current_task_id
+from friday_core.task_queue import create_task_record, get_task_record
+from friday_reader import extractor
+from friday_reader import main as reader
+
+
+def test_checkpoint_round_trip_and_validation(tmp_path):
+    save_checkpoint(tmp_path, "pdf", "hash", "v1", {"pages_done": 3})
+    assert load_checkpoint(tmp_path, "pdf", "hash", "v1") == {"pages_done": 3}
+    # 类型、内容哈希或版本不一致时不可用
+    assert load_checkpoint(tmp_path, "audio", "hash", "v1") is None
+    assert load_checkpoint(tmp_path, "pdf", "other", "v1") is None
+    assert load_checkpoint(tmp_path, "pdf", "hash", "v2") is None
+    clear_checkpoint(tmp_path)
+    assert load_checkpoint(tmp_path, "pdf", "hash", "v1") is None
+
+
+def test_checkpoint_is_mirrored_to_the_task(tmp_path):
+    task = create_task_record("parse_pdf", {})
+    token = current_task_id.set(task["id"])
+    try:
+        save_checkpoint(tmp_path, "pdf", "hash", "v1", {"pages_done": 2})
+    finally:
+        current_task_id.reset(token)
+    assert get_task_record(task["id"])["checkpoint"] == {"kind": "pdf", "resource_dir": str(tmp_path), "pages_done": 2}
+
+
+def test_truncate_to(tmp_path):
+    path = tmp_path / "out.md"
+    path.write_bytes(b"0123456789")
+    assert truncate_to(path, 4) and path.read_bytes() == b"0123"
+    # 文件比检查点记录的短，或不存在时检查点不可用
+    assert not truncate_to(path, 8)
+    assert not truncate_to(tmp_path / "missing.md", 0)
+
+
+def test_interrupted_pdf_resumes_from_checkpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "PDF_MAX_SHARD_PAGES", 2)
+    monkeypatch.setattr(Config, "LAYOUT_MIN_SHARD_PAGES", 2)
+    pdf = make_text_pdf(tmp_path / "a.pdf", 7)
+    starts = []
+    extract_shard = extractor._extract_shard
+
+    def interrupted(pdf_path, start, end, *args):
+        starts.append(start)
+        if start == 4 and starts.count(4) == 1:
+            raise RuntimeError("interrupted")
+        return extract_shard(pdf_path, start, end, *args)
+
+    monkeypatch.setattr(extractor, "_extract_shard", interrupted)
+    with pytest.raises(RuntimeError, match="interrupted"):
+        asyncio.run(reader.parse_pdf(str(pdf), workers=1))
+    assert starts == [0, 2, 4]
+
+    resource = asyncio.run(reader.parse_pdf(str(pdf), workers=1))
+    # 已完成的 4 页不再抽取
+    assert starts == [0, 2, 4, 4, 6]
+    with open(resource["md_path"], encoding="utf-8") as f:
+        pages = [int(n) for n in re.findall(r"^## 第 (\d+) 页$", f.read(), re.M)]
+    assert pages == list(range(1, 8))
+
+
+def test_interrupted_audio_resumes_from_checkpoint(tmp_path, monkeypatch):
+    from benchmarks.fixtures import make_wav
+    from friday_listener import main as listener
+    from friday_listener import transcriber
+
+    monkeypatch.setattr(Config, "ASR_BACKEND", "energy")
+    monkeypatch.setattr(Config, "ASR_WINDOW_SECONDS", 10)
+    monkeypatch.setattr(Config, "ASR_BATCH_WINDOWS", 1)
+    wav = make_wav(tmp_path / "a.wav", 45)
+    starts = []
+    transcribe_batch = transcriber._transcribe_batch
+
+    def interrupted(backend, windows, *args):
+        start = windows[0][0]
+        starts.append(start)
+        if start >= 20 and not any(s >= 20 for s in starts[:-1]):
+            raise RuntimeError("interrupted")
+        return transcribe_batch(backend, windows, *args)
+
+    monkeypatch.setattr(transcriber, "_transcribe_batch", interrupted)
+    with pytest.raises(RuntimeError, match="interrupted"):
+        asyncio.run(listener.process_audio(str(wav), workers=1))
+    interrupted_at = starts[-1]
+
+    resource = asyncio.run(listener.process_audio(str(wav), workers=1))
+    resumed = starts[starts.index(interrupted_at) + 1:]
+    # 从中断的窗口继续，之前完成的窗口不再转写
+    assert resumed[0] <= interrupted_at and all(s >= resumed[0] for s in resumed)
+    segments_path = tmp_path / "library" / resource["id"] / "transcript.jsonl"
+    resumed_segments = segments_path.read_text(encoding="utf-8")
+
+    monkeypatch.setattr(transcriber, "_transcribe_batch", transcribe_batch)
+    asyncio.run(listener.process_audio(str(wav), workers=1, force=True))
+    # 与一次完整转写的结果相同
+    assert segments_path.read_text(encoding="utf-8") == resumed_segments
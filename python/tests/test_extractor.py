@@ -0,0 +1,107 @@
+"""PDF 抽取：分片规划、并行分片按页序拼接、单遍流式写入，以及图片按 xref 和内容哈希去重"""
+import asyncio
+import re
+from pathlib import Path
+
+from benchmarks.fixtures import make_image_pdf, make_text_pdf
+from friday_core.config import Config
+from friday_reader import extractor
+
+
+def page_headings(md_path):
+    with open(md_path, encoding="utf-8") as f:
+        return [int(n) for n in re.findall(r"^## 第 (\d+) 页$", f.read(), re.M)]
+
+
+def test_plan_shards(monkeypatch):
+    monkeypatch.setattr(Config, "PDF_MAX_SHARD_PAGES", 32)
+    shards = extractor.plan_shards(100, 4)
+    assert shards[0][0] == 0 and shards[-1][1] == 100
+    assert all(a[1] == b[0] for a, b in zip(shards, shards[1:]))
+    assert max(end - start for start, end in shards) == 7
+    # 续做时从 start_page 开始；分片不少于 min_pages，不多于 PDF_MAX_SHARD_PAGES
+    assert extractor.plan_shards(100, 4, start_page=90) == [(90, 91), (91, 92), (92, 93), (93, 94), (94, 95),
+                                                            (95, 96), (96, 97), (97, 98), (98, 99), (99, 100)]
+    assert extractor.plan_shards(100, 1, min_pages=40) == [(0, 40), (40, 80), (80, 100)]
+    assert extractor.plan_shards(1000, 1) == [(s, min(s + 32, 1000)) for s in range(0, 1000, 32)]
+    assert extractor.plan_shards(10, 4, start_page=10) == []
+
+
+def test_parallel_shards_are_stitched_in_page_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "PDF_MAX_SHARD_PAGES", 2)
+    monkeypatch.setattr(Config, "LAYOUT_MIN_SHARD_PAGES", 1)
+    monkeypatch.setattr(Config, "PDF_PARALLEL_MIN_PAGES", 0)
+    pdf = make_text_pdf(tmp_path / "a.pdf", 15)
+    md_path = tmp_path / "out" / "a.md"
+    md_path.parent.mkdir()
+    md_path.write_text("# a\n\n", encoding="utf-8")
+    checkpoints = []
+
+    async def on_checkpoint(pages, md_bytes):
+        checkpoints.append(([p["page"] for p in pages], md_bytes))
+
+    try:
+        pages = asyncio.run(extractor.extract_pages(
+            str(pdf), tmp_path / "out" / "assets", md_path, workers=3, checkpoint_callback=on_checkpoint,
+        ))
+    finally:
+        extractor.shutdown_executor()
+
+    assert [p["page"] for p in pages] == list(range(1, 16))
+    assert page_headings(md_path) == list(range(1, 16))
+    # 检查点按页序推进，记录的字节数单调递增，最后一次等于文件长度
+    assert [n for batch, _ in checkpoints for n in batch] == list(range(1, 16))
+    sizes = [size for _, size in checkpoints]
+    assert sizes == sorted(sizes) and sizes[-1] == md_path.stat().st_size
+    assert not (tmp_path / "out" / ".parts").exists()
+
+
+def test_images_are_deduplicated(tmp_path):
+    pdf = make_image_pdf(tmp_path / "img.pdf", 3, images_per_page=2, image_size=64)
+    store = tmp_path / "store"
+    assets = tmp_path / "assets"
+    pages, stats = extractor._extract_shard(str(pdf), 0, 3, str(assets), str(tmp_path / "a.md"), str(store))
+
+    # 每页都引用共用的 logo，但只保存一份
+    logos = {p["images"][0] for p in pages}
+    assert len(logos) == 1
+    assert len({path for p in pages for path in p["images"]}) == 1 + 3 * 2
+    assert len(list(assets.iterdir())) == 7
+    first_written = stats["bytes_written"]
+
+    # 另一个资源再次抽取同样的图片：共享仓库中已有，只建立链接
+    other = tmp_path / "other"
+    _, stats = extractor._extract_shard(str(pdf), 0, 3, str(other), str(tmp_path / "b.md"), str(store))
+    assert len(list(other.iterdir())) == 7
+    assert len([f for f in store.rglob("*") if f.is_file()]) == 7
+    assert stats["bytes_written"] < first_written
+
+
+def test_images_follow_their_page_and_modes_agree(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "PDF_MAX_SHARD_PAGES", 2)
+    monkeypatch.setattr(Config, "LAYOUT_MIN_SHARD_PAGES", 1)
+    monkeypatch.setattr(Config, "PDF_PARALLEL_MIN_PAGES", 0)
+    pdf = make_image_pdf(tmp_path / "img.pdf", 5, images_per_page=2, image_size=32)
+
+    def extract(name, workers):
+        out = tmp_path / name
+        out.mkdir()
+        md_path = out / "a.md"
+        md_path.touch()
+        try:
+            pages = asyncio.run(extractor.extract_pages(str(pdf), out / "assets", md_path, workers=workers))
+        finally:
+            extractor.shutdown_executor()
+        return pages, md_path.read_text(encoding="utf-8")
+
+    pages, sequential = extract("seq", 1)
+    _, parallel = extract("par", 3)
+    # 单线程直接写入和多进程片段拼接得到同样的 Markdown
+    assert sequential == parallel
+
+    # 每页的图片引用紧跟在该页文本之后，而不是集中在文末
+    sections = re.split(r"^## 第 \d+ 页$", sequential, flags=re.M)[1:]
+    assert len(sections) == len(pages) == 5
+    for section, page in zip(sections, pages):
+        linked = re.findall(r"!\[[^\]]*\]\(assets/([^)]+)\)", section)
+        assert linked and linked == [Path(path).name for path in page["images"]]
@@ -0,0 +1,44 @@
+"""批量导入：CPU 预算在 PDF 和 ASR 进程池之间的分配、跳过未变化的文件"""
+import asyncio
+
+from benchmarks.fixtures import make_text_pdf, make_wav
+from friday_core import ingest
+from friday_core.config import Config
+from friday_reader.extractor import shutdown_executor
+
+
+def test_split_budget():
+    assert ingest.split_budget(8, 3, 0) == (8, 8)
+    assert ingest.split_budget(8, 0, 2) == (8, 8)
+    assert ingest.split_budget(8, 3, 1) == (6, 2)
+    assert ingest.split_budget(4, 1, 9) == (1, 3)
+    assert ingest.split_budget(2, 5, 5) == (1, 1)
+    # 预算为 1 时两边都是 1，但同一时刻只处理一个文件
+    assert ingest.split_budget(1, 1, 1) == (1, 1)
+
+
+def test_mixed_batch_shares_one_budget(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "ASR_BACKEND", "energy")
+    source = tmp_path / "in"
+    make_text_pdf(source / "a.pdf", 2)
+    make_text_pdf(source / "b.pdf", 2, seed=1)
+    make_text_pdf(source / "c.pdf", 2, seed=2)
+    make_wav(source / "d.wav", 5)
+
+    calls = []
+    ingest_file = ingest.ingest_file
+
+    async def spy(path, workers=None, **kwargs):
+        calls.append((ingest.classify_file(path), workers))
+        return await ingest_file(path, workers=workers, **kwargs)
+
+    monkeypatch.setattr(ingest, "ingest_file", spy)
+    try:
+        result = asyncio.run(ingest.batch_ingest(path=str(source), cpu_budget=4))
+    finally:
+        shutdown_executor()
+    assert (result["processed"], result["failed"]) == (4, 0)
+    assert sorted(set(calls)) == [("audio", 1), ("pdf", 3)]
+
+    again = asyncio.run(ingest.batch_ingest(path=str(source), cpu_budget=4))
+    assert again["skipped"] == 4 and len(calls) == 4
@@ -0,0 +1,79 @@
+"""意图识别：规则打分、参数提取、记忆化、插件登记的意图和 LLM 兜底"""
+import asyncio
+
+import pytest
+
+from friday_core import intents
+from friday_core.config import Config
+from friday_core.llm import set_mock_responder
+
+
+@pytest.fixture
+def restore_intents(monkeypatch):
+    monkeypatch.setattr(intents, "_intents", dict(intents._intents))
+    monkeypatch.setattr(intents, "_matcher", None)
+    intents._classify_rules.cache_clear()
+    yield
+    intents._classify_rules.cache_clear()
+
+
+def test_keywords_and_extensions():
+    assert intents.classify("帮我解析这篇论文 ~/papers/attention.pdf")["type"] == "pdf"
+    assert intents.classify("转写一下 meeting.m4a")["type"] == "audio"
+    assert intents.classify("处理字幕 talk.en.vtt")["type"] == "video"
+    # 扩展名比关键词权重高：提到“视频”但给的是音频文件
+    assert intents.classify("视频里的音轨 track.wav")["type"] == "audio"
+    # 英文关键词前面不能是字母
+    assert intents.classify("unfinder")["type"] == "unknown"
+    assert intents.classify("你好")["source"] == "none"
+
+
+def test_arguments_are_extracted():
+    result = intents.classify('搜索 "注意力机制" https://example.com/a ./notes/x.txt')
+    args = result["args"]
+    assert result["type"] == "search" and result["cmd"] == "search_library"
+    assert args["quoted"] == ["注意力机制"]
+    assert args["urls"] == ["https://example.com/a"]
+    assert args["paths"] == ["./notes/x.txt"]
+    assert intents.classify("search transformer layers")["args"]["query"] == "transformer layers"
+
+
+def test_results_are_memoized_and_copied():
+    intents._classify_rules.cache_clear()
+    first = intents.classify("解析 a.pdf")
+    first["args"]["paths"].append("mutated")
+    second = intents.classify("  解析 a.pdf ")
+    assert second["args"]["paths"] == ["a.pdf"]
+    assert intents._classify_rules.cache_info().hits == 1
+
+
+def test_registered_intent_recompiles_and_clears_cache(restore_intents):
+    assert intents.classify("翻译 notes.docx")["type"] == "unknown"
+    intents.register_intent("translate", "translate", cmd="translate_doc", keywords=("翻译",), extensions=(".docx",))
+    result = intents.classify("翻译 notes.docx")
+    assert (result["type"], result["cmd"], result["args"]["paths"]) == ("translate", "translate_doc", ["notes.docx"])
+    assert intents.get_intent("translate")["extensions"] == (".docx",)
+
+
+def test_llm_fallback_batches_unresolved_commands(monkeypatch):
+    monkeypatch.setattr(Config, "LLM_PROVIDER", "mock")
+    monkeypatch.setattr(Config, "INTENT_LLM_FALLBACK", True)
+    prompts = []
+
+    def responder(request):
+        prompts.append(request["prompt"])
+        return '好的：{"type": "search"}' if "资料" in request["prompt"] else "不确定"
+
+    set_mock_responder(responder)
+    try:
+        results = asyncio.run(intents.identify_intents(["找找相关资料", "解析 a.pdf", "随便聊聊", "找找相关资料"]))
+    finally:
+        set_mock_responder(None)
+    assert [(r["type"], r["source"]) for r in results] == [
+        ("search", "llm"), ("pdf", "rules"), ("unknown", "none"), ("search", "llm"),
+    ]
+    # 规则命中的不请求 LLM，相同命令只请求一次
+    assert len(prompts) == 2
+
+    offline = asyncio.run(intents.identify_intent("找找相关资料", use_llm=False))
+    assert offline["source"] == "none"
@@ -0,0 +1,54 @@
+"""关键片段检测"""
+from friday_watcher.key_segments import detect_key_segments, segment_information
+
+_FILLER = "嗯 好的 那么 我们 继续"
+_DENSE = [
+    "傅里叶变换把时域信号分解为不同频率的正弦分量",
+    "卷积定理说明时域卷积等于频域乘积",
+    "采样定理要求采样率高于信号最高频率的两倍",
+    "窗函数可以减少频谱泄漏但会降低频率分辨率",
+]
+
+
+def columns(texts, seconds=10.0):
+    return {
+        "start": [i * seconds for i in range(len(texts))],
+        "end": [(i + 1) * seconds for i in range(len(texts))],
+        "text": list(texts),
+    }
+
+
+def test_segment_information():
+    info = segment_information(["aaaa", _DENSE[0], ""])
+    assert info.shape == (3,)
+    assert info[1] > info[0] >= 0
+    assert info[2] == 0
+    assert segment_information([]).shape == (0,)
+
+
+def test_empty_input():
+    assert detect_key_segments(columns([]), 60, 3) == []
+    assert detect_key_segments(columns(["text"]), 60, 0) == []
+
+
+def test_selects_dense_window():
+    texts = [_FILLER] * 30 + _DENSE + [_FILLER] * 30
+    results = detect_key_segments(columns(texts), 60, 1)
+    assert len(results) == 1
+    top = results[0]
+    assert top["score"] == 1.0
+    # 信息密集的分段位于 300-340 秒
+    assert top["start"] <= 300 and top["end"] >= 340
+    assert top["text"] in _DENSE
+
+
+def test_windows_do_not_overlap_and_are_sorted():
+    texts = [f"{_DENSE[i % 4]} 第{i}段" if i % 17 == 0 else _FILLER for i in range(200)]
+    results = detect_key_segments(columns(texts), 60, 5)
+    assert 0 < len(results) <= 5
+    starts = [r["start"] for r in results]
+    assert starts == sorted(starts)
+    for previous, current in zip(results, results[1:]):
+        assert previous["end"] <= current["start"]
+    assert max(r["score"] for r in results) == 1.0
+    assert all(0 < r["score"] <= 1.0 for r in results)
@@ -0,0 +1,55 @@
+"""版面分析：分栏、阅读顺序和页眉页脚识别（包括末尾的短分片）"""
+import re
+
+from benchmarks.fixtures import make_paper_pdf
+from friday_reader.extractor import _extract_shard
+from friday_reader.layout import layout_pages, page_blocks
+
+HEADER = "Proceedings of the Friday Workshop on Document Layout"
+
+
+def read_pages(pdf_path):
+    import fitz  # PyMuPDF
+
+    with fitz.open(str(pdf_path)) as doc:
+        return [page_blocks(page) for page in doc]
+
+
+def paragraph_numbers(text):
+    return [int(n) for n in re.findall(r"\[P(\d+)\]", text)]
+
+
+def test_columns_and_reading_order(tmp_path):
+    pages = read_pages(make_paper_pdf(tmp_path / "paper.pdf", 3))
+    results = layout_pages(pages)
+    assert [r["columns"] for r in results] == [2, 2, 2]
+    numbers = [n for r in results for n in paragraph_numbers(r["text"])]
+    # 先读完左栏再读右栏，段落编号递增（放不下的段落生成时被跳过，编号不一定连续）
+    assert len(numbers) > 10 and numbers == sorted(set(numbers))
+    # 通栏标题和摘要排在正文前面
+    assert results[0]["text"].index("Reading Order") < results[0]["text"].index("[P")
+
+
+def test_running_headers_and_page_numbers_are_removed(tmp_path):
+    pages = read_pages(make_paper_pdf(tmp_path / "paper.pdf", 4))
+    for result in layout_pages(pages):
+        assert HEADER not in result["text"]
+        assert result["running"] == 2
+
+
+def test_single_page_needs_context_for_headers(tmp_path):
+    pages = read_pages(make_paper_pdf(tmp_path / "paper.pdf", 6))
+    # 单独一页无法判断页眉是否在各页重复出现，只去掉页码
+    alone = layout_pages(pages[-1:])[0]
+    assert HEADER in alone["text"] and alone["running"] == 1
+    with_context = layout_pages(pages[-1:], context=pages[:-1])[0]
+    assert HEADER not in with_context["text"] and with_context["running"] == 2
+
+
+def test_short_tail_shard_strips_headers(tmp_path):
+    pdf = make_paper_pdf(tmp_path / "paper.pdf", 9)
+    out = tmp_path / "tail.md"
+    pages, _ = _extract_shard(str(pdf), 8, 9, str(tmp_path / "assets"), str(out), str(tmp_path / "store"), layout=True)
+    assert [p["page"] for p in pages] == [9]
+    text = out.read_text(encoding="utf-8")
+    assert "[P" in text and HEADER not in text
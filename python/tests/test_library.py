@@ -0,0 +1,70 @@
+"""资源库：键集分页、过滤，以及共享的路由器和数据库引擎"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from friday_core.context import get_engine, get_router, reset_app_context, session_scope
+from friday_core.database import Resource
+from friday_core.library import list_resources
+
+BASE = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def resources():
+    # 部分资源的创建时间相同，检查 (created_at, id) 的并列顺序
+    rows = [
+        ("r%02d" % i, "pdf" if i % 3 else "audio", f"{'ab'[i % 2]}-title-{i:02d}", BASE + timedelta(minutes=i // 2))
+        for i in range(11)
+    ]
+    with session_scope() as session:
+        for resource_id, resource_type, title, created_at in rows:
+            session.add(Resource(
+                id=resource_id, type=resource_type, title=title, source="/tmp/x",
+                created_at=created_at, updated_at=created_at,
+            ))
+        session.commit()
+    return rows
+
+
+def all_pages(**kwargs):
+    ids, cursor = [], None
+    while True:
+        page = list_resources(limit=3, cursor=cursor, **kwargs)
+        assert len(page["items"]) <= 3
+        ids.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+def test_cursor_pages_cover_everything_once(resources):
+    by_created = sorted(resources, key=lambda r: (r[3], r[0]))
+    assert all_pages(order="asc") == [r[0] for r in by_created]
+    assert all_pages(order="desc") == [r[0] for r in reversed(by_created)]
+    by_title = sorted(resources, key=lambda r: (r[2], r[0]))
+    assert all_pages(sort="title", order="asc") == [r[0] for r in by_title]
+
+
+def test_filters(resources):
+    assert all_pages(type="audio", order="asc") == ["r00", "r03", "r06", "r09"]
+    assert set(all_pages(title_prefix="b-")) == {r[0] for r in resources if r[2].startswith("b-")}
+    since = (BASE + timedelta(minutes=2)).isoformat()
+    until = (BASE + timedelta(minutes=4)).isoformat()
+    assert all_pages(since=since, until=until, order="asc") == ["r04", "r05", "r06", "r07"]
+
+
+def test_invalid_arguments(resources):
+    with pytest.raises(ValueError):
+        list_resources(cursor="not-a-cursor")
+    with pytest.raises(ValueError):
+        list_resources(sort="size")
+    with pytest.raises(ValueError):
+        list_resources(since="yesterday")
+
+
+def test_router_and_engine_are_shared_until_reset():
+    router, engine = get_router(), get_engine()
+    assert get_router() is router and get_engine() is engine
+    reset_app_context()
+    assert get_router() is not router and get_engine() is not engine
@@ -0,0 +1,133 @@
+"""LLM 客户端：重试、缓存和相同请求合并（使用不访问网络的 mock 提供方）"""
+import asyncio
+
+import pytest
+
+from friday_core.config import Config
+from friday_core.llm import LLMClient, LLMError, set_mock_responder
+
+
+class Responder:
+    """记录调用次数，前 failures 次抛出错误"""
+
+    def __init__(self, failures=0, retryable=True):
+        self.failures = failures
+        self.retryable = retryable
+        self.prompts = []
+
+    def __call__(self, request):
+        self.prompts.append(request["prompt"])
+        if len(self.prompts) <= self.failures:
+            raise LLMError("simulated", retryable=self.retryable)
+        return f"answer: {request['prompt']}"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(Config, "LLM_PROVIDER", "mock")
+    monkeypatch.setattr(Config, "LLM_MAX_RETRIES", 3)
+    monkeypatch.setattr(Config, "LLM_BACKOFF_BASE", 0.001)
+    monkeypatch.setattr(Config, "LLM_MOCK_LATENCY", 0.0)
+    monkeypatch.setattr(Config, "LLM_MOCK_FAILURE_RATE", 0.0)
+    client = LLMClient()
+    yield client
+    set_mock_responder(None)
+    client.cache.close()
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_retries_retryable_errors(client):
+    responder = Responder(failures=2)
+    set_mock_responder(responder)
+    result = run(client.complete("q"))
+    assert result["text"] == "answer: q"
+    assert result["cached"] is False
+    assert len(responder.prompts) == 3
+
+
+def test_gives_up_after_max_retries(client):
+    responder = Responder(failures=10)
+    set_mock_responder(responder)
+    with pytest.raises(LLMError):
+        run(client.complete("q"))
+    assert len(responder.prompts) == Config.LLM_MAX_RETRIES + 1
+
+
+def test_does_not_retry_permanent_errors(client):
+    responder = Responder(failures=1, retryable=False)
+    set_mock_responder(responder)
+    with pytest.raises(LLMError):
+        run(client.complete("q"))
+    assert len(responder.prompts) == 1
+
+
+def test_failed_request_is_not_cached(client):
+    responder = Responder(failures=1, retryable=False)
+    set_mock_responder(responder)
+    with pytest.raises(LLMError):
+        run(client.complete("q"))
+    assert run(client.complete("q"))["cached"] is False
+    assert len(responder.prompts) == 2
+
+
+def test_response_cache(client):
+    responder = Responder()
+    set_mock_responder(responder)
+    first = run(client.complete("q"))
+    second = run(client.complete("q"))
+    assert second["cached"] is True
+    assert second["text"] == first["text"]
+    assert len(responder.prompts) == 1
+
+    # 请求参数不同不命中
+    run(client.complete("q", temperature=0.5))
+    assert len(responder.prompts) == 2
+    # 显式跳过缓存
+    assert run(client.complete("q", use_cache=False))["cached"] is False
+    assert len(responder.prompts) == 3
+
+
+def test_cache_persists_across_clients(client):
+    responder = Responder()
+    set_mock_responder(responder)
+    run(client.complete("q"))
+    other = LLMClient()
+    try:
+        assert run(other.complete("q"))["cached"] is True
+    finally:
+        other.cache.close()
+    assert len(responder.prompts) == 1
+
+
+def test_cache_ttl(client, monkeypatch):
+    responder = Responder()
+    set_mock_responder(responder)
+    run(client.complete("q"))
+    monkeypatch.setattr(client.cache, "ttl_seconds", 1e-9)
+    assert run(client.complete("q"))["cached"] is False
+    assert len(responder.prompts) == 2
+
+
+def test_complete_many_deduplicates(client):
+    responder = Responder()
+    set_mock_responder(responder)
+    results = run(client.complete_many(["a", "b", "a", "a"]))
+    assert [r["text"] for r in results] == ["answer: a", "answer: b", "answer: a", "answer: a"]
+    assert sorted(responder.prompts) == ["a", "b"]
+
+
+def test_concurrent_identical_requests_are_merged(client, monkeypatch):
+    monkeypatch.setattr(Config, "LLM_MOCK_LATENCY", 0.05)
+    responder = Responder()
+    set_mock_responder(responder)
+
+    async def both():
+        return await asyncio.gather(client.complete("q", use_cache=False), client.complete("q", use_cache=False))
+
+    results = run(both())
+    assert [r["text"] for r in results] == ["answer: q", "answer: q"]
+    assert sorted(r["cached"] for r in results) == [False, True]
+    assert len(responder.prompts) == 1
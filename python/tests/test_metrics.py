@@ -0,0 +1,53 @@
+"""性能埋点：阶段统计、剖析请求排队、未知剖析模式"""
+import asyncio
+
+import pytest
+
+from friday_core import metrics
+from friday_core.config import Config
+
+
+def test_stages_are_recorded():
+    async def run():
+        async with metrics.instrument("cmd") as request:
+            with metrics.stage("extract"):
+                await asyncio.sleep(0.01)
+            metrics.record_worker_stats({"ocr": 0.5})
+            metrics.record_worker_stats({"ocr": 0.25})
+        return request.to_dict()
+
+    data = asyncio.run(run())
+    assert data["stages"]["extract"]["wall_s"] >= 0.01
+    assert data["stages"]["ocr"]["worker_s"] == pytest.approx(0.75)
+    assert data["wall_s"] >= data["stages"]["extract"]["wall_s"]
+
+
+def test_concurrent_profiles_run_one_at_a_time(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "PROFILE_DIR", str(tmp_path / "profiles"))
+    events = []
+
+    async def profiled(name):
+        async with metrics.instrument(name, profile="cprofile") as request:
+            events.append(f"{name}+")
+            # 嵌套的命令包含在外层剖析中
+            async with metrics.instrument(f"{name}_inner", profile="cprofile") as inner:
+                await asyncio.sleep(0.02)
+            events.append(f"{name}-")
+        return request.profile_path, inner.profile_path
+
+    async def run():
+        return await asyncio.gather(profiled("a"), profiled("b"))
+
+    results = asyncio.run(run())
+    assert events == ["a+", "a-", "b+", "b-"]
+    assert all(outer and inner is None for outer, inner in results)
+    assert len(list((tmp_path / "profiles").glob("*.prof"))) == 2
+
+
+def test_unknown_profile_mode():
+    async def run():
+        async with metrics.instrument("cmd", profile="trace"):
+            pass
+
+    with pytest.raises(ValueError, match="Unknown profile mode"):
+        asyncio.run(run())
@@ -0,0 +1,62 @@
+"""扫描页 OCR：文本层检测、识别结果缓存和后端不可用时的退化"""
+import fitz  # PyMuPDF
+import pytest
+
+from benchmarks.fixtures import make_scanned_pdf
+from friday_core.config import Config
+from friday_reader import ocr
+from friday_reader.extractor import _extract_shard, count_scanned_pages
+
+
+@pytest.fixture(autouse=True)
+def ocr_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "OCR_CACHE_PATH", str(tmp_path / "ocr_cache"))
+
+
+def test_text_layer_detection(monkeypatch):
+    monkeypatch.setattr(Config, "OCR_MIN_TEXT_CHARS", 10)
+    assert ocr.has_text_layer("a real text layer with words")
+    assert not ocr.has_text_layer("  12 \n ")
+    assert not ocr.has_text_layer("�" * 20 + "abc")
+    # 没有图片的空白页不做 OCR
+    assert ocr.needs_ocr("", 1) and not ocr.needs_ocr("", 0)
+    assert not ocr.needs_ocr("a real text layer with words", 1)
+
+
+def test_scanned_pages_are_recognized(tmp_path):
+    pdf = make_scanned_pdf(tmp_path / "mixed.pdf", 4, scanned_every=2, dpi=72)
+    assert count_scanned_pages(str(pdf)) == 2
+    assert count_scanned_pages(str(pdf), start_page=1) == 1
+
+    out = tmp_path / "out.md"
+    pages, _ = _extract_shard(str(pdf), 0, 4, str(tmp_path / "assets"), str(out), str(tmp_path / "store"), "placeholder")
+    assert [p.get("ocr") for p in pages] == [True, None, True, None]
+    assert out.read_text(encoding="utf-8").count("[扫描页 ") == 2
+
+
+def test_results_are_cached_by_page_image(tmp_path):
+    calls = []
+
+    def counting_factory():
+        def recognize(image):
+            calls.append(image.shape)
+            return "recognized"
+        return recognize
+
+    ocr.register_ocr_backend("counting", counting_factory)
+    pdf = make_scanned_pdf(tmp_path / "scan.pdf", 1, dpi=72)
+    with fitz.open(str(pdf)) as doc:
+        assert ocr.ocr_page(doc[0], "counting") == ("recognized", False)
+        assert ocr.ocr_page(doc[0], "counting") == ("recognized", True)
+    assert len(calls) == 1
+
+
+def test_unavailable_backend_keeps_the_text_layer(tmp_path):
+    def missing_factory():
+        raise ImportError("not installed")
+
+    ocr.register_ocr_backend("missing", missing_factory)
+    pdf = make_scanned_pdf(tmp_path / "scan.pdf", 2, dpi=72)
+    pages, _ = _extract_shard(str(pdf), 0, 2, str(tmp_path / "assets"), str(tmp_path / "out.md"), str(tmp_path / "store"), "missing")
+    assert [p["ocr"] for p in pages] == [False, False]
+    assert ocr.unavailable_reason("missing") == "not installed"
@@ -0,0 +1,101 @@
+"""插件：AST 发现不导入插件、进程模式只在 worker 中导入、超时只影响超时的调用"""
+import asyncio
+import os
+import sys
+import textwrap
+
+import pytest
+
+from friday_core import plugins
+from friday_core.config import Config
+
+PLUGIN_SOURCE = textwrap.dedent('''
+    import os
+    import time
+    from friday_core.plugins import friday_plugin
+
+    IMPORTED_IN = os.getpid()
+
+
+    @friday_plugin("t_echo", timeout=5, description="echo")
+    def echo(payload):
+        return {"pid": os.getpid(), "payload": payload}
+
+
+    @friday_plugin(name="t_sleep", mode="process", timeout=5)
+    def sleep(payload):
+        time.sleep(payload["seconds"])
+        return {"pid": os.getpid(), "imported_in": IMPORTED_IN}
+
+
+    @friday_plugin(name="t_thread_sleep", timeout=0.2)
+    def thread_sleep(payload):
+        time.sleep(1)
+
+
+    def helper():
+        pass
+''')
+
+
+@pytest.fixture
+def plugin_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "plugins"
+    directory.mkdir()
+    (directory / "sample.py").write_text(PLUGIN_SOURCE, encoding="utf-8")
+    monkeypatch.setattr(Config, "PLUGIN_DIRS", str(directory))
+    monkeypatch.setattr(Config, "PLUGIN_INDEX_PATH", str(tmp_path / "plugin_index.json"))
+    monkeypatch.setattr(Config, "PLUGIN_PROCESSES", 2)
+    monkeypatch.setattr(plugins, "DEFAULT_PLUGIN_DIR", tmp_path / "none")
+    monkeypatch.setattr(plugins, "_registry", None)
+    monkeypatch.setattr(plugins, "_loaded", {})
+    yield directory
+    plugins.shutdown_executor()
+    sys.modules.pop("friday_plugins.sample", None)
+
+
+def test_discovery_reads_options_without_importing(plugin_dir, monkeypatch):
+    registry = plugins.discover_plugins(refresh=True)
+    assert sorted(registry) == ["t_echo", "t_sleep", "t_thread_sleep"]
+    assert registry["t_echo"]["mode"] == "thread" and registry["t_echo"]["timeout"] == 5
+    assert registry["t_sleep"]["mode"] == "process"
+    assert "friday_plugins.sample" not in sys.modules
+
+    # 文件没有变化时直接使用索引，不再解析
+    def no_scan(path):
+        raise AssertionError("unchanged files should come from the index")
+
+    monkeypatch.setattr(plugins, "_scan_file", no_scan)
+    assert sorted(plugins.discover_plugins(refresh=True)) == sorted(registry)
+
+
+def test_thread_plugin_runs_in_this_process(plugin_dir):
+    result = asyncio.run(plugins.run_plugin("t_echo", {"x": 1}))
+    assert result == {"pid": os.getpid(), "payload": {"x": 1}}
+    with pytest.raises(TimeoutError):
+        asyncio.run(plugins.run_plugin("t_thread_sleep", {}))
+
+
+def test_process_plugin_is_imported_only_in_the_worker(plugin_dir):
+    result = asyncio.run(plugins.run_plugin("t_sleep", {"seconds": 0}))
+    assert result["pid"] != os.getpid()
+    assert result["imported_in"] == result["pid"]
+    assert "friday_plugins.sample" not in sys.modules
+
+
+def test_process_timeout_only_fails_that_call(plugin_dir):
+    plugins.discover_plugins(refresh=True)["t_sleep"]["timeout"] = 1
+
+    async def run():
+        return await asyncio.gather(
+            plugins.run_plugin("t_sleep", {"seconds": 30}),
+            plugins.run_plugin("t_sleep", {"seconds": 0.1}),
+            return_exceptions=True,
+        )
+
+    slow, fast = asyncio.run(run())
+    assert isinstance(slow, TimeoutError)
+    assert fast["pid"] != os.getpid()
+    # 超时的 worker 被终止，完成的 worker 留作空闲复用
+    again = asyncio.run(plugins.run_plugin("t_sleep", {"seconds": 0}))
+    assert again["pid"] == fast["pid"]
@@ -0,0 +1,63 @@
+"""进度通道：限频合并、阶段切换立即输出、close 补发和请求/任务 ID"""
+import json
+
+import pytest
+
+from friday_core import progress
+from friday_core.progress import ProgressReporter, current_request_id, current_task_id
+
+
+@pytest.fixture
+def events():
+    captured = []
+    progress.set_sink(captured.append)
+    yield captured
+    progress.set_sink(None)
+
+
+def test_updates_within_interval_are_coalesced(events):
+    reporter = ProgressReporter("parse_pdf", min_interval=60, file="a.pdf")
+    reporter.update("extract", 10, current=1, total=10)
+    for page in range(2, 6):
+        reporter.update("extract", 10 + page, current=page, total=10)
+    assert len(events) == 1
+
+    # 阶段切换立即输出；close 补发被合并的最后一条，且只补发一次
+    reporter.update("write", 80)
+    reporter.update("write", 90)
+    reporter.close()
+    reporter.close()
+    assert [(e["stage"], e["progress"]) for e in events] == [("extract", 10), ("write", 80), ("write", 90)]
+    assert events[0]["source"] == "parse_pdf" and events[0]["file"] == "a.pdf"
+    assert events[0]["current"] == 1 and "eta" in events[0]
+
+
+def test_completion_is_never_coalesced(events):
+    reporter = ProgressReporter("process_audio", min_interval=60)
+    reporter("transcribe", 50, "half", bytes_done=1024)
+    reporter("transcribe", 100, "done")
+    assert [e["progress"] for e in events] == [50, 100]
+    assert events[0]["bytes"] == 1024 and events[1]["message"] == "done"
+    # 完成量等于总量时不再估算 ETA
+    reporter("finish", 100, current=3, total=3)
+    assert "eta" not in events[-1]
+
+
+def test_events_carry_request_and_task_ids(events):
+    request_token = current_request_id.set(7)
+    task_token = current_task_id.set("task-1")
+    try:
+        progress.emit({"stage": "x", "progress": 0})
+    finally:
+        current_task_id.reset(task_token)
+        current_request_id.reset(request_token)
+    progress.emit({"stage": "y", "progress": 0})
+    assert (events[0]["request_id"], events[0]["task_id"]) == (7, "task-1")
+    assert (events[1]["request_id"], events[1]["task_id"]) == (None, None)
+
+
+def test_default_sink_writes_progress_lines(capsys):
+    progress.emit({"stage": "中文", "progress": 1})
+    line = capsys.readouterr().err.strip()
+    assert line.startswith("PROGRESS:")
+    assert json.loads(line[len("PROGRESS:"):])["stage"] == "中文"
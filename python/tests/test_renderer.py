@@ -0,0 +1,65 @@
+"""页面渲染：磁盘缓存的最近访问淘汰，以及 render_page 的缓存命中"""
+import asyncio
+import itertools
+
+import pytest
+
+from benchmarks.fixtures import make_text_pdf
+from friday_core.config import Config
+from friday_reader import renderer
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # 每次取时间严格递增，访问顺序不受时钟分辨率影响
+    ticks = itertools.count(1)
+    monkeypatch.setattr(renderer.time, "time", lambda: float(next(ticks)))
+
+
+def test_least_recently_used_pages_are_evicted(tmp_path, clock):
+    cache = renderer.PageCache(str(tmp_path / "cache"), max_bytes=250)
+    for key in ("aa", "bb"):
+        cache.put(key, b"x" * 100, 10, 10)
+    assert cache.get("aa") is not None
+    cache.put("cc", b"x" * 100, 10, 10)
+
+    # bb 最久未访问，被淘汰且图片被删除
+    assert cache.get("bb") is None
+    assert not cache.path_for("bb").exists()
+    assert cache.get("aa") is not None and cache.get("cc") is not None
+    cache.close()
+
+
+def test_missing_image_is_a_miss(tmp_path, clock):
+    cache = renderer.PageCache(str(tmp_path / "cache"), max_bytes=1000)
+    entry = cache.put("aa", b"png", 3, 4)
+    assert cache.get("aa") == entry == {"path": str(cache.path_for("aa")), "width": 3, "height": 4}
+    cache.path_for("aa").unlink()
+    assert cache.get("aa") is None
+    cache.close()
+
+
+@pytest.fixture
+def render_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "RENDER_CACHE_PATH", str(tmp_path / "render_cache"))
+    monkeypatch.setattr(renderer, "_cache", None)
+    yield
+    renderer.shutdown_executor()
+    renderer.get_page_cache().close()
+
+
+def test_render_page_uses_the_cache(tmp_path, render_cache):
+    pdf = str(make_text_pdf(tmp_path / "a.pdf", 3))
+
+    async def run():
+        first = await renderer.render_page(pdf, page=2, zoom=1.0001)
+        second = await renderer.render_page(pdf, page=2, zoom=1.0)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert first["path"] == second["path"] and first["page_count"] == 3
+    assert first["zoom"] == 1.0 and first["width"] > 0
+
+    with pytest.raises(ValueError, match="Page out of range"):
+        asyncio.run(renderer.render_page(pdf, page=4))
@@ -0,0 +1,60 @@
+"""内容哈希缓存和同一内容的处理互斥"""
+import asyncio
+
+from benchmarks.fixtures import make_text_pdf
+from friday_core.library import compute_file_hash, resource_lock
+from friday_reader import main as reader
+
+
+def test_same_content_is_a_cache_hit(tmp_path, monkeypatch):
+    pdf = make_text_pdf(tmp_path / "a.pdf", 3)
+    copy = tmp_path / "copy.pdf"
+    copy.write_bytes(pdf.read_bytes())
+
+    first = asyncio.run(reader.parse_pdf(str(pdf), workers=1))
+
+    async def no_extract(*args, **kwargs):
+        raise AssertionError("cached content should not be extracted again")
+
+    monkeypatch.setattr(reader, "extract_pages", no_extract)
+    # 同一内容换个文件名仍命中缓存，落到同一个资源
+    assert asyncio.run(reader.parse_pdf(str(copy), workers=1))["id"] == first["id"]
+
+
+def test_concurrent_imports_extract_once(tmp_path, monkeypatch):
+    pdf = make_text_pdf(tmp_path / "a.pdf", 3)
+    calls = []
+    extract_pages = reader.extract_pages
+
+    async def counting(*args, **kwargs):
+        calls.append(args[0])
+        return await extract_pages(*args, **kwargs)
+
+    monkeypatch.setattr(reader, "extract_pages", counting)
+
+    async def run():
+        return await asyncio.gather(*(reader.parse_pdf(str(pdf), workers=1) for _ in range(3)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert len({r["id"] for r in results}) == 1
+
+
+def test_resource_lock_is_exclusive_per_content(tmp_path):
+    content_hash = compute_file_hash(str(make_text_pdf(tmp_path / "a.pdf", 1)))
+    events = []
+
+    async def hold(name: str, key: str):
+        async with resource_lock(key):
+            events.append(f"{name}+")
+            await asyncio.sleep(0.05)
+            events.append(f"{name}-")
+
+    async def run():
+        await asyncio.gather(hold("a", content_hash), hold("b", content_hash), hold("c", "other"))
+
+    asyncio.run(run())
+    same = [e for e in events if e[0] in "ab"]
+    # 同一内容不交叠；不同内容互不阻塞
+    assert same in (["a+", "a-", "b+", "b-"], ["b+", "b-", "a+", "a-"])
+    assert events.index("c+") < min(events.index("a-"), events.index("b-"))
@@ -0,0 +1,88 @@
+"""全文检索：trigram 主表和短词辅助表"""
+from sqlalchemy import text
+
+from friday_core import search
+from friday_core.config import Config
+from friday_core.context import get_engine, reset_app_context
+
+
+def add_resource(tmp_path, resource_id, pages, title="doc", resource_type="pdf"):
+    md_path = tmp_path / f"{resource_id}.md"
+    body = "".join(f"## 第 {i} 页\n\n{content}\n\n" for i, content in enumerate(pages, 1))
+    md_path.write_text(f"# {title}\n\n---\n\n{body}", encoding="utf-8")
+    resource = {"id": resource_id, "type": resource_type, "title": title, "md_path": str(md_path)}
+    search.index_resource_text(resource)
+    return resource
+
+
+def pages_of(hits):
+    return [(hit["resource_id"], hit["page"]) for hit in hits]
+
+
+def test_bigram_text():
+    assert search._bigram_text("向量检索 AI").split() == ["向量", "量检", "检索", "索", "AI"]
+    assert search._bigram_text("字").split() == ["字"]
+
+
+def test_two_character_terms_are_ranked(tmp_path):
+    add_resource(tmp_path, "a", ["全文检索与倒排索引", "检查索引的结构", "检索检索，再检索"])
+    hits = search.search_text("检索")
+    # "检查索引" 不含 "检索"；出现次数多的页排在前面
+    assert pages_of(hits) == [("a", 3), ("a", 1)]
+    assert hits[0]["score"] > hits[1]["score"] > 0
+    assert "检索" in hits[0]["snippet"]
+
+
+def test_single_character_matches_anywhere_in_a_run(tmp_path):
+    add_resource(tmp_path, "a", ["检索", "系统检", "没有"])
+    assert sorted(pages_of(search.search_text("检"))) == [("a", 1), ("a", 2)]
+
+
+def test_short_latin_terms_match_whole_words(tmp_path):
+    add_resource(tmp_path, "a", ["AI models", "she said hello"])
+    assert pages_of(search.search_text("ai")) == [("a", 1)]
+
+
+def test_short_and_long_terms_combined(tmp_path):
+    add_resource(tmp_path, "a", ["倒排索引的检索", "倒排索引", "检索"])
+    assert pages_of(search.search_text("倒排索引 检索")) == [("a", 1)]
+
+
+def test_type_filter(tmp_path):
+    add_resource(tmp_path, "a", ["检索"], resource_type="pdf")
+    add_resource(tmp_path, "b", ["检索"], resource_type="audio")
+    assert pages_of(search.search_text("检索", types=["audio"])) == [("b", 1)]
+
+
+def test_reindex_and_remove(tmp_path):
+    resource = add_resource(tmp_path, "a", ["检索"])
+    add_resource(tmp_path, "b", ["检索"])
+    (tmp_path / "a.md").write_text("## 第 1 页\n\n其他内容\n", encoding="utf-8")
+    search.index_resource_text(resource)
+    assert pages_of(search.search_text("检索")) == [("b", 1)]
+    assert pages_of(search.search_text("其他")) == [("a", 1)]
+
+    search.remove_resource_text("b")
+    assert search.search_text("检索") == []
+    with get_engine().connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM pages_bigram_fts")).scalar() == 1
+
+
+def test_short_term_index_is_backfilled(tmp_path):
+    add_resource(tmp_path, "a", ["全文检索"])
+    with get_engine().begin() as conn:
+        conn.execute(text("DROP TABLE pages_bigram_fts"))
+    # 重建上下文（如重启进程）后对同一个库重新检查
+    reset_app_context()
+    assert pages_of(search.search_text("检索")) == [("a", 1)]
+
+
+def test_switching_database_creates_tables(tmp_path, monkeypatch):
+    add_resource(tmp_path, "a", ["全文检索"])
+    monkeypatch.setattr(Config, "DATABASE_PATH", str(tmp_path / "other.db"))
+    reset_app_context()
+    assert search.search_text("全文检索") == []
+    assert search.search_text("检索") == []
+
+    add_resource(tmp_path, "b", ["全文检索"])
+    assert pages_of(search.search_text("检索")) == [("b", 1)]
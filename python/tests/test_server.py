@@ -0,0 +1,39 @@
+"""常驻模式：请求帧按 id 返回响应，同时处理的帧数受限"""
+import asyncio
+import json
+
+import main
+
+
+def test_serve_frame_echoes_id_and_limits_concurrency(monkeypatch):
+    written = []
+    running = {"now": 0, "max": 0}
+
+    async def handle(frame):
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        return {"result": frame["cmd"]}
+
+    monkeypatch.setattr(main, "handle_request", handle)
+    monkeypatch.setattr(main, "_write_response", written.append)
+
+    async def run():
+        slots = asyncio.Semaphore(2)
+        frames = [json.dumps({"id": i, "cmd": f"c{i}", "payload": {}}) for i in range(6)]
+        await asyncio.gather(*(main._serve_frame(frame, slots) for frame in frames))
+
+    asyncio.run(run())
+    assert running["max"] == 2
+    assert sorted((r["id"], r["result"]) for r in written) == [(i, f"c{i}") for i in range(6)]
+
+
+def test_serve_frame_rejects_invalid_json(monkeypatch):
+    written = []
+    monkeypatch.setattr(main, "_write_response", written.append)
+    asyncio.run(main._serve_frame("not json", asyncio.Semaphore(1)))
+    asyncio.run(main._serve_frame("[1]", asyncio.Semaphore(1)))
+    assert [r["id"] for r in written] == [None, None]
+    assert written[0]["error"].startswith("Invalid JSON")
+    assert written[1]["error"] == "Frame must be a JSON object"
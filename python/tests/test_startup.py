@@ -0,0 +1,43 @@
+"""冷启动：导入入口模块不加载重依赖，启动基准的预算和导入耗时解析"""
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks import startup
+
+HEAVY_MODULES = ("fitz", "pymupdf", "dotenv", "numpy", "sqlalchemy.ext.declarative")
+
+
+def test_entry_imports_stay_light(tmp_path):
+    code = (
+        "import json, sys\n"
+        "import main, friday_reader.main, friday_core.logger\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n"
+    )
+    # 在没有 .env 的目录中以新进程导入，避免受测试进程已加载模块的影响；
+    # 音频解码需要 numpy，friday_listener 只在 process_audio 时由 Router 延迟导入
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True, text=True, cwd=tmp_path, check=True,
+        env={**os.environ, "PYTHONPATH": str(startup.PYTHON_DIR)},
+    )
+    assert json.loads(proc.stdout.strip().splitlines()[-1]) == []
+
+
+def test_budget_covers_every_command():
+    with open(startup.DEFAULT_BUDGET, "r", encoding="utf-8") as f:
+        budget = json.load(f)
+    assert set(budget["commands"]) == set(startup.COMMANDS)
+    assert all(ms > 0 for ms in budget["commands"].values())
+
+
+def test_top_imports_sorts_by_cumulative_time():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 |   json.decoder",
+        "import time:       200 |       5300 | sqlalchemy",
+        "import time:        50 |       2000 | loguru",
+        "unrelated line",
+    ])
+    assert startup._top_imports(stderr, top=2) == ["     5.3 ms  sqlalchemy", "     2.0 ms  loguru"]
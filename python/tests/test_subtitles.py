@@ -0,0 +1,88 @@
+"""字幕解析与合并"""
+from friday_watcher.subtitles import iter_cues, merge_cues, parse_timestamp
+
+
+def cue(start, end, *lines):
+    return {"start": start, "end": end, "lines": list(lines)}
+
+
+def merge(cues, max_gap=1.0, max_seconds=30.0, max_chars=200):
+    return list(merge_cues(cues, max_gap, max_seconds, max_chars))
+
+
+def test_parse_timestamp():
+    assert parse_timestamp("01:02:03,450") == 3723.45
+    assert parse_timestamp("02:03.5") == 123.5
+    assert parse_timestamp("no time") is None
+
+
+def test_iter_cues_srt_and_vtt(tmp_path):
+    srt = tmp_path / "a.srt"
+    srt.write_text(
+        "1\n00:00:01,000 --> 00:00:02,500\n<i>Hello</i>  world\n\n"
+        "2\n00:00:03,000 --> 00:00:04,000\nsecond &amp; line\n",
+        encoding="utf-8",
+    )
+    assert list(iter_cues(str(srt))) == [
+        cue(1.0, 2.5, "Hello world"),
+        cue(3.0, 4.0, "second & line"),
+    ]
+
+    vtt = tmp_path / "a.vtt"
+    vtt.write_text(
+        "WEBVTT\n\nNOTE comment\n\n"
+        "00:01.000 --> 00:02.000 align:start\nfirst\n\n"
+        "00:02.000 --> 00:03.000\n<c>second</c>",
+        encoding="utf-8",
+    )
+    assert list(iter_cues(str(vtt))) == [cue(1.0, 2.0, "first"), cue(2.0, 3.0, "second")]
+
+
+def test_merge_adjacent_cues():
+    segments = merge([cue(0, 1, "a"), cue(1.2, 2, "b"), cue(2.5, 3, "c.")])
+    assert segments == [{"start": 0, "end": 3, "text": "a b c."}]
+
+
+def test_merge_splits_on_gap():
+    segments = merge([cue(0, 1, "a"), cue(5, 6, "b")], max_gap=1.0)
+    assert [s["text"] for s in segments] == ["a", "b"]
+    assert segments[1]["start"] == 5
+
+
+def test_merge_splits_on_length_limits():
+    words = [f"word{i}" for i in range(10)]
+    long_cues = [cue(i, i + 1, word) for i, word in enumerate(words)]
+    by_chars = merge(long_cues, max_chars=12)
+    assert len(by_chars) > 1
+    assert all(len(s["text"]) <= 12 for s in by_chars)
+    assert " ".join(s["text"] for s in by_chars) == " ".join(words)
+
+    by_seconds = merge(long_cues, max_seconds=3)
+    assert all(s["end"] - s["start"] <= 3 for s in by_seconds)
+
+
+def test_merge_breaks_at_sentence_end_after_half_window():
+    # 超过 max_seconds 的一半后，句末才断开
+    segments = merge([cue(0, 5, "first."), cue(5, 20, "second"), cue(20, 21, "third")], max_seconds=30)
+    assert [s["text"] for s in segments] == ["first.", "second third"]
+    segments = merge([cue(0, 5, "first."), cue(5, 10, "second")], max_seconds=30)
+    assert [s["text"] for s in segments] == ["first. second"]
+
+
+def test_merge_drops_rolling_caption_repeats():
+    segments = merge([
+        cue(0, 1, "the quick"),
+        cue(1, 2, "the quick", "brown fox"),
+        cue(2, 3, "brown fox"),
+        cue(3, 4, "brown fox", "jumps"),
+    ])
+    assert segments == [{"start": 0, "end": 4, "text": "the quick brown fox jumps"}]
+
+
+def test_merge_joins_cjk_without_spaces():
+    segments = merge([cue(0, 1, "你好"), cue(1, 2, "世界"), cue(2, 3, "OK")])
+    assert segments[0]["text"] == "你好世界 OK"
+
+
+def test_merge_skips_empty_cues():
+    assert merge([cue(0, 1), cue(1, 2, "text"), cue(2, 3)]) == [{"start": 1, "end": 3, "text": "text"}]
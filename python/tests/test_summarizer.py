@@ -0,0 +1,95 @@
+"""map-reduce 总结"""
+import asyncio
+import random
+
+import pytest
+
+from friday_core.config import Config
+from friday_watcher import summarizer
+from friday_watcher.summarizer import register_summarizer, split_sentences, summarize_chunks
+
+
+@pytest.fixture
+def concat_summarizers(monkeypatch):
+    """拼接输入的后端：结果保留各块的顺序，便于检查 map-reduce 是否打乱顺序"""
+    monkeypatch.setattr(Config, "SUMMARY_FAN_IN", 3)
+
+    def concat_factory():
+        def summarize(texts, max_sentences):
+            return "[" + ",".join(texts) + "]"
+        return summarize
+
+    def slow_concat_factory():
+        async def summarize(texts, max_sentences):
+            # 随机完成顺序
+            await asyncio.sleep(random.uniform(0, 0.01))
+            return "[" + ",".join(texts) + "]"
+        return summarize
+
+    register_summarizer("test-concat", concat_factory)
+    register_summarizer("test-slow-concat", slow_concat_factory)
+    yield
+    for name in ("test-concat", "test-slow-concat"):
+        summarizer._summarizer_factories.pop(name, None)
+        summarizer._summarizers.pop(name, None)
+
+
+def flatten(summary):
+    return summary.replace("[", "").replace("]", "").split(",")
+
+
+@pytest.mark.parametrize("name", ["test-concat", "test-slow-concat"])
+def test_map_reduce_keeps_chunk_order(concat_summarizers, name):
+    chunks = [[f"c{i}a", f"c{i}b"] for i in range(20)]
+    done = []
+    summary = asyncio.run(summarize_chunks(iter(chunks), workers=1, summarizer=name, on_chunk=done.append))
+    assert flatten(summary) == [text for chunk in chunks for text in chunk]
+    assert done == list(range(1, 21))
+    # 20 块 -> 7 -> 3 -> 1，共三层 reduce
+    assert summary.startswith("[[[[")
+
+
+def test_single_chunk_is_not_reduced(concat_summarizers):
+    summary = asyncio.run(summarize_chunks(iter([["only"]]), workers=1, summarizer="test-concat"))
+    assert summary == "[only]"
+
+
+def test_no_chunks(concat_summarizers):
+    assert asyncio.run(summarize_chunks(iter([]), workers=1, summarizer="test-concat")) == ""
+
+
+def test_inflight_chunks_are_bounded(concat_summarizers, monkeypatch):
+    monkeypatch.setattr(Config, "LLM_PROVIDER", "mock")
+    monkeypatch.setattr(Config, "LLM_CONCURRENCY", "mock=2")
+    active = {"now": 0, "max": 0}
+
+    def tracking_factory():
+        async def summarize(texts, max_sentences):
+            leaf = not texts[0].startswith("[")
+            if leaf:
+                active["now"] += 1
+                active["max"] = max(active["max"], active["now"])
+            await asyncio.sleep(0.001)
+            if leaf:
+                active["now"] -= 1
+            return "[" + ",".join(texts) + "]"
+        return summarize
+
+    register_summarizer("test-tracking", tracking_factory)
+    try:
+        chunks = ([str(i)] for i in range(50))
+        summary = asyncio.run(summarize_chunks(chunks, workers=1, summarizer="test-tracking"))
+    finally:
+        summarizer._summarizer_factories.pop("test-tracking", None)
+        summarizer._summarizers.pop("test-tracking", None)
+    assert flatten(summary) == [str(i) for i in range(50)]
+    # 异步后端的在途块数上限为 LLM 并发数的两倍
+    assert 1 < active["max"] <= 4
+
+
+def test_extractive_summary():
+    texts = ["今天讨论傅里叶变换。傅里叶变换把信号分解为频率分量。", "嗯。好的。", "卷积定理把时域卷积变为频域乘积。"]
+    summary = summarizer.get_summarizer("extractive")(texts, 2)
+    sentences = split_sentences([summary])
+    assert len(sentences) == 2
+    assert all(sentence in "".join(texts) for sentence in sentences)
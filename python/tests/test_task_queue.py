@@ -0,0 +1,95 @@
+"""任务队列：直接执行、重启恢复、execute_command 的任务记录和任务 ID 上下文"""
+import asyncio
+
+from friday_core.context import get_router
+from friday_core.progress import current_task_id
+from friday_core.task_queue import TaskQueue, create_task_record, get_task_record, list_task_records
+
+
+class FakeRouter:
+    """只有一个 echo 命令的路由器，记录每次执行时看到的任务 ID"""
+
+    def __init__(self):
+        self.handlers = {"echo": None, "boom": None}
+        self.seen = []
+
+    async def route(self, cmd, payload):
+        self.seen.append(current_task_id.get())
+        if cmd == "boom":
+            raise RuntimeError("boom")
+        return {"echo": payload}
+
+
+def test_submit_runs_inline_when_not_started():
+    router = FakeRouter()
+    queue = TaskQueue(router)
+
+    async def run():
+        ok = await queue.submit("echo", {"x": 1})
+        failed = await queue.submit("boom", {})
+        return ok, failed, current_task_id.get()
+
+    ok, failed, outer_task_id = asyncio.run(run())
+    assert ok["status"] == "completed" and ok["result"] == {"echo": {"x": 1}}
+    assert failed["status"] == "failed" and failed["error"] == "boom"
+    assert router.seen == [ok["id"], failed["id"]]
+    # 任务结束后任务 ID 不会留在调用方的上下文中
+    assert outer_task_id is None
+
+
+def test_start_recovers_interrupted_tasks():
+    interrupted = create_task_record("echo", {"n": 1}, status="running")
+    waiting = create_task_record("echo", {"n": 2})
+    router = FakeRouter()
+
+    async def run():
+        queue = TaskQueue(router, max_workers=1)
+        await queue.start()
+        await queue.join()
+        await queue.stop()
+
+    asyncio.run(run())
+    assert sorted(router.seen) == sorted([interrupted["id"], waiting["id"]])
+    assert [get_task_record(t["id"])["status"] for t in (interrupted, waiting)] == ["completed", "completed"]
+
+
+def test_submit_wait_in_server_mode():
+    router = FakeRouter()
+
+    async def run():
+        queue = TaskQueue(router)
+        await queue.start()
+        pending = await queue.submit("echo", {"n": 1})
+        done = await queue.submit("echo", {"n": 2}, wait=True)
+        await queue.join()
+        await queue.stop()
+        return pending, done
+
+    pending, done = asyncio.run(run())
+    assert pending["status"] == "pending"
+    assert done["status"] == "completed" and done["result"] == {"echo": {"n": 2}}
+
+
+def test_execute_command_keeps_one_task_record():
+    router = get_router()
+    result = asyncio.run(router.route("execute_command", {"command": "你好"}))
+    tasks = list_task_records()
+    assert [t["id"] for t in tasks] == [result["id"]]
+    assert tasks[0]["status"] == "completed" and "intent" in tasks[0]["result"]
+
+
+def test_recovered_execute_command_is_not_duplicated():
+    interrupted = create_task_record("execute_command", {"command": "你好"}, status="running")
+
+    async def run():
+        queue = TaskQueue(get_router())
+        await queue.start()
+        await queue.join()
+        await queue.stop()
+
+    asyncio.run(run())
+    tasks = list_task_records()
+    assert [t["id"] for t in tasks] == [interrupted["id"]]
+    assert tasks[0]["status"] == "completed"
+    # 结果是命令本身的输出，而不是嵌套的任务记录
+    assert "intent" in tasks[0]["result"] and "status" not in tasks[0]["result"]
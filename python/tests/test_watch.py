@@ -0,0 +1,70 @@
+"""文件夹监视：导入失败时区分确定性错误和可重试的错误"""
+import asyncio
+
+from friday_core import watch
+from friday_core.config import Config
+
+
+def run_watcher(tmp_path, monkeypatch, ingest, until):
+    """监视一个只含 a.pdf 的目录，直到 until(watcher) 为真（最多 5 秒）"""
+    monkeypatch.setattr(Config, "WATCH_RETRY_DELAY", 0.05)
+    monkeypatch.setattr(Config, "WATCH_MAX_RETRIES", 2)
+    monkeypatch.setattr(watch, "ingest_file", ingest)
+    watch_dir = tmp_path / "watched"
+    watch_dir.mkdir()
+    (watch_dir / "a.pdf").write_bytes(b"%PDF-1.4")
+
+    async def main():
+        watcher = watch.FolderWatcher([str(watch_dir)], backend="polling", debounce=0)
+        await watcher.start()
+        try:
+            for _ in range(100):
+                await asyncio.sleep(0.05)
+                if until(watcher):
+                    break
+            return watcher.status(), watch.load_scan_index([str(watch_dir)])
+        finally:
+            await watcher.stop()
+
+    return asyncio.run(main())
+
+
+def test_transient_error_is_retried(tmp_path, monkeypatch):
+    calls = []
+
+    async def ingest(path, progress_callback=None):
+        calls.append(path)
+        if len(calls) < 3:
+            raise OSError("database is locked")
+        return {"id": "res-1"}
+
+    status, index = run_watcher(tmp_path, monkeypatch, ingest, lambda w: w.status()["processed"])
+    assert len(calls) == 3
+    assert status["processed"] == 1 and status["failed"] == 0 and status["retrying"] == 0
+    assert [entry[3] for entry in index.values()] == ["res-1"]
+
+
+def test_permanent_error_is_recorded(tmp_path, monkeypatch):
+    calls = []
+
+    async def ingest(path, progress_callback=None):
+        calls.append(path)
+        raise ValueError("broken file")
+
+    status, index = run_watcher(tmp_path, monkeypatch, ingest, lambda w: w.status()["failed"])
+    assert len(calls) == 1
+    assert status["failed"] == 1 and status["retrying"] == 0
+    assert [entry[3] for entry in index.values()] == [None]
+
+
+def test_retries_are_bounded(tmp_path, monkeypatch):
+    calls = []
+
+    async def ingest(path, progress_callback=None):
+        calls.append(path)
+        raise OSError("disk busy")
+
+    status, index = run_watcher(tmp_path, monkeypatch, ingest, lambda w: w.status()["failed"])
+    assert len(calls) == 1 + Config.WATCH_MAX_RETRIES
+    assert status["failed"] == 1
+    assert [entry[3] for entry in index.values()] == [None]
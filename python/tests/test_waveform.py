@@ -0,0 +1,64 @@
+"""波形峰值金字塔：层级合并、按范围读取和层级选择"""
+import numpy as np
+import pytest
+
+from benchmarks.fixtures import make_wav
+from friday_core.config import Config
+from friday_listener.waveform import PEAK_SCALE, PeakBuilder, build_waveform, read_waveform
+
+
+@pytest.fixture
+def ramp_file(tmp_path):
+    # 1000 个样本、每对 10 个样本：第 0 层 100 对，逐层减半直到 1 对
+    samples = np.linspace(-1, 1, 1000, dtype=np.float32)
+    builder = PeakBuilder(samples_per_peak=10, sample_rate=100)
+    for block in np.array_split(samples, 7):
+        builder.feed(block)
+    path = tmp_path / "ramp.peaks"
+    builder.save(path)
+    return samples, builder, path
+
+
+def test_levels_merge_pairs(ramp_file):
+    samples, builder, _ = ramp_file
+    levels = builder.levels()
+    assert [len(level) for level in levels] == [100, 50, 25, 13, 7, 4, 2, 1]
+    # 分块送入与一次计算的第 0 层相同，包络不会被削薄
+    frames = samples.reshape(100, 10)
+    assert np.array_equal(levels[0][:, 0], np.floor(frames.min(axis=1) * PEAK_SCALE).astype(np.int8))
+    assert np.array_equal(levels[0][:, 1], np.ceil(frames.max(axis=1) * PEAK_SCALE).astype(np.int8))
+    assert levels[-1].tolist() == [[-PEAK_SCALE, PEAK_SCALE]]
+
+
+def test_read_range_and_level(ramp_file):
+    _, builder, path = ramp_file
+    levels = builder.levels()
+    data = read_waveform(path, start=2.0, end=4.0, level=1)
+    assert data["duration"] == 10.0 and data["levels"] == len(levels)
+    assert data["seconds_per_peak"] == 0.2
+    assert (data["start"], data["end"]) == (2.0, 4.0)
+    assert data["min"] == levels[1][10:20, 0].tolist()
+    assert data["max"] == levels[1][10:20, 1].tolist()
+
+    # 按宽度选择峰值对数不少于 width 的最粗层级
+    assert read_waveform(path, width=25)["level"] == 2
+    assert read_waveform(path, width=1000)["level"] == 0
+    with pytest.raises(ValueError):
+        read_waveform(path, level=len(levels))
+
+
+def test_too_many_peaks(ramp_file, monkeypatch):
+    _, _, path = ramp_file
+    monkeypatch.setattr(Config, "WAVEFORM_MAX_PEAKS", 10)
+    with pytest.raises(ValueError, match="Too many peaks"):
+        read_waveform(path, level=0)
+    assert len(read_waveform(path, level=4)["min"]) == 7
+
+
+def test_build_from_audio(tmp_path):
+    wav = make_wav(tmp_path / "a.wav", 3)
+    path = build_waveform(str(wav), tmp_path / "a.peaks")
+    data = read_waveform(path, level=0)
+    assert data["duration"] == pytest.approx(3.0, abs=0.01)
+    assert len(data["min"]) == -(-data["duration"] * data["sample_rate"] // Config.WAVEFORM_SAMPLES_PER_PEAK)
+    assert all(lo <= hi for lo, hi in zip(data["min"], data["max"]))
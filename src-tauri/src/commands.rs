@@ -22,6 +22,8 @@ pub struct Task {
     pub payload: serde_json::Value,
     pub result: Option<serde_json::Value>,
     pub error: Option<String>,
+    #[serde(default)]
+    pub metrics: Option<serde_json::Value>,
     pub created_at: String,
     pub updated_at: String,
 }
@@ -153,13 +155,28 @@ pub async fn update_settings(settings: Settings) -> Result<(), String> {
 
 #[tauri::command]
 pub async fn get_task_status(id: String) -> Result<Task, String> {
-    // TODO: 从任务队列获取任务状态
-    Err("Not implemented".to_string())
+    use crate::python_bridge;
+    let result = python_bridge::call_python("get_task_status", serde_json::json!({ "id": id }), None)
+        .await
+        .map_err(|e| e.to_string())?;
+    
+    serde_json::from_value(result.get("result").cloned().unwrap_or(serde_json::Value::Null))
+        .map_err(|e| format!("Failed to parse result: {}", e))
 }
 
 #[tauri::command]
 pub async fn list_tasks() -> Result<Vec<Task>, String> {
-    // TODO: 获取所有任务列表
-    Ok(vec![])
+    use crate::python_bridge;
+    let result = python_bridge::call_python("list_tasks", serde_json::json!({}), None)
+        .await
+        .map_err(|e| e.to_string())?;
+    
+    let tasks = result
+        .get("result")
+        .and_then(|r| r.get("tasks"))
+        .cloned()
+        .unwrap_or(serde_json::Value::Array(vec![]));
+    serde_json::from_value(tasks)
+        .map_err(|e| format!("Failed to parse result: {}", e))
 }
 
@@ -8,6 +8,11 @@ use commands::*;
 
 fn main() {
     tauri::Builder::default()
+        .setup(|_app| {
+            // 应用启动时拉起常驻 Python sidecar，之后所有命令共用这一个进程
+            python_bridge::start_sidecar();
+            Ok(())
+        })
         .invoke_handler(tauri::generate_handler![
             greet,
             parse_pdf,
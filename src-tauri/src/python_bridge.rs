@@ -1,32 +1,45 @@
 use serde_json::Value;
-use std::process::{Command, Stdio};
-use std::io::{Write, BufRead, BufReader};
+use std::collections::HashMap;
+use std::io::{BufRead, BufReader, Write};
+use std::process::{Child, ChildStdin, Command, Stdio};
+use std::sync::atomic::{AtomicBool, AtomicU64, Ordering};
+use std::sync::{Arc, Mutex};
 use std::thread;
+use tokio::sync::oneshot;
 
-pub async fn call_python(
-    cmd: &str, 
-    payload: Value,
-    window: Option<tauri::Window>,
-) -> Result<Value, Box<dyn std::error::Error>> {
-    // 构建 JSON RPC 请求
-    let request = serde_json::json!({
-        "cmd": cmd,
-        "payload": payload
-    });
+// 常驻 Python Sidecar（python main.py --server）：应用启动时拉起，所有命令共用一个进程。
+// 请求和响应都是一行 JSON 帧，按 id 匹配；进度事件以 {"event": "progress"} 帧输出在 stdout 上。
+// 进程意外退出后，下一次调用时重新拉起。
 
-    // 调用 Python Sidecar
+type Pending = Arc<Mutex<HashMap<u64, oneshot::Sender<Value>>>>;
+
+struct Sidecar {
+    child: Child,
+    stdin: ChildStdin,
+    pending: Pending,
+    alive: Arc<AtomicBool>,
+}
+
+static SIDECAR: Mutex<Option<Sidecar>> = Mutex::new(None);
+static NEXT_ID: AtomicU64 = AtomicU64::new(1);
+
+// 接收进度事件的窗口（最近一次传入窗口的调用）
+static PROGRESS_WINDOW: Mutex<Option<tauri::Window>> = Mutex::new(None);
+
+/// 查找 Python 解释器
+fn python_command() -> String {
     // 在 Windows 上，尝试使用 conda 环境中的 Python
-    let python_cmd = if cfg!(windows) {
+    if cfg!(windows) {
         // 策略1: 尝试从环境变量获取 conda Python 路径
         let mut python_path = None;
-        
+
         if let Ok(conda_prefix) = std::env::var("CONDA_PREFIX") {
             let path = format!("{}\\python.exe", conda_prefix);
             if std::path::Path::new(&path).exists() {
                 python_path = Some(path);
             }
         }
-        
+
         // 策略2: 尝试从 CONDA_DEFAULT_ENV 构建路径
         if python_path.is_none() {
             if let Ok(conda_default_env) = std::env::var("CONDA_DEFAULT_ENV") {
@@ -38,7 +51,7 @@ pub async fn call_python(
                 }
             }
         }
-        
+
         // 策略3: 尝试从 PATH 中查找 python.exe
         if python_path.is_none() {
             if let Ok(path_var) = std::env::var("PATH") {
@@ -51,24 +64,25 @@ pub async fn call_python(
                 }
             }
         }
-        
+
         // 策略4: 使用默认的 "python" 命令（依赖系统 PATH）
         python_path.unwrap_or_else(|| "python".to_string())
     } else {
         "python3".to_string()
-    };
-    
-    // 获取项目根目录（可能从 src-tauri 目录运行，需要向上查找）
+    }
+}
+
+/// 查找项目根目录和 python/main.py（可能从 src-tauri 目录运行，需要向上查找）
+fn find_python_script() -> Result<(std::path::PathBuf, std::path::PathBuf), String> {
     let mut project_root = std::env::current_dir()
         .unwrap_or_else(|_| std::path::PathBuf::from("."));
-    
-    // 如果当前在 src-tauri 目录，向上查找项目根目录
-    let python_script = loop {
+
+    loop {
         let test_path = project_root.join("python").join("main.py");
         if test_path.exists() {
-            break test_path;
+            return Ok((project_root, test_path));
         }
-        
+
         // 尝试向上查找
         if let Some(parent) = project_root.parent() {
             project_root = parent.to_path_buf();
@@ -79,12 +93,49 @@ pub async fn call_python(
                 "Python script not found. Searched in: {}\nExpected location: {}",
                 project_root.display(),
                 fallback.display()
-            ).into());
+            ));
         }
-    };
-    
+    }
+}
+
+/// 把 sidecar 的进度事件转发给窗口
+fn emit_progress(event: Value) {
+    let window = PROGRESS_WINDOW.lock().unwrap().clone();
+    if let Some(win) = window {
+        let _ = win.emit("pdf-progress", serde_json::json!({
+            "stage": event.get("stage").and_then(|s| s.as_str()).unwrap_or(""),
+            "progress": event.get("progress").and_then(|p| p.as_i64()).unwrap_or(0),
+            "message": event.get("message").and_then(|m| m.as_str()).unwrap_or("")
+        }));
+        // 完整事件（含 task_id、current/total、eta 等）供需要的页面订阅
+        let _ = win.emit("sidecar-progress", event);
+    }
+}
+
+/// 解析 stderr 上的进度行：PROGRESS:{json}（结构化事件）或旧格式 PROGRESS:stage:pct:msg
+fn parse_progress_line(rest: &str) -> Option<Value> {
+    if rest.starts_with('{') {
+        return serde_json::from_str::<Value>(rest).ok();
+    }
+    let parts: Vec<&str> = rest.splitn(3, ':').collect();
+    if parts.len() != 3 {
+        return None;
+    }
+    Some(serde_json::json!({
+        "stage": parts[0],
+        "progress": parts[1].parse::<i64>().unwrap_or(0),
+        "message": parts[2]
+    }))
+}
+
+/// 拉起常驻 sidecar，并启动读取 stdout（响应和进度帧）和 stderr（日志和进度行）的线程
+fn spawn_sidecar() -> Result<Sidecar, String> {
+    let python_cmd = python_command();
+    let (project_root, python_script) = find_python_script()?;
+
     let mut child = Command::new(&python_cmd)
         .arg(python_script.to_str().unwrap())
+        .arg("--server")
         .current_dir(&project_root)
         .stdin(Stdio::piped())
         .stdout(Stdio::piped())
@@ -94,89 +145,120 @@ pub async fn call_python(
             format!("Failed to spawn Python process with command '{}': {}\nHint: Make sure conda environment is activated and Python is in PATH", python_cmd, e)
         })?;
 
-    // 发送请求（确保使用 UTF-8 编码）
-    if let Some(stdin) = child.stdin.as_mut() {
-        let request_str = serde_json::to_string(&request)?;
-        stdin.write_all(request_str.as_bytes())?;
-        stdin.flush()?; // 确保数据被发送
-    }
+    let stdin = child.stdin.take().unwrap();
+    let stdout = child.stdout.take().unwrap();
+    let stderr = child.stderr.take().unwrap();
+    let pending: Pending = Arc::new(Mutex::new(HashMap::new()));
+    let alive = Arc::new(AtomicBool::new(true));
 
-    // 如果有窗口，启动进度监听线程（从 stderr 读取进度）
-    if let Some(win) = window.clone() {
-        let stderr = child.stderr.take().unwrap();
-        let reader = BufReader::new(stderr);
-        
+    {
+        let pending = pending.clone();
+        let alive = alive.clone();
         thread::spawn(move || {
-            for line in reader.lines() {
-                if let Ok(line) = line {
-                    // 检查是否是进度信息
-                    if line.starts_with("PROGRESS:") {
-                        let parts: Vec<&str> = line.strip_prefix("PROGRESS:").unwrap().splitn(3, ':').collect();
-                        if parts.len() == 3 {
-                            let stage = parts[0];
-                            let progress = parts[1].parse::<i32>().unwrap_or(0);
-                            let message = parts[2];
-                            
-                            let _ = win.emit("pdf-progress", serde_json::json!({
-                                "stage": stage,
-                                "progress": progress,
-                                "message": message
-                            }));
-                        }
+            for line in BufReader::new(stdout).lines() {
+                let Ok(line) = line else { break };
+                let Ok(frame) = serde_json::from_str::<Value>(&line) else {
+                    eprintln!("[sidecar] unexpected output: {}", line);
+                    continue;
+                };
+                if frame.get("event").and_then(|e| e.as_str()) == Some("progress") {
+                    emit_progress(frame.get("data").cloned().unwrap_or(Value::Null));
+                    continue;
+                }
+                if let Some(id) = frame.get("id").and_then(|id| id.as_u64()) {
+                    if let Some(sender) = pending.lock().unwrap().remove(&id) {
+                        let _ = sender.send(frame);
                     }
                 }
             }
+            // stdout 关闭说明进程已退出：丢弃等待中的请求，调用方收到错误
+            alive.store(false, Ordering::SeqCst);
+            pending.lock().unwrap().clear();
         });
     }
 
-    // 等待响应
-    let output = child.wait_with_output()?;
-    
-    // 解析响应（stdout 只包含 JSON）
-    let response_str = String::from_utf8_lossy(&output.stdout);
-    
-    // 先尝试解析 JSON 响应（即使进程失败，也可能有错误 JSON）
-    if let Ok(response) = serde_json::from_str::<Value>(&response_str) {
-        // 检查响应中是否有错误
-        if let Some(error_msg) = response.get("error").and_then(|e| e.as_str()) {
-            return Err(format!("Python error: {}", error_msg).into());
+    // stderr 上是日志和尚未改用进度通道的 PROGRESS 行，持续读取避免管道写满阻塞 sidecar
+    thread::spawn(move || {
+        for line in BufReader::new(stderr).lines() {
+            let Ok(line) = line else { break };
+            match line.strip_prefix("PROGRESS:").and_then(parse_progress_line) {
+                Some(event) => emit_progress(event),
+                None => eprintln!("[sidecar] {}", line),
+            }
         }
-        
-        if !output.status.success() {
-            let stderr = String::from_utf8_lossy(&output.stderr);
-            return Err(format!("Python process failed: {}\nStderr: {}", response_str, stderr).into());
+    });
+
+    Ok(Sidecar { child, stdin, pending, alive })
+}
+
+/// 应用启动时拉起常驻 sidecar（失败时只记录，首次调用时会再次尝试）
+pub fn start_sidecar() {
+    let mut sidecar = SIDECAR.lock().unwrap();
+    if sidecar.is_none() {
+        match spawn_sidecar() {
+            Ok(started) => *sidecar = Some(started),
+            Err(e) => eprintln!("Failed to start Python sidecar: {}", e),
         }
-        
-        return Ok(response);
     }
-    
-    // 如果 JSON 解析失败，检查进程状态
-    if !output.status.success() {
-        let stderr = String::from_utf8_lossy(&output.stderr);
-        let stdout = response_str.to_string();
-        let exit_code = output.status.code().unwrap_or(-1);
-        
-        // 提供更友好的错误信息
-        let mut error_msg = format!("Python 进程退出，代码: {}\n", exit_code);
-        
-        if !stdout.is_empty() {
-            error_msg.push_str(&format!("标准输出: {}\n", stdout));
-        }
-        if !stderr.is_empty() {
-            error_msg.push_str(&format!("错误输出: {}\n", stderr));
-        }
-        
-        // 根据退出代码提供建议
-        match exit_code {
-            2 => error_msg.push_str("\n提示: 可能的原因：\n1. Python 命令未找到（请确保 conda 环境已激活）\n2. Python 脚本路径错误\n3. 缺少必要的 Python 依赖"),
-            _ => error_msg.push_str("\n提示: 请检查 Python 脚本和依赖是否正确安装"),
+}
+
+/// 发送一帧请求，返回等待响应的接收端
+fn send_request(id: u64, request: &Value) -> Result<oneshot::Receiver<Value>, String> {
+    let mut guard = SIDECAR.lock().unwrap();
+
+    // 进程已退出时回收并重新拉起
+    if let Some(sidecar) = guard.as_mut() {
+        if !sidecar.alive.load(Ordering::SeqCst) {
+            let _ = sidecar.child.wait();
+            *guard = None;
         }
-        
-        return Err(error_msg.into());
     }
+    if guard.is_none() {
+        *guard = Some(spawn_sidecar()?);
+    }
+    let sidecar = guard.as_mut().unwrap();
+
+    let (sender, receiver) = oneshot::channel();
+    sidecar.pending.lock().unwrap().insert(id, sender);
 
-    // 如果进程成功但 JSON 解析失败
-    Err(format!("Failed to parse Python response as JSON: {}", response_str).into())
+    // 一帧一行（确保使用 UTF-8 编码）
+    let mut line = serde_json::to_string(request).map_err(|e| e.to_string())?;
+    line.push('\n');
+    let written = sidecar.stdin.write_all(line.as_bytes()).and_then(|_| sidecar.stdin.flush());
+    if let Err(e) = written {
+        sidecar.pending.lock().unwrap().remove(&id);
+        sidecar.alive.store(false, Ordering::SeqCst);
+        return Err(format!("Failed to send request to Python sidecar: {}", e));
+    }
+    Ok(receiver)
 }
 
+pub async fn call_python(
+    cmd: &str,
+    payload: Value,
+    window: Option<tauri::Window>,
+) -> Result<Value, Box<dyn std::error::Error>> {
+    if let Some(win) = window {
+        *PROGRESS_WINDOW.lock().unwrap() = Some(win);
+    }
 
+    // 构建 JSON RPC 请求帧
+    let id = NEXT_ID.fetch_add(1, Ordering::SeqCst);
+    let request = serde_json::json!({
+        "id": id,
+        "cmd": cmd,
+        "payload": payload
+    });
+
+    let receiver = send_request(id, &request)?;
+    let response = receiver
+        .await
+        .map_err(|_| "Python 进程退出，未返回响应\n提示: 请检查 Python 脚本和依赖是否正确安装（详见 sidecar 错误输出）")?;
+
+    // 检查响应中是否有错误
+    if let Some(error_msg) = response.get("error").and_then(|e| e.as_str()) {
+        return Err(format!("Python error: {}", error_msg).into());
+    }
+
+    Ok(response)
+}
@@ -9,7 +9,7 @@ export default function Watcher() {
 
   const handleProcess = async () => {
     if (!url.trim()) {
-      alert("请输入视频链接");
+      alert("请输入字幕文件路径");
       return;
     }
 
@@ -29,19 +29,19 @@ export default function Watcher() {
     <div className="p-8">
       <div className="mb-6">
         <h1 className="text-3xl font-bold text-gray-900 mb-2">视频处理</h1>
-        <p className="text-gray-600">输入 YouTube 或 Bilibili 链接，获取字幕和总结</p>
+        <p className="text-gray-600">导入本地字幕（SRT / VTT）或 yt-dlp 下载的 .info.json，生成总结和关键片段</p>
       </div>
 
       <div className="bg-white rounded-lg border border-gray-200 p-8">
         <div className="mb-4">
           <label className="block text-sm font-medium text-gray-700 mb-2">
-            视频链接
+            字幕或元数据文件路径
           </label>
           <input
             type="text"
             value={url}
             onChange={(e) => setUrl(e.target.value)}
-            placeholder="https://www.youtube.com/watch?v=..."
+            placeholder="/path/to/video.info.json"
             className="w-full px-4 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-transparent"
             disabled={loading}
           />